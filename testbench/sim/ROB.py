@@ -32,8 +32,35 @@ class RobRegisterBase():
         self.avaliable_phy_reg.append(self.map[reg])
         self.map[reg] = phy_reg
 
+    # 提交时释放旧映射，冲刷时回滚
+    def rename(self, reg: int) -> tuple[int, int]:
+        new = self.next_rat()
+        old = self.map[reg]
+        self.map[reg] = new
+        self.set_busy(new)
+        return new, old
+
+    def release(self, phy_reg: int):
+        self.avaliable_phy_reg.append(phy_reg)
+
+    def rollback(self, reg: int, new: int, old: int):
+        self.map[reg] = old
+        self.release_busy(new)
+        self.release(new)
+
 class RobGPR(RobRegisterBase):
-    
+    def __init__(self, open_reg = 32, phy_reg = 128):
+        super().__init__(open_reg, phy_reg, zero=True)
+
+    def read(self, phy_reg: int) -> int:
+        if phy_reg == 0 and self.zero:
+            return 0
+        return self.mem[phy_reg]
+
+    def write(self, phy_reg: int, data: int):
+        if phy_reg == 0 and self.zero:
+            return
+        self.mem[phy_reg] = data
 
 class RobRegisterGroup():
     pass
\ No newline at end of file
@@ -0,0 +1,261 @@
+# 主机侧性能基准与回归门限
+#
+# 每项指标都是速率 (越大越好)，重复 repeat 次取最好的一次:
+#   readmemh       testbench/binary/*.mem 的读入速度 (行/秒)
+#   decode32       DecodeBlock 译码 32 位指令 (条/秒)，指令流由 instgen 按固定种子生成
+#   decode16       同上，只有 RVC
+#   alu / mdu      ops.alu.update / ops.MDU._process 逐条执行 (次/秒)，操作数取自 golden.operands
+#   sim.<image>    Simulator 在 main.mem / CNN.mem 上的模拟速度 (周期/秒)
+#
+# 另外测一个纯 Python 参考循环；比较时各指标先除以参考循环的速率，
+# 消除机器本身快慢的影响，只反映代码相对解释器的快慢
+# 结果写成 JSON；与基线 (缺省为本目录的 bench_baseline.json) 比较，
+# 任何指标低于基线的 (1 - threshold) 倍时返回非 0
+# 主机、repeat 或 scale 与基线不同时速率不可比，只打印警告不判回归；
+# --only 与 --save 同用时只更新所选指标，其余指标保留，此时主机/参数不同则拒绝写入
+#
+#   python -m sim.bench                    # 与基线比较
+#   python -m sim.bench --save             # 更新基线
+#   python -m sim.bench --only alu --save  # 只更新 alu
+#   python -m sim.bench --only decode32,alu --threshold 0.3
+
+import argparse, json, os, platform, sys, time
+import numpy as np
+from .util import readmemh
+from .decode import DecodeBlock
+from .instr_unit import *
+from .ops import alu, MDU
+from .sim_code import Simulator
+from . import golden, instgen
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+BASELINE = os.path.join(HERE, 'bench_baseline.json')
+IMAGES = {'main': os.path.join(HERE, '..', 'binary', 'main.mem'),
+          'CNN': os.path.join(HERE, '..', 'binary', 'CNN.mem')}
+
+
+def _timed(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+############
+# 各项指标 #
+############
+def bench_readmemh(scale: float) -> tuple[int, float]:
+    """
+    (行数, 秒)
+    """
+    rounds = max(1, int(20 * scale))
+    lines = 0
+    for path in IMAGES.values():
+        with open(path) as f:
+            lines += sum(1 for _ in f)
+    def run():
+        for _ in range(rounds):
+            for path in IMAGES.values():
+                readmemh(path)
+    return lines * rounds, _timed(run)
+
+def _decode(weights: dict[str, float], scale: float) -> tuple[int, float]:
+    words = instgen.generate(max(1, int(50_000 * scale)), weights, seed=1)['word'].tolist()
+    decoder = DecodeBlock()
+    def run():
+        for w in words:
+            try:
+                decoder.decode_to_human(w, 0, 0)
+            except NotImplementedError:
+                pass
+    return len(words), _timed(run)
+
+def bench_decode32(scale: float) -> tuple[int, float]:
+    return _decode({c: (0 if c == 'C' else w) for c, w in instgen.WEIGHTS.items()}, scale)
+
+def bench_decode16(scale: float) -> tuple[int, float]:
+    return _decode({c: (1 if c == 'C' else 0) for c in instgen.CLASSES}, scale)
+
+def _operands(n: int) -> list[tuple[int, int]]:
+    rng = np.random.default_rng(1)
+    return list(zip(golden.operands(n, rng).tolist(), golden.operands(n, rng).tolist()))
+
+def bench_alu(scale: float) -> tuple[int, float]:
+    n = max(1, int(100_000 * scale))
+    ops = list(golden.ALU_OPS.values())
+    pairs = _operands(n)
+    instrs = []
+    for op in ops:
+        instr = InstrUnit()
+        instr.alu, instr.op = ExecType.ALU, op
+        instr.mux_A, instr.mux_B = AluPortAType.RS1, AluPortBType.RS2
+        instrs.append(instr)
+    unit = alu()
+    def run():
+        for k, (a, b) in enumerate(pairs):
+            instr = instrs[k % len(instrs)]
+            instr.value.rs1, instr.value.rs2 = a, b
+            unit.set_instr(instr)
+            unit.update()
+    return n, _timed(run)
+
+def bench_mdu(scale: float) -> tuple[int, float]:
+    n = max(1, int(100_000 * scale))
+    pairs = _operands(n)
+    instrs = []
+    for op in golden.MDU_OPS.values():
+        instr = InstrUnit()
+        instr.alu, instr.op = ExecType.MDU, op
+        instrs.append(instr)
+    unit = MDU()
+    def run():
+        for k, (a, b) in enumerate(pairs):
+            instr = instrs[k % len(instrs)]
+            instr.value.rs1, instr.value.rs2 = a, b
+            unit._process(instr)
+    return n, _timed(run)
+
+def _bench_sim(path: str):
+    def bench(scale: float) -> tuple[int, float]:
+        mem = readmemh(path)
+        sim = Simulator(mem)
+        seconds = _timed(lambda: sim.run_until(cycle=max(1, int(20_000 * scale))))
+        return sim.cycle, seconds
+    return bench
+
+def bench_reference(scale: float) -> tuple[int, float]:
+    """
+    整数运算、dict 和 list 存取混合的固定循环，用于归一化
+    """
+    n = max(1, int(200_000 * scale))
+    def run():
+        table, regs, acc = {}, [0] * 32, 0
+        for i in range(n):
+            acc = (acc * 31 + i) & 0xffffffff
+            table[acc & 0xff] = regs[i & 31]
+            regs[(i + 1) & 31] = acc >> 3
+    return n, _timed(run)
+
+METRICS = {
+    'readmemh': ('lines/s', bench_readmemh),
+    'decode32': ('instr/s', bench_decode32),
+    'decode16': ('instr/s', bench_decode16),
+    'alu': ('ops/s', bench_alu),
+    'mdu': ('ops/s', bench_mdu),
+    **{f'sim.{name}': ('cycles/s', _bench_sim(path)) for name, path in IMAGES.items()},
+}
+
+def _rate(fn, scale: float) -> float:
+    work, seconds = fn(scale)
+    return work / max(seconds, 1e-9)
+
+def run(names: list[str] | None = None, repeat: int = 3, scale: float = 1.0) -> dict:
+    """
+    {'host': ..., 'reference': 参考循环速率, 'metrics': {指标: {'rate', 'unit'}}}，每项取 repeat 次中最快的一次
+    参考循环在每次测量前各跑一次，取全程最快的一次
+    """
+    metrics = {}
+    reference = 0.0
+    for name in names if names is not None else METRICS:
+        unit, fn = METRICS[name]
+        best = 0.0
+        for _ in range(repeat):
+            reference = max(reference, _rate(bench_reference, scale))
+            best = max(best, _rate(fn, scale))
+        metrics[name] = {'rate': round(best, 1), 'unit': unit}
+    host = {'python': platform.python_version(), 'numpy': np.__version__, 'machine': platform.machine(),
+            'system': platform.system(), 'processor': platform.processor()}
+    return {'host': host, 'repeat': repeat, 'scale': scale, 'reference': round(reference, 1), 'metrics': metrics}
+
+def mismatch(result: dict, baseline: dict) -> list[str]:
+    """
+    与基线测量条件不同的字段 (host 的子项、repeat、scale)
+    """
+    diff = [f'host.{k}' for k in sorted(set(result['host']) | set(baseline.get('host', {})))
+            if result['host'].get(k) != baseline.get('host', {}).get(k)]
+    return diff + [k for k in ('repeat', 'scale') if result.get(k) != baseline.get(k)]
+
+def merge(result: dict, baseline: dict) -> dict:
+    """
+    用 result 中的指标替换 baseline 中的同名指标，保持 METRICS 的顺序
+    新指标按两次运行参考循环速率之比换算到基线的参考速率下，保留基线的参考速率
+    """
+    factor = baseline['reference'] / result['reference'] if baseline.get('reference') else 1.0
+    new = {n: {**m, 'rate': round(m['rate'] * factor, 1)} for n, m in result['metrics'].items()}
+    metrics = {**baseline.get('metrics', {}), **new}
+    order = [n for n in METRICS if n in metrics] + [n for n in metrics if n not in METRICS]
+    return {**result, 'reference': baseline.get('reference', result['reference']),
+            'metrics': {n: metrics[n] for n in order}}
+
+def compare(result: dict, baseline: dict, threshold: float) -> list[tuple[str, float, float, float, bool]]:
+    """
+    [(指标, 当前, 基线, 比值, 是否回归)]，基线中没有的指标不比较
+    比值按参考循环速率归一化 (基线没有参考速率时比较绝对速率)
+    """
+    scale = baseline['reference'] / result['reference'] if baseline.get('reference') else 1.0
+    rows = []
+    for name, m in result['metrics'].items():
+        base = baseline.get('metrics', {}).get(name)
+        if base is None:
+            continue
+        ratio = m['rate'] * scale / base['rate'] if base['rate'] else float('inf')
+        rows.append((name, m['rate'], base['rate'], ratio, ratio < 1 - threshold))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Host-side throughput benchmarks with regression gating")
+    parser.add_argument('--baseline', default=BASELINE, help="baseline JSON")
+    parser.add_argument('--save', action='store_true', help="write the results as the new baseline")
+    parser.add_argument('--threshold', type=float, default=0.2, help="allowed slowdown fraction")
+    parser.add_argument('--only', default=None, help=f"comma-separated metrics: {', '.join(METRICS)}")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--scale', type=float, default=1.0, help="work per run relative to the default")
+    parser.add_argument('-o', '--output', default=None, help="also write this run's results as JSON")
+    args = parser.parse_args(argv)
+
+    names = None
+    if args.only:
+        names = [s.strip() for s in args.only.split(',')]
+        unknown = [s for s in names if s not in METRICS]
+        if unknown:
+            parser.error(f"unknown metrics {unknown}, expected {', '.join(METRICS)}")
+    result = run(names, args.repeat, args.scale)
+    baseline = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+    differs = mismatch(result, baseline) if baseline is not None else []
+
+    saved = result
+    if args.save and names is not None and baseline is not None:
+        if differs:
+            print(f"not saving: baseline was measured with different {', '.join(differs)}; "
+                  f"rerun all metrics with --save to replace it", file=sys.stderr)
+            return 1
+        saved = merge(result, baseline)
+    for path, data in ([(args.output, result)] if args.output else []) + ([(args.baseline, saved)] if args.save else []):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2)
+            f.write('\n')
+    if args.save or baseline is None:
+        for name, m in result['metrics'].items():
+            print(f"{name:12} {m['rate']:>14,.0f} {m['unit']}")
+        if not args.save:
+            print(f"no baseline at {args.baseline}, run with --save to create one", file=sys.stderr)
+        return 0
+    rows = compare(result, baseline, args.threshold)
+    for name, rate, base, ratio, regressed in rows:
+        print(f"{name:12} {rate:>14,.0f} {result['metrics'][name]['unit']:9} baseline {base:>14,.0f} "
+              f"x{ratio:5.2f}{'  REGRESSION' if regressed else ''}")
+    failed = [r[0] for r in rows if r[4]]
+    if differs:
+        print(f"warning: baseline was measured with different {', '.join(differs)}, "
+              f"not gating on regressions", file=sys.stderr)
+        return 0
+    if failed:
+        print(f"regressed past {args.threshold:.0%}: {', '.join(failed)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
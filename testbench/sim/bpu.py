@@ -0,0 +1,514 @@
+# Branch Prediction Unit 分支预测
+#
+# 方向预测器 (bimodal / gshare / TAGE) + BTB + RAS
+# 预测在取指时进行，解析(resolve)时修复推测状态，提交(commit)时训练表项
+
+import numpy as np
+from enum import Enum, auto
+from .instr_unit import *
+
+# RISC-V 约定的链接寄存器 (ra / t0)
+LINK_REGS = (1, 5)
+
+
+class BranchKind(Enum):
+    NONE = -1
+    COND = auto()   # BEQ/BNE/... c.beqz/c.bnez
+    JAL = auto()    # 直接跳转
+    JALR = auto()   # 间接跳转
+    CALL = auto()   # jal/jalr, rd = x1/x5
+    RET = auto()    # jalr, rs1 = x1/x5, rd != link
+
+
+def _check_pow2(n: int, name: str):
+    if n <= 0 or n & (n - 1):
+        raise ValueError(f"BPU: {name} must be a power of 2")
+
+
+def _fold(value: int, length: int, bits: int) -> int:
+    """
+    将 length 位历史折叠为 bits 位 (异或折叠)
+    """
+    value &= (1 << length) - 1
+    out = 0
+    m = (1 << bits) - 1
+    while value:
+        out ^= value & m
+        value >>= bits
+    return out
+
+
+def classify(instr: InstrUnit) -> BranchKind:
+    """
+    根据译码结果判断控制流类型
+    """
+    if instr.alu == ExecType.BRANCH:
+        return BranchKind.COND
+    if not instr.pc_effect.valid:
+        return BranchKind.NONE
+    rd = instr.dataflow.rd
+    if instr.pc_effect.mux_A == PCEffectPortAType.PC:
+        return BranchKind.CALL if rd in LINK_REGS else BranchKind.JAL
+    rs1 = instr.dataflow.rs1
+    if rd in LINK_REGS:
+        return BranchKind.CALL
+    if rs1 in LINK_REGS:
+        return BranchKind.RET
+    return BranchKind.JALR
+
+
+# ---------------------------
+# Direction predictors
+# ---------------------------
+
+class DirectionPredictor():
+    '''
+    方向预测器基类
+    predict 返回 (taken, meta)，meta 原样交还给 update
+    '''
+    name = 'base'
+
+    def __init__(self):
+        self.lookups = 0
+        self.mispredicts = 0
+
+    def predict(self, pc: int, ghr: int) -> tuple[bool, object]:
+        raise NotImplementedError("BPU: Method not implemented")
+
+    def update(self, pc: int, ghr: int, taken: bool, meta: object) -> None:
+        raise NotImplementedError("BPU: Method not implemented")
+
+    def accuracy(self) -> float:
+        if self.lookups == 0:
+            return 0.0
+        return 1.0 - self.mispredicts / self.lookups
+
+
+class Bimodal(DirectionPredictor):
+    '''
+    2-bit 饱和计数器表，按 PC 索引
+    '''
+    name = 'bimodal'
+
+    def __init__(self, entries: int = 4096):
+        super().__init__()
+        _check_pow2(entries, 'entries')
+        self.mask = entries - 1
+        self.table = np.full(entries, 1, dtype=np.uint8)
+
+    def predict(self, pc: int, ghr: int) -> tuple[bool, object]:
+        index = (pc >> 1) & self.mask
+        return bool(self.table[index] >= 2), index
+
+    def update(self, pc: int, ghr: int, taken: bool, meta: object) -> None:
+        c = self.table[meta]
+        if taken:
+            if c < 3:
+                self.table[meta] = c + 1
+        elif c > 0:
+            self.table[meta] = c - 1
+
+
+class Gshare(Bimodal):
+    '''
+    全局历史异或 PC 索引的 2-bit 计数器表
+    '''
+    name = 'gshare'
+
+    def __init__(self, entries: int = 4096, history: int = 12):
+        super().__init__(entries)
+        self.history = history
+
+    def predict(self, pc: int, ghr: int) -> tuple[bool, object]:
+        h = ghr & ((1 << self.history) - 1)
+        index = ((pc >> 1) ^ h) & self.mask
+        return bool(self.table[index] >= 2), index
+
+
+class Tage(DirectionPredictor):
+    '''
+    简化 TAGE: bimodal 基础表 + 若干几何历史长度的带 tag 表
+    计数器 3-bit (0..7, >=4 跳转)，useful 2-bit
+    '''
+    name = 'tage'
+
+    def __init__(self, base_entries: int = 4096, entries: int = 1024,
+                 histories: tuple = (5, 15, 44, 130), tag_bits: int = 9,
+                 reset_period: int = 1 << 18):
+        super().__init__()
+        _check_pow2(entries, 'entries')
+        self.base = Bimodal(base_entries)
+        self.histories = tuple(histories)
+        self.index_bits = entries.bit_length() - 1
+        self.tag_bits = tag_bits
+        self.mask = entries - 1
+        n = len(self.histories)
+        self.tag = np.zeros((n, entries), dtype=np.uint16)
+        self.ctr = np.full((n, entries), 4, dtype=np.uint8)
+        self.useful = np.zeros((n, entries), dtype=np.uint8)
+        self.valid = np.zeros((n, entries), dtype=bool)
+        self.reset_period = reset_period
+        self.updates = 0
+
+    def _hash(self, pc: int, ghr: int):
+        p = pc >> 1
+        idx = []
+        tag = []
+        for h in self.histories:
+            idx.append((p ^ (p >> self.index_bits) ^ _fold(ghr, h, self.index_bits)) & self.mask)
+            t = p ^ _fold(ghr, h, self.tag_bits) ^ (_fold(ghr, h, self.tag_bits - 1) << 1)
+            tag.append(t & ((1 << self.tag_bits) - 1))
+        return idx, tag
+
+    def predict(self, pc: int, ghr: int) -> tuple[bool, object]:
+        idx, tag = self._hash(pc, ghr)
+        base_taken, base_meta = self.base.predict(pc, ghr)
+        provider = -1
+        alt = -1
+        for t in range(len(self.histories) - 1, -1, -1):
+            if self.valid[t, idx[t]] and self.tag[t, idx[t]] == tag[t]:
+                if provider < 0:
+                    provider = t
+                else:
+                    alt = t
+                    break
+        alt_taken = base_taken if alt < 0 else bool(self.ctr[alt, idx[alt]] >= 4)
+        taken = alt_taken if provider < 0 else bool(self.ctr[provider, idx[provider]] >= 4)
+        return taken, (idx, tag, provider, taken, alt_taken, base_meta)
+
+    def update(self, pc: int, ghr: int, taken: bool, meta: object) -> None:
+        idx, tag, provider, pred, alt_taken, base_meta = meta
+        n = len(self.histories)
+
+        if provider >= 0:
+            i = idx[provider]
+            c = self.ctr[provider, i]
+            if taken and c < 7:
+                self.ctr[provider, i] = c + 1
+            elif not taken and c > 0:
+                self.ctr[provider, i] = c - 1
+            if pred != alt_taken:
+                u = self.useful[provider, i]
+                if pred == taken and u < 3:
+                    self.useful[provider, i] = u + 1
+                elif pred != taken and u > 0:
+                    self.useful[provider, i] = u - 1
+        else:
+            self.base.update(pc, ghr, taken, base_meta)
+
+        # 预测错误时在更长历史的表中分配新表项
+        if pred != taken and provider < n - 1:
+            allocated = False
+            for t in range(provider + 1, n):
+                i = idx[t]
+                if not self.valid[t, i] or self.useful[t, i] == 0:
+                    self.valid[t, i] = True
+                    self.tag[t, i] = tag[t]
+                    self.ctr[t, i] = 4 if taken else 3
+                    self.useful[t, i] = 0
+                    allocated = True
+                    break
+            if not allocated:
+                for t in range(provider + 1, n):
+                    i = idx[t]
+                    if self.useful[t, i] > 0:
+                        self.useful[t, i] -= 1
+
+        self.updates += 1
+        if self.updates % self.reset_period == 0:
+            self.useful >>= 1
+
+
+PREDICTORS = {
+    'bimodal': Bimodal,
+    'gshare': Gshare,
+    'tage': Tage,
+}
+
+
+def make_predictor(name: str, **kwargs) -> DirectionPredictor:
+    if name not in PREDICTORS:
+        raise ValueError(f"BPU: unknown predictor {name}")
+    return PREDICTORS[name](**kwargs)
+
+
+# ---------------------------
+# BTB / RAS
+# ---------------------------
+
+class BTB():
+    '''
+    组相联 Branch Target Buffer，LRU 替换
+    只保存间接跳转 (jalr) 的目标；条件分支和 jal 的目标在译码时由 pc + offset 得到
+    '''
+    def __init__(self, sets: int = 512, ways: int = 4):
+        _check_pow2(sets, 'sets')
+        self.sets = sets
+        self.ways = ways
+        self.set_bits = sets.bit_length() - 1
+        self.tag = np.zeros((sets, ways), dtype=np.int64)
+        self.target = np.zeros((sets, ways), dtype=np.int64)
+        self.valid = np.zeros((sets, ways), dtype=bool)
+        self.lru = np.zeros((sets, ways), dtype=np.uint64)
+        self.clock = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _locate(self, pc: int):
+        p = pc >> 1
+        return p & (self.sets - 1), p >> self.set_bits
+
+    def _find(self, s: int, tag: int) -> int:
+        for w in range(self.ways):
+            if self.valid[s, w] and self.tag[s, w] == tag:
+                return w
+        return -1
+
+    def lookup(self, pc: int) -> int | None:
+        s, tag = self._locate(pc)
+        w = self._find(s, tag)
+        self.clock += 1
+        if w < 0:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.lru[s, w] = self.clock
+        return int(self.target[s, w])
+
+    def update(self, pc: int, target: int) -> None:
+        s, tag = self._locate(pc)
+        w = self._find(s, tag)
+        if w < 0:
+            empty = np.flatnonzero(~self.valid[s])
+            w = int(empty[0]) if len(empty) else int(np.argmin(self.lru[s]))
+        self.clock += 1
+        self.valid[s, w] = True
+        self.tag[s, w] = tag
+        self.target[s, w] = target
+        self.lru[s, w] = self.clock
+
+
+class RAS():
+    '''
+    循环返回地址栈，溢出时覆盖最旧项
+    '''
+    def __init__(self, depth: int = 16):
+        self.depth = depth
+        self.stack = [0] * depth
+        self.top = 0    # 下一个写入位置
+        self.count = 0
+        self.overflows = 0
+
+    def push(self, addr: int) -> None:
+        self.stack[self.top] = addr
+        self.top = (self.top + 1) % self.depth
+        if self.count == self.depth:
+            self.overflows += 1
+        else:
+            self.count += 1
+
+    def pop(self) -> int | None:
+        if self.count == 0:
+            return None
+        self.top = (self.top - 1) % self.depth
+        self.count -= 1
+        return self.stack[self.top]
+
+    def snapshot(self) -> tuple:
+        return self.top, self.count, self.stack[(self.top - 1) % self.depth]
+
+    def restore(self, snap: tuple) -> None:
+        self.top, self.count, value = snap
+        self.stack[(self.top - 1) % self.depth] = value
+
+
+# ---------------------------
+# BPU
+# ---------------------------
+
+class Prediction():
+    '''
+    单条控制流指令的预测记录，随指令进入流水线
+    '''
+    pc: int = -1
+    kind: BranchKind = BranchKind.NONE
+    taken: bool = False
+    target: int = -1
+    next_pc: int = -1
+    fall: int = -1
+    ghr: int = 0
+    ras: tuple = None
+    ras_pop: bool = False
+    indirect: bool = False  # jalr: 目标来自 RAS / BTB
+    meta: object = None
+
+    def mispredicted(self, taken: bool, target: int) -> bool:
+        if taken != self.taken:
+            return True
+        return taken and target != self.target
+
+
+class BranchPredictUnit():
+    '''
+    前端分支预测
+      predict(pc, instr, size) 取指时调用
+      recover(pred, taken, target) 解析时调用，预测错误时修复 GHR/RAS
+      update(pred, taken, target) 提交时调用，训练表项并统计
+    '''
+    def __init__(self, predictor: str | DirectionPredictor = 'gshare',
+                 btb_sets: int = 512, btb_ways: int = 4, ras_depth: int = 16,
+                 history: int = 256, **kwargs):
+        if isinstance(predictor, str):
+            predictor = make_predictor(predictor, **kwargs)
+        self.dir = predictor
+        self.btb = BTB(btb_sets, btb_ways)
+        self.ras = RAS(ras_depth)
+        self.history_mask = (1 << history) - 1
+        self.ghr = 0
+
+        self.branches = 0
+        self.cond = 0
+        self.cond_mispredicts = 0
+        self.target_mispredicts = 0
+        self.ras_mispredicts = 0
+        self.returns = 0
+
+    def _push_history(self, ghr: int, taken: bool) -> int:
+        return ((ghr << 1) | int(taken)) & self.history_mask
+
+    def predict(self, pc: int, instr: InstrUnit, size: int = 4) -> Prediction:
+        pred = Prediction()
+        pred.pc = pc
+        pred.kind = classify(instr)
+        pred.ghr = self.ghr
+        pred.ras = self.ras.snapshot()
+        fall = pc + size
+        pred.fall = fall
+
+        kind = pred.kind
+        if kind == BranchKind.NONE:
+            pred.next_pc = fall
+            return pred
+
+        if kind == BranchKind.COND:
+            pred.taken, pred.meta = self.dir.predict(pc, self.ghr)
+            pred.target = pc + instr.dataflow.offset
+            self.ghr = self._push_history(self.ghr, pred.taken)
+        elif instr.pc_effect.mux_A == PCEffectPortAType.PC:
+            # jal / c.j: 目标在译码时已知
+            pred.taken = True
+            pred.target = pc + instr.dataflow.offset
+        else:
+            pred.taken = True
+            pred.indirect = True
+            target = None
+            if kind == BranchKind.RET:
+                target = self.ras.pop()
+            elif kind == BranchKind.CALL and instr.dataflow.rs1 in LINK_REGS \
+                    and instr.dataflow.rs1 != instr.dataflow.rd:
+                # rd, rs1 均为链接寄存器且不同: 先 pop 再 push
+                self.ras.pop()
+                pred.ras_pop = True
+            if target is None:
+                target = self.btb.lookup(pc)
+            pred.target = fall if target is None else target
+
+        if kind == BranchKind.CALL:
+            self.ras.push(fall)
+
+        pred.next_pc = pred.target if pred.taken else fall
+        return pred
+
+    def recover(self, pred: Prediction, taken: bool, target: int) -> bool:
+        if not pred.mispredicted(taken, target):
+            return False
+        # 错误路径上的推测状态全部作废
+        self.ras.restore(pred.ras)
+        if pred.kind == BranchKind.COND:
+            self.ghr = self._push_history(pred.ghr, taken)
+        else:
+            self.ghr = pred.ghr
+        if pred.kind == BranchKind.RET or pred.ras_pop:
+            self.ras.pop()
+        if pred.kind == BranchKind.CALL:
+            self.ras.push(pred.fall)
+        return True
+
+    def restore(self, pred: Prediction) -> None:
+        """
+        冲刷到 pred 所属指令 (含) 时，恢复其预测前的 GHR/RAS
+        """
+        self.ghr = pred.ghr
+        self.ras.restore(pred.ras)
+
+    def update(self, pred: Prediction, taken: bool, target: int) -> bool:
+        if pred.kind == BranchKind.NONE:
+            return False
+        miss = pred.mispredicted(taken, target)
+        self.branches += 1
+        if pred.kind == BranchKind.COND:
+            self.cond += 1
+            self.dir.lookups += 1
+            if taken != pred.taken:
+                self.cond_mispredicts += 1
+                self.dir.mispredicts += 1
+            self.dir.update(pred.pc, pred.ghr, taken, pred.meta)
+        elif miss:
+            self.target_mispredicts += 1
+            if pred.kind == BranchKind.RET:
+                self.ras_mispredicts += 1
+        if pred.kind == BranchKind.RET:
+            self.returns += 1
+        # 条件分支与 jal 的目标由译码给出，BTB 只保存间接跳转的目标
+        if taken and pred.indirect:
+            self.btb.update(pred.pc, target)
+        return miss
+
+    @property
+    def mispredicts(self) -> int:
+        return self.cond_mispredicts + self.target_mispredicts
+
+    def stats(self, instret: int = 0) -> dict:
+        out = {
+            'predictor': self.dir.name,
+            'branches': self.branches,
+            'cond_branches': self.cond,
+            'cond_mispredicts': self.cond_mispredicts,
+            'target_mispredicts': self.target_mispredicts,
+            'ras_mispredicts': self.ras_mispredicts,
+            'direction_accuracy': self.dir.accuracy(),
+            'accuracy': 1.0 - self.mispredicts / self.branches if self.branches else 0.0,
+            'btb_hits': self.btb.hits,
+            'btb_misses': self.btb.misses,
+            'ras_overflows': self.ras.overflows,
+        }
+        out['mpki'] = self.mispredicts * 1000 / instret if instret else 0.0
+        return out
+
+
+def compare(pcs, taken, configs: dict, instret: int = 0) -> dict:
+    """
+    在记录的条件分支流上对比多个方向预测器配置
+    pcs, taken: 等长数组 (按提交顺序)
+    configs: {名称: (预测器名, kwargs)}
+    """
+    pcs = np.asarray(pcs, dtype=np.int64).tolist()
+    taken = np.asarray(taken, dtype=bool).tolist()
+    out = {}
+    for label, (name, kwargs) in configs.items():
+        p = make_predictor(name, **kwargs)
+        mask = (1 << 256) - 1
+        ghr = 0
+        for pc, t in zip(pcs, taken):
+            guess, meta = p.predict(pc, ghr)
+            p.lookups += 1
+            if guess != t:
+                p.mispredicts += 1
+            p.update(pc, ghr, t, meta)
+            ghr = ((ghr << 1) | int(t)) & mask
+        out[label] = {
+            'accuracy': p.accuracy(),
+            'mispredicts': p.mispredicts,
+            'mpki': p.mispredicts * 1000 / instret if instret else 0.0,
+        }
+    return out
@@ -0,0 +1,126 @@
+# Cache 模型 (只建模命中/缺失与填充时间，不保存数据)
+
+import numpy as np
+
+
+class Cache():
+    '''
+    组相联 cache，LRU 替换
+    每行记录填充完成的周期 (ready)，用于建模在途 (in-flight) 的填充
+    prefetched 标记由预取带入、还未被需求访问命中的行
+    '''
+    def __init__(self, size: int = 32 * 1024, ways: int = 8, line: int = 64,
+                 hit_latency: int = 2, miss_latency: int = 40):
+        sets = size // (ways * line)
+        if sets <= 0 or sets & (sets - 1) or line & (line - 1):
+            raise ValueError("Cache: sets and line size must be powers of 2")
+        self.sets = sets
+        self.ways = ways
+        self.line_bits = line.bit_length() - 1
+        self.set_bits = sets.bit_length() - 1
+        self.hit_latency = hit_latency
+        self.miss_latency = miss_latency
+
+        self.tag = np.zeros((sets, ways), dtype=np.int64)
+        self.valid = np.zeros((sets, ways), dtype=bool)
+        self.ready = np.zeros((sets, ways), dtype=np.int64)
+        self.lru = np.zeros((sets, ways), dtype=np.int64)
+        self.prefetched = np.zeros((sets, ways), dtype=bool)
+        self.clock = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.prefetch_fills = 0
+        self.prefetch_useful = 0
+        self.prefetch_late = 0
+        self.prefetch_evicted = 0  # 未被使用即被替换
+        self.hidden_cycles = 0
+
+    def line_addr(self, addr: int) -> int:
+        return addr >> self.line_bits
+
+    def _locate(self, line: int):
+        return line & (self.sets - 1), line >> self.set_bits
+
+    def _find(self, s: int, tag: int) -> int:
+        row = self.tag[s]
+        valid = self.valid[s]
+        for w in range(self.ways):
+            if valid[w] and row[w] == tag:
+                return w
+        return -1
+
+    def _victim(self, s: int) -> int:
+        empty = np.flatnonzero(~self.valid[s])
+        if len(empty):
+            return int(empty[0])
+        w = int(np.argmin(self.lru[s]))
+        if self.prefetched[s, w]:
+            self.prefetch_evicted += 1
+        return w
+
+    def contains(self, addr: int) -> bool:
+        s, tag = self._locate(self.line_addr(addr))
+        return self._find(s, tag) >= 0
+
+    def access(self, addr: int, cycle: int = 0) -> tuple[bool, int]:
+        """
+        需求访问，返回 (是否命中, 访问延迟)
+        命中在途填充的行时延迟为剩余的填充时间
+        """
+        self.clock += 1
+        s, tag = self._locate(self.line_addr(addr))
+        w = self._find(s, tag)
+        if w >= 0:
+            self.hits += 1
+            self.lru[s, w] = self.clock
+            latency = max(self.hit_latency, int(self.ready[s, w]) - cycle)
+            if self.prefetched[s, w]:
+                self.prefetched[s, w] = False
+                self.prefetch_useful += 1
+                if latency > self.hit_latency:
+                    self.prefetch_late += 1
+                self.hidden_cycles += self.miss_latency - latency
+            return True, latency
+
+        self.misses += 1
+        w = self._victim(s)
+        self.valid[s, w] = True
+        self.tag[s, w] = tag
+        self.ready[s, w] = cycle + self.miss_latency
+        self.lru[s, w] = self.clock
+        self.prefetched[s, w] = False
+        return False, self.miss_latency
+
+    def fill(self, line: int, cycle: int = 0, prefetch: bool = True) -> bool:
+        """
+        按行地址填充 (预取)，行已存在时返回 False
+        """
+        s, tag = self._locate(line)
+        if self._find(s, tag) >= 0:
+            return False
+        self.clock += 1
+        w = self._victim(s)
+        self.valid[s, w] = True
+        self.tag[s, w] = tag
+        self.ready[s, w] = cycle + self.miss_latency
+        # 预取行以较低的优先级插入
+        self.lru[s, w] = self.clock - self.ways
+        self.prefetched[s, w] = prefetch
+        if prefetch:
+            self.prefetch_fills += 1
+        return True
+
+    def stats(self) -> dict:
+        accesses = self.hits + self.misses
+        return {
+            'accesses': accesses,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / accesses if accesses else 0.0,
+            'prefetch_fills': self.prefetch_fills,
+            'prefetch_useful': self.prefetch_useful,
+            'prefetch_late': self.prefetch_late,
+            'prefetch_evicted': self.prefetch_evicted,
+            'hidden_cycles': self.hidden_cycles,
+        }
@@ -0,0 +1,171 @@
+# 体系结构检查点: 寄存器 (GPR / FPR / VPR)、CSR、PC 和内存页
+#
+# 文件格式 (小端，不压缩):
+#   header  32 bytes: magic "RVCK" | u32 version | u32 page bits | u64 meta bytes | u64 page count
+#   meta    JSON (utf-8): pc / instret / cycle / 寄存器和 CSR (十六进制字符串，VPR 宽度不固定)
+#   index   u64 页号 × page count
+#   data    按页对齐，每页 PAGE_SIZE 字节，与 index 顺序相同
+#
+# 恢复时以 mmap ACCESS_COPY 映射数据区，每页是映射上的 numpy 视图:
+# 页在第一次访问时才由操作系统读入，写入只修改本进程的私有副本，文件不变
+# 同一个检查点可以在多个进程 / 多个 Simulator 中同时恢复
+#
+#   sim.run_until(instret=10_000_000)
+#   Checkpoint.capture(sim).save("boot.ckpt")
+#   ...
+#   sim = Simulator(mem, cfg)
+#   Checkpoint.load("boot.ckpt").restore(sim)
+
+import json, mmap, struct
+import numpy as np
+from .memory import PAGE_BITS, PAGE_SIZE
+
+MAGIC = b'RVCK'
+VERSION = 1
+HEADER = struct.Struct('<4sIIQQ')
+
+
+def _align(n: int) -> int:
+    return (n + PAGE_SIZE - 1) & ~(PAGE_SIZE - 1)
+
+
+def _hex(values) -> list[str]:
+    return [f"{v:x}" for v in values]
+
+
+def _int(values) -> list[int]:
+    return [int(v, 16) for v in values]
+
+
+class Checkpoint():
+    '''
+    只包含已提交的状态；恢复后的 Simulator 从 pc 开始取指，
+    分支预测器、cache 和流水线都是冷的 (需要预热时先运行一段再开始统计)
+    '''
+    def __init__(self, pc: int = 0, instret: int = 0, cycle: int = 0,
+                 gpr: list[int] | None = None, fpr: list[int] | None = None, vpr: list[int] | None = None,
+                 csr: dict[int, int] | None = None, pages: dict[int, np.ndarray] | None = None):
+        self.pc = pc
+        self.instret = instret
+        self.cycle = cycle
+        self.gpr = gpr if gpr is not None else []
+        self.fpr = fpr if fpr is not None else []
+        self.vpr = vpr if vpr is not None else []
+        self.csr = csr if csr is not None else {}
+        self.pages = pages if pages is not None else {}
+        self.file_name: str | None = None
+        self.index: np.ndarray | None = None
+        self.data_offset = 0
+
+    ########
+    # 保存 #
+    ########
+    @classmethod
+    def capture(cls, sim) -> 'Checkpoint':
+        """
+        复制 Simulator 当前的体系结构状态
+        PC 为下一条待提交的指令: ROB 头部，其次取指队列头部，否则为取指地址
+        """
+        if sim.rob:
+            pc = sim.rob[0].pc
+        elif sim.decode_fifo:
+            pc = sim.decode_fifo[0].pc
+        else:
+            pc = sim.fetch_pc
+        # 全零页不保存，恢复后读到的同样是 0
+        pages = {n: p.copy() for n, p in sim.dmem.pages.items() if p.any()}
+        return cls(pc, sim.instret + sim.base_instret, sim.cycle + sim.base_cycle,
+                   list(sim.gpr.mem), list(sim.fpr.mem), [sim.vec.vrf.read(i) for i in range(32)], dict(sim.csr), pages)
+
+    def meta(self) -> dict:
+        return {
+            'pc': self.pc,
+            'instret': self.instret,
+            'cycle': self.cycle,
+            'gpr': _hex(self.gpr),
+            'fpr': _hex(self.fpr),
+            'vpr': _hex(self.vpr),
+            'csr': {f"{k:x}": f"{v:x}" for k, v in self.csr.items()},
+        }
+
+    def save(self, file_name: str) -> None:
+        meta = json.dumps(self.meta()).encode('utf-8')
+        numbers = sorted(self.pages)
+        index = np.asarray(numbers, dtype='<u8')
+        data_offset = _align(HEADER.size + len(meta) + index.nbytes)
+        with open(file_name, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, VERSION, PAGE_BITS, len(meta), len(numbers)))
+            f.write(meta)
+            f.write(index.tobytes())
+            f.write(bytes(data_offset - f.tell()))
+            for n in numbers:
+                f.write(np.ascontiguousarray(self.pages[n], dtype=np.uint8).tobytes())
+
+    ########
+    # 恢复 #
+    ########
+    @classmethod
+    def load(cls, file_name: str) -> 'Checkpoint':
+        """
+        只读取头部、元数据和页号，内存页在 restore() 时才映射
+        """
+        with open(file_name, 'rb') as f:
+            head = f.read(HEADER.size)
+            if len(head) < HEADER.size:
+                raise ValueError(f"Checkpoint: {file_name} is too short")
+            magic, version, page_bits, meta_size, count = HEADER.unpack(head)
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f"Checkpoint: {file_name} is not a version {VERSION} checkpoint")
+            if page_bits != PAGE_BITS:
+                raise ValueError(f"Checkpoint: page size {1 << page_bits} does not match memory page size {PAGE_SIZE}")
+            meta = json.loads(f.read(meta_size).decode('utf-8'))
+            index = np.frombuffer(f.read(8 * count), dtype='<u8')
+        ckpt = cls(meta['pc'], meta['instret'], meta['cycle'],
+                   _int(meta['gpr']), _int(meta['fpr']), _int(meta['vpr']),
+                   {int(k, 16): int(v, 16) for k, v in meta['csr'].items()})
+        ckpt.file_name = file_name
+        ckpt.index = index
+        ckpt.data_offset = _align(HEADER.size + meta_size + index.nbytes)
+        return ckpt
+
+    def map_pages(self) -> dict[int, np.ndarray]:
+        """
+        每次调用得到一组独立的写时复制页
+        """
+        if self.file_name is None:
+            return {n: p.copy() for n, p in self.pages.items()}
+        if not len(self.index):
+            return {}
+        with open(self.file_name, 'rb') as f:
+            m = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+        # 视图持有 m 的引用，最后一页被释放时映射随之关闭
+        return {int(n): np.frombuffer(m, dtype=np.uint8, count=PAGE_SIZE, offset=self.data_offset + i * PAGE_SIZE)
+                for i, n in enumerate(self.index)}
+
+    def restore(self, sim) -> None:
+        """
+        把状态装入一个尚未运行的 Simulator
+        """
+        if sim.cycle != 0 or sim.rob or sim.decode_fifo:
+            raise ValueError("Checkpoint: restore requires a fresh Simulator")
+        for reg, values in ((sim.gpr, self.gpr), (sim.fpr, self.fpr)):
+            if len(values) > len(reg.mem):
+                raise ValueError(f"Checkpoint: {len(values)} registers do not fit in a file of {len(reg.mem)}")
+            reg.mem[:len(values)] = values
+        if len(self.vpr) > 32:
+            raise ValueError(f"Checkpoint: {len(self.vpr)} vector registers do not fit in a file of 32")
+        if sim.gpr.zero:
+            sim.gpr.mem[0] = 0
+        # 新的 Simulator 重命名表为恒等映射: 物理寄存器 i 即体系结构寄存器 i
+        for i, v in enumerate(sim.gpr.mem):
+            sim.prf.write(sim.prf.map[i], v)
+        for i, value in enumerate(self.vpr):
+            sim.vec.vrf.write(i, value)
+        sim.csr.clear()
+        sim.csr.update(self.csr)
+        sim.vec.load_csr(sim.csr)
+        sim.csr.update(sim.vec.csr())
+        sim.dmem.pages = self.map_pages()
+        sim.fetch_pc = self.pc
+        sim.base_instret = self.instret
+        sim.base_cycle = self.cycle
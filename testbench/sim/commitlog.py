@@ -0,0 +1,194 @@
+# 二进制提交日志 + 锁步比较
+#
+# 文件格式 (小端):
+#   header  16 bytes: magic "RVCL" | u32 version | u32 record size | u32 reserved
+#   record  48 bytes:
+#     u64 order | u64 pc | u32 instr | u8 rd_region | u8 rd | u8 mem_size | u8 flags
+#     u64 value | u64 mem_addr | u64 mem_data
+#
+#   rd_region: 0 无写回, 1 GPR, 2 FPR, 3 VPR
+#   mem_size : 0 无访存, 否则为访存字节数
+#   flags    : bit0 store, bit1 fused pair
+#
+# SystemVerilog 侧按相同布局逐字节 $fwrite 即可与模型日志比较
+
+import mmap, struct, sys
+import numpy as np
+
+MAGIC = b'RVCL'
+VERSION = 1
+HEADER = struct.Struct('<4sIII')
+RECORD = struct.Struct('<QQIBBBBQQQ')
+
+REGION_NONE = 0
+REGION_GPR = 1
+REGION_FPR = 2
+REGION_VPR = 3
+
+FLAG_STORE = 0b01
+FLAG_FUSED = 0b10
+
+COMMIT_DTYPE = np.dtype([
+    ('order', '<u8'),
+    ('pc', '<u8'),
+    ('instr', '<u4'),
+    ('rd_region', 'u1'),
+    ('rd', 'u1'),
+    ('mem_size', 'u1'),
+    ('flags', 'u1'),
+    ('value', '<u8'),
+    ('mem_addr', '<u8'),
+    ('mem_data', '<u8'),
+])
+assert COMMIT_DTYPE.itemsize == RECORD.size
+
+# order 由各自的实现分配，默认不参与比较
+COMPARE_FIELDS = ('pc', 'instr', 'rd_region', 'rd', 'value', 'mem_size', 'mem_addr', 'mem_data')
+
+
+class CommitLog():
+    '''
+    定长记录写入，攒满 buffer 条后一次写出
+    '''
+    def __init__(self, file_name: str, buffer: int = 4096):
+        self.file = open(file_name, 'wb')
+        self.file.write(HEADER.pack(MAGIC, VERSION, RECORD.size, 0))
+        self.buf = bytearray(RECORD.size * buffer)
+        self.capacity = buffer
+        self.fill = 0
+        self.records = 0
+
+    def write(self, order: int, pc: int, instr: int, rd_region: int = 0, rd: int = 0, value: int = 0,
+              mem_size: int = 0, mem_addr: int = 0, mem_data: int = 0, flags: int = 0) -> None:
+        RECORD.pack_into(self.buf, self.fill * RECORD.size, order, pc, instr & 0xffffffff,
+                         rd_region, rd, mem_size, flags, value, mem_addr, mem_data)
+        self.fill += 1
+        self.records += 1
+        if self.fill == self.capacity:
+            self.flush()
+
+    def flush(self) -> None:
+        if self.fill:
+            self.file.write(memoryview(self.buf)[:self.fill * RECORD.size])
+            self.fill = 0
+        self.file.flush()
+
+    def close(self) -> None:
+        if not self.file.closed:
+            self.flush()
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class LogView():
+    '''
+    mmap 打开日志，records 为结构化数组视图 (不拷贝)
+    '''
+    def __init__(self, file_name: str):
+        self.file = open(file_name, 'rb')
+        head = self.file.read(HEADER.size)
+        if len(head) < HEADER.size:
+            self.file.close()
+            raise ValueError(f"CommitLog: {file_name} is too short")
+        magic, version, size, _ = HEADER.unpack(head)
+        if magic != MAGIC or version != VERSION or size != RECORD.size:
+            self.file.close()
+            raise ValueError(f"CommitLog: {file_name} is not a version {VERSION} commit log")
+        n = (self.file.seek(0, 2) - HEADER.size) // RECORD.size
+        if n:
+            self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+            self.records = np.frombuffer(self.map, dtype=COMMIT_DTYPE, count=n, offset=HEADER.size)
+        else:
+            self.map = None
+            self.records = np.zeros(0, dtype=COMMIT_DTYPE)
+
+    def __len__(self):
+        return len(self.records)
+
+    def close(self) -> None:
+        self.records = None
+        if self.map is not None:
+            self.map.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def format_record(r) -> str:
+    s = f"#{int(r['order'])} pc={int(r['pc']):08x} instr={int(r['instr']):08x}"
+    if r['rd_region']:
+        s += f" {'?xfv'[int(r['rd_region'])]}{int(r['rd'])}={int(r['value']):016x}"
+    if r['mem_size']:
+        kind = 'st' if r['flags'] & FLAG_STORE else 'ld'
+        s += f" {kind}{int(r['mem_size'])} [{int(r['mem_addr']):x}]={int(r['mem_data']):x}"
+    return s
+
+
+def first_divergence(a: np.ndarray, b: np.ndarray, fields=COMPARE_FIELDS, chunk: int = 1 << 20) -> int:
+    """
+    返回第一条不一致记录的下标；完全一致返回 -1
+    长度不同且公共前缀一致时返回较短日志的长度
+    """
+    n = min(len(a), len(b))
+    for start in range(0, n, chunk):
+        end = min(start + chunk, n)
+        x = a[start:end]
+        y = b[start:end]
+        diff = np.zeros(end - start, dtype=bool)
+        for f in fields:
+            diff |= x[f] != y[f]
+        hit = np.flatnonzero(diff)
+        if len(hit):
+            return start + int(hit[0])
+    return -1 if len(a) == len(b) else n
+
+
+def compare(file_a: str, file_b: str, fields=COMPARE_FIELDS, context: int = 3) -> dict | None:
+    """
+    比较两个提交日志，一致时返回 None
+    """
+    with LogView(file_a) as va, LogView(file_b) as vb:
+        a, b = va.records, vb.records
+        i = first_divergence(a, b, fields)
+        if i < 0:
+            a = b = None
+            return None
+        out = {
+            'index': i,
+            'len_a': len(a),
+            'len_b': len(b),
+            'fields': [f for f in fields if i < len(a) and i < len(b) and a[i][f] != b[i][f]],
+            'a': format_record(a[i]) if i < len(a) else None,
+            'b': format_record(b[i]) if i < len(b) else None,
+            'context': [format_record(r) for r in a[max(0, i - context):i]],
+        }
+        # 释放对 mmap 的引用后才能关闭
+        a = b = None
+        return out
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 3:
+        print("usage: python -m sim.commitlog <model.log> <rtl.log>", file=sys.stderr)
+        sys.exit(2)
+    result = compare(sys.argv[1], sys.argv[2])
+    if result is None:
+        print("logs match")
+        sys.exit(0)
+    print(f"first divergence at record {result['index']} (len {result['len_a']} vs {result['len_b']})")
+    for line in result['context']:
+        print(f"    {line}")
+    print(f"  a: {result['a']}")
+    print(f"  b: {result['b']}")
+    if result['fields']:
+        print(f"  fields: {', '.join(result['fields'])}")
+    sys.exit(1)
@@ -0,0 +1,146 @@
+# 核心参数 (原先散落在 core() / ops / ROB 中的常量)
+
+from dataclasses import dataclass, asdict, fields, replace
+from .moduleConstant import XLEN
+
+
+@dataclass
+class CoreConfig():
+    # ---- 前端 ----
+    fetch_width: int = 4            # 每周期译码条数
+    fetch_buffer: int = 16          # 译码队列深度
+    fusion: bool = False            # 宏操作融合
+    predictor: str = 'gshare'       # bimodal / gshare / tage
+    btb_sets: int = 512
+    btb_ways: int = 4
+    ras_depth: int = 16
+    redirect_penalty: int = 2       # 分支预测错误后的取指气泡
+
+    # ---- 重命名 / ROB ----
+    arch_regs: int = 32
+    phy_regs: int = 128
+    rob_size: int = 64
+    commit_width: int = 4
+
+    # ---- 执行单元 ----
+    alu_count: int = 2
+    lsu_count: int = 1
+    alu_latency: int = 1
+    mul_latency: int = 5
+    div_latency_min: int = 18
+    div_latency_max: int = 45
+    mdu_depth: int = 4              # MDU 同时在算的指令数
+    # FPU 各运算组的延迟 (fpnew 的流水级数 + 1)，DIVSQRT 不流水
+    fpu_addmul_latency_s: int = 3
+    fpu_addmul_latency_d: int = 4
+    fpu_divsqrt_latency_s: int = 12
+    fpu_divsqrt_latency_d: int = 20
+    fpu_noncomp_latency: int = 2
+    fpu_conv_latency: int = 3
+    vlen: int = 128                 # 向量寄存器位宽 (功能模型的向量单元)
+
+    # ---- 访存 ----
+    lq_size: int = 32
+    sq_size: int = 32
+    icache_size: int = 32 * 1024
+    icache_ways: int = 4
+    dcache_size: int = 32 * 1024
+    dcache_ways: int = 8
+    cache_line: int = 64
+    cache_hit_latency: int = 2
+    cache_miss_latency: int = 40
+    prefetch: bool = False
+    prefetch_degree: int = 2        # 每次触发预取的行数 (stride / stream 相同)
+    prefetch_distance: int = 1      # stride 预取从 addr + distance * stride 开始
+    prefetch_entries: int = 64      # stride 表项数
+    prefetch_streams: int = 8       # stream 表项数
+
+    # ---- 其他 ----
+    xlen: int = XLEN
+    seed: int = 0                   # DIV 随机延迟的种子
+    max_cycles: int = 1_000_000
+    perf_interval: int = 1000       # 区间 IPC 的采样周期
+    strict_decode: bool = False     # True: 遇到无法译码的指令直接报错；False: 按 NOP 处理并计数
+
+    def validate(self) -> 'CoreConfig':
+        if self.xlen != XLEN:
+            raise ValueError(f"CoreConfig: only XLEN={XLEN} is supported by ops")
+        if self.phy_regs <= self.arch_regs:
+            raise ValueError("CoreConfig: phy_regs must be larger than arch_regs")
+        if self.predictor not in ('bimodal', 'gshare', 'tage'):
+            raise ValueError(f"CoreConfig: unknown predictor {self.predictor}")
+        if self.div_latency_min > self.div_latency_max:
+            raise ValueError("CoreConfig: div_latency_min > div_latency_max")
+        if self.vlen < 64 or self.vlen > 65536 or self.vlen & (self.vlen - 1):
+            raise ValueError("CoreConfig: vlen must be a power of two in [64, 65536]")
+        for name in ('fetch_width', 'commit_width', 'rob_size', 'alu_count', 'lsu_count', 'mdu_depth', 'perf_interval',
+                     'fpu_addmul_latency_s', 'fpu_addmul_latency_d', 'fpu_divsqrt_latency_s', 'fpu_divsqrt_latency_d',
+                     'fpu_noncomp_latency', 'fpu_conv_latency',
+                     'prefetch_degree', 'prefetch_distance', 'prefetch_entries', 'prefetch_streams'):
+            if getattr(self, name) <= 0:
+                raise ValueError(f"CoreConfig: {name} must be positive")
+        return self
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, d: dict) -> 'CoreConfig':
+        unknown = set(d) - {f.name for f in fields(cls)}
+        if unknown:
+            raise ValueError(f"CoreConfig: unknown fields {sorted(unknown)}")
+        return cls(**d)
+
+    def replace(self, **kwargs) -> 'CoreConfig':
+        return replace(self, **kwargs)
+
+    @classmethod
+    def parse_value(cls, name: str, text: str):
+        """
+        命令行 'name=value' 中的 value 转换为字段类型，未知字段或无法转换的值报 ValueError
+        """
+        if name not in {f.name for f in fields(cls)}:
+            raise ValueError(f"CoreConfig: unknown field {name}")
+        default = getattr(cls(), name)
+        if isinstance(default, bool):
+            key = text.strip().lower()
+            if key in ('1', 'true', 'yes', 'on'):
+                return True
+            if key in ('0', 'false', 'no', 'off'):
+                return False
+            raise ValueError(f"CoreConfig: {name}={text!r} is not a boolean")
+        if isinstance(default, int):
+            try:
+                return int(text, 0)
+            except ValueError:
+                raise ValueError(f"CoreConfig: {name}={text!r} is not an integer") from None
+        return text
+
+    @classmethod
+    def from_overrides(cls, items: list[str], base: 'CoreConfig' = None) -> 'CoreConfig':
+        """
+        ['rob_size=32', 'predictor=tage'] -> 在 base (缺省为默认配置) 上覆盖后 validate
+        """
+        cfg = base if base is not None else cls()
+        for item in items:
+            name, _, value = item.partition('=')
+            if not value:
+                raise ValueError(f"CoreConfig: bad override {item!r}, expected NAME=VALUE")
+            cfg = cfg.replace(**{name.strip(): cls.parse_value(name.strip(), value)})
+        return cfg.validate()
+
+
+def parse_sweep_axes(items: list[str]) -> dict[str, list]:
+    """
+    ['rob_size=32,64', 'predictor=gshare,tage'] -> {'rob_size': [32, 64], 'predictor': ['gshare', 'tage']}
+    """
+    axes = {}
+    for item in items:
+        name, _, values = item.partition('=')
+        name = name.strip()
+        if not values:
+            raise ValueError(f"CoreConfig: bad sweep axis {item!r}, expected NAME=V1,V2")
+        if name in axes:
+            raise ValueError(f"CoreConfig: sweep axis {name} given twice")
+        axes[name] = [CoreConfig.parse_value(name, v) for v in values.split(',')]
+    return axes
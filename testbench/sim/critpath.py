@@ -0,0 +1,506 @@
+# 数据依赖图关键路径分析
+#
+# 从 replay.py 录制的提交轨迹建立真实的数据依赖图 (数组形式):
+#   寄存器 RAW: 按 InstrUnit.dataflow.rs1 / rs2 / rd 和寄存器区域 (GPR / FPR) 找最近的生产者
+#   向量寄存器: 按轨迹中 vsetvl* 记录的 vtype 展开寄存器组 (LMUL、加宽 / 变窄、段访存)，
+#              掩码指令读 v0，所有向量指令读最近的 vsetvl* 设置的 vl / vtype
+#   内存 RAW:  load 依赖每个 8 字节块最近一条写它的更老 store，向量访存按轨迹中记录的块
+# 每条指令按延迟类别取延迟，关键路径 = 依赖图上的最长路径，ILP = 指令数 / 关键路径
+# 资源无限、窗口无限，是给定延迟下性能的上界，用于比较各功能单元提速的收益
+#
+# 延迟不影响图的结构: 先按依赖深度分层，同一层的指令互不依赖，
+# 每层一次 numpy 运算同时计算所有指令和所有场景 (场景 × 类别的延迟表)
+#
+#   python -m sim.critpath trace_dir --what-if mul=3 --what-if div=8 --sweep mul=1:8
+
+import argparse, sys
+import numpy as np
+from .decode import DecodeBlock
+from .instr_unit import *
+from .lsq import lsu_is_store, lsu_size
+from .cache import Cache
+from .config import CoreConfig
+from .sim_code import _writes_gpr
+from .replay import TraceReader, GRANULE_BITS
+from .sweep import write_csv
+from .vector import (is_vector, vector_instr, VType, _VMEM_WIDTH,
+                     OPIVV, OPFVV, OPMVV, OPIVI, OPIVX, OPFVF, OPMVX, OPCFG)
+
+# 延迟类别
+CLASSES = ('alu', 'branch', 'mul', 'div', 'load', 'miss', 'store', 'csr', 'fpu', 'fdiv', 'vector', 'nop')
+ALU, BRANCH, MUL, DIV, LOAD, MISS, STORE, CSR, FPU, FDIV, VECTOR, NOP = range(len(CLASSES))
+
+# 内存依赖的块大小与轨迹中向量访存的记录粒度相同
+BLOCK_BITS = GRANULE_BITS
+
+# 依赖键 = 区域 * 32 + 编号；vl / vtype 单独一个键
+VPR = RegisterType.VPR.value
+VL_KEY = RegisterType.N.value * 32
+
+
+def default_latency(config: CoreConfig = None) -> dict[str, int]:
+    """
+    与 CoreConfig 一致的延迟 (除法取范围的中点；miss 为 D-cache 缺失的 load；
+    fpu 为 FPU 中流水的运算，取单精度加乘的延迟；fdiv 为不流水的除法和开方；
+    vector 为访存和写标量寄存器以外的向量指令，与 Simulator 相同按 1 周期计)
+    """
+    cfg = config if config is not None else CoreConfig()
+    return {
+        'alu': cfg.alu_latency,
+        'branch': cfg.alu_latency,
+        'mul': cfg.mul_latency,
+        'div': (cfg.div_latency_min + cfg.div_latency_max) // 2,
+        'load': cfg.cache_hit_latency,
+        'miss': cfg.cache_miss_latency,
+        'store': 1,
+        'csr': cfg.alu_latency,
+        'fpu': cfg.fpu_addmul_latency_s,
+        'fdiv': cfg.fpu_divsqrt_latency_s,
+        'vector': 1,
+        'nop': 1,
+    }
+
+
+def latency_table(scenarios: list[dict[str, int]], base: dict[str, int] | None = None) -> np.ndarray:
+    """
+    场景列表 -> (场景数, 类别数) 的延迟矩阵；场景中没有给出的类别取 base
+    """
+    base = base if base is not None else default_latency()
+    table = np.empty((len(scenarios), len(CLASSES)), dtype=np.int32)
+    for s, sc in enumerate(scenarios):
+        unknown = set(sc) - set(CLASSES)
+        if unknown:
+            raise ValueError(f"critpath: unknown latency class {sorted(unknown)}")
+        table[s] = [sc.get(c, base[c]) for c in CLASSES]
+    return table
+
+
+def _span(reg: int, n: int) -> list[int]:
+    return list(range(reg, min(reg + max(1, min(n, 8)), 32)))
+
+
+def _vector_regs(inst: int, sew: int, lmul8: int) -> tuple[list[int], list[int]]:
+    """
+    向量指令读 / 写的向量寄存器编号，寄存器组按 vtype (sew, lmul8) 展开
+    无法精确确定时多报: 加宽 / 变窄的源和目的都按 2 * LMUL，归约的 vs1 按整组
+    被掩码的指令、乘加、vslideup、vcompress、vmv.s.x 读 vd 的旧值 (未激活元素 undisturbed)；尾部 undisturbed 不计
+    """
+    vd, vs1, vs2 = inst >> 7 & 0x1f, inst >> 15 & 0x1f, inst >> 20 & 0x1f
+    masked = not inst >> 25 & 1
+    emul = max(1, lmul8 // 8)
+    srcs = [0] if masked else []
+    if inst & 0x7f != 0x57:
+        store = inst & 0x7f == 0x27
+        eew = _VMEM_WIDTH[inst >> 12 & 0b111]
+        nf = (inst >> 29) + 1
+        mop = inst >> 26 & 0b11
+        umop = inst >> 20 & 0x1f
+        index_emul = max(1, eew * lmul8 // (sew * 8))
+        if mop == 0 and umop == 0b01000:
+            # vl<nf>r / vs<nf>r: nf 个整寄存器，不带掩码
+            srcs, data = [], _span(vd, nf)
+        elif mop == 0 and umop == 0b01011:
+            data = [vd]
+        elif mop & 1:
+            # 索引访存: 数据按 SEW / LMUL，vs2 的索引按 EEW
+            data = _span(vd, nf * emul)
+            srcs += _span(vs2, index_emul)
+        else:
+            data = _span(vd, nf * index_emul)
+        if store:
+            return srcs + data, []
+        return srcs + (data if masked else []), data
+
+    funct3 = inst >> 12 & 0b111
+    funct6 = inst >> 26
+    if funct3 == OPCFG:
+        return [], []
+    opi = funct3 in (OPIVV, OPIVX, OPIVI)
+    if funct6 == 0b010000 and funct3 in (OPMVV, OPFVV):
+        # vmv.x.s / vcpop.m / vfirst.m / vfmv.f.s: 写标量寄存器
+        return srcs + [vs2], []
+    if funct6 == 0b010000 and funct3 in (OPMVX, OPFVF):
+        # vmv.s.x / vfmv.s.f: 只写第 0 个元素
+        return srcs + [vd], [vd]
+    if funct6 == 0b100111 and funct3 == OPIVI:
+        # vmv<nr>r.v
+        return _span(vs2, vs1 + 1), _span(vd, vs1 + 1)
+    widen = funct3 in (OPMVV, OPMVX, OPFVV, OPFVF) and funct6 >= 0b110000
+    narrow = opi and 0b101100 <= funct6 <= 0b101111
+    convert = funct3 == OPFVV and funct6 == 0b010010      # vfwcvt / vfncvt 的宽度由 vs1 字段选择
+    wide = 2 * emul if widen or narrow or convert else emul
+    single = ((opi or funct3 in (OPFVV, OPFVF) or funct3 == OPMVV) and 0b011000 <= funct6 <= 0b011111
+              or funct3 == OPMVV and funct6 <= 0b000111
+              or funct3 == OPFVV and funct6 in (0b000001, 0b000011, 0b000101, 0b000111, 0b110001, 0b110011)
+              or funct3 == OPIVV and funct6 in (0b110000, 0b110001))   # 比较、掩码逻辑和归约只写一个寄存器
+    accumulate = (funct3 in (OPMVV, OPMVX) and (funct6 in (0b101001, 0b101011, 0b101101, 0b101111) or funct6 >= 0b111100)
+                  or funct3 in (OPFVV, OPFVF) and (0b101000 <= funct6 <= 0b101111 or funct6 >= 0b111100)
+                  or opi and funct6 == 0b001110
+                  or funct3 == OPMVV and funct6 == 0b010111)
+    selector = (funct3 == OPMVV and funct6 in (0b010010, 0b010100)
+                or funct3 == OPFVV and funct6 in (0b010010, 0b010011))      # vs1 字段选择运算
+    if not (opi and funct6 == 0b010111 and not masked):
+        # vmv.v.* 的 vs2 字段为 0
+        srcs += _span(vs2, wide)
+    if funct3 in (OPIVV, OPMVV, OPFVV) and not selector:
+        srcs += _span(vs1, emul)
+    dsts = [vd] if single else _span(vd, wide if widen or convert else emul)
+    if masked or accumulate:
+        srcs += dsts
+    return srcs, dsts
+
+
+def _vector_keys(inst: int, sew: int, lmul8: int) -> tuple[list[int], list[int]]:
+    """
+    _vector_regs 的结果换成依赖键，加上 vl / vtype 和 .vf 指令读的 f[rs1]
+    """
+    if inst & 0x7f == 0x57 and inst >> 12 & 0b111 == OPCFG:
+        return [], [VL_KEY]
+    srcs, dsts = _vector_regs(inst, sew, lmul8)
+    keys = [VPR * 32 + r for r in dict.fromkeys(srcs)] + [VL_KEY]
+    if inst & 0x7f == 0x57 and inst >> 12 & 0b111 == OPFVF:
+        keys.append(RegisterType.FPR.value * 32 + (inst >> 15 & 0x1f))
+    return keys, [VPR * 32 + r for r in dsts]
+
+
+def _classify(instr: InstrUnit | None) -> tuple[int, list[int], list[int]]:
+    """
+    (类别, 源寄存器键, 目的寄存器键)；键 = 区域 * 32 + 编号，x0 不出现
+    向量指令只给出标量寄存器，向量寄存器组与 vtype 有关，见 _vector_regs
+    """
+    if instr is None or instr.alu not in (ExecType.ALU, ExecType.BRANCH, ExecType.MDU, ExecType.LSU, ExecType.CSR,
+                                          ExecType.VEC, ExecType.FPU):
+        return NOP, [], []
+    df = instr.dataflow
+    unit = instr.alu
+    gpr = RegisterType.GPR.value
+    fpr = RegisterType.FPR.value
+    srcs = []
+    if (instr.req.rs1 or unit == ExecType.BRANCH) and df.rs1:
+        srcs.append(gpr * 32 + df.rs1)
+    dst = -1
+    if unit == ExecType.LSU:
+        region = instr.lsu_dataflow.region
+        region = region.value if isinstance(region, RegisterType) else gpr
+        if lsu_is_store(instr.lsu_dataflow.op):
+            if (instr.req.rs2 and df.rs2) or region != gpr:
+                srcs.append(region * 32 + df.rs2)
+            return STORE, srcs, []
+        if df.rd or region != gpr:
+            dst = region * 32 + df.rd
+        return LOAD, srcs, [dst] if dst >= 0 else []
+    if (instr.req.rs2 or unit == ExecType.BRANCH) and df.rs2:
+        srcs.append(gpr * 32 + df.rs2)
+    if _writes_gpr(instr) and df.rd:
+        dst = gpr * 32 + df.rd
+    if instr.region.rd == RegisterType.FPR:
+        dst = fpr * 32 + df.rd
+    dst = [dst] if dst >= 0 else []
+    if unit == ExecType.BRANCH:
+        return BRANCH, srcs, dst
+    if unit == ExecType.MDU:
+        div = instr.op in (MduOpType.DIV, MduOpType.DIVU, MduOpType.REM, MduOpType.REMU,
+                           MduOpType.DIVW, MduOpType.DIVUW, MduOpType.REMW, MduOpType.REMUW)
+        return (DIV if div else MUL), srcs, dst
+    if unit == ExecType.VEC:
+        # 读向量寄存器写标量寄存器的指令与 CSR 一样在 ROB 头部串行执行；向量访存按 D-cache 分为 load / store / miss
+        if instr.op == VecOpType.TO_SCALAR:
+            return CSR, srcs, dst
+        if instr.op == VecOpType.LOAD:
+            return LOAD, srcs, dst
+        if instr.op == VecOpType.STORE:
+            return STORE, srcs, dst
+        return VECTOR, srcs, dst
+    if unit == ExecType.CSR:
+        return CSR, srcs, dst
+    if unit == ExecType.FPU:
+        # 最多三个 f 寄存器源操作数 (fma)，不与内存依赖同时出现
+        region = instr.region
+        srcs += [fpr * 32 + r for k, r in ((region.rs1, df.rs1), (region.rs2, df.rs2), (region.rs3, df.rs3))
+                 if k == RegisterType.FPR]
+        return (FDIV if instr.op in (FpuOpType.FDIV, FpuOpType.FSQRT) else FPU), srcs, dst
+    return ALU, srcs, dst
+
+
+class DepGraph():
+    '''
+    cls[i]           延迟类别
+    deps[k][i]       前三个依赖 (去重后的生产者) 的指令下标，没有时为 n (哨兵)
+    extra            (dst, src) 两个数组: 超过三个依赖的指令 (向量寄存器组、向量访存) 其余的边，按 dst 升序
+    level[i]         依赖深度 (不依赖任何指令的为 0)
+    count[i]         提交计数 (融合对为 2)
+    '''
+    def __init__(self, cls: np.ndarray, deps: np.ndarray, level: np.ndarray, count: np.ndarray,
+                 extra: tuple[np.ndarray, np.ndarray] | None = None):
+        self.cls = cls
+        self.deps = deps
+        self.level = level
+        self.count = count
+        self.n = len(cls)
+        if extra is None:
+            extra = (np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64))
+        self.extra_dst, self.extra_src = extra
+        # 按层排序后的下标和每层的边界；额外的边按目的指令的层分段
+        self.order = np.argsort(level, kind='stable')
+        levels = np.arange(int(level.max()) + 2 if self.n else 1)
+        self.bounds = np.searchsorted(level[self.order], levels)
+        self.extra_order = np.argsort(level[self.extra_dst], kind='stable')
+        self.extra_bounds = np.searchsorted(level[self.extra_dst][self.extra_order], levels)
+
+    @property
+    def instret(self) -> int:
+        return int(self.count.sum())
+
+    @property
+    def depth(self) -> int:
+        return len(self.bounds) - 1
+
+    def class_counts(self) -> dict[str, int]:
+        counts = np.bincount(self.cls, minlength=len(CLASSES))
+        return {c: int(counts[k]) for k, c in enumerate(CLASSES)}
+
+    @classmethod
+    def from_trace(cls, directory: str, config: CoreConfig = None, max_instret: int | None = None) -> 'DepGraph':
+        """
+        load 和向量访存用 D-cache 模型按轨迹中的地址分为命中 / 缺失两类
+        """
+        cfg = config if config is not None else CoreConfig()
+        dcache = Cache(cfg.dcache_size, cfg.dcache_ways, cfg.cache_line, cfg.cache_hit_latency, cfg.cache_miss_latency)
+        line_shift = np.uint64(dcache.line_bits - BLOCK_BITS)
+        decoder = DecodeBlock()
+        statics: dict[int, tuple] = {}
+        vkeys: dict[tuple[int, int, int], tuple[list[int], list[int]]] = {}
+        # 执行 vsetvl* 之前按最宽的寄存器组计
+        sew, lmul8 = 8, 64
+        n = len(TraceReader(directory))
+        if max_instret is not None:
+            n = min(n, max_instret)
+        kinds = np.empty(n, dtype=np.int8)
+        deps = np.full((3, n), n, dtype=np.int64)
+        count = np.empty(n, dtype=np.int8)
+        extra_dst: list[int] = []
+        extra_src: list[int] = []
+        producer: dict[int, int] = {}
+        last_store: dict[int, int] = {}
+        lv = [-1] * (n + 1)     # lv[n] 为哨兵
+        i = 0
+        for pc, _, addr, word, word2, vblocks in TraceReader(directory).records():
+            if i >= n:
+                break
+            st = statics.get(pc)
+            if st is None or st[0] != (word, word2):
+                try:
+                    if word2:
+                        code = decoder.fuse(word, word2, pc, 0)
+                    else:
+                        _, code = decoder.decode_to_human(word, pc, 0)
+                except NotImplementedError:
+                    code = None
+                instr = code[1] if isinstance(code, tuple) else None
+                vop = None
+                if instr is None and not word2 and is_vector(word):
+                    instr = vector_instr(word)
+                    vop = instr.op
+                k, srcs, dsts = _classify(instr)
+                size = lsu_size(instr.lsu_dataflow.op) if k in (LOAD, STORE) and vop is None else 0
+                st = statics[pc] = ((word, word2), k, srcs, dsts, size, 2 if word2 else 1, vop)
+            _, k, srcs, dsts, size, c, vop = st
+            if vop is not None:
+                if vop == VecOpType.CONFIG:
+                    vt = VType(addr)
+                    if not vt.vill:
+                        sew, lmul8 = vt.sew, vt.lmul8
+                v = vkeys.get((word, sew, lmul8))
+                if v is None:
+                    v = vkeys[(word, sew, lmul8)] = _vector_keys(word, sew, lmul8)
+                srcs, dsts = srcs + v[0], dsts + v[1]
+            found = []
+            for r in srcs:
+                p = producer.get(r)
+                if p is not None and p not in found:
+                    found.append(p)
+            if k == LOAD or k == STORE:
+                if vop is None:
+                    blocks = range(addr >> BLOCK_BITS, ((addr + size - 1) >> BLOCK_BITS) + 1)
+                    if k == LOAD and not dcache.access(addr)[0]:
+                        k = MISS
+                elif vblocks is not None:
+                    blocks = vblocks.tolist()
+                    # 与 Simulator 相同每行访问一次，任一行缺失即为 miss
+                    for line in np.unique(vblocks >> line_shift).tolist():
+                        if not dcache.access(line << dcache.line_bits)[0]:
+                            k = MISS
+                else:
+                    blocks = ()
+                if st[1] == STORE:
+                    for b in blocks:
+                        last_store[b] = i
+                else:
+                    for d in {last_store[b] for b in blocks if b in last_store}:
+                        if d not in found:
+                            found.append(d)
+            lv_max = -1
+            for j, p in enumerate(found):
+                if j < 3:
+                    deps[j, i] = p
+                else:
+                    extra_dst.append(i)
+                    extra_src.append(p)
+                if lv[p] > lv_max:
+                    lv_max = lv[p]
+            for r in dsts:
+                producer[r] = i
+            kinds[i] = k
+            count[i] = c
+            lv[i] = lv_max + 1
+            i += 1
+        if i < n:
+            kinds, deps, count = kinds[:i], deps[:, :i], count[:i]
+            deps[deps == n] = i
+        extra = (np.array(extra_dst, dtype=np.int64), np.array(extra_src, dtype=np.int64))
+        return cls(kinds, deps, np.array(lv[:i], dtype=np.int64), count, extra)
+
+    ############
+    # 关键路径 #
+    ############
+    def finish_times(self, table: np.ndarray) -> np.ndarray:
+        """
+        table 为 (场景数, 类别数)；返回 (n + 1, 场景数) 的完成时间，最后一行为哨兵 (0)
+        """
+        lat = np.ascontiguousarray(table.T)          # 类别 × 场景
+        finish = np.zeros((self.n + 1, len(table)), dtype=np.int64)
+        d0, d1, d2 = self.deps
+        order, bounds, cls = self.order, self.bounds, self.cls
+        xdst, xsrc, xorder, xbounds = self.extra_dst, self.extra_src, self.extra_order, self.extra_bounds
+        for l, (lo, hi) in enumerate(zip(bounds[:-1], bounds[1:])):
+            idx = order[lo:hi]
+            ready = np.maximum(np.maximum(finish[d0[idx]], finish[d1[idx]]), finish[d2[idx]])
+            if xbounds[l] < xbounds[l + 1]:
+                # 额外的边: 先写入就绪时间，再按边取最大值
+                x = xorder[xbounds[l]:xbounds[l + 1]]
+                finish[idx] = ready
+                np.maximum.at(finish, xdst[x], finish[xsrc[x]])
+                finish[idx] += lat[cls[idx]]
+            else:
+                finish[idx] = ready + lat[cls[idx]]
+        return finish
+
+    def critical_path(self, table: np.ndarray, block: int | None = None) -> np.ndarray:
+        """
+        每个场景的关键路径长度 (周期)；场景按 block 个一组计算以限制内存
+        """
+        table = np.atleast_2d(np.asarray(table, dtype=np.int64))
+        if block is None:
+            # 完成时间矩阵不超过约 256 MiB
+            block = max(1, (32 << 20) // max(self.n + 1, 1))
+        out = np.empty(len(table), dtype=np.int64)
+        for s in range(0, len(table), block):
+            out[s:s + block] = self.finish_times(table[s:s + block])[:-1].max(axis=0) if self.n else 0
+        return out
+
+    def ilp(self, table: np.ndarray) -> np.ndarray:
+        cp = self.critical_path(table)
+        return self.instret / np.maximum(cp, 1)
+
+    def breakdown(self, latency: dict[str, int] | np.ndarray) -> dict[str, int]:
+        """
+        单个场景下关键路径上各类别贡献的周期数
+        """
+        table = latency_table([latency]) if isinstance(latency, dict) else np.atleast_2d(latency)
+        finish = self.finish_times(table)[:, 0]
+        lat = table[0]
+        out = dict.fromkeys(CLASSES, 0)
+        if not self.n:
+            return out
+        i = int(finish[:-1].argmax())
+        while i != self.n:
+            out[CLASSES[self.cls[i]]] += int(lat[self.cls[i]])
+            deps = self.deps[:, i]
+            lo, hi = np.searchsorted(self.extra_dst, [i, i + 1])
+            if lo < hi:
+                deps = np.concatenate((deps, self.extra_src[lo:hi]))
+            i = int(deps[finish[deps].argmax()])
+        return out
+
+
+def _latency(name: str, value: str) -> int:
+    if name not in CLASSES:
+        raise ValueError(f"critpath: unknown latency class {name!r}, expected one of {', '.join(CLASSES)}")
+    try:
+        n = int(value)
+    except ValueError:
+        raise ValueError(f"critpath: bad latency {value!r} for {name}") from None
+    if n < 0:
+        raise ValueError(f"critpath: latency of {name} must not be negative")
+    return n
+
+
+def _parse(text: str) -> dict[str, int]:
+    """
+    'mul=3,div=8' -> {'mul': 3, 'div': 8}
+    """
+    out = {}
+    for item in text.split(','):
+        name, eq, value = item.partition('=')
+        if not eq or not value.strip():
+            raise ValueError(f"critpath: bad scenario {item!r}, expected CLASS=N")
+        out[name.strip()] = _latency(name.strip(), value.strip())
+    return out
+
+
+def _parse_sweep(text: str) -> list[dict[str, int]]:
+    """
+    'mul=1:8' -> [{'mul': 1}, ..., {'mul': 8}]；只给一个值时等价于 --what-if
+    """
+    name, eq, span = text.partition('=')
+    lo, _, hi = span.partition(':')
+    if not eq or not lo.strip():
+        raise ValueError(f"critpath: bad sweep {text!r}, expected CLASS=LO:HI")
+    name = name.strip()
+    lo = _latency(name, lo.strip())
+    hi = _latency(name, hi.strip()) if hi.strip() else lo
+    if hi < lo:
+        raise ValueError(f"critpath: empty sweep range {text!r}")
+    return [{name: v} for v in range(lo, hi + 1)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Critical-path / ILP what-if analysis on a replay trace")
+    parser.add_argument('directory', help="trace recorded by 'python -m sim.replay record'")
+    parser.add_argument('--what-if', action='append', default=[], metavar='CLASS=N[,CLASS=N]',
+                        help=f"latency scenario, classes: {', '.join(CLASSES)}")
+    parser.add_argument('--sweep', action='append', default=[], metavar='CLASS=LO:HI',
+                        help="one scenario per latency in [LO, HI]")
+    parser.add_argument('--instret', type=int, default=None)
+    parser.add_argument('--set', action='append', default=[], metavar='NAME=VALUE',
+                        help="CoreConfig field for the baseline latencies and D-cache")
+    parser.add_argument('-o', '--output', default=None, help="CSV, one row per scenario")
+    args = parser.parse_args(argv)
+
+    try:
+        cfg = CoreConfig.from_overrides(args.set)
+        scenarios = [{}] + [_parse(s) for s in args.what_if]
+        for item in args.sweep:
+            scenarios += _parse_sweep(item)
+    except ValueError as exc:
+        parser.error(str(exc))
+    base = default_latency(cfg)
+
+    graph = DepGraph.from_trace(args.directory, cfg, args.instret)
+    table = latency_table(scenarios, base)
+    cp = graph.critical_path(table)
+    print(f"{graph.n} nodes, {graph.instret} instructions, depth {graph.depth}, classes {graph.class_counts()}",
+          file=sys.stderr)
+    print(f"baseline critical path by class: {graph.breakdown(table[0])}", file=sys.stderr)
+    rows = []
+    for sc, lat, c in zip(scenarios, table, cp):
+        name = ','.join(f"{k}={v}" for k, v in sc.items()) or 'baseline'
+        rows.append({'scenario': name, **dict(zip(CLASSES, lat.tolist())), 'critical_path': int(c),
+                     'ilp': graph.instret / max(int(c), 1), 'speedup': int(cp[0]) / max(int(c), 1)})
+        print(f"{name:24} cp={int(c):>10} ilp={rows[-1]['ilp']:8.3f} speedup={rows[-1]['speedup']:6.3f}")
+    if args.output:
+        write_csv(args.output, rows)
+
+
+if __name__ == '__main__':
+    main()
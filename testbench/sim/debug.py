@@ -0,0 +1,113 @@
+# 断点 / 观察点
+#
+# PC 断点: 集合 + 以 (pc >> 1) 为下标的位图，提交时查表
+# 内存观察点: Memory 的页标志，只有命中被观察的页才比较精确区间
+# 寄存器观察点: Register.watch() 把 write 换成带检查的版本；
+#   向量寄存器 (VectorRegFile) 在每条向量指令提交后与保存的副本比较
+#
+# core() 在循环开始前根据 armed 状态决定是否加入检查，没有设置时提交路径上没有任何额外判断
+
+from .instr_unit import RegisterType
+from .memory import Memory
+from .register import RegisterGroup
+
+
+class StopEvent():
+    kind: str = ''          # 'breakpoint' / 'watchpoint'
+    pc: int = -1
+    order: int = -1
+    cycle: int = -1
+    detail: dict = None
+
+    def __init__(self, kind: str, pc: int, order: int, cycle: int, **detail):
+        self.kind = kind
+        self.pc = pc
+        self.order = order
+        self.cycle = cycle
+        self.detail = detail
+
+    def to_dict(self) -> dict:
+        return {'kind': self.kind, 'pc': self.pc, 'order': self.order, 'cycle': self.cycle, **self.detail}
+
+    def __repr__(self):
+        return f"StopEvent({self.kind} pc={self.pc:08x} order={self.order} cycle={self.cycle} {self.detail})"
+
+
+class Debugger():
+    '''
+    断点在指令提交前停下 (该指令尚未提交)，观察点在访问/写回的指令提交后停下
+    继续运行时跳过刚停下的那条指令的断点 (Simulator.skip_order)
+    '''
+    def __init__(self):
+        self.breakpoints: set[int] = set()
+        self.bitmap = bytearray()
+        self.mem_watches: list[tuple[int, int, bool, bool]] = []
+        self.reg_watches: set[tuple[RegisterType, int]] = set()
+        self.stop: StopEvent | None = None
+        self.memory: Memory | None = None
+        self.regs: RegisterGroup | None = None
+
+    ########
+    # 设置 #
+    ########
+    def break_at(self, pc: int) -> None:
+        self.breakpoints.add(pc)
+        i = pc >> 1
+        if i >= len(self.bitmap):
+            self.bitmap.extend(bytes(i + 1 - len(self.bitmap)))
+        self.bitmap[i] = 1
+
+    def clear_break(self, pc: int | None = None) -> None:
+        if pc is None:
+            self.breakpoints.clear()
+            self.bitmap = bytearray()
+            return
+        self.breakpoints.discard(pc)
+        if (pc >> 1) < len(self.bitmap):
+            self.bitmap[pc >> 1] = 0
+
+    def watch_memory(self, addr: int, size: int = 1, read: bool = False, write: bool = True) -> None:
+        self.mem_watches.append((addr, size, read, write))
+        if self.memory is not None:
+            self.memory.watch(addr, size, read, write)
+
+    def watch_register(self, index: int, region: RegisterType = RegisterType.GPR) -> None:
+        self.reg_watches.add((region, index))
+        if self.regs is not None:
+            self.regs.watch(region, index)
+
+    def clear_watch(self) -> None:
+        self.mem_watches.clear()
+        self.reg_watches.clear()
+        if self.memory is not None:
+            self.memory.unwatch()
+        if self.regs is not None:
+            self.regs.unwatch()
+
+    @property
+    def armed(self) -> bool:
+        return bool(self.breakpoints or self.mem_watches or self.reg_watches)
+
+    ##########
+    # 流水线 #
+    ##########
+    def attach(self, memory: Memory, regs: RegisterGroup) -> None:
+        """
+        把观察点装到 core 的内存和寄存器上
+        """
+        if self.memory is not memory:
+            self.memory = memory
+            memory.unwatch()
+            for addr, size, read, write in self.mem_watches:
+                memory.watch(addr, size, read, write)
+        if self.regs is not regs:
+            self.regs = regs
+            regs.unwatch()
+            for region, index in self.reg_watches:
+                regs.watch(region, index)
+
+    def resume(self) -> None:
+        """
+        清除停止状态
+        """
+        self.stop = None
@@ -5,7 +5,9 @@ from .instr_unit import MduOpType
 from .instr_unit import LsuOpType
 from .instr_unit import BranchOpType
 from .instr_unit import CsrOpType
+from .instr_unit import FpuOpType
 from .instr_unit import PCEffectPortAType
+from .instr_unit import FusionType
 from .moduleConstant import *
 
 # ---------------------------
@@ -75,9 +77,110 @@ def is_compressed(inst: int) -> bool:
 # Core decoders
 # ---------------------------
 
+# ---------------------------
+# Macro-op fusion patterns (raw bits)
+# ---------------------------
+
+def _lui(inst: int):
+    """lui / c.lui -> (rd, 64 位结果)"""
+    if is_compressed(inst):
+        rd = get_bits(inst, 11, 7)
+        if get_bits(inst, 1, 0) == 0b01 and get_bits(inst, 15, 13) == 0b011 and rd not in (0, 2):
+            imm = sign_extend((get_bits(inst, 12, 12) << 17) | (get_bits(inst, 6, 2) << 12), 18)
+            if imm != 0:
+                return rd, imm
+        return None
+    if get_bits(inst, 6, 0) == 0x37:
+        return get_bits(inst, 11, 7), sign_extend(imm_u(inst), 32)
+    return None
+
+def _addi(inst: int):
+    """addi / addiw / c.addi / c.addiw -> (rd, rs1, imm, word)"""
+    if is_compressed(inst):
+        f3 = get_bits(inst, 15, 13)
+        rd = get_bits(inst, 11, 7)
+        if get_bits(inst, 1, 0) == 0b01 and f3 in (0b000, 0b001) and rd != 0:
+            imm = sign_extend((get_bits(inst, 12, 12) << 5) | get_bits(inst, 6, 2), 6)
+            return rd, rd, imm, f3 == 0b001
+        return None
+    opc = get_bits(inst, 6, 0)
+    if opc in (0x13, 0x1B) and get_bits(inst, 14, 12) == 0:
+        return get_bits(inst, 11, 7), get_bits(inst, 19, 15), imm_i(inst), opc == 0x1B
+    return None
+
+def _auipc(inst: int):
+    if not is_compressed(inst) and get_bits(inst, 6, 0) == 0x17:
+        return get_bits(inst, 11, 7), sign_extend(imm_u(inst), 32)
+    return None
+
+def _jalr(inst: int):
+    if not is_compressed(inst) and get_bits(inst, 6, 0) == 0x67 and get_bits(inst, 14, 12) == 0:
+        return get_bits(inst, 11, 7), get_bits(inst, 19, 15), imm_i(inst)
+    return None
+
+def _ld(inst: int):
+    if not is_compressed(inst) and get_bits(inst, 6, 0) == 0x03 and get_bits(inst, 14, 12) == 3:
+        return get_bits(inst, 11, 7), get_bits(inst, 19, 15), imm_i(inst)
+    return None
+
+def _shift(inst: int, left: bool):
+    """slli/srli 及 c.slli/c.srli -> (rd, rs1, shamt)"""
+    if is_compressed(inst):
+        sh = (get_bits(inst, 12, 12) << 5) | get_bits(inst, 6, 2)
+        if left and get_bits(inst, 1, 0) == 0b10 and get_bits(inst, 15, 13) == 0b000:
+            rd = get_bits(inst, 11, 7)
+            return rd, rd, sh
+        if not left and get_bits(inst, 1, 0) == 0b01 and get_bits(inst, 15, 13) == 0b100 \
+                and get_bits(inst, 11, 10) == 0b00:
+            rd = 8 + get_bits(inst, 9, 7)
+            return rd, rd, sh
+        return None
+    if get_bits(inst, 6, 0) == 0x13 and get_bits(inst, 31, 26) == 0:
+        if get_bits(inst, 14, 12) == (1 if left else 5):
+            return get_bits(inst, 11, 7), get_bits(inst, 19, 15), get_bits(inst, 25, 20)
+    return None
+
+def inst_size(inst: int) -> int:
+    return 2 if is_compressed(inst) else 4
+
+# ---------------------------
+# F/D helpers
+# ---------------------------
+
+FP_FMT = {0: "s", 1: "d"}
+FP_RM = {0: "rne", 1: "rtz", 2: "rdn", 3: "rup", 4: "rmm", 7: "dyn"}
+
+def fp_rm_text(rm: int) -> str:
+    # 与 objdump 相同: 动态舍入不打印
+    return "" if rm == 7 else f", {FP_RM[rm]}"
+
+def fp_unit(instr: InstrUnit, op: FpuOpType, fmt: int, rm: int = 0, srcs: int = 1,
+            rd: RegisterType = RegisterType.FPR, rs1: RegisterType = RegisterType.FPR, width: int = 0) -> None:
+    """
+    填写 FPU 指令: srcs 为源操作数个数，rs2 / rs3 总在 f 寄存器
+    x 寄存器的源操作数经重命名读取 (req.rs1)，f 寄存器的源操作数只在 region 中标记
+    """
+    if fmt not in FP_FMT or rm not in FP_RM:
+        raise NotImplementedError("Decoder: Decode Error")
+    instr.alu = ExecType.FPU
+    instr.op = op
+    instr.fpu_dataflow.fmt = fmt
+    instr.fpu_dataflow.rm = rm
+    instr.fpu_dataflow.width = width
+    instr.region.rd = rd
+    instr.region.rs1 = rs1
+    instr.req.rs1 = rs1 == RegisterType.GPR
+    if srcs >= 2:
+        instr.region.rs2 = RegisterType.FPR
+    if srcs >= 3:
+        instr.region.rs3 = RegisterType.FPR
+
+
 class DecodeBlock():
-    def __init__(self):
+    def __init__(self, fusion: bool = False):
         self.intp = False
+        # 宏操作融合开关 (融合对在提交时计数，见 Simulator.fusion_count)
+        self.fusion = fusion
 
     def decode_32(self, inst: int, pc: int = -1, order: int = -1) -> tuple[str, InstrUnit]:
         opc = get_bits(inst, 6, 0)
@@ -110,7 +213,7 @@ class DecodeBlock():
             u = imm_u(inst)
             instr.alu = ExecType.ALU
             instr.op = AluOpType.BYPASS
-            instr.dataflow.imm = u
+            instr.dataflow.imm = sign_extend(u, 32)
             instr.mux_A = AluPortAType.IMM
             instr.mux_B = AluPortBType.EMPTY
             return f"lui {XR(rd)}, {hex(u)}", instr
@@ -118,7 +221,7 @@ class DecodeBlock():
             u = imm_u(inst)
             instr.alu = ExecType.ALU
             instr.op = AluOpType.ADD
-            instr.dataflow.imm = u
+            instr.dataflow.imm = sign_extend(u, 32)
             instr.mux_A = AluPortAType.PC
             instr.mux_B = AluPortBType.IMM
             return f"auipc {XR(rd)}, {hex(imm_u(inst))}", instr
@@ -160,14 +263,15 @@ class DecodeBlock():
         # BGEU rs1, rs2, off: if (rs1 >= rs2) PC += off
         if opc == 0x63:
             off = imm_b(inst)
+            m = {0: "beq", 1: "bne", 4: "blt", 5: "bge", 6: "bltu", 7: "bgeu"}
+            if funct3 not in m:
+                raise NotImplementedError("Decoder: Decode Error")
             instr.alu = ExecType.BRANCH
             instr.op = BranchOpType(funct3)
             instr.dataflow.offset = off
             instr.pc_effect.valid = True
             instr.pc_effect.mux_A = PCEffectPortAType.PC
-            m = {0: "beq", 1: "bne", 4: "blt", 5: "bge", 6: "bltu", 7: "bgeu"}
-            if funct3 in m:
-                return f"{m[funct3]} {XR(rs1)}, {XR(rs2)}, {hex(off)}", instr
+            return f"{m[funct3]} {XR(rs1)}, {XR(rs2)}, {hex(off)}", instr
 
         # ---- Loads (I) ----
         # Lx rd, off(rs1): rd = sext8 ( M8[rs1+off] )
@@ -195,19 +299,20 @@ class DecodeBlock():
             instr.alu = ExecType.LSU
             instr.op = AluOpType.BYPASS
             instr.req.rs1 = True
+            instr.req.rs2 = True
             instr.lsu_dataflow.op = (funct3 << 2) + 0b01
             instr.lsu_dataflow.region = RegisterType.GPR
             instr.dataflow.offset = off
             m = {0: "sb", 1: "sh", 2: "sw", 3: "sd"}
             if funct3 in m:
-                return f"{m[funct3]} {XR(rs2)}, {hex(off)}({XR(rs1)})"
+                return f"{m[funct3]} {XR(rs2)}, {hex(off)}({XR(rs1)})", instr
 
         # ---- OP-IMM (I) ----
         if opc == 0x13:
             imm = imm_i(inst)
             shamt = shamt = get_bits(inst, 25, 20)
-            opcode = (get_bits(inst, 30, 30) << 3) + funct3
-            mop = {0: 'addi', 2: 'stli', 3: 'sltiu', 4: 'xori', 6: 'ori', 7: 'andi', 8: 'subi'}
+            opcode = ((get_bits(inst, 30, 30) << 3) if funct3 == 5 else 0) + funct3
+            mop = {0: 'addi', 2: 'slti', 3: 'sltiu', 4: 'xori', 6: 'ori', 7: 'andi'}
             sop = {1: 'slli', 5: 'srli', 13: 'srai'}
             if opcode not in mop and opcode not in sop:
                 raise NotImplementedError("Decoder: Decode Error")
@@ -228,7 +333,7 @@ class DecodeBlock():
                 instr.mux_A = AluPortAType.RS1
                 instr.mux_B = AluPortBType.IMM
                 instr.dataflow.imm = shamt
-                return f"{sop[opcode]} {XR(rd)}, {XR(rs1)}, {shamt}"
+                return f"{sop[opcode]} {XR(rd)}, {XR(rs1)}, {shamt}", instr
 
         # ---- OP-IMM-32 (RV64) ----
         if opc == 0x1B:
@@ -262,7 +367,7 @@ class DecodeBlock():
         if opc == 0x33:
             if funct7 != 1:
                 opcode = (get_bits(inst, 30, 30) << 3) + funct3
-                m = {0: 'add', 1: 'sll', 2: 'stl', 3: 'sltu', \
+                m = {0: 'add', 1: 'sll', 2: 'slt', 3: 'sltu', \
                      4: 'xor', 5: 'srl', 6: 'or', 7: 'and', \
                      8: 'sub', 13: 'sra'}
                 if get_bits(inst, 31, 31) != 0 or get_bits(inst, 29, 26) != 0:
@@ -274,7 +379,7 @@ class DecodeBlock():
                     instr.req.rs2 = True
                     instr.mux_A = AluPortAType.RS1
                     instr.mux_B = AluPortBType.RS2
-                    return f"{m[funct3]} {XR(rd)}, {XR(rs1)}, {XR(rs2)}", instr
+                    return f"{m[opcode]} {XR(rd)}, {XR(rs1)}, {XR(rs2)}", instr
                 raise NotImplementedError("Decoder: Decode Error")
             else:
                 # M Extension
@@ -302,7 +407,7 @@ class DecodeBlock():
                     instr.req.rs2 = True
                     instr.mux_A = AluPortAType.RS1
                     instr.mux_B = AluPortBType.RS2
-                    return f"{m[funct3]} {XR(rd)}, {XR(rs1)}, {XR(rs2)}", instr
+                    return f"{m[opcode]} {XR(rd)}, {XR(rs1)}, {XR(rs2)}", instr
                 raise NotImplementedError("Decoder: Decode Error")
             else:
                 # M Extension
@@ -310,13 +415,13 @@ class DecodeBlock():
                     0: "mulw",
                     4: "divw", 5: "divuw", 6: "remw", 7: "remuw"
                 }
+                if funct3 not in m:
+                    raise NotImplementedError("Decoder: Decode Error")
                 instr.alu = ExecType.MDU
-                instr.op = MduOpType(funct3)
+                instr.op = MduOpType(0b1000 | funct3)
                 instr.req.rs1 = True
                 instr.req.rs2 = True
-                if funct3 in m:
-                    return f"{m[funct3]} {XR(rd)}, {XR(rs1)}, {XR(rs2)}", instr
-                raise NotImplementedError("Decoder: Decode Error")
+                return f"{m[funct3]} {XR(rd)}, {XR(rs1)}, {XR(rs2)}", instr
 
         # ---- SYSTEM / CSR ----
         if opc == 0x73:
@@ -381,91 +486,100 @@ class DecodeBlock():
                 return f"{amo}{suffix}{ord_str} {XR(rd)}, {XR(rs2)}, ({XR(rs1)})"
 
         # ---- Floating (F/D) loads/stores ----
-        if opc == 0x07:
+        # FLW rd, off(rs1): f[rd] = NaN-box(M32[rs1+off])     FLD rd, off(rs1): f[rd] = M64[rs1+off]
+        # FSW rs2, off(rs1): M32[rs1+off] = f[rs2][31:0]       FSD rs2, off(rs1): M64[rs1+off] = f[rs2]
+        # 向量访存使用同一 opcode，funct3 为 0/5/6/7
+        if opc in (0x07, 0x27) and funct3 in (2, 3):
+            name = "w" if funct3 == 2 else "d"
+            instr.alu = ExecType.LSU
+            instr.op = AluOpType.BYPASS
+            instr.req.rs1 = True
+            instr.lsu_dataflow.region = RegisterType.FPR
+            if opc == 0x27:
+                off = imm_s(inst)
+                instr.lsu_dataflow.op = (funct3 << 2) + 0b01
+                instr.region.rs2 = RegisterType.FPR
+                instr.dataflow.offset = off
+                return f"fs{name} {FR(rs2)}, {hex(off)}({XR(rs1)})", instr
             off = imm_i(inst)
-            if funct3 == 2:
-                return f"flw {FR(rd)}, {hex(off)}({XR(rs1)})"
-            if funct3 == 3:
-                return f"fld {FR(rd)}, {hex(off)}({XR(rs1)})"
-        if opc == 0x27:
-            off = imm_s(inst)
-            if funct3 == 2:
-                return f"fsw {FR(rs2)}, {hex(off)}({XR(rs1)})"
-            if funct3 == 3:
-                return f"fsd {FR(rs2)}, {hex(off)}({XR(rs1)})"
+            instr.lsu_dataflow.op = (funct3 << 2) + 0b10
+            instr.region.rd = RegisterType.FPR
+            instr.dataflow.offset = off
+            return f"fl{name} {FR(rd)}, {hex(off)}({XR(rs1)})", instr
 
-        # ---- FP fused multiply-add (F/D) ----
+        # ---- FP fused multiply-add (F/D, R4) ----
+        # FMADD  rd = rs1 * rs2 + rs3       FMSUB  rd = rs1 * rs2 - rs3
+        # FNMSUB rd = -(rs1 * rs2) + rs3    FNMADD rd = -(rs1 * rs2) - rs3
+        # fmt = inst[26:25], rs3 = inst[31:27], rm = funct3
         if opc in (0x43, 0x47, 0x4B, 0x4F):
-            # rm at funct3, fmt by funct7[1:0] via rs3 (encoded as rd for FMA family is rd, rs1, rs2, rs3)
-            fmt = get_bits(inst, 26, 25)  # heuristic; real spec uses funct2 in funct7
-            rs3 = get_bits(inst, 31, 27)  # approximate place for rs3 in these opcodes
-            # 为了人读友好，简单用 .s / .d 判别：fmt==0 => .s, fmt==1 => .d
-            suf = ".s" if fmt == 0 else (".d" if fmt == 1 else "")
-            m = {0x43: "fmadd", 0x47: "fmsub", 0x4B: "fnmsub", 0x4F: "fnmadd"}
-            op = m[opc] + suf if suf else m[opc]
-            return f"{op} {FR(rd)}, {FR(rs1)}, {FR(rs2)}, f{rs3}"
+            fmt = get_bits(inst, 26, 25)
+            m = {0x43: (FpuOpType.FMADD, "fmadd"), 0x47: (FpuOpType.FMSUB, "fmsub"),
+                 0x4B: (FpuOpType.FNMSUB, "fnmsub"), 0x4F: (FpuOpType.FNMADD, "fnmadd")}
+            op, name = m[opc]
+            fp_unit(instr, op, fmt, funct3, srcs=3)
+            return f"{name}.{FP_FMT[fmt]} {FR(rd)}, {FR(rs1)}, {FR(rs2)}, {FR(rs3)}{fp_rm_text(funct3)}", instr
 
         # ---- OP-FP (F/D) ----
+        # funct7 = funct5 << 2 | fmt；舍入类运算 rm = funct3，其余运算 funct3 选择子操作
         if opc == 0x53:
+            funct5 = funct7 >> 2
+            fmt = funct7 & 0b11
+            if fmt not in FP_FMT:
+                raise NotImplementedError("Decoder: Decode Error")
+            sf = FP_FMT[fmt]
             rm = funct3
-            # funct7 selects operation; rs2 sometimes selects conversion type
-            f7 = funct7
-            # Common group: fadd/sub/mul/div/sqrt.s/d
-            f_scalar = {
-                0x00: "fadd", 0x04: "fsub", 0x08: "fmul", 0x0C: "fdiv",
-                0x2C: "fsqrt",
-                0x10: "fsgnj", 0x11: "fsgnjn", 0x12: "fsgnjx",
-                0x14: "fmin", 0x15: "fmax",
-                0x50: "fcvt",  # fcvt.[s/d].[w/wu/l/lu] or cross s<->d
-                0x60: "fcmp",  # feq/flt/fle
-                0x70: "fclass/fmv"  # fclass, fmv.[x.w/w.x]
-            }
-            if f7 in (0x00, 0x04, 0x08, 0x0C, 0x2C):
-                suf = ".s" if rs2 == 0 else (".d" if rs2 == 1 else "")
-                base = f_scalar[f7] + suf if suf else f_scalar[f7]
-                if f7 == 0x2C:  # fsqrt
-                    return f"{base} {FR(rd)}, {FR(rs1)}"
-                return f"{base} {FR(rd)}, {FR(rs1)}, {FR(rs2)}"
-            if f7 in (0x10, 0x11, 0x12):  # fsgnj*
-                suf = ".s" if rm == 0 else (".d" if rm == 1 else "")
-                base = f_scalar[f7] + suf if suf else f_scalar[f7]
-                return f"{base} {FR(rd)}, {FR(rs1)}, {FR(rs2)}"
-            if f7 in (0x14, 0x15):  # fmin/fmax
-                suf = ".s" if rm == 0 else (".d" if rm == 1 else "")
-                base = f_scalar[f7] + suf if suf else f_scalar[f7]
-                return f"{base} {FR(rd)}, {FR(rs1)}, {FR(rs2)}"
-            if f7 == 0x60:  # compare
-                cmp_map = {0: "feq", 1: "flt", 2: "fle"}
-                if rm in cmp_map:
-                    suf = ".s" if get_bits(inst, 25, 25) == 0 else ".d"
-                    return f"{cmp_map[rm]}{suf} {XR(rd)}, {FR(rs1)}, {FR(rs2)}"
-            if f7 == 0x70:
-                # fclass (rs2=0), fmv.x.w (rs2=0) / fmv.w.x (rs2=0) — 简化处理
-                if rm == 1:  # fclass
-                    return f"fclass {XR(rd)}, {FR(rs1)}"
-                if rm == 0:
-                    # 依据位域粗略区分 x<->f 移动
-                    if rs2 == 0:
-                        return f"fmv.x.w {XR(rd)}, {FR(rs1)}"
-                    else:
-                        return f"fmv.w.x {FR(rd)}, {XR(rs1)}"
-            if f7 == 0x50:
-                # fcvt.*.*
-                # 使用 rs2 编码目标/源类型（简化版）
-                conv_map = {
-                    (0, 0): "fcvt.s.w", (0, 1): "fcvt.s.wu",
-                    (1, 0): "fcvt.d.w", (1, 1): "fcvt.d.wu",
-                    (0, 2): "fcvt.s.l", (0, 3): "fcvt.s.lu",
-                    (1, 2): "fcvt.d.l", (1, 3): "fcvt.d.lu",
-                }
-                key = (get_bits(inst, 25, 25), rs2 & 0x3)
-                if key in conv_map:
-                    return f"{conv_map[key]} {FR(rd)}, {XR(rs1)}"
-                # cross precision
-                if rs2 == 1 and get_bits(inst, 25, 25) == 0:
-                    return f"fcvt.s.d {FR(rd)}, {FR(rs1)}"
-                if rs2 == 0 and get_bits(inst, 25, 25) == 1:
-                    return f"fcvt.d.s {FR(rd)}, {FR(rs1)}"
+            # FADD/FSUB/FMUL/FDIV rd, rs1, rs2: rd = rs1 op rs2
+            arith = {0b00000: (FpuOpType.FADD, "fadd"), 0b00001: (FpuOpType.FSUB, "fsub"),
+                     0b00010: (FpuOpType.FMUL, "fmul"), 0b00011: (FpuOpType.FDIV, "fdiv")}
+            if funct5 in arith:
+                op, name = arith[funct5]
+                fp_unit(instr, op, fmt, rm, srcs=2)
+                return f"{name}.{sf} {FR(rd)}, {FR(rs1)}, {FR(rs2)}{fp_rm_text(rm)}", instr
+            # FSQRT rd, rs1
+            if funct5 == 0b01011 and rs2 == 0:
+                fp_unit(instr, FpuOpType.FSQRT, fmt, rm)
+                return f"fsqrt.{sf} {FR(rd)}, {FR(rs1)}{fp_rm_text(rm)}", instr
+            # FSGNJ/FSGNJN/FSGNJX rd, rs1, rs2: rd = {sign, rs1[xlen-2:0]}
+            sgnj = {0: (FpuOpType.FSGNJ, "fsgnj"), 1: (FpuOpType.FSGNJN, "fsgnjn"), 2: (FpuOpType.FSGNJX, "fsgnjx")}
+            if funct5 == 0b00100 and funct3 in sgnj:
+                op, name = sgnj[funct3]
+                fp_unit(instr, op, fmt, srcs=2)
+                return f"{name}.{sf} {FR(rd)}, {FR(rs1)}, {FR(rs2)}", instr
+            # FMIN/FMAX rd, rs1, rs2
+            if funct5 == 0b00101 and funct3 in (0, 1):
+                fp_unit(instr, FpuOpType.FMAX if funct3 else FpuOpType.FMIN, fmt, srcs=2)
+                return f"{'fmax' if funct3 else 'fmin'}.{sf} {FR(rd)}, {FR(rs1)}, {FR(rs2)}", instr
+            # FCVT.S.D / FCVT.D.S rd, rs1: rs2 为源格式
+            if funct5 == 0b01000 and rs2 == 1 - fmt:
+                fp_unit(instr, FpuOpType.FCVT_F2F, fmt, rm)
+                return f"fcvt.{sf}.{FP_FMT[rs2]} {FR(rd)}, {FR(rs1)}{fp_rm_text(rm)}", instr
+            # FEQ/FLT/FLE rd, rs1, rs2: x[rd] = rs1 cmp rs2
+            cmp_map = {2: (FpuOpType.FEQ, "feq"), 1: (FpuOpType.FLT, "flt"), 0: (FpuOpType.FLE, "fle")}
+            if funct5 == 0b10100 and funct3 in cmp_map:
+                op, name = cmp_map[funct3]
+                fp_unit(instr, op, fmt, srcs=2, rd=RegisterType.GPR)
+                return f"{name}.{sf} {XR(rd)}, {FR(rs1)}, {FR(rs2)}", instr
+            # FCVT.{W,WU,L,LU}.fmt rd, rs1 / FCVT.fmt.{W,WU,L,LU} rd, rs1: rs2 为整数宽度
+            ints = ("w", "wu", "l", "lu")
+            if funct5 == 0b11000 and rs2 < 4:
+                fp_unit(instr, FpuOpType.FCVT_F2I, fmt, rm, rd=RegisterType.GPR, width=rs2)
+                return f"fcvt.{ints[rs2]}.{sf} {XR(rd)}, {FR(rs1)}{fp_rm_text(rm)}", instr
+            if funct5 == 0b11010 and rs2 < 4:
+                fp_unit(instr, FpuOpType.FCVT_I2F, fmt, rm, rs1=RegisterType.GPR, width=rs2)
+                return f"fcvt.{sf}.{ints[rs2]} {FR(rd)}, {XR(rs1)}{fp_rm_text(rm)}", instr
+            # FMV.X.W / FMV.X.D rd, rs1: x[rd] = 原样搬运 (单精度符号扩展)    FCLASS rd, rs1: x[rd] = 10 位分类掩码
+            xw = "w" if fmt == 0 else "d"
+            if funct5 == 0b11100 and rs2 == 0 and funct3 == 0:
+                fp_unit(instr, FpuOpType.FMV_F2X, fmt, rd=RegisterType.GPR)
+                return f"fmv.x.{xw} {XR(rd)}, {FR(rs1)}", instr
+            if funct5 == 0b11100 and rs2 == 0 and funct3 == 1:
+                fp_unit(instr, FpuOpType.FCLASS, fmt, rd=RegisterType.GPR)
+                return f"fclass.{sf} {XR(rd)}, {FR(rs1)}", instr
+            # FMV.W.X / FMV.D.X rd, rs1: f[rd] = x[rs1] (单精度装箱)
+            if funct5 == 0b11110 and rs2 == 0 and funct3 == 0:
+                fp_unit(instr, FpuOpType.FMV_X2F, fmt, rs1=RegisterType.GPR)
+                return f"fmv.{xw}.x {FR(rd)}, {XR(rs1)}", instr
+            raise NotImplementedError("Decoder: Decode Error")
 
         # ---------------------------
         # Vector extension (RVV)
@@ -708,91 +822,46 @@ class DecodeBlock():
             return f".instr {{{hex(inst & 0xFFFFFFFF)}}}"
 
         # ---- Vector Loads / Stores (LOAD-FP / STORE-FP with vector width encoding)
-        if opc in (0x07, 0x27) and funct3 == 0b111:
-            # Fields according to spec:
+        if opc in (0x07, 0x27) and funct3 in (0b000, 0b101, 0b110, 0b111):
+            # Fields according to spec (RVV 1.0):
             vm = get_bits(inst, 25, 25)
-            width = get_bits(inst, 14, 12)     # EEW encoding (with mew)
             mew = get_bits(inst, 28, 28)
             mop = get_bits(inst, 27, 26)       # addressing mode
             nf = get_bits(inst, 31, 29)        # segments-1 or #whole regs-1
-            off = imm_i(inst) if opc == 0x07 else imm_s(inst)
+            umop = get_bits(inst, 24, 20)      # lumop / sumop (unit-stride), rs2 (strided), vs2 (indexed)
             base = xname(rs1)
-
-            # Determine EEW and choose mnemonic stem
-            def eew_text(mew, width):
-                table = {
-                    (0, 0b000): "8",
-                    (0, 0b101): "16",
-                    (0, 0b110): "32",
-                    (0, 0b111): "64",
-                }
-                return table.get((mew, width), None)
-
-            eew = eew_text(mew, width)
+            eew = {0b000: 8, 0b101: 16, 0b110: 32, 0b111: 64}[funct3]
             is_load = (opc == 0x07)
+            vreg = vname(rd)                   # vd (load) / vs3 (store)
+            mask = "" if vm == 1 else ", v0.t"
+            seg = f"seg{nf + 1}" if nf else ""
+            if mew:
+                return f".instr {{{hex(inst & 0xFFFFFFFF)}}}"
 
-            # mop: 00 unit-stride, 01 strided, 10 indexed-ordered, 11 indexed-unordered
+            # mop: 00 unit-stride, 01 indexed-unordered, 10 strided, 11 indexed-ordered
             if mop == 0b00:
-                # unit-stride / whole / mask / fault-only-first 由 lumop/sumop 指定（imm 高位）
-                lumop = get_bits(inst, 24, 20)
-                if is_load:
-                    # mask/whole/fault-only-first
-                    if lumop == 0b01001:
-                        return f"vlm.v {vname(rd)}, {hex(off)}({base})"
-                    if lumop == 0b00100:
-                        return f"vl1r.v {vname(rd)}, {hex(off)}({base})"
-                    if lumop == 0b10000:
-                        # fault-only-first
-                        if eew is None:
-                            return f".instr {{{hex(inst & 0xFFFFFFFF)}}}"
-                        return f"vle{eew}.ff.v {vname(rd)}, {hex(off)}({base})"
-                    # regular unit-stride
-                    if eew is None:
-                        return f".instr {{{hex(inst & 0xFFFFFFFF)}}}"
-                    return f"vle{eew}.v {vname(rd)}, {hex(off)}({base}){'' if vm==1 else ''}"
-                else:
-                    sumop = get_bits(inst, 24, 20)
-                    if sumop == 0b01001:
-                        return f"vsm.v {vname(rs2)}, {hex(off)}({base})"
-                    if sumop == 0b00100:
-                        return f"vs1r.v {vname(rs2)}, {hex(off)}({base})"
-                    if eew is None:
-                        return f".instr {{{hex(inst & 0xFFFFFFFF)}}}"
-                    return f"vse{eew}.v {vname(rs2)}, {hex(off)}({base})"
-
-            if mop == 0b01:
-                # strided: rs1 holds base, stride in rs2 (load) / rs2 data (store), stride in imm[??] → 规范：stride 在 rs2?（按 spec 为 x寄存器 rs2）
-                if eew is None:
-                    return f".instr {{{hex(inst & 0xFFFFFFFF)}}}"
-                # 载入：vlseXX.v vd, (rs1), rs2 ; 存储：vsseXX.v vs2, (rs1), rs2
-                if is_load:
-                    return f"vlse{eew}.v {vname(rd)}, ({base}), {xname(rs2)}"
-                else:
-                    return f"vsse{eew}.v {vname(rs2)}, ({base}), {xname(get_bits(inst, 24, 20))}"
-
-            if mop in (0b10, 0b11):
-                # indexed-ordered (10) / indexed-unordered (11)
-                if eew is None:
-                    return f".instr {{{hex(inst & 0xFFFFFFFF)}}}"
-                stem = "vloxei" if mop == 0b10 else "vluxei"
-                stem_s = "vsoxei" if mop == 0b10 else "vsuxei"
-                if is_load:
-                    return f"{stem}{eew}.v {vname(rd)}, ({base}), {vname(rs2)}"
-                else:
-                    return f"{stem_s}{eew}.v {vname(rs2)}, ({base}), {vname(get_bits(inst, 24, 20))}"
-
-            # Segmented（nf>0）：单位步长多字段（vlseg<nf>eXX / vsseg<nf>eXX）或 whole-register 多组
-            if nf != 0:
-                n = nf + 1
-                if eew is None:
-                    return f".instr {{{hex(inst & 0xFFFFFFFF)}}}"
-                if is_load:
-                    return f"vlseg{n}e{eew}.v {vname(rd)}..{vname((rd + n - 1) % 32)}, {hex(off)}({base})"
-                else:
-                    return f"vsseg{n}e{eew}.v {vname(rs2)}..{vname((rs2 + n - 1) % 32)}, {hex(off)}({base})"
-
-            # 兜底
-            return f".instr {{{hex(inst & 0xFFFFFFFF)}}}"
+                if umop == 0b01011:
+                    # 掩码: vlm.v / vsm.v
+                    return f"{'vlm' if is_load else 'vsm'}.v {vreg}, ({base})"
+                if umop == 0b01000:
+                    # 整寄存器: vl<nf>re<eew>.v / vs<nf>r.v
+                    if is_load:
+                        return f"vl{nf + 1}re{eew}.v {vreg}, ({base})"
+                    return f"vs{nf + 1}r.v {vreg}, ({base})"
+                if umop == 0b10000 and is_load:
+                    # fault-only-first
+                    return f"vl{seg}e{eew}ff.v {vreg}, ({base}){mask}"
+                if umop == 0b00000:
+                    return f"{'vl' if is_load else 'vs'}{seg}e{eew}.v {vreg}, ({base}){mask}"
+                return f".instr {{{hex(inst & 0xFFFFFFFF)}}}"
+
+            if mop == 0b10:
+                # strided: stride 在 x[rs2]
+                return f"{'vl' if is_load else 'vs'}s{seg}e{eew}.v {vreg}, ({base}), {xname(umop)}{mask}"
+
+            # indexed-unordered (01) / indexed-ordered (11): 下标在 vs2，宽度为 eew
+            stem = ("vl" if is_load else "vs") + ("ox" if mop == 0b11 else "ux")
+            return f"{stem}{seg}ei{eew}.v {vreg}, ({base}), {vname(umop)}{mask}"
 
 # ---------------------------
 # Compressed (C) decoder (subset)
@@ -821,6 +890,7 @@ class DecodeBlock():
                 n = (get_bits(inst, 12, 11) << 4) | (get_bits(inst, 10, 7) << 6) | (get_bits(inst, 6, 6) << 2) | (get_bits(inst, 5, 5) << 3)
                 rd_ = 8 + get_bits(inst, 4, 2)
                 instr.alu = ExecType.ALU
+                instr.op = AluOpType.ADD
                 instr.dataflow.rs1 = 2
                 instr.dataflow.imm = n
                 instr.dataflow.rd = rd_
@@ -833,7 +903,7 @@ class DecodeBlock():
                 
                 return f"c.addi4spn {XR(rd_)}, {n}", instr
             if funct3 == 0b001:
-                # c.fld rd', uimm(xr1') -> lw rd, offset(rs1)
+                # c.fld rd', uimm(xr1') -> fld rd, offset(rs1)
                 u = (get_bits(inst, 6, 5) << 6) | (get_bits(inst, 12, 10) << 3)
                 rd_ = 8 + get_bits(inst, 4, 2)
                 rs1_ = 8 + get_bits(inst, 9, 7)
@@ -842,9 +912,11 @@ class DecodeBlock():
                 instr.dataflow.rs1 = rs1_
                 instr.dataflow.rd = rd_
                 instr.req.rs1 = True
-                instr.lsu_op = LsuOpType.LW
+                instr.lsu_dataflow.op = LsuOpType.LD.value
+                instr.lsu_dataflow.region = RegisterType.FPR
+                instr.region.rd = RegisterType.FPR
                 instr.dataflow.offset = u
-                return f"c.lw {XR(rd_)}, {u}({XR(rs1_)})", instr
+                return f"c.fld {FR(rd_)}, {u}({XR(rs1_)})", instr
             if funct3 == 0b010:
                 # c.lw rd', uimm(xr1') -> lw rd, offset(rs1)
                 u = (get_bits(inst, 5, 5) << 6) | (get_bits(inst, 12, 10) << 3) | (get_bits(inst, 6, 6) << 2)
@@ -855,12 +927,13 @@ class DecodeBlock():
                 instr.dataflow.rs1 = rs1_
                 instr.dataflow.rd = rd_
                 instr.req.rs1 = True
-                instr.lsu_op = LsuOpType.LW
+                instr.lsu_dataflow.op = LsuOpType.LW.value
+                instr.lsu_dataflow.region = RegisterType.GPR
                 instr.dataflow.offset = u
                 return f"c.lw {XR(rd_)}, {u}({XR(rs1_)})", instr
             if funct3 == 0b011:
                 # c.ld
-                u = (get_bits(inst, 5, 5) << 6) | (get_bits(inst, 12, 10) << 3) | (get_bits(inst, 6, 6) << 2)
+                u = (get_bits(inst, 6, 5) << 6) | (get_bits(inst, 12, 10) << 3)
                 rd_ = 8 + get_bits(inst, 4, 2)
                 rs1_ = 8 + get_bits(inst, 9, 7)
                 instr.alu = ExecType.LSU
@@ -868,7 +941,8 @@ class DecodeBlock():
                 instr.req.rs1 = True
                 instr.dataflow.rs1 = rs1_
                 instr.dataflow.rd = rd_
-                instr.lsu_op = LsuOpType.LD
+                instr.lsu_dataflow.op = LsuOpType.LD.value
+                instr.lsu_dataflow.region = RegisterType.GPR
                 instr.dataflow.offset = u
                 return f"c.ld {XR(rd_)}, {u}({XR(rs1_)})", instr
             if funct3 == 0b110:
@@ -882,12 +956,13 @@ class DecodeBlock():
                 instr.dataflow.rs2 = rs2_
                 instr.req.rs1 = True
                 instr.req.rs2 = True
-                instr.lsu_op = LsuOpType.SW
+                instr.lsu_dataflow.op = LsuOpType.SW.value
+                instr.lsu_dataflow.region = RegisterType.GPR
                 instr.dataflow.offset = u
                 return f"c.sw {XR(rs2_)}, {u}({XR(rs1_)})", instr
             if funct3 == 0b111:
                 # c.sd
-                u = (get_bits(inst, 5, 5) << 6) | (get_bits(inst, 12, 10) << 3) | (get_bits(inst, 6, 6) << 2)
+                u = (get_bits(inst, 6, 5) << 6) | (get_bits(inst, 12, 10) << 3)
                 rs2_ = 8 + get_bits(inst, 4, 2)
                 rs1_ = 8 + get_bits(inst, 9, 7)
                 instr.alu = ExecType.LSU
@@ -896,9 +971,10 @@ class DecodeBlock():
                 instr.dataflow.rs2 = rs2_
                 instr.req.rs1 = True
                 instr.req.rs2 = True
-                instr.lsu_op = LsuOpType.SD
+                instr.lsu_dataflow.op = LsuOpType.SD.value
+                instr.lsu_dataflow.region = RegisterType.GPR
                 instr.dataflow.offset = u
-                return f"c.sd {XR(rs2_)}, {u}({XR(rs1_)})"
+                return f"c.sd {XR(rs2_)}, {u}({XR(rs1_)})", instr
 
         # Quadrant 1 (op=01)
         if op == 0b01:
@@ -924,36 +1000,47 @@ class DecodeBlock():
                 instr.op = AluOpType.BYPASS
                 instr.dataflow.rd = rd
                 instr.mux_A = AluPortAType.IMM
+                instr.mux_B = AluPortBType.EMPTY
                 instr.dataflow.imm = imm
                 return f"c.li {XR(rd)}, {imm}", instr
             if funct3 == 0b011:
                 rd = get_bits(inst, 11, 7)
                 imm = sign_extend((get_bits(inst, 12, 12) << 17) | (get_bits(inst, 6, 2) << 12), 18)
                 if rd == 2:
+                    imm = sign_extend((get_bits(inst, 12, 12) << 9) | (get_bits(inst, 4, 3) << 7) |
+                                      (get_bits(inst, 5, 5) << 6) | (get_bits(inst, 2, 2) << 5) |
+                                      (get_bits(inst, 6, 6) << 4), 10)
                     instr.alu = ExecType.ALU
-                    instr.op = AluOpType.BYPASS
+                    instr.op = AluOpType.ADD
                     instr.dataflow.rd = rd
-                    instr.mux_A = AluPortAType.IMM
+                    instr.dataflow.rs1 = rd
+                    instr.req.rs1 = True
+                    instr.mux_A = AluPortAType.RS1
+                    instr.mux_B = AluPortBType.IMM
                     instr.dataflow.imm = imm
                     return f"c.addi16sp x2, {imm}", instr
                 instr.alu = ExecType.ALU
-                instr.op = AluOpType.ADD
+                instr.op = AluOpType.BYPASS
                 instr.dataflow.rd = rd
-                instr.dataflow.rs1 = rd
-                instr.mux_A = AluPortAType.RS1
-                instr.mux_B = AluPortBType.IMM
+                instr.mux_A = AluPortAType.IMM
+                instr.mux_B = AluPortBType.EMPTY
                 instr.dataflow.imm = imm
                 return f"c.lui {XR(rd)}, {imm}", instr
             if funct3 == 0b001:
-                # c.jal (RV32), treat as jal x1
-                off = sign_extend(
-                    (get_bits(inst, 12, 12) << 11) | (get_bits(inst, 8, 8) << 10) |
-                    (get_bits(inst, 10, 9) << 8) | (get_bits(inst, 6, 6) << 7) |
-                    (get_bits(inst, 7, 7) << 6) | (get_bits(inst, 2, 2) << 5) |
-                    (get_bits(inst, 11, 11) << 4) | (get_bits(inst, 5, 3) << 1), 12
-                )
-                raise NotImplementedError("Decoder: Illegal Instruction")
-                return f"c.jal x1, {off}"
+                # c.addiw (RV64; RV32 下为 c.jal)
+                imm = sign_extend((get_bits(inst, 12, 12) << 5) | get_bits(inst, 6, 2), 6)
+                rd = get_bits(inst, 11, 7)
+                if rd == 0:
+                    raise NotImplementedError("Decoder: Illegal Instruction")
+                instr.alu = ExecType.ALU
+                instr.op = AluOpType.ADDW
+                instr.dataflow.rs1 = rd
+                instr.dataflow.rd = rd
+                instr.dataflow.imm = imm
+                instr.req.rs1 = True
+                instr.mux_A = AluPortAType.RS1
+                instr.mux_B = AluPortBType.IMM
+                return f"c.addiw {XR(rd)}, {imm}", instr
             if funct3 == 0b101:
                 # c.j
                 off = sign_extend(
@@ -1003,7 +1090,7 @@ class DecodeBlock():
                 instr.dataflow.offset = off
                 instr.pc_effect.valid = True
                 instr.pc_effect.mux_A = PCEffectPortAType.PC
-                return f"c.bnez {XR(rs1_)}, {off}"
+                return f"c.bnez {XR(rs1_)}, {off}", instr
             if funct3 == 0b100:
                 subop = get_bits(inst, 11, 10)
                 rs1_ = 8 + get_bits(inst, 9, 7)
@@ -1041,15 +1128,15 @@ class DecodeBlock():
                     instr.dataflow.imm = imm
                     instr.mux_A = AluPortAType.RS1
                     instr.mux_B = AluPortBType.IMM
-                    return f"c.andi {XR(rs1_)}, {imm}"
+                    return f"c.andi {XR(rs1_)}, {imm}", instr
                 if subop == 0b11:
                     fun = get_bits(inst, 6, 5)
                     m = {0: "c.sub", 1: "c.xor", 2: "c.or", 3: "c.and"}
                     instr_op = {0: AluOpType.SUB, 1: AluOpType.XOR, 2: AluOpType.OR, 3: AluOpType.AND}
                     instr.alu = ExecType.ALU
-                    instr.op = AluOpType.AND
+                    instr.op = instr_op[fun]
                     instr.dataflow.rs1 = rs1_
-                    instr.dataflow.rs2 = instr_op[fun]
+                    instr.dataflow.rs2 = rs2_
                     instr.dataflow.rd = rs1_
                     instr.req.rs1 = True
                     instr.req.rs2 = True
@@ -1063,45 +1150,94 @@ class DecodeBlock():
                 # c.slli
                 rd = get_bits(inst, 11, 7)
                 sh = (get_bits(inst, 12, 12) << 5) | get_bits(inst, 6, 2)
-                return f"slli {XR(rd)}, {XR(rd)}, {sh}"
-            if funct3 == 0b010:
-                # c.lwsp
-                rd = get_bits(inst, 11, 7)
-                u = (get_bits(inst, 3, 2) << 6) | (get_bits(inst, 12, 12) << 5) | (get_bits(inst, 6, 4) << 2)
-                return f"lw {XR(rd)}, {u}(x2)"
-            if funct3 == 0b011:
-                # c.ldsp
+                instr.alu = ExecType.ALU
+                instr.op = AluOpType.SLL
+                instr.dataflow.rs1 = rd
+                instr.dataflow.rd = rd
+                instr.dataflow.imm = sh
+                instr.req.rs1 = True
+                instr.mux_A = AluPortAType.RS1
+                instr.mux_B = AluPortBType.IMM
+                return f"slli {XR(rd)}, {XR(rd)}, {sh}", instr
+            if funct3 in (0b010, 0b011):
                 rd = get_bits(inst, 11, 7)
-                u = (get_bits(inst, 4, 2) << 6) | (get_bits(inst, 12, 12) << 5) | (get_bits(inst, 6, 5) << 3)
-                return f"ld {XR(rd)}, {u}(x2)"
+                if funct3 == 0b010:
+                    # c.lwsp
+                    u = (get_bits(inst, 3, 2) << 6) | (get_bits(inst, 12, 12) << 5) | (get_bits(inst, 6, 4) << 2)
+                    lsu_op, name = LsuOpType.LW, "lw"
+                else:
+                    # c.ldsp
+                    u = (get_bits(inst, 4, 2) << 6) | (get_bits(inst, 12, 12) << 5) | (get_bits(inst, 6, 5) << 3)
+                    lsu_op, name = LsuOpType.LD, "ld"
+                instr.alu = ExecType.LSU
+                instr.op = AluOpType.BYPASS
+                instr.dataflow.rs1 = 2
+                instr.dataflow.rd = rd
+                instr.dataflow.offset = u
+                instr.req.rs1 = True
+                instr.lsu_dataflow.op = lsu_op.value
+                instr.lsu_dataflow.region = RegisterType.GPR
+                return f"{name} {XR(rd)}, {u}(x2)", instr
             if funct3 == 0b100:
                 rs2 = get_bits(inst, 6, 2)
                 rd = get_bits(inst, 11, 7)
+                link = get_bits(inst, 12, 12)
                 if rs2 == 0:
                     if rd == 0:
+                        # c.ebreak / reserved
                         return f".instr {{{hex(inst & 0xFFFF)}}}"
-                    # c.jr
-                    return f"jalr x0, 0({XR(rd)})"
+                    # c.jr / c.jalr: pc <= rs1, rd <= pc + 2
+                    instr.alu = ExecType.ALU
+                    instr.op = AluOpType.ADD
+                    instr.dataflow.rs1 = rd
+                    instr.dataflow.rd = 1 if link else 0
+                    instr.dataflow.imm = 2
+                    instr.dataflow.offset = 0
+                    instr.req.rs1 = True
+                    instr.mux_A = AluPortAType.PC
+                    instr.mux_B = AluPortBType.IMM
+                    instr.pc_effect.valid = True
+                    instr.pc_effect.mux_A = PCEffectPortAType.RS1
+                    return f"jalr {XR(1 if link else 0)}, 0({XR(rd)})", instr
                 if rd == 0:
                     return f".instr {{{hex(inst & 0xFFFF)}}}"
-                if rs2 == 1 and rd == 1:
-                    # c.jalr (rare path)
-                    return f"jalr x1, 0(x1)"
-                if rd == 1 and rs2 != 0:
+                instr.alu = ExecType.ALU
+                instr.dataflow.rd = rd
+                instr.req.rs1 = True
+                instr.mux_A = AluPortAType.RS1
+                if link:
                     # c.add
-                    return f"add {XR(rd)}, {XR(rd)}, {XR(get_bits(inst, 6, 2))}"
+                    instr.op = AluOpType.ADD
+                    instr.dataflow.rs1 = rd
+                    instr.dataflow.rs2 = rs2
+                    instr.req.rs2 = True
+                    instr.mux_B = AluPortBType.RS2
+                    return f"add {XR(rd)}, {XR(rd)}, {XR(rs2)}", instr
                 # c.mv
-                return f"mv {XR(rd)}, {XR(get_bits(inst, 6, 2))}"
-            if funct3 == 0b110:
-                # c.swsp
-                rs2 = get_bits(inst, 6, 2)
-                u = (get_bits(inst, 8, 7) << 6) | (get_bits(inst, 12, 9) << 2)
-                return f"sw {XR(rs2)}, {u}(x2)"
-            if funct3 == 0b111:
-                # c.sdsp
+                instr.op = AluOpType.BYPASS
+                instr.dataflow.rs1 = rs2
+                instr.mux_B = AluPortBType.EMPTY
+                return f"mv {XR(rd)}, {XR(rs2)}", instr
+            if funct3 in (0b110, 0b111):
                 rs2 = get_bits(inst, 6, 2)
-                u = (get_bits(inst, 9, 7) << 6) | (get_bits(inst, 12, 10) << 3)
-                return f"sd {XR(rs2)}, {u}(x2)"
+                if funct3 == 0b110:
+                    # c.swsp
+                    u = (get_bits(inst, 8, 7) << 6) | (get_bits(inst, 12, 9) << 2)
+                    lsu_op, name = LsuOpType.SW, "sw"
+                else:
+                    # c.sdsp
+                    u = (get_bits(inst, 9, 7) << 6) | (get_bits(inst, 12, 10) << 3)
+                    lsu_op, name = LsuOpType.SD, "sd"
+                instr.alu = ExecType.LSU
+                instr.op = AluOpType.BYPASS
+                instr.dataflow.rs1 = 2
+                instr.dataflow.rs2 = rs2
+                instr.dataflow.offset = u
+                instr.req.rs1 = True
+                instr.req.rs2 = True
+                instr.lsu_dataflow.op = lsu_op.value
+                instr.lsu_dataflow.region = RegisterType.GPR
+                return f"{name} {XR(rs2)}, {u}(x2)", instr
 
             return f".instr {{{hex(inst & 0xFFFF)}}}"
 
@@ -1126,4 +1262,103 @@ class DecodeBlock():
             # only keep low 16 bits for safety
             return True, self.decode_c(opcode & 0xFFFF, pc, order)
         else:
-            return False, self.decode_32(opcode & 0xFFFFFFFF, pc, order)
\ No newline at end of file
+            return False, self.decode_32(opcode & 0xFFFFFFFF, pc, order)
+
+    def decode_pair(self, opcode: int, next_opcode: int | None, pc: int = -1, order: int = -1) -> tuple[bool, int, tuple[str, InstrUnit | None]]:
+        """
+        译码一条指令；fusion 打开时先尝试与紧随其后的指令融合
+        融合后的指令占用一个译码槽，执行一次
+
+        Returns:
+            (compress, 消耗的字节数, (文本, InstrUnit))
+        """
+        if self.fusion and next_opcode is not None:
+            first = opcode & 0xFFFF if is_compressed(opcode) else opcode & 0xFFFFFFFF
+            second = next_opcode & 0xFFFF if is_compressed(next_opcode) else next_opcode & 0xFFFFFFFF
+            fused = self.fuse(first, second, pc, order)
+            if fused is not None:
+                return False, inst_size(first) + inst_size(second), fused
+        compress, code = self.decode_to_human(opcode, pc, order)
+        return compress, 2 if compress else 4, code
+
+    def fuse(self, first: int, second: int, pc: int = -1, order: int = -1) -> tuple[str, InstrUnit] | None:
+        """
+        识别可融合的指令对，返回融合后的单条内部操作
+        只在第一条的结果被第二条覆盖时融合 (不需要写两个目的寄存器)
+        """
+        size = inst_size(first) + inst_size(second)
+        instr = InstrUnit()
+        instr.dataflow.pc = pc
+        instr.order = order
+
+        # lui rd, U + addi(w) rd, rd, I -> li rd, (U + I)
+        a = _lui(first)
+        if a is not None:
+            b = _addi(second)
+            if b is None or a[0] != b[0] or b[0] != b[1]:
+                return None
+            rd, value = a[0], a[1] + b[2]
+            if b[3]:
+                value = sign_extend(value & 0xFFFFFFFF, 32)
+            instr.alu = ExecType.ALU
+            instr.op = AluOpType.BYPASS
+            instr.dataflow.rd = rd
+            instr.dataflow.imm = value
+            instr.mux_A = AluPortAType.IMM
+            instr.mux_B = AluPortBType.EMPTY
+            instr.fused = FusionType.LUI_ADDI
+            text = f"lui.addi{'w' if b[3] else ''} {XR(rd)}, {hex(value)}"
+            return text, instr
+
+        a = _auipc(first)
+        if a is not None:
+            rd, upper = a
+            # auipc rd, U + jalr rd, I(rd) -> jal rd, U + I
+            b = _jalr(second)
+            if b is not None and b[0] == rd and b[1] == rd and rd != 0:
+                # 与 jalr 相同清除目标地址的第 0 位 (pc 为偶数)
+                off = (upper + b[2]) & ~1
+                instr.alu = ExecType.ALU
+                instr.op = AluOpType.ADD
+                instr.dataflow.rd = rd
+                instr.dataflow.imm = size
+                instr.dataflow.offset = off
+                instr.mux_A = AluPortAType.PC
+                instr.mux_B = AluPortBType.IMM
+                instr.pc_effect.valid = True
+                instr.pc_effect.mux_A = PCEffectPortAType.PC
+                instr.fused = FusionType.AUIPC_JALR
+                return f"auipc.jalr {XR(rd)}, {hex(off)}", instr
+            # auipc rd, U + ld rd, I(rd) -> ld rd, [pc + U + I]
+            b = _ld(second)
+            if b is not None and b[0] == rd and b[1] == rd and rd != 0:
+                addr = pc + upper + b[2]
+                instr.alu = ExecType.LSU
+                instr.dataflow.rd = rd
+                instr.dataflow.rs1 = 0
+                instr.dataflow.offset = addr
+                instr.req.rs1 = True
+                instr.lsu_dataflow.op = LsuOpType.LD.value
+                instr.lsu_dataflow.region = RegisterType.GPR
+                instr.fused = FusionType.AUIPC_LD
+                return f"auipc.ld {XR(rd)}, {hex(addr)}", instr
+            return None
+
+        # slli rd, rs, N + srli rd, rd, N -> rd = zext(rs, 64 - N)
+        a = _shift(first, True)
+        if a is not None:
+            b = _shift(second, False)
+            if b is None or b[0] != a[0] or b[1] != a[0] or b[2] != a[2] or a[2] == 0 or a[0] == 0:
+                return None
+            rd, rs, sh = a
+            instr.alu = ExecType.ALU
+            instr.op = AluOpType.AND
+            instr.dataflow.rd = rd
+            instr.dataflow.rs1 = rs
+            instr.dataflow.imm = (1 << (XLEN - sh)) - 1
+            instr.req.rs1 = True
+            instr.mux_A = AluPortAType.RS1
+            instr.mux_B = AluPortBType.IMM
+            instr.fused = FusionType.SLLI_SRLI
+            return f"slli.srli {XR(rd)}, {XR(rs)}, {sh}", instr
+        return None
@@ -0,0 +1,206 @@
+# 译码器的参考表 (rtl/decode.sv 的测试向量)
+#
+# 对每个指令字调用 DecodeBlock.decode_to_human (OP-V 回落到 vector.vector_instr，与执行模型相同)，
+# 把 InstrUnit 的字段压成定长记录:
+#   rvc   全部 65536 个 16 位编码 (低 2 位为 11 的是 32 位指令的低半字，记为非法)
+#   rv32  按 (opcode[6:2], funct3, funct7) 分层抽样，每层 per 个，其余位随机
+# 译码按块分给进程池；输出 <part>.bin (RECORD 的紧凑二进制) 和 <part>.hex ($readmemh，一行一条)
+# manifest.json 记录本文件及其传递导入的 sim 模块的源码哈希和抽样参数，没有变化的部分不重新生成
+#
+# 字段 (hex 中按 FIELDS 的顺序高位在前):
+#   illegal       没有得到 InstrUnit (译码器报错或未实现)，其余字段为 0
+#   exec op       ExecType / 运算类型枚举的值，ERROR (-1) 截断为全 1
+#   lsu_op        LsuOpType 的值；mux_a / mux_b 为 AluPortAType / AluPortBType
+#   pc_effect     valid << 2 | PCEffectPortAType；req 为 rs3 rs2 rs1 的读使能
+#   region        rd rs1 rs2 rs3 的 RegisterType，每个 4 位 (rd 在最高位)
+#   fpu           fmt << 5 | rm << 2 | width
+#
+#   python -m sim.decode_golden decode_golden/ -j 8
+
+import argparse, ast, hashlib, json, os, sys
+from enum import Enum
+import numpy as np
+from .decode import DecodeBlock, is_compressed
+from .instr_unit import *
+from .moduleConstant import REGISTER_MASK
+from .vector import is_vector, vector_instr
+from .util import writememh
+
+# (名称, dtype, 十六进制位数)
+FIELDS = (
+    ('instr', '<u4', 8),
+    ('illegal', 'u1', 1),
+    ('exec', 'u1', 1),
+    ('op', 'u1', 2),
+    ('lsu_op', 'u1', 2),
+    ('mux_a', 'u1', 1),
+    ('mux_b', 'u1', 1),
+    ('pc_effect', 'u1', 1),
+    ('req', 'u1', 1),
+    ('region', '<u2', 4),
+    ('rd', 'u1', 2),
+    ('rs1', 'u1', 2),
+    ('rs2', 'u1', 2),
+    ('rs3', 'u1', 2),
+    ('csr', '<u2', 3),
+    ('fpu', 'u1', 2),
+    ('imm', '<u8', 16),
+    ('offset', '<u8', 16),
+)
+RECORD = np.dtype([(name, t) for name, t, _ in FIELDS])
+
+CHUNK = 4096
+
+_decoder = None
+
+
+def _v(x) -> int:
+    return x.value if isinstance(x, Enum) else int(x)
+
+def _record(decoder: DecodeBlock, word: int, rvc: bool) -> tuple:
+    instr = None
+    if rvc and not is_compressed(word):
+        return (word, 1) + (0,) * (len(FIELDS) - 2)
+    try:
+        code = decoder.decode_to_human(word, 0, 0)[1]
+        instr = code[1] if isinstance(code, tuple) else None
+    except NotImplementedError:
+        pass
+    if instr is None and not is_compressed(word) and is_vector(word):
+        instr = vector_instr(word)
+    if instr is None:
+        return (word, 1) + (0,) * (len(FIELDS) - 2)
+    df, region, fd = instr.dataflow, instr.region, instr.fpu_dataflow
+    return (word, 0, _v(instr.alu) & 0xf, _v(instr.op) & 0xff, _v(instr.lsu_dataflow.op) & 0x1f,
+            _v(instr.mux_A) & 0xf, _v(instr.mux_B) & 0xf,
+            int(instr.pc_effect.valid) << 2 | _v(instr.pc_effect.mux_A) & 0b11,
+            int(instr.req.rs3) << 2 | int(instr.req.rs2) << 1 | int(instr.req.rs1),
+            (_v(region.rd) & 0xf) << 12 | (_v(region.rs1) & 0xf) << 8 | (_v(region.rs2) & 0xf) << 4
+            | _v(region.rs3) & 0xf,
+            df.rd & 0x1f, df.rs1 & 0x1f, df.rs2 & 0x1f, df.rs3 & 0x1f, df.csr & 0xfff,
+            (fd.fmt & 1) << 5 | (fd.rm & 0b111) << 2 | fd.width & 0b11,
+            df.imm & REGISTER_MASK, df.offset & REGISTER_MASK)
+
+def decode_fields(words, rvc: bool = False) -> np.ndarray:
+    """
+    指令字数组 -> RECORD 数组 (在当前进程中译码)；rvc 时按 16 位编码处理，32 位指令的低半字为非法
+    """
+    global _decoder
+    if _decoder is None:
+        _decoder = DecodeBlock()
+    return np.array([_record(_decoder, w, rvc) for w in np.asarray(words).tolist()], dtype=RECORD)
+
+def decode_parallel(words: np.ndarray, rvc: bool = False, jobs: int | None = None) -> np.ndarray:
+    chunks = [(words[i:i + CHUNK], rvc) for i in range(0, len(words), CHUNK)]
+    if jobs == 1 or len(chunks) <= 1:
+        parts = [decode_fields(*c) for c in chunks]
+    else:
+        from multiprocessing import Pool
+        with Pool(jobs) as pool:
+            parts = pool.starmap(decode_fields, chunks, 1)
+    return np.concatenate(parts) if parts else np.empty(0, dtype=RECORD)
+
+############
+# 指令空间 #
+############
+def rvc_words() -> np.ndarray:
+    return np.arange(1 << 16, dtype=np.uint32)
+
+def rv32_words(per: int = 8, seed: int = 0) -> np.ndarray:
+    """
+    每个 (opcode[6:2], funct3, funct7) 层 per 个随机指令字，按层的顺序排列
+    opcode[4:2] = 111 是更长的编码，不抽样
+    """
+    opcodes = np.array([(o << 2) | 0b11 for o in range(32) if o & 0b111 != 0b111], dtype=np.uint32)
+    op, f3, f7 = np.meshgrid(opcodes, np.arange(8, dtype=np.uint32), np.arange(128, dtype=np.uint32), indexing='ij')
+    fixed = np.repeat((op | f3 << np.uint32(12) | f7 << np.uint32(25)).ravel(), per)
+    free = np.random.default_rng(seed).integers(0, 1 << 32, size=len(fixed), dtype=np.uint32)
+    return fixed | (free & np.uint32(0x01ff8f80))        # rd rs1 rs2 (及 I / S / B 型的立即数) 随机
+
+def sources() -> list[str]:
+    """
+    输出依赖的源文件: 本文件及其传递导入的 sim 模块 (from .x import ...)，按文件名排序
+    """
+    here = os.path.dirname(os.path.abspath(__file__))
+    seen, todo = set(), [os.path.basename(__file__)]
+    while todo:
+        name = todo.pop()
+        if name in seen:
+            continue
+        seen.add(name)
+        with open(os.path.join(here, name), 'rb') as f:
+            tree = ast.parse(f.read(), name)
+        for node in ast.walk(tree):
+            if isinstance(node, ast.ImportFrom) and node.level == 1:
+                if node.module is not None:
+                    todo.append(node.module.split('.')[0] + '.py')
+                else:
+                    todo.extend(a.name + '.py' for a in node.names)
+    return sorted(seen)
+
+def _source_hash() -> str:
+    h = hashlib.sha256()
+    here = os.path.dirname(os.path.abspath(__file__))
+    for name in sources():
+        with open(os.path.join(here, name), 'rb') as f:
+            h.update(name.encode() + b'\0' + f.read())
+    return h.hexdigest()
+
+def export(directory: str, per: int = 8, seed: int = 0, jobs: int | None = None,
+           force: bool = False) -> dict[str, int | None]:
+    """
+    生成 rvc / rv32 两部分，返回 {部分: 记录数}，没有变化而跳过的部分为 None
+    """
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, 'manifest.json')
+    manifest = {}
+    if os.path.exists(path) and not force:
+        with open(path, encoding='utf-8') as f:
+            manifest = json.load(f)
+    source = _source_hash()
+    parts = {'rvc': ({'source': source}, rvc_words),
+             'rv32': ({'source': source, 'per': per, 'seed': seed}, lambda: rv32_words(per, seed))}
+    done = {}
+    for name, (key, words) in parts.items():
+        files = [os.path.join(directory, f"{name}.{ext}") for ext in ('bin', 'hex')]
+        if manifest.get(name) == key and all(os.path.exists(f) for f in files):
+            done[name] = None
+            continue
+        table = decode_parallel(words(), name == 'rvc', jobs)
+        table.tofile(files[0])
+        writememh(files[1], [(table[n], d) for n, _, d in FIELDS],
+                  header=f"{name}: {{{', '.join(n for n, _, _ in FIELDS)}}} x {len(table)}\n"
+                         f"hex digits: {', '.join(str(d) for _, _, d in FIELDS)}")
+        manifest[name] = key
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+        done[name] = len(table)
+    return done
+
+def load(directory: str, part: str) -> np.ndarray:
+    """
+    读回 export 写出的 <part>.bin
+    """
+    return np.fromfile(os.path.join(directory, f"{part}.bin"), dtype=RECORD)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export decoder reference tables for rtl/decode.sv")
+    parser.add_argument('directory')
+    parser.add_argument('--per', type=int, default=8, help="32-bit samples per (opcode, funct3, funct7) stratum")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('-j', '--jobs', type=int, default=None)
+    parser.add_argument('--force', action='store_true', help="regenerate even if decode.py is unchanged")
+    args = parser.parse_args(argv)
+
+    for name, n in export(args.directory, args.per, args.seed, args.jobs, args.force).items():
+        if n is None:
+            print(f"{name}: up to date", file=sys.stderr)
+        else:
+            table = load(args.directory, name)
+            print(f"{name}: {n} records, {int(table['illegal'].sum())} illegal -> {args.directory}", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,880 @@
+# 标量浮点单元 (F / D 扩展)
+#
+# binary32 / binary64，语义按 RISC-V 非特权规范:
+#   - f 寄存器为 64 位，单精度值 NaN-boxing (高 32 位全 1)，未正确装箱的单精度输入按规范 NaN 处理
+#   - 运算产生的 NaN 一律为规范 NaN (0x7fc00000 / 0x7ff8000000000000)
+#   - fflags (NV DZ OF UF NX) 累积到 fflags / fcsr；rm=DYN 时使用 frm
+#   - 舍入之后判断 tininess，UF 只在结果 tiny 且不精确时置位
+#   - fmin / fmax 为 IEEE 754-2019 的 minimumNumber / maximumNumber，-0 < +0
+#   - fcvt 到整数时溢出 / NaN 饱和并置 NV (不再置 NX)，32 位结果符号扩展
+#
+# 标量路径用整数精确计算后再舍入，结果逐位确定
+# batch() 是 NumPy 批量路径，用于生成 RTL FPU 的测试向量:
+#   单精度在双精度下计算，双精度加 / 减 / 乘 / 除 / 开方用误差项 (TwoSum / Dekker 乘法) 确定舍入方向
+#   含零 / 无穷 / NaN / 非规格化数、结果可能上溢或下溢、无法判定的元素回落到标量路径，结果与标量路径完全相同
+#
+# 延迟按 fpnew 的运算组配置 (CoreConfig.fpu_*):
+#   ADDMUL  fadd fsub fmul fmadd 系列      DIVSQRT fdiv fsqrt (不流水)
+#   NONCOMP fsgnj fmin fmax 比较 fclass fmv CONV    fcvt
+#
+#   python -m sim.fpu fadd.s --count 1000000 --rm all -o fadd_s.hex
+
+import argparse, math, sys
+import numpy as np
+from .instr_unit import FpuOpType, InstrUnit
+from .config import CoreConfig
+from .util import mask, writememh
+
+CSR_FFLAGS = 0x001
+CSR_FRM = 0x002
+CSR_FCSR = 0x003
+
+# fflags
+NV = 0x10   # 无效操作
+DZ = 0x08   # 除以零
+OF = 0x04   # 上溢
+UF = 0x02   # 下溢
+NX = 0x01   # 不精确
+
+# 舍入模式
+RNE, RTZ, RDN, RUP, RMM, DYN = 0, 1, 2, 3, 4, 7
+RM_NAMES = {'rne': RNE, 'rtz': RTZ, 'rdn': RDN, 'rup': RUP, 'rmm': RMM}
+
+S, D = 0, 1
+# fmt -> (指数位数, 尾数位数)
+_FORMAT = {S: (8, 23), D: (11, 52)}
+CANONICAL_NAN = {S: 0x7fc00000, D: 0x7ff8000000000000}
+_BOX = 0xffffffff_00000000
+_MASK64 = (1 << 64) - 1
+
+# fcvt 整数宽度 -> (最小值, 最大值)
+_INT_RANGE = {0: (-(1 << 31), (1 << 31) - 1), 1: (0, (1 << 32) - 1),
+              2: (-(1 << 63), (1 << 63) - 1), 3: (0, (1 << 64) - 1)}
+
+# _unpack 的类别
+_FINITE, _INF, _QNAN, _SNAN = 0, 1, 2, 3
+
+# 结果写 x 寄存器的运算
+GPR_RESULT = (FpuOpType.FEQ, FpuOpType.FLT, FpuOpType.FLE, FpuOpType.FCLASS, FpuOpType.FCVT_F2I, FpuOpType.FMV_F2X)
+
+
+def box(bits: int, fmt: int) -> int:
+    return bits | _BOX if fmt == S else bits
+
+def unbox(value: int, fmt: int) -> int:
+    """
+    寄存器值取出 fmt 格式的位模式，未正确装箱的单精度值视为规范 NaN
+    """
+    if fmt == S:
+        return value & 0xffffffff if (value >> 32) & 0xffffffff == 0xffffffff else CANONICAL_NAN[S]
+    return value & _MASK64
+
+def fp_load(size: int, value: int) -> int:
+    """
+    flw / fld 读出的数据 -> f 寄存器的值
+    """
+    return box(value & 0xffffffff, S) if size == 4 else value & _MASK64
+
+def _sext32(value: int) -> int:
+    value &= 0xffffffff
+    return (value ^ 0x80000000) - 0x80000000 & _MASK64
+
+
+############
+# 精确舍入 #
+############
+def _unpack(bits: int, fmt: int) -> tuple[int, int, int, int]:
+    """
+    位模式 -> (类别, 符号, m, e)，有限值为 (-1)^sign * m * 2^e
+    """
+    ebits, fbits = _FORMAT[fmt]
+    sign = bits >> (ebits + fbits)
+    exp = (bits >> fbits) & ((1 << ebits) - 1)
+    frac = bits & ((1 << fbits) - 1)
+    if exp == (1 << ebits) - 1:
+        if frac == 0:
+            return _INF, sign, 0, 0
+        return (_QNAN if frac >> (fbits - 1) else _SNAN), sign, 0, 0
+    bias = (1 << (ebits - 1)) - 1
+    if exp == 0:
+        return _FINITE, sign, frac, 1 - bias - fbits
+    return _FINITE, sign, frac | (1 << fbits), exp - bias - fbits
+
+def _inf(sign: int, fmt: int) -> int:
+    ebits, fbits = _FORMAT[fmt]
+    return (sign << (ebits + fbits)) | (((1 << ebits) - 1) << fbits)
+
+def _shift_round(sign: int, m: int, shift: int, sticky: bool, rm: int) -> tuple[int, bool]:
+    """
+    (m + δ) * 2^-shift 按 rm 舍入为整数，sticky 表示 0 < δ < 1
+    返回 (整数, 是否不精确)
+    """
+    if shift <= 0:
+        return m << -shift, sticky
+    mant = m >> shift
+    rem = m & ((1 << shift) - 1)
+    if rem == 0 and not sticky:
+        return mant, False
+    half = 1 << (shift - 1)
+    if rm == RNE:
+        up = rem > half or (rem == half and (sticky or mant & 1))
+    elif rm == RTZ:
+        up = False
+    elif rm == RDN:
+        up = sign == 1
+    elif rm == RUP:
+        up = sign == 0
+    else:
+        up = rem >= half
+    return mant + up, True
+
+def _round(sign: int, m: int, e: int, sticky: bool, fmt: int, rm: int) -> tuple[int, int]:
+    """
+    (-1)^sign * (m + δ) * 2^e 舍入到 fmt，sticky 表示 0 < δ < 1 (此时 m 至少比结果多 3 位)
+    返回 (位模式, fflags)
+    """
+    ebits, fbits = _FORMAT[fmt]
+    bias = (1 << (ebits - 1)) - 1
+    emin = 1 - bias
+    top = sign << (ebits + fbits)
+    if m == 0 and not sticky:
+        return top, 0
+    E = e + m.bit_length() - 1          # 最高位的指数
+    q = max(E, emin) - fbits            # 结果最低位的指数
+    mant, inexact = _shift_round(sign, m, q - e, sticky, rm)
+    if mant >> (fbits + 1):
+        mant >>= 1
+        q += 1
+    biased = q + fbits + bias if mant >> fbits else 0
+    if biased >= (1 << ebits) - 1:
+        if rm == RTZ or (rm == RDN and sign == 0) or (rm == RUP and sign == 1):
+            return top | (_inf(0, fmt) - 1), OF | NX
+        return top | _inf(0, fmt), OF | NX
+    flags = NX if inexact else 0
+    if inexact and E < emin:
+        # 指数范围不受限时舍入的结果仍小于最小规格化数才算 tiny
+        tiny = True
+        if E == emin - 1:
+            unbounded, _ = _shift_round(sign, m, E - fbits - e, sticky, rm)
+            tiny = unbounded >> (fbits + 1) == 0
+        if tiny:
+            flags |= UF
+    return top | (biased << fbits) | (mant & ((1 << fbits) - 1)), flags
+
+
+############
+# 标量运算 #
+############
+def _sum(sa: int, ma: int, ea: int, sb: int, mb: int, eb: int, fmt: int, rm: int) -> tuple[int, int]:
+    """
+    两个有限值精确相加后舍入；和恰为零时同号取该符号，异号时 RDN 为 -0，否则为 +0
+    """
+    e = min(ea, eb)
+    s = ((-ma if sa else ma) << (ea - e)) + ((-mb if sb else mb) << (eb - e))
+    if s == 0:
+        return _round(sa if sa == sb else int(rm == RDN), 0, 0, False, fmt, rm)
+    return _round(int(s < 0), abs(s), e, False, fmt, rm)
+
+def _add(a: int, b: int, fmt: int, rm: int, negate: int = 0) -> tuple[int, int]:
+    ka, sa, ma, ea = _unpack(a, fmt)
+    kb, sb, mb, eb = _unpack(b, fmt)
+    sb ^= negate
+    if ka >= _QNAN or kb >= _QNAN:
+        return CANONICAL_NAN[fmt], NV if _SNAN in (ka, kb) else 0
+    if ka == _INF or kb == _INF:
+        if ka == kb and sa != sb:
+            return CANONICAL_NAN[fmt], NV
+        return _inf(sa if ka == _INF else sb, fmt), 0
+    return _sum(sa, ma, ea, sb, mb, eb, fmt, rm)
+
+def _mul(a: int, b: int, fmt: int, rm: int) -> tuple[int, int]:
+    ka, sa, ma, ea = _unpack(a, fmt)
+    kb, sb, mb, eb = _unpack(b, fmt)
+    if ka >= _QNAN or kb >= _QNAN:
+        return CANONICAL_NAN[fmt], NV if _SNAN in (ka, kb) else 0
+    if ka == _INF or kb == _INF:
+        if (ka == _FINITE and ma == 0) or (kb == _FINITE and mb == 0):
+            return CANONICAL_NAN[fmt], NV
+        return _inf(sa ^ sb, fmt), 0
+    return _round(sa ^ sb, ma * mb, ea + eb, False, fmt, rm)
+
+def _fma(a: int, b: int, c: int, fmt: int, rm: int, negate_product: int, negate_addend: int) -> tuple[int, int]:
+    """
+    (-1)^negate_product * a * b + (-1)^negate_addend * c，只舍入一次
+    """
+    ka, sa, ma, ea = _unpack(a, fmt)
+    kb, sb, mb, eb = _unpack(b, fmt)
+    kc, sc, mc, ec = _unpack(c, fmt)
+    sp = sa ^ sb ^ negate_product
+    sc ^= negate_addend
+    # ∞ * 0 即使加数是 qNaN 也置 NV
+    invalid = (ka == _INF and kb == _FINITE and mb == 0) or (kb == _INF and ka == _FINITE and ma == 0)
+    if ka >= _QNAN or kb >= _QNAN or kc >= _QNAN:
+        return CANONICAL_NAN[fmt], NV if invalid or _SNAN in (ka, kb, kc) else 0
+    if invalid:
+        return CANONICAL_NAN[fmt], NV
+    if ka == _INF or kb == _INF:
+        if kc == _INF and sc != sp:
+            return CANONICAL_NAN[fmt], NV
+        return _inf(sp, fmt), 0
+    if kc == _INF:
+        return _inf(sc, fmt), 0
+    return _sum(sp, ma * mb, ea + eb, sc, mc, ec, fmt, rm)
+
+def _div(a: int, b: int, fmt: int, rm: int) -> tuple[int, int]:
+    ka, sa, ma, ea = _unpack(a, fmt)
+    kb, sb, mb, eb = _unpack(b, fmt)
+    sign = sa ^ sb
+    if ka >= _QNAN or kb >= _QNAN:
+        return CANONICAL_NAN[fmt], NV if _SNAN in (ka, kb) else 0
+    if ka == _INF:
+        return (CANONICAL_NAN[fmt], NV) if kb == _INF else (_inf(sign, fmt), 0)
+    if kb == _INF:
+        return _round(sign, 0, 0, False, fmt, rm)
+    if mb == 0:
+        return (CANONICAL_NAN[fmt], NV) if ma == 0 else (_inf(sign, fmt), DZ)
+    if ma == 0:
+        return _round(sign, 0, 0, False, fmt, rm)
+    # 商至少保留 p + 3 位，余数作为 sticky
+    k = max(0, _FORMAT[fmt][1] + 4 + mb.bit_length() - ma.bit_length())
+    quo, rem = divmod(ma << k, mb)
+    return _round(sign, quo, ea - eb - k, rem != 0, fmt, rm)
+
+def _sqrt(a: int, fmt: int, rm: int) -> tuple[int, int]:
+    ka, sa, ma, ea = _unpack(a, fmt)
+    if ka >= _QNAN:
+        return CANONICAL_NAN[fmt], NV if ka == _SNAN else 0
+    if ka == _FINITE and ma == 0:
+        return a, 0
+    if sa:
+        return CANONICAL_NAN[fmt], NV
+    if ka == _INF:
+        return a, 0
+    k = max(0, 2 * (_FORMAT[fmt][1] + 4) - ma.bit_length())
+    if (ea - k) & 1:
+        k += 1
+    n = ma << k
+    r = math.isqrt(n)
+    return _round(0, r, (ea - k) // 2, r * r != n, fmt, rm)
+
+def _key(bits: int, fmt: int, signed_zero: int) -> int:
+    """
+    非 NaN 值的全序键；signed_zero=1 时 -0 < +0
+    """
+    w = 32 if fmt == S else 64
+    mag = bits & ((1 << (w - 1)) - 1)
+    return -mag - signed_zero if bits >> (w - 1) else mag
+
+def _minmax(a: int, b: int, fmt: int, is_max: bool) -> tuple[int, int]:
+    ka = _unpack(a, fmt)[0]
+    kb = _unpack(b, fmt)[0]
+    flags = NV if _SNAN in (ka, kb) else 0
+    if ka >= _QNAN and kb >= _QNAN:
+        return CANONICAL_NAN[fmt], flags
+    if ka >= _QNAN:
+        return b, flags
+    if kb >= _QNAN:
+        return a, flags
+    a_less = _key(a, fmt, 1) < _key(b, fmt, 1)
+    return (b if a_less else a) if is_max else (a if a_less else b), flags
+
+def _compare(a: int, b: int, fmt: int, op: FpuOpType) -> tuple[int, int]:
+    ka = _unpack(a, fmt)[0]
+    kb = _unpack(b, fmt)[0]
+    if ka >= _QNAN or kb >= _QNAN:
+        # feq 只对 sNaN 置 NV，flt / fle 对任何 NaN 置 NV
+        return 0, NV if op != FpuOpType.FEQ or _SNAN in (ka, kb) else 0
+    x, y = _key(a, fmt, 0), _key(b, fmt, 0)
+    if op == FpuOpType.FEQ:
+        return int(x == y), 0
+    return int(x < y if op == FpuOpType.FLT else x <= y), 0
+
+def _classify(a: int, fmt: int) -> int:
+    k, sign, m, _ = _unpack(a, fmt)
+    if k == _INF:
+        return 1 << (0 if sign else 7)
+    if k == _SNAN:
+        return 1 << 8
+    if k == _QNAN:
+        return 1 << 9
+    if m == 0:
+        return 1 << (3 if sign else 4)
+    if m >> _FORMAT[fmt][1] == 0:
+        return 1 << (2 if sign else 5)
+    return 1 << (1 if sign else 6)
+
+def _sgnj(a: int, b: int, fmt: int, op: FpuOpType) -> int:
+    sbit = 1 << (31 if fmt == S else 63)
+    if op == FpuOpType.FSGNJ:
+        s = b & sbit
+    elif op == FpuOpType.FSGNJN:
+        s = ~b & sbit
+    else:
+        s = (a ^ b) & sbit
+    return (a & ~sbit) | s
+
+def _to_int(a: int, fmt: int, rm: int, width: int) -> tuple[int, int]:
+    lo, hi = _INT_RANGE[width]
+    k, sign, m, e = _unpack(a, fmt)
+    if k >= _QNAN:
+        return hi, NV
+    if k == _INF:
+        return (lo if sign else hi), NV
+    n, inexact = _shift_round(sign, m, -e, False, rm)
+    n = -n if sign else n
+    if n < lo or n > hi:
+        return (lo if sign else hi), NV
+    return n, NX if inexact else 0
+
+def _from_int(x: int, fmt: int, rm: int, width: int) -> tuple[int, int]:
+    n = x & (0xffffffff if width < 2 else _MASK64)
+    if width == 0:
+        n = (n ^ 0x80000000) - 0x80000000
+    elif width == 2:
+        n = (n ^ (1 << 63)) - (1 << 63)
+    return _round(int(n < 0), abs(n), 0, False, fmt, rm)
+
+def _convert(a: int, src: int, dst: int, rm: int) -> tuple[int, int]:
+    k, sign, m, e = _unpack(a, src)
+    if k >= _QNAN:
+        return CANONICAL_NAN[dst], NV if k == _SNAN else 0
+    if k == _INF:
+        return _inf(sign, dst), 0
+    return _round(sign, m, e, False, dst, rm)
+
+
+def fp_execute(op: FpuOpType, fmt: int, rm: int, a: int, b: int = 0, c: int = 0, width: int = 0) -> tuple[int, int]:
+    """
+    a / b / c 为寄存器值 (FCVT_I2F / FMV_X2F 的 a 是 x 寄存器)，rm 已解析 (不为 DYN)
+    返回 (写回寄存器的值, fflags)：写 f 寄存器的单精度结果已装箱，写 x 寄存器的 32 位结果已符号扩展
+    """
+    if op == FpuOpType.FMV_X2F:
+        return box(a & (0xffffffff if fmt == S else _MASK64), fmt), 0
+    if op == FpuOpType.FMV_F2X:
+        return (_sext32(a) if fmt == S else a & _MASK64), 0
+    if op == FpuOpType.FCVT_I2F:
+        bits, flags = _from_int(a, fmt, rm, width)
+        return box(bits, fmt), flags
+    if op == FpuOpType.FCVT_F2F:
+        bits, flags = _convert(unbox(a, 1 - fmt), 1 - fmt, fmt, rm)
+        return box(bits, fmt), flags
+    x = unbox(a, fmt)
+    if op == FpuOpType.FCVT_F2I:
+        n, flags = _to_int(x, fmt, rm, width)
+        return (_sext32(n) if width < 2 else n & _MASK64), flags
+    if op == FpuOpType.FCLASS:
+        return _classify(x, fmt), 0
+    if op == FpuOpType.FSQRT:
+        bits, flags = _sqrt(x, fmt, rm)
+        return box(bits, fmt), flags
+    y = unbox(b, fmt)
+    if op in (FpuOpType.FEQ, FpuOpType.FLT, FpuOpType.FLE):
+        return _compare(x, y, fmt, op)
+    if op == FpuOpType.FADD or op == FpuOpType.FSUB:
+        bits, flags = _add(x, y, fmt, rm, int(op == FpuOpType.FSUB))
+    elif op == FpuOpType.FMUL:
+        bits, flags = _mul(x, y, fmt, rm)
+    elif op == FpuOpType.FDIV:
+        bits, flags = _div(x, y, fmt, rm)
+    elif op == FpuOpType.FMIN or op == FpuOpType.FMAX:
+        bits, flags = _minmax(x, y, fmt, op == FpuOpType.FMAX)
+    elif op in (FpuOpType.FSGNJ, FpuOpType.FSGNJN, FpuOpType.FSGNJX):
+        bits, flags = _sgnj(x, y, fmt, op), 0
+    else:
+        negate = {FpuOpType.FMADD: (0, 0), FpuOpType.FMSUB: (0, 1),
+                  FpuOpType.FNMSUB: (1, 0), FpuOpType.FNMADD: (1, 1)}[op]
+        bits, flags = _fma(x, y, unbox(c, fmt), fmt, rm, *negate)
+    return box(bits, fmt), flags
+
+
+def accrue(csr: dict, flags: int) -> None:
+    """
+    fflags 累积到 fflags / fcsr
+    """
+    if flags:
+        csr[CSR_FFLAGS] = csr.get(CSR_FFLAGS, 0) | flags
+        csr[CSR_FCSR] = csr.get(CSR_FCSR, 0) | flags
+
+def sync_fcsr(csr: dict, addr: int) -> None:
+    """
+    CSR 指令写 fflags / frm / fcsr 之后调用，使三者一致 (其余地址不处理)
+    """
+    if addr == CSR_FCSR:
+        value = csr[CSR_FCSR] & 0xff
+        csr[CSR_FCSR], csr[CSR_FFLAGS], csr[CSR_FRM] = value, value & 0x1f, value >> 5
+    elif addr == CSR_FFLAGS or addr == CSR_FRM:
+        csr[CSR_FFLAGS] = csr.get(CSR_FFLAGS, 0) & 0x1f
+        csr[CSR_FRM] = csr.get(CSR_FRM, 0) & 0x7
+        csr[CSR_FCSR] = (csr[CSR_FRM] << 5) | csr[CSR_FFLAGS]
+
+
+class FPU():
+    '''
+    execute() 执行一条 FPU 指令，返回 (写回值, fflags)，fflags 由调用者在提交时 accrue()
+    latency() 按 fpnew 的运算组给出延迟，DIVSQRT 不流水 (占用 latency 个周期)
+    '''
+    ADDMUL = (FpuOpType.FADD, FpuOpType.FSUB, FpuOpType.FMUL,
+              FpuOpType.FMADD, FpuOpType.FMSUB, FpuOpType.FNMSUB, FpuOpType.FNMADD)
+    DIVSQRT = (FpuOpType.FDIV, FpuOpType.FSQRT)
+    CONV = (FpuOpType.FCVT_F2F, FpuOpType.FCVT_F2I, FpuOpType.FCVT_I2F)
+
+    def __init__(self, config: CoreConfig = None):
+        cfg = config if config is not None else CoreConfig()
+        self.addmul = (cfg.fpu_addmul_latency_s, cfg.fpu_addmul_latency_d)
+        self.divsqrt = (cfg.fpu_divsqrt_latency_s, cfg.fpu_divsqrt_latency_d)
+        self.noncomp = cfg.fpu_noncomp_latency
+        self.conv = cfg.fpu_conv_latency
+
+    def rounding(self, instr: InstrUnit, csr: dict) -> int:
+        """
+        指令的舍入模式，DYN 时取 frm；保留的编码按非法指令处理
+        """
+        rm = instr.fpu_dataflow.rm
+        if rm == DYN:
+            rm = csr.get(CSR_FRM, 0) & 0x7
+        if rm > RMM:
+            raise NotImplementedError(f"FPU: Illegal Rounding Mode {rm}")
+        return rm
+
+    def execute(self, instr: InstrUnit, csr: dict, a: int, b: int = 0, c: int = 0) -> tuple[int, int]:
+        df = instr.fpu_dataflow
+        return fp_execute(instr.op, df.fmt, self.rounding(instr, csr), a, b, c, df.width)
+
+    def latency(self, instr: InstrUnit) -> int:
+        op = instr.op
+        if op in self.ADDMUL:
+            return self.addmul[instr.fpu_dataflow.fmt]
+        if op in self.DIVSQRT:
+            return self.divsqrt[instr.fpu_dataflow.fmt]
+        if op in self.CONV:
+            return self.conv
+        return self.noncomp
+
+
+############
+# 批量运算 #
+############
+_F32_MIN = 2.0 ** -126
+_F32_MAX = float(np.finfo(np.float32).max)
+# 双精度快速路径的安全范围: TwoSum / Dekker 乘法不溢出，误差项不下溢，结果为规格化数
+_D_LO, _D_HI = 2.0 ** -900, 2.0 ** 900
+_SPLIT = 134217729.0        # 2^27 + 1
+
+def _operands(v: np.ndarray, fmt: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    寄存器值 -> (float64 值, 是否正确装箱)
+    """
+    if fmt == S:
+        boxed = (v >> np.uint64(32)) == np.uint64(0xffffffff)
+        return (v & np.uint64(0xffffffff)).astype(np.uint32).view(np.float32).astype(np.float64), boxed
+    return v.view(np.float64), np.ones(len(v), dtype=bool)
+
+def _usable(x: np.ndarray) -> np.ndarray:
+    return np.isfinite(x) & (x != 0)
+
+def _sign(x: np.ndarray) -> np.ndarray:
+    return (x > 0).astype(np.int8) - (x < 0)
+
+def _two_sum(a: np.ndarray, b: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    s = a + b
+    bb = s - a
+    return s, (a - (s - bb)) + (b - bb)
+
+def _split(a: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    t = _SPLIT * a
+    hi = t - (t - a)
+    return hi, a - hi
+
+def _two_product(a: np.ndarray, b: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    p = a * b
+    ah, al = _split(a)
+    bh, bl = _split(b)
+    return p, ((ah * bh - p) + ah * bl + al * bh) + al * bl
+
+def _residual_sign(x: np.ndarray, hi: np.ndarray, y: np.ndarray) -> np.ndarray:
+    """
+    sign(x - hi * y)，hi * y 由 Dekker 乘法精确表示 (x - p 由 Sterbenz 引理精确)
+    """
+    p, e = _two_product(hi, y)
+    r = x - p
+    return (r > e).astype(np.int8) - (r < e)
+
+def _finish_s(hi: np.ndarray, lo: np.ndarray, rm: int, ok: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    hi = 双精度下的结果，lo = sign(精确值 - hi)
+    单精度的格点是双精度格点的子集，精确值与 hi 落在同一个单精度区间内，只有 hi 恰为格点或中点时需要 lo
+    返回 (单精度位模式, NX, 可用)
+    """
+    y = hi.astype(np.float32)
+    yd = y.astype(np.float64)
+    exact = yd == hi
+    down = np.where(yd > hi, np.nextafter(y, np.float32(-np.inf)), y)
+    up = np.where(yd < hi, np.nextafter(y, np.float32(np.inf)), y)
+    mid = (down.astype(np.float64) + up.astype(np.float64)) * 0.5
+    tie = ~exact & (hi == mid)
+    if rm == RNE or rm == RMM:
+        res = np.where(tie & (lo > 0), up, np.where(tie & (lo < 0), down, y))
+        if rm == RMM:
+            res = np.where(tie & (lo == 0), np.where(hi > 0, up, down), res)
+    else:
+        toward = {RDN: -1, RUP: 1, RTZ: None}[rm]
+        if toward is None:
+            # 朝零: 精确值在 hi 的靠零一侧时取下一个
+            step = np.where(hi > 0, lo < 0, lo > 0)
+            near = np.nextafter(y, np.float32(0))
+            res = np.where(exact, np.where(step, near, y), np.where(hi > 0, down, up))
+        elif toward < 0:
+            res = np.where(exact, np.where(lo < 0, np.nextafter(y, np.float32(-np.inf)), y), down)
+        else:
+            res = np.where(exact, np.where(lo > 0, np.nextafter(y, np.float32(np.inf)), y), up)
+    mag = np.abs(hi)
+    ok = ok & (mag > _F32_MIN) & (mag < _F32_MAX) & np.isfinite(res) & (np.abs(res) >= np.float32(_F32_MIN))
+    nx = ~exact | (lo != 0)
+    return res.view(np.uint32).astype(np.uint64) | np.uint64(_BOX), nx, ok
+
+def _finish_d(hi: np.ndarray, lo: np.ndarray, rm: int, ok: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    hi = 就近舍入的结果，lo = sign(精确值 - hi)；RMM 无法区分中点，只接受精确结果
+    """
+    if rm == RTZ:
+        res = np.where(np.where(hi > 0, lo < 0, lo > 0), np.nextafter(hi, 0.0), hi)
+    elif rm == RDN:
+        res = np.where(lo < 0, np.nextafter(hi, -np.inf), hi)
+    elif rm == RUP:
+        res = np.where(lo > 0, np.nextafter(hi, np.inf), hi)
+    else:
+        res = hi
+        if rm == RMM:
+            ok = ok & (lo == 0)
+    mag = np.abs(hi)
+    ok = ok & (mag > _D_LO) & (mag < _D_HI)
+    return res.view(np.uint64), lo != 0, ok
+
+def _batch_arith(op, fmt, rm, width, a, b, c):
+    x, bx = _operands(a, fmt)
+    ok = bx & _usable(x)
+    if op != FpuOpType.FSQRT:
+        y, by = _operands(b, fmt)
+        ok &= by & _usable(y)
+    if fmt == D:
+        ok &= (np.abs(x) > _D_LO) & (np.abs(x) < _D_HI)
+        if op != FpuOpType.FSQRT:
+            ok &= (np.abs(y) > _D_LO) & (np.abs(y) < _D_HI)
+    if op in (FpuOpType.FMADD, FpuOpType.FMSUB, FpuOpType.FNMSUB, FpuOpType.FNMADD):
+        if fmt == D:
+            return None
+        z, bz = _operands(c, fmt)
+        ok &= bz & _usable(z)
+        p = x * y           # 24 x 24 位，双精度下精确
+        if op in (FpuOpType.FNMSUB, FpuOpType.FNMADD):
+            p = -p
+        hi, lo = _two_sum(p, -z if op in (FpuOpType.FMSUB, FpuOpType.FNMADD) else z)
+        lo = _sign(lo)
+    elif op == FpuOpType.FADD or op == FpuOpType.FSUB:
+        hi, lo = _two_sum(x, -y if op == FpuOpType.FSUB else y)
+        lo = _sign(lo)
+    elif op == FpuOpType.FMUL:
+        if fmt == S:
+            hi, lo = x * y, np.zeros(len(x), dtype=np.int8)
+        else:
+            hi, lo = _two_product(x, y)
+            lo = _sign(lo)
+    elif op == FpuOpType.FDIV:
+        hi = x / y
+        lo = _residual_sign(x, hi, y) * _sign(y)
+    else:
+        ok &= x > 0
+        hi = np.sqrt(np.abs(x))
+        lo = _residual_sign(x, hi, hi)
+    if fmt == S:
+        return _finish_s(hi, lo, rm, ok)
+    return _finish_d(hi, lo, rm, ok)
+
+def _batch_convert(op, fmt, rm, width, a, b, c):
+    n = len(a)
+    if op == FpuOpType.FCVT_F2F:
+        x, bx = _operands(a, 1 - fmt)
+        if fmt == D:
+            return x.view(np.uint64).copy(), np.zeros(n, dtype=bool), bx & ~np.isnan(x)
+        return _finish_s(x, np.zeros(n, dtype=np.int8), rm, bx & _usable(x))
+    if op == FpuOpType.FCVT_I2F:
+        if width == 0:
+            v = (a & np.uint64(0xffffffff)).astype(np.uint32).view(np.int32).astype(np.float64)
+        elif width == 1:
+            v = (a & np.uint64(0xffffffff)).astype(np.float64)
+        elif width == 2:
+            v = a.view(np.int64).astype(np.float64)
+        else:
+            v = a.astype(np.float64)
+        # 2^53 以内的整数在双精度下精确
+        ok = (np.abs(v) < 2.0 ** 53) & (v != 0)
+        if fmt == S:
+            return _finish_s(v, np.zeros(n, dtype=np.int8), rm, ok)
+        return v.view(np.uint64).copy(), np.zeros(n, dtype=bool), ok
+    # FCVT_F2I
+    x, bx = _operands(a, fmt)
+    ok = bx & np.isfinite(x)
+    if rm == RNE:
+        r = np.rint(x)
+    elif rm == RTZ:
+        r = np.trunc(x)
+    elif rm == RDN:
+        r = np.floor(x)
+    elif rm == RUP:
+        r = np.ceil(x)
+    else:
+        t = np.trunc(x)
+        r = t + np.copysign(np.abs(x - t) >= 0.5, x)
+    lo, hi = _INT_RANGE[width]
+    ok &= (r >= lo) & (r < hi + 1.0)
+    r = np.where(ok, r, 0.0)
+    ints = np.where(r < 0, r.astype(np.int64).view(np.uint64), np.abs(r).astype(np.uint64))
+    if width < 2:
+        ints = (ints & np.uint64(0xffffffff)).astype(np.uint32).view(np.int32).astype(np.int64).view(np.uint64)
+    return ints, r != x, ok
+
+def _fclass(u: np.ndarray, sew: int) -> np.ndarray:
+    """
+    fclass 的 10 位分类掩码 (u 为位模式，vfclass 也使用)
+    """
+    ebits, mbits = {16: (5, 10), 32: (8, 23), 64: (11, 52)}[sew]
+    neg = (u >> (sew - 1)).astype(bool)
+    exp = (u >> mbits) & mask(ebits)
+    frac = u & mask(mbits)
+    inf_nan = exp == mask(ebits)
+    cls = np.select(
+        [inf_nan & (frac != 0) & ((frac >> (mbits - 1)) == 1),
+         inf_nan & (frac != 0),
+         inf_nan,
+         (exp == 0) & (frac == 0),
+         exp == 0],
+        [9, 8, np.where(neg, 0, 7), np.where(neg, 3, 4), np.where(neg, 2, 5)],
+        np.where(neg, 1, 6))
+    return np.left_shift(1, cls).astype(u.dtype)
+
+def _nan_masks(v: np.ndarray, fmt: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    (是否 NaN, 是否 sNaN)
+    """
+    ebits, fbits = _FORMAT[fmt]
+    exp = (v >> np.uint64(fbits)) & np.uint64((1 << ebits) - 1)
+    frac = v & np.uint64((1 << fbits) - 1)
+    nan = (exp == np.uint64((1 << ebits) - 1)) & (frac != 0)
+    return nan, nan & ((frac >> np.uint64(fbits - 1)) == 0)
+
+def _batch_noncomp(op, fmt, rm, width, a, b, c):
+    n = len(a)
+    done = np.ones(n, dtype=bool)
+    none = np.zeros(n, dtype=np.uint8)
+    if op == FpuOpType.FMV_X2F:
+        return ((a & np.uint64(0xffffffff)) | np.uint64(_BOX)) if fmt == S else a.copy(), none, done
+    if op == FpuOpType.FMV_F2X:
+        if fmt == S:
+            return (a & np.uint64(0xffffffff)).astype(np.uint32).view(np.int32).astype(np.int64).view(np.uint64), none, done
+        return a.copy(), none, done
+    w = 32 if fmt == S else 64
+    sbit = np.uint64(1 << (w - 1))
+
+    def raw(v):
+        if fmt == D:
+            return v
+        boxed = (v >> np.uint64(32)) == np.uint64(0xffffffff)
+        return np.where(boxed, v & np.uint64(0xffffffff), np.uint64(CANONICAL_NAN[S]))
+
+    x = raw(a)
+    if op == FpuOpType.FCLASS:
+        return _fclass(x, w), none, done
+    y = raw(b)
+    out_box = np.uint64(_BOX if fmt == S else 0)
+    if op in (FpuOpType.FSGNJ, FpuOpType.FSGNJN, FpuOpType.FSGNJX):
+        s = {FpuOpType.FSGNJ: y, FpuOpType.FSGNJN: ~y, FpuOpType.FSGNJX: x ^ y}[op] & sbit
+        return (x & ~sbit) | s | out_box, none, done
+    xn, xs = _nan_masks(x, fmt)
+    yn, ys = _nan_masks(y, fmt)
+    mag = np.uint64((1 << (w - 1)) - 1)
+
+    def key(v, signed_zero):
+        m = (v & mag).astype(np.int64)
+        return np.where((v & sbit) != 0, -m - signed_zero, m)
+
+    snan = np.where(xs | ys, NV, 0).astype(np.uint8)
+    if op == FpuOpType.FMIN or op == FpuOpType.FMAX:
+        kx, ky = key(x, 1), key(y, 1)
+        pick_x = (kx > ky) if op == FpuOpType.FMAX else (kx < ky)
+        res = np.where(pick_x | (kx == ky), x, y)
+        res = np.where(xn, y, np.where(yn, x, res))
+        res = np.where(xn & yn, np.uint64(CANONICAL_NAN[fmt]), res)
+        return res | out_box, snan, done
+    kx, ky = key(x, 0), key(y, 0)
+    nan = xn | yn
+    if op == FpuOpType.FEQ:
+        res, flags = (kx == ky) & ~nan, snan
+    else:
+        res = ((kx < ky) if op == FpuOpType.FLT else (kx <= ky)) & ~nan
+        flags = np.where(nan, NV, 0).astype(np.uint8)
+    return res.astype(np.uint64), flags, done
+
+_BATCH = {}
+for _op in FPU.ADDMUL + FPU.DIVSQRT:
+    _BATCH[_op] = _batch_arith
+for _op in FPU.CONV:
+    _BATCH[_op] = _batch_convert
+for _op in (FpuOpType.FSGNJ, FpuOpType.FSGNJN, FpuOpType.FSGNJX, FpuOpType.FMIN, FpuOpType.FMAX,
+            FpuOpType.FEQ, FpuOpType.FLT, FpuOpType.FLE, FpuOpType.FCLASS, FpuOpType.FMV_X2F, FpuOpType.FMV_F2X):
+    _BATCH[_op] = _batch_noncomp
+
+
+def batch(op: FpuOpType, fmt: int, a, b=None, c=None, rm: int = RNE, width: int = 0) -> tuple[np.ndarray, np.ndarray]:
+    """
+    对寄存器值数组逐元素执行 fp_execute (rm 为标量，不能为 DYN)
+    返回 (结果 uint64, fflags uint8)，与逐个调用 fp_execute 的结果相同
+    """
+    if rm > RMM:
+        raise ValueError(f"FPU: invalid rounding mode {rm}")
+    a = np.ascontiguousarray(a, dtype=np.uint64)
+    n = len(a)
+    b = np.zeros(n, dtype=np.uint64) if b is None else np.ascontiguousarray(b, dtype=np.uint64)
+    c = np.zeros(n, dtype=np.uint64) if c is None else np.ascontiguousarray(c, dtype=np.uint64)
+    out = np.zeros(n, dtype=np.uint64)
+    flags = np.zeros(n, dtype=np.uint8)
+    done = np.zeros(n, dtype=bool)
+    with np.errstate(all='ignore'):
+        fast = _BATCH[op](op, fmt, rm, width, a, b, c) if n else None
+    if fast is not None:
+        res, fl, done = fast
+        out[done] = res[done]
+        if fl.dtype == bool:
+            flags[done] = np.where(fl[done], NX, 0)
+        else:
+            flags[done] = fl[done]
+    for i in np.flatnonzero(~done).tolist():
+        out[i], flags[i] = fp_execute(op, fmt, rm, int(a[i]), int(b[i]), int(c[i]), width)
+    return out, flags
+
+
+############
+# 测试向量 #
+############
+def _mnemonics() -> dict[str, tuple[FpuOpType, int, int, str]]:
+    """
+    助记符 -> (运算, fmt, 整数宽度, 操作数类型)，操作数类型中 f 为浮点寄存器、x 为整数寄存器
+    """
+    table = {}
+    ints = ('w', 'wu', 'l', 'lu')
+    for fmt, s in ((S, 's'), (D, 'd')):
+        for name, op in (('fadd', FpuOpType.FADD), ('fsub', FpuOpType.FSUB), ('fmul', FpuOpType.FMUL),
+                         ('fdiv', FpuOpType.FDIV), ('fmin', FpuOpType.FMIN), ('fmax', FpuOpType.FMAX),
+                         ('fsgnj', FpuOpType.FSGNJ), ('fsgnjn', FpuOpType.FSGNJN), ('fsgnjx', FpuOpType.FSGNJX),
+                         ('feq', FpuOpType.FEQ), ('flt', FpuOpType.FLT), ('fle', FpuOpType.FLE)):
+            table[f"{name}.{s}"] = (op, fmt, 0, 'ff')
+        for name, op in (('fmadd', FpuOpType.FMADD), ('fmsub', FpuOpType.FMSUB),
+                         ('fnmsub', FpuOpType.FNMSUB), ('fnmadd', FpuOpType.FNMADD)):
+            table[f"{name}.{s}"] = (op, fmt, 0, 'fff')
+        table[f"fsqrt.{s}"] = (FpuOpType.FSQRT, fmt, 0, 'f')
+        table[f"fclass.{s}"] = (FpuOpType.FCLASS, fmt, 0, 'f')
+        for width, i in enumerate(ints):
+            table[f"fcvt.{i}.{s}"] = (FpuOpType.FCVT_F2I, fmt, width, 'f')
+            table[f"fcvt.{s}.{i}"] = (FpuOpType.FCVT_I2F, fmt, width, 'x')
+    table['fcvt.s.d'] = (FpuOpType.FCVT_F2F, S, 0, 'g')     # 源操作数为另一种格式
+    table['fcvt.d.s'] = (FpuOpType.FCVT_F2F, D, 0, 'g')
+    table['fmv.x.w'] = (FpuOpType.FMV_F2X, S, 0, 'f')
+    table['fmv.x.d'] = (FpuOpType.FMV_F2X, D, 0, 'f')
+    table['fmv.w.x'] = (FpuOpType.FMV_X2F, S, 0, 'x')
+    table['fmv.d.x'] = (FpuOpType.FMV_X2F, D, 0, 'x')
+    return table
+
+MNEMONICS = _mnemonics()
+
+def _specials(fmt: int) -> np.ndarray:
+    ebits, fbits = _FORMAT[fmt]
+    sign = 1 << (ebits + fbits)
+    inf = _inf(0, fmt)
+    bias = (1 << (ebits - 1)) - 1
+    one = bias << fbits
+    values = [0, inf, CANONICAL_NAN[fmt], inf | 1, inf | (1 << (fbits - 2)),   # ±0 ±∞ qNaN sNaN
+              1, (1 << fbits) - 1, 1 << fbits, inf - 1,                       # 非规格化上下界 最小规格化数 最大有限值
+              one, one | (1 << (fbits - 1)), one - (1 << fbits),              # 1 1.5 0.5
+              (bias + 31) << fbits, (bias + 32) << fbits, (bias + 63) << fbits, (bias + 64) << fbits,
+              ((bias + 31) << fbits) - 1, ((bias + 63) << fbits) - 1]         # 整数转换的边界
+    values += [v | sign for v in values]
+    return np.array(values, dtype=np.uint64)
+
+_INT_SPECIALS = np.array([0, 1, _MASK64, 0x7fffffff, 0x80000000, 0xffffffff, 0xffffffff_80000000,
+                          (1 << 63) - 1, 1 << 63, (1 << 53) + 1, (1 << 24) + 1, _MASK64 - (1 << 53)],
+                         dtype=np.uint64)
+
+def operands(kind: str, fmt: int, count: int, rng: np.random.Generator, special: float = 0.125) -> np.ndarray:
+    """
+    随机寄存器值: f 为 fmt 格式的浮点数 (单精度已装箱)，x 为 64 位整数
+    按 special 的比例混入特殊值 (±0 ±∞ NaN 非规格化数 边界值)
+    """
+    v = rng.integers(0, 1 << 64, size=count, dtype=np.uint64, endpoint=False)
+    pool = _INT_SPECIALS if kind == 'x' else _specials(fmt)
+    if kind != 'x':
+        ebits, fbits = _FORMAT[fmt]
+        v &= np.uint64((1 << (ebits + fbits + 1)) - 1)
+        # 指数集中在 1 附近，便于产生相消和舍入
+        near = rng.random(count) < 0.5
+        bias = (1 << (ebits - 1)) - 1
+        exp = rng.integers(bias - 8, bias + 8, size=count).astype(np.uint64)
+        v = np.where(near, (v & ~np.uint64(((1 << ebits) - 1) << fbits)) | (exp << np.uint64(fbits)), v)
+    pick = rng.random(count) < special
+    v[pick] = pool[rng.integers(0, len(pool), size=int(pick.sum()))]
+    return v | np.uint64(_BOX) if kind != 'x' and fmt == S else v
+
+def vectors(name: str, count: int, rm: int | None = RNE, seed: int = 0) -> dict[str, np.ndarray]:
+    """
+    生成 count 组测试向量: {'a', 'b', 'c', 'rm', 'result', 'flags'}
+    rm=None 时每组随机选择 RNE..RMM
+    """
+    op, fmt, width, kinds = MNEMONICS[name]
+    rng = np.random.default_rng(seed)
+    cols = []
+    for k in kinds:
+        if k == 'g':
+            cols.append(operands('f', 1 - fmt, count, rng))
+        else:
+            cols.append(operands(k, fmt, count, rng))
+    cols += [np.zeros(count, dtype=np.uint64)] * (3 - len(cols))
+    a, b, c = cols
+    rms = rng.integers(RNE, RMM + 1, size=count).astype(np.uint8) if rm is None else np.full(count, rm, dtype=np.uint8)
+    result = np.zeros(count, dtype=np.uint64)
+    flags = np.zeros(count, dtype=np.uint8)
+    for r in range(RNE, RMM + 1):
+        sel = np.flatnonzero(rms == r)
+        if len(sel):
+            result[sel], flags[sel] = batch(op, fmt, a[sel], b[sel], c[sel], r, width)
+    return {'a': a, 'b': b, 'c': c, 'rm': rms, 'result': result, 'flags': flags}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate scalar FPU test vectors for $readmemh")
+    parser.add_argument('op', choices=sorted(MNEMONICS), metavar='OP', help="mnemonic, e.g. fadd.s / fmadd.d / fcvt.w.s")
+    parser.add_argument('--count', type=int, default=100_000)
+    parser.add_argument('--rm', default='rne', choices=sorted(RM_NAMES) + ['all'], help="'all': random per vector")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--check', type=int, default=0, metavar='K', help="re-check K random vectors with the scalar path")
+    parser.add_argument('-o', '--output', default=None, help="readmemh file (default: <op>.hex)")
+    args = parser.parse_args(argv)
+
+    vec = vectors(args.op, args.count, None if args.rm == 'all' else RM_NAMES[args.rm], args.seed)
+    op, fmt, width, _ = MNEMONICS[args.op]
+    if args.check:
+        rng = np.random.default_rng(args.seed + 1)
+        for i in rng.integers(0, args.count, size=min(args.check, args.count)).tolist():
+            expect = fp_execute(op, fmt, int(vec['rm'][i]), int(vec['a'][i]), int(vec['b'][i]), int(vec['c'][i]), width)
+            if expect != (int(vec['result'][i]), int(vec['flags'][i])):
+                print(f"mismatch at {i}: a={int(vec['a'][i]):#x} b={int(vec['b'][i]):#x} c={int(vec['c'][i]):#x} "
+                      f"rm={int(vec['rm'][i])} batch=({int(vec['result'][i]):#x}, {int(vec['flags'][i]):#x}) "
+                      f"scalar=({expect[0]:#x}, {expect[1]:#x})", file=sys.stderr)
+                return 1
+    out = args.output if args.output is not None else f"{args.op}.hex"
+    writememh(out, [(vec['a'], 16), (vec['b'], 16), (vec['c'], 16), (vec['rm'], 1),
+                    (vec['result'], 16), (vec['flags'], 2)],
+              header=f"{args.op}: {{a[63:0], b[63:0], c[63:0], rm[3:0], result[63:0], fflags[7:0]}} x {args.count}")
+    print(f"{args.count} vectors -> {out}", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
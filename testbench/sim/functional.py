@@ -0,0 +1,275 @@
+# 功能模型: 按程序顺序逐条执行，不建模流水线和时序
+#
+# 与 sim_code.Simulator 使用相同的译码器、执行单元和内存，提交的体系结构状态一致
+# 用于快速前进到感兴趣的区域、生成检查点和采样分析
+# 译码结果按 pc 缓存 (取指读的是只读镜像，不考虑自修改代码)
+#
+# 读 cycle CSR 时没有周期数，返回已提交指令数
+# 向量指令由 vector.VectorUnit 执行，与 Simulator 的结果相同；向量访存记录的内存地址为基地址，
+# 访问的全部字节地址另外交给 tracer
+# 浮点指令由 fpu.FPU 执行，fflags 在执行时累积
+
+import random
+from .register import Register, RegisterGroup
+from .decode import DecodeBlock, is_compressed
+from .moduleConstant import *
+from .instr_unit import *
+from .ops import alu, branch, MDU
+from .lsq import lsu_is_store, lsu_size, lsu_extend
+from .memory import Memory
+from .config import CoreConfig
+from .checkpoint import Checkpoint
+from .vector import VectorUnit, CSR_VXRM, is_vector, vector_instr
+from .fpu import FPU, CSR_FRM, fp_load, accrue, sync_fcsr
+from .sim_code import fetch_opcode, index2addr, _writes_gpr, CSR_CYCLE, CSR_INSTRET
+
+
+class FunctionalSim():
+    '''
+    step() / run_until() 与 Simulator 的同名方法语义相同，但以指令为单位
+    on_block(start_pc, n) 在每个基本块 (以控制流指令结束) 执行完后调用，用于 BBV 统计
+    tracer.record(pc, next_pc, mem_addr, instr, instr2, vaddrs) 在每条指令 (融合对为一条) 执行后调用，
+    vaddrs 为向量访存的字节地址 (VectorUnit.memory 的返回值)，其余指令为 None
+    '''
+    TERMINAL = ('self-loop', 'end-of-image')
+
+    def __init__(self, mem, config: CoreConfig = None, on_block=None, tracer=None):
+        cfg = (config if config is not None else CoreConfig()).validate()
+        self.mem = mem
+        self.cfg = cfg
+        self.on_block = on_block
+        self.tracer = tracer
+
+        self.gpr = Register(cfg.arch_regs, zero=True)
+        self.fpr = Register(32, zero=False)
+        self.vec = VectorUnit(cfg.vlen)
+        self.vpr = self.vec.vrf
+        self.regs = RegisterGroup(self.gpr, self.fpr, self.vpr)
+        self.csr = self.vec.csr()
+
+        self.decoder = DecodeBlock(fusion=cfg.fusion)
+        self.alu = alu()
+        self.bru = branch()
+        self.mdu = MDU(cfg.mul_latency, (cfg.div_latency_min, cfg.div_latency_max), random.Random(cfg.seed))
+        self.fpu = FPU(cfg)
+        self.dmem = Memory()
+        self.dmem.load_image(mem)
+
+        self.pc = 0
+        self.instret = 0
+        self.base_instret = 0
+        self.halted = None
+        self.reason = None
+        self.image_end = index2addr(len(mem))
+        self.block_pc = 0           # 当前基本块的起始地址
+        self.block_len = 0
+        # pc -> (size, instr, unit, 提交计数, 指令字, 融合的第二条指令字)
+        self.cache: dict[int, tuple[int, InstrUnit, ExecType, int, int, int]] = {}
+
+    @property
+    def finished(self) -> bool:
+        return self.halted is not None
+
+    def _decode(self, pc: int) -> tuple[int, InstrUnit, ExecType, int, int, int]:
+        opcode = fetch_opcode(self.mem, pc)
+        next_opcode = fetch_opcode(self.mem, pc + (2 if is_compressed(opcode) else 4))
+        try:
+            _, size, code = self.decoder.decode_pair(opcode, next_opcode, pc, 0)
+        except NotImplementedError:
+            size, code = (2 if is_compressed(opcode) else 4), None
+        instr = code[1] if isinstance(code, tuple) else None
+        unit = ExecType.ERROR
+        if instr is None and is_vector(opcode):
+            instr, unit = vector_instr(opcode), ExecType.VEC
+        elif instr is None:
+            if self.cfg.strict_decode:
+                raise NotImplementedError("Decode: Undecoded Instruction")
+            instr = InstrUnit()
+        elif instr.alu in (ExecType.ALU, ExecType.BRANCH, ExecType.MDU, ExecType.LSU, ExecType.CSR, ExecType.FPU):
+            unit = instr.alu
+        first = opcode & 0xffff if is_compressed(opcode) else opcode
+        if instr.fused != FusionType.NONE:
+            second = next_opcode & 0xffff if is_compressed(next_opcode) else next_opcode
+            d = (size, instr, unit, 2, first, second)
+        else:
+            d = (size, instr, unit, 1, first, 0)
+        self.cache[pc] = d
+        return d
+
+    ########
+    # 运行 #
+    ########
+    def step(self, n: int = 1) -> str | None:
+        """
+        最多提交 n 条指令 (融合对计为 2 条)
+        """
+        return self.run_until(instret=self.instret + n)
+
+    def run_until(self, instret: int | None = None, pc: int | None = None) -> str | None:
+        """
+        运行到 instret 条指令已提交，或下一条指令地址为 pc (从 pc 处开始运行时不会立即停下)
+        返回停止原因: 'instret' / 'pc' / 'self-loop' / 'end-of-image'
+        """
+        if self.halted is not None:
+            return self.halted
+        MASK = REGISTER_MASK
+        gpr, fpr, csr, dmem, mem, cache = self.gpr, self.fpr, self.csr, self.dmem, self.mem, self.cache
+        vec = self.vec
+        alu_unit, bru_unit, mdu, fpu_unit = self.alu, self.bru, self.mdu, self.fpu
+        on_block = self.on_block
+        tracer = self.tracer
+        image_end = self.image_end
+        limit = instret if instret is not None else 1 << 62
+        count = self.instret
+        cur = self.pc
+        block_pc, block_len = self.block_pc, self.block_len
+        reason = None
+        first = True
+        try:
+            while count < limit:
+                if cur == pc and not first:
+                    reason = 'pc'
+                    break
+                first = False
+                if cur >= image_end:
+                    reason = 'end-of-image'
+                    break
+                d = cache.get(cur)
+                if d is None:
+                    d = self._decode(cur)
+                size, instr, unit, k, op1, op2 = d
+                nxt = cur + size
+                control = False
+                addr = 0
+                vaddrs = None
+                if unit == ExecType.VEC:
+                    df = instr.dataflow
+                    try:
+                        if instr.op == VecOpType.LOAD or instr.op == VecOpType.STORE:
+                            addr = gpr.read(df.rs1)
+                            vaddrs = vec.memory(op1, dmem, addr, gpr.read(df.rs2))
+                            out = None
+                        else:
+                            out = vec.execute(op1, gpr.read(df.rs1), gpr.read(df.rs2), fpr.read(df.rs1),
+                                              csr.get(CSR_FRM, 0), csr.get(CSR_VXRM, 0))
+                            accrue(csr, vec.fflags)
+                            if instr.op == VecOpType.CONFIG:
+                                # 轨迹中 vsetvl* 的地址字段记录新的 vtype
+                                addr = vec.vtype.value
+                    except NotImplementedError:
+                        if self.cfg.strict_decode:
+                            raise
+                        out = None
+                    if out is not None:
+                        self.regs[out[0]].write(out[1], out[2])
+                    csr.update(vec.csr())
+                elif unit != ExecType.ERROR:
+                    df = instr.dataflow
+                    v = instr.value
+                    v.rs1 = gpr.read(df.rs1) if instr.req.rs1 or unit == ExecType.BRANCH else 0
+                    v.rs2 = gpr.read(df.rs2) if instr.req.rs2 or unit == ExecType.BRANCH else 0
+                    value = None
+                    if unit == ExecType.ALU:
+                        alu_unit.set_instr(instr)
+                        alu_unit.update()
+                        value = alu_unit.result.value
+                        if instr.pc_effect.valid:
+                            nxt = alu_unit.result.pc_effect.target
+                            control = True
+                    elif unit == ExecType.BRANCH:
+                        bru_unit.set_instr(instr)
+                        bru_unit.update()
+                        if bru_unit.result.value == 1:
+                            nxt = bru_unit.result.pc_effect.target
+                        control = True
+                    elif unit == ExecType.MDU:
+                        value = mdu._process(instr).value
+                    elif unit == ExecType.LSU:
+                        op = instr.lsu_dataflow.op
+                        addr = (v.rs1 + df.offset) & MASK
+                        size_b = lsu_size(op)
+                        fp = instr.lsu_dataflow.region == RegisterType.FPR
+                        if lsu_is_store(op):
+                            data = fpr.read(df.rs2) if fp else v.rs2
+                            dmem.write(addr, data & ((1 << (size_b * 8)) - 1), size_b)
+                        elif fp:
+                            fpr.write(df.rd, fp_load(size_b, dmem.read(addr, size_b)))
+                        else:
+                            value = lsu_extend(op, dmem.read(addr, size_b))
+                    elif unit == ExecType.FPU:
+                        try:
+                            value, flags = fpu_unit.execute(instr, csr, v.rs1 if instr.req.rs1 else fpr.read(df.rs1),
+                                                            fpr.read(df.rs2), fpr.read(df.rs3))
+                        except NotImplementedError:
+                            if self.cfg.strict_decode:
+                                raise
+                            value, flags = None, 0
+                        accrue(csr, flags)
+                        if value is not None and instr.region.rd == RegisterType.FPR:
+                            fpr.write(df.rd, value)
+                            value = None
+                    else:
+                        reg = df.csr
+                        src = df.imm if instr.op.value >= 5 else v.rs1
+                        if reg in CSR_CYCLE or reg in CSR_INSTRET:
+                            old = count + self.base_instret
+                        else:
+                            old = csr.get(reg, 0)
+                        kind = instr.op.value & 0b11
+                        if kind == CsrOpType.RW.value:
+                            csr[reg] = src & MASK
+                        elif kind == CsrOpType.RS.value:
+                            csr[reg] = (old | src) & MASK
+                        elif kind == CsrOpType.RC.value:
+                            csr[reg] = (old & ~src) & MASK
+                        sync_fcsr(csr, reg)
+                        value = old & MASK
+                    if value is not None and df.rd != 0 and _writes_gpr(instr):
+                        gpr.write(df.rd, value)
+                if tracer is not None:
+                    tracer.record(cur, nxt, addr, op1, op2, vaddrs)
+                count += k
+                block_len += k
+                if control:
+                    if on_block is not None:
+                        on_block(block_pc, block_len)
+                    block_pc, block_len = nxt, 0
+                if nxt == cur:
+                    # j 0: 程序结束
+                    reason = 'self-loop'
+                    cur = nxt
+                    break
+                cur = nxt
+        finally:
+            self.instret = count
+            self.pc = cur
+            self.block_pc, self.block_len = block_pc, block_len
+        if reason is None:
+            reason = 'instret'
+        if reason in self.TERMINAL:
+            self.halted = reason
+        self.reason = reason
+        return reason
+
+    def checkpoint(self) -> Checkpoint:
+        """
+        当前体系结构状态 (cycle 记为 0)
+        """
+        pages = {n: p.copy() for n, p in self.dmem.pages.items() if p.any()}
+        return Checkpoint(self.pc, self.instret + self.base_instret, 0, list(self.gpr.mem), list(self.fpr.mem),
+                          [self.vec.vrf.read(i) for i in range(32)], dict(self.csr), pages)
+
+    def restore(self, ckpt: Checkpoint) -> None:
+        for reg, values in ((self.gpr, ckpt.gpr), (self.fpr, ckpt.fpr)):
+            reg.mem[:len(values)] = values
+        for i, value in enumerate(ckpt.vpr):
+            self.vec.vrf.write(i, value)
+        self.csr.clear()
+        self.csr.update(ckpt.csr)
+        self.vec.load_csr(self.csr)
+        self.csr.update(self.vec.csr())
+        self.dmem.pages = ckpt.map_pages()
+        self.pc = self.block_pc = ckpt.pc
+        self.block_len = 0
+        self.instret = 0
+        self.base_instret = ckpt.instret
@@ -0,0 +1,249 @@
+# ALU / MDU 的 $readmemh 测试向量
+#
+# alu_batch / mdu_batch 是 ops.alu.update / ops.MDU._process 的 NumPy uint64 向量化版本，
+# 一次计算整个数组，结果与逐条执行标量模型完全相同 (--check 抽查)
+#   - 加减乘在 uint64 下自然回绕，有符号比较 / 算术右移用 int64 视图
+#   - mulh*: 32 位分段求 128 位乘积的高 64 位，有符号版本由无符号结果修正
+#   - 除法按绝对值做无符号除法再取符号 (向零截断)，除零和 INT_MIN / -1 按规范
+#   - *W: 与标量模型相同先截断 / 扩展操作数，结果取低 32 位符号扩展 (util.w_result)
+#
+# 操作数混入边界值: 0 1 -1 INT_MIN INT_MAX 及 32 位的对应值，
+# 移位的 rs2 保留随机高位，低 6 位取 5 / 6 位移位量的边界 (0 1 31 32 33 63)
+# 按块生成和写出，内存占用与向量数无关
+#
+# 一行一组: {op[7:0], a[63:0], b[63:0], result[63:0]}，op 为 AluOpType / MduOpType 的编码
+#
+#   python -m sim.golden alu --count 10000000 -o alu.hex
+#   python -m sim.golden mdu --ops div,divw,rem,remw --count 1000000 --check 10000
+
+import argparse, sys
+import numpy as np
+from .instr_unit import *
+from .ops import alu, MDU
+from .util import writememh
+
+ALU_OPS = {
+    'add': AluOpType.ADD, 'sub': AluOpType.SUB, 'sll': AluOpType.SLL, 'slt': AluOpType.SLR,
+    'sltu': AluOpType.SLTU, 'xor': AluOpType.XOR, 'srl': AluOpType.SRL, 'sra': AluOpType.SRA,
+    'or': AluOpType.OR, 'and': AluOpType.AND, 'bypass': AluOpType.BYPASS,
+    'addw': AluOpType.ADDW, 'subw': AluOpType.SUBW, 'sllw': AluOpType.SLLW, 'srlw': AluOpType.SRLW,
+    'sraw': AluOpType.SRAW,
+}
+MDU_OPS = {m.name.lower(): m for m in MduOpType}
+UNITS = {'alu': ALU_OPS, 'mdu': MDU_OPS}
+
+_MASK64 = np.uint64((1 << 64) - 1)
+_MASK32 = np.uint64(0xffffffff)
+_SHIFTS = (AluOpType.SLL, AluOpType.SRL, AluOpType.SRA)
+
+SPECIALS = np.array([0, 1, 2, (1 << 64) - 1, (1 << 64) - 2, 1 << 63, (1 << 63) - 1, (1 << 63) + 1,
+                     0x7fffffff, 0x80000000, 0xffffffff, 0x1_00000000, 0xffffffff_80000000, 0xffffffff_7fffffff],
+                    dtype=np.uint64)
+SHAMTS = np.array([0, 1, 31, 32, 33, 63], dtype=np.uint64)
+
+
+def _w(v: np.ndarray) -> np.ndarray:
+    """
+    util.w_result: 低 32 位符号扩展到 64 位
+    """
+    return v.astype(np.uint32).view(np.int32).astype(np.int64).view(np.uint64)
+
+def _signed(v: np.ndarray) -> np.ndarray:
+    return v.view(np.int64)
+
+def _neg(v: np.ndarray) -> np.ndarray:
+    return np.uint64(0) - v
+
+##############
+# 向量化 ALU #
+##############
+def alu_batch(op: AluOpType, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """
+    a = rs1 / mux_A，b = rs2 / mux_B (uint64 数组)
+    """
+    a = np.asarray(a, dtype=np.uint64)
+    b = np.asarray(b, dtype=np.uint64)
+    if op == AluOpType.BYPASS:
+        return a.copy()
+    code = op.value
+    base = AluOpType(code & ALU_MASK)
+    word = code & (ALU_MASK + 1) != 0
+    shamt = b & np.uint64(31 if word else 63)
+    if word:
+        a = _w(a) if base == AluOpType.SRA else a & _MASK32
+    if base == AluOpType.ADD:
+        r = a + b
+    elif base == AluOpType.SUB:
+        r = a - b
+    elif base == AluOpType.SLL:
+        r = a << shamt
+    elif base == AluOpType.SLR:
+        r = (_signed(a) < _signed(b)).astype(np.uint64)
+    elif base == AluOpType.SLTU:
+        r = (a < b).astype(np.uint64)
+    elif base == AluOpType.XOR:
+        r = a ^ b
+    elif base == AluOpType.SRL:
+        r = a >> shamt
+    elif base == AluOpType.SRA:
+        r = (_signed(a) >> shamt.astype(np.int64)).view(np.uint64)
+    elif base == AluOpType.OR:
+        r = a | b
+    elif base == AluOpType.AND:
+        r = a & b
+    else:
+        raise ValueError(f"golden: unsupported ALU op {op}")
+    return _w(r) if word else r
+
+##############
+# 向量化 MDU #
+##############
+def _mulhu(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    a0, a1 = a & _MASK32, a >> np.uint64(32)
+    b0, b1 = b & _MASK32, b >> np.uint64(32)
+    p00, p01, p10, p11 = a0 * b0, a0 * b1, a1 * b0, a1 * b1
+    mid = (p00 >> np.uint64(32)) + (p01 & _MASK32) + (p10 & _MASK32)     # < 3 * 2^32，不溢出
+    return p11 + (p01 >> np.uint64(32)) + (p10 >> np.uint64(32)) + (mid >> np.uint64(32))
+
+def _div(a: np.ndarray, b: np.ndarray, signed: bool) -> tuple[np.ndarray, np.ndarray]:
+    """
+    (商, 余数)，除零时商为全 1、余数为被除数；有符号溢出 INT_MIN / -1 自然得到 (INT_MIN, 0)
+    """
+    zero = b == 0
+    if signed:
+        na, nb = _signed(a) < 0, _signed(b) < 0
+        ua, ub = np.where(na, _neg(a), a), np.where(nb, _neg(b), b)
+    else:
+        ua, ub = a, b
+    ub = np.where(zero, np.uint64(1), ub)
+    q, r = np.divmod(ua, ub)
+    if signed:
+        q = np.where(na ^ nb, _neg(q), q)
+        r = np.where(na, _neg(r), r)
+    return np.where(zero, _MASK64, q), np.where(zero, a, r)
+
+def mdu_batch(op: MduOpType, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    a = np.asarray(a, dtype=np.uint64)
+    b = np.asarray(b, dtype=np.uint64)
+    base = MduOpType(op.value & 0b111)
+    word = op.value & 0b1000 != 0
+    if word:
+        ext = _w if base in (MduOpType.DIV, MduOpType.REM) else (lambda v: v & _MASK32)
+        a, b = ext(a), ext(b)
+    if base == MduOpType.MUL:
+        r = a * b
+    elif base == MduOpType.MULHU:
+        r = _mulhu(a, b)
+    elif base == MduOpType.MULH:
+        r = _mulhu(a, b) - np.where(_signed(a) < 0, b, np.uint64(0)) - np.where(_signed(b) < 0, a, np.uint64(0))
+    elif base == MduOpType.MULHSU:
+        r = _mulhu(a, b) - np.where(_signed(a) < 0, b, np.uint64(0))
+    else:
+        q, rem = _div(a, b, base in (MduOpType.DIV, MduOpType.REM))
+        r = q if base in (MduOpType.DIV, MduOpType.DIVU) else rem
+    return _w(r) if word else r
+
+def batch(op: AluOpType | MduOpType, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    return mdu_batch(op, a, b) if isinstance(op, MduOpType) else alu_batch(op, a, b)
+
+################
+# 标量模型对照 #
+################
+def scalar(op: AluOpType | MduOpType, a: int, b: int) -> int:
+    """
+    用 ops.alu / ops.MDU 逐条计算 (--check)
+    """
+    instr = InstrUnit()
+    instr.op = op
+    instr.value.rs1, instr.value.rs2 = a, b
+    if isinstance(op, MduOpType):
+        instr.alu = ExecType.MDU
+        return MDU()._process(instr).value
+    instr.alu = ExecType.ALU
+    instr.mux_A, instr.mux_B = AluPortAType.RS1, AluPortBType.RS2
+    unit = alu()
+    unit.set_instr(instr)
+    unit.update()
+    return unit.result.value
+
+############
+# 测试向量 #
+############
+def operands(count: int, rng: np.random.Generator, special: float = 0.125) -> np.ndarray:
+    """
+    随机 64 位寄存器值: 1/4 为符号扩展的 32 位数，1/8 为小整数，按 special 的比例混入边界值
+    """
+    v = rng.integers(0, 1 << 64, size=count, dtype=np.uint64, endpoint=False)
+    kind = rng.random(count)
+    v = np.where(kind < 0.25, _w(v), v)
+    v = np.where((kind >= 0.25) & (kind < 0.375), v & np.uint64(0xff), v)
+    pick = rng.random(count) < special
+    v[pick] = SPECIALS[rng.integers(0, len(SPECIALS), size=int(pick.sum()))]
+    return v
+
+def vectors(ops: list[AluOpType | MduOpType], count: int, seed: int = 0,
+            special: float = 0.125) -> dict[str, np.ndarray]:
+    """
+    生成 count 组测试向量: {'op', 'a', 'b', 'result'}，每组在 ops 中均匀选择运算
+    """
+    rng = np.random.default_rng(seed)
+    which = rng.integers(0, len(ops), size=count)
+    a = operands(count, rng, special)
+    b = operands(count, rng, special)
+    # 移位: rs2 保留随机高位，低 6 位取移位量的边界
+    shift = np.isin(which, [k for k, op in enumerate(ops)
+                            if isinstance(op, AluOpType) and AluOpType(op.value & ALU_MASK) in _SHIFTS])
+    pick = shift & (rng.random(count) < 2 * special)
+    b[pick] = (b[pick] & ~np.uint64(63)) | SHAMTS[rng.integers(0, len(SHAMTS), size=int(pick.sum()))]
+    code = np.empty(count, dtype=np.uint8)
+    result = np.empty(count, dtype=np.uint64)
+    for k, op in enumerate(ops):
+        sel = np.flatnonzero(which == k)
+        code[sel] = op.value
+        if len(sel):
+            result[sel] = batch(op, a[sel], b[sel])
+    return {'op': code, 'a': a, 'b': b, 'result': result}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate ALU / MDU test vectors for $readmemh")
+    parser.add_argument('unit', choices=sorted(UNITS))
+    parser.add_argument('--ops', default=None, help="comma-separated mnemonics (default: all of the unit)")
+    parser.add_argument('--count', type=int, default=1_000_000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--special', type=float, default=0.125, help="fraction of boundary operands")
+    parser.add_argument('--chunk', type=int, default=1 << 22, help="vectors generated per step")
+    parser.add_argument('--check', type=int, default=0, metavar='K',
+                        help="re-check K random vectors per chunk with the scalar model")
+    parser.add_argument('-o', '--output', default=None, help="readmemh file (default: <unit>.hex)")
+    args = parser.parse_args(argv)
+
+    table = UNITS[args.unit]
+    names = list(table) if args.ops is None else [s.strip() for s in args.ops.split(',')]
+    unknown = [s for s in names if s not in table]
+    if unknown:
+        parser.error(f"unknown {args.unit} ops {unknown}, expected {', '.join(table)}")
+    ops = [table[s] for s in names]
+    codes = ', '.join(f"{s}={table[s].value:#x}" for s in names)
+    out = args.output if args.output is not None else f"{args.unit}.hex"
+    rng = np.random.default_rng(args.seed + 1)
+    with open(out, 'wb') as f:
+        for k, lo in enumerate(range(0, args.count, args.chunk)):
+            n = min(args.chunk, args.count - lo)
+            vec = vectors(ops, n, seed=(args.seed, k), special=args.special)
+            for i in rng.integers(0, n, size=min(args.check, n)).tolist():
+                op = next(o for o in ops if o.value == vec['op'][i])
+                expect = scalar(op, int(vec['a'][i]), int(vec['b'][i]))
+                if expect != int(vec['result'][i]):
+                    print(f"mismatch at {lo + i}: {op.name} a={int(vec['a'][i]):#x} b={int(vec['b'][i]):#x} "
+                          f"batch={int(vec['result'][i]):#x} scalar={expect:#x}", file=sys.stderr)
+                    return 1
+            writememh(f, [(vec['op'], 2), (vec['a'], 16), (vec['b'], 16), (vec['result'], 16)],
+                      header=None if lo else (f"{args.unit}: {{op[7:0], a[63:0], b[63:0], result[63:0]}} "
+                                              f"x {args.count}\nop: {codes}"))
+    print(f"{args.count} vectors -> {out}", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,120 @@
+# 热点分析: 按 PC 统计退休次数 / 停顿周期 / 分支预测错误
+#
+# 计数数组以 (pc >> 1) 为下标，流水线只向列表追加下标，
+# 攒满 batch 个后用 np.bincount 一次合并
+# 结束后按 main.asm 的格式输出带计数的反汇编和前 N 个热点
+
+import numpy as np
+
+
+class HotspotProfiler():
+    '''
+    retire[i]      pc = i << 1 的指令退休次数
+    stall[i]       ROB 头部为该指令 (ROB 为空时为取指地址) 且没有提交的周期数
+    mispredict[i]  该分支预测错误的次数
+    '''
+    def __init__(self, image_bytes: int = 0, batch: int = 1 << 14):
+        n = max(image_bytes >> 1, 1)
+        self.retire = np.zeros(n, dtype=np.int64)
+        self.stall = np.zeros(n, dtype=np.int64)
+        self.mispredict = np.zeros(n, dtype=np.int64)
+        self.batch = batch
+        self._retire: list[int] = []
+        self._stall: list[int] = []
+        self._mispredict: list[int] = []
+
+    # 以下三个方法在流水线中每事件调用一次，只做追加
+    def on_retire(self, pc: int) -> None:
+        self._retire.append(pc >> 1)
+        if len(self._retire) >= self.batch:
+            self.retire = self._merge(self.retire, self._retire)
+
+    def on_stall(self, pc: int) -> None:
+        self._stall.append(pc >> 1)
+        if len(self._stall) >= self.batch:
+            self.stall = self._merge(self.stall, self._stall)
+
+    def on_mispredict(self, pc: int) -> None:
+        self._mispredict.append(pc >> 1)
+        if len(self._mispredict) >= self.batch:
+            self.mispredict = self._merge(self.mispredict, self._mispredict)
+
+    @staticmethod
+    def _merge(counts: np.ndarray, buf: list[int]) -> np.ndarray:
+        add = np.bincount(np.asarray(buf, dtype=np.int64), minlength=len(counts))
+        buf.clear()
+        if len(add) > len(counts):
+            add[:len(counts)] += counts
+            return add
+        counts += add
+        return counts
+
+    def flush(self) -> None:
+        self.retire = self._merge(self.retire, self._retire)
+        self.stall = self._merge(self.stall, self._stall)
+        self.mispredict = self._merge(self.mispredict, self._mispredict)
+        n = max(len(self.retire), len(self.stall), len(self.mispredict))
+        for name in ('retire', 'stall', 'mispredict'):
+            a = getattr(self, name)
+            if len(a) < n:
+                setattr(self, name, np.pad(a, (0, n - len(a))))
+
+    ########
+    # 报告 #
+    ########
+    def _counts(self, addr: int) -> tuple[int, int, int]:
+        i = addr >> 1
+        if i >= len(self.retire):
+            return 0, 0, 0
+        return int(self.retire[i]), int(self.stall[i]), int(self.mispredict[i])
+
+    def annotate(self, lines: list[tuple[int, int, str]]) -> list[str]:
+        """
+        lines 为 sim_code.disassemble() 的结果
+        每行: 退休次数 占比 | 停顿周期 占比 | 预测错误 | main.asm 原格式
+        """
+        self.flush()
+        total_r = int(self.retire.sum()) or 1
+        total_s = int(self.stall.sum()) or 1
+        out = [f"{'retire':>10} {'%':>6} | {'stall':>9} {'%':>6} | {'mispred':>7} | code"]
+        for addr, opcode, text in lines:
+            r, s, m = self._counts(addr)
+            if r or s or m:
+                head = f"{r:>10} {100 * r / total_r:6.2f} | {s:>9} {100 * s / total_s:6.2f} | {m:>7}"
+            else:
+                head = f"{'':>10} {'':>6} | {'':>9} {'':>6} | {'':>7}"
+            out.append(f"{head} | {addr:08x}: {opcode:08x} {text}")
+        return out
+
+    def top(self, n: int = 10, key: str = 'retire') -> list[tuple[int, int, int, int]]:
+        """
+        按 retire / stall / mispredict 排序的前 n 个 PC: [(pc, retire, stall, mispredict)]
+        """
+        self.flush()
+        counts = getattr(self, key)
+        n = min(n, int(np.count_nonzero(counts)))
+        if n == 0:
+            return []
+        idx = np.argpartition(counts, -n)[-n:]
+        idx = idx[np.argsort(counts[idx])[::-1]]
+        return [(int(i) << 1, int(self.retire[i]), int(self.stall[i]), int(self.mispredict[i])) for i in idx]
+
+    def summary(self, lines: list[tuple[int, int, str]] | None = None, n: int = 10) -> str:
+        self.flush()
+        text = {addr: t for addr, _, t in lines} if lines is not None else {}
+        total_r = int(self.retire.sum()) or 1
+        total_s = int(self.stall.sum()) or 1
+        out = []
+        for key, total in (('retire', total_r), ('stall', total_s)):
+            out.append(f"top {n} by {key}:")
+            for pc, r, s, m in self.top(n, key):
+                v = r if key == 'retire' else s
+                out.append(f"  {pc:08x} {v:>10} {100 * v / total:6.2f}%  mispred {m:<6} {text.get(pc, '')}")
+        return '\n'.join(out)
+
+    def write(self, lines: list[tuple[int, int, str]], file_name: str, n: int = 10) -> None:
+        with open(file_name, 'w', encoding='utf-8') as f:
+            f.write(self.summary(lines, n))
+            f.write('\n\n')
+            f.write('\n'.join(self.annotate(lines)))
+            f.write('\n')
@@ -0,0 +1,343 @@
+# 约束随机的 RV64GCV 指令流生成器
+#
+# FORMS 为每种指令的 (名称, 类别, 长度, match, mask, 约束)，mask 内的位取 match，其余位随机 (寄存器号和立即数)，
+# 约束保证字段合法:
+#   ('nz', m)               word & m 不为 0 (如 c.lui 的 rd 和 nzimm)
+#   ('ne', lo, w, values)   word[lo +: w] 不取 values 中的值 (拒绝采样)
+#   ('in', lo, w, values)   word[lo +: w] 从 values 中随机选 (如 F / D 的 rm，vsetvli 的 vtype)
+# 先按类别权重选类别 (I M A C F D V)，再在类别内均匀选指令；全部用 numpy 按数组生成
+# V 的 funct6 取自 vector.py 执行的运算表，寄存器组不检查 LMUL 对齐
+#
+# 输出与 readmemh 兼容的 .mem (每行 128 位，低地址在右) 或内存中的数组 (image() 与 readmemh 的返回值相同)
+# --check 用 DecodeBlock 译码整个指令流，按指令统计译码器报错 / 不认识的编码，并给出译码速度
+#
+#   python -m sim.instgen random.mem --count 100000 --weights C=50,V=0 --check
+
+import argparse, collections, sys, time
+import numpy as np
+from .decode import DecodeBlock
+from .vector import (is_vector, vector_instr, _INT_BINARY, _INT_SHIFT, _INT_COMPARE, _INT_REDUCE, _MASK_LOGIC,
+                     _INT_WIDEN, _FP_BINARY, _FP_COMPARE, _FP_FMA, _FP_WIDEN)
+from .util import writememh
+
+CLASSES = ('I', 'M', 'A', 'C', 'F', 'D', 'V')
+WEIGHTS = {'I': 40, 'M': 6, 'A': 3, 'C': 30, 'F': 6, 'D': 5, 'V': 10}
+
+RMS = (0, 1, 2, 3, 4, 7)        # 5 / 6 保留
+
+############
+# 编码模板 #
+############
+def _u(opc: int) -> tuple[int, int]:
+    return opc, 0x7f
+
+def _i(opc: int, funct3: int) -> tuple[int, int]:
+    return opc | funct3 << 12, 0x707f
+
+def _r(opc: int, funct3: int, funct7: int) -> tuple[int, int]:
+    return opc | funct3 << 12 | funct7 << 25, 0xfe00707f
+
+def _c(op: int, funct3: int) -> tuple[int, int]:
+    return op | funct3 << 13, 0xe003
+
+def _vtypes(bits: int) -> tuple[int, ...]:
+    """
+    合法的 vtype (vsew 8..64，vlmul 不取保留值 4)，bits 为 zimm 的位数
+    """
+    return tuple(vma << 7 | vta << 6 | sew << 3 | lmul for vma in (0, 1) for vta in (0, 1)
+                 for sew in range(4) for lmul in (0, 1, 2, 3, 5, 6, 7) if vma << 7 < 1 << bits)
+
+def _forms() -> list[tuple[str, str, int, int, int, tuple]]:
+    forms = []
+
+    def add(name, cls, code, extra=(), size=4):
+        forms.append((name, cls, size, code[0], code[1], tuple(extra)))
+
+    # ---- I ----
+    for name, opc in (('lui', 0x37), ('auipc', 0x17), ('jal', 0x6f)):
+        add(name, 'I', _u(opc))
+    add('jalr', 'I', _i(0x67, 0))
+    for f3, name in ((0, 'beq'), (1, 'bne'), (4, 'blt'), (5, 'bge'), (6, 'bltu'), (7, 'bgeu')):
+        add(name, 'I', _i(0x63, f3))
+    for f3, name in enumerate(('lb', 'lh', 'lw', 'ld', 'lbu', 'lhu', 'lwu')):
+        add(name, 'I', _i(0x03, f3))
+    for f3, name in enumerate(('sb', 'sh', 'sw', 'sd')):
+        add(name, 'I', _i(0x23, f3))
+    for f3, name in ((0, 'addi'), (2, 'slti'), (3, 'sltiu'), (4, 'xori'), (6, 'ori'), (7, 'andi')):
+        add(name, 'I', _i(0x13, f3))
+    for name, f3, f6 in (('slli', 1, 0), ('srli', 5, 0), ('srai', 5, 0b010000)):
+        add(name, 'I', (0x13 | f3 << 12 | f6 << 26, 0xfc00707f))
+    add('addiw', 'I', _i(0x1b, 0))
+    for name, f3, f7 in (('slliw', 1, 0), ('srliw', 5, 0), ('sraiw', 5, 0x20)):
+        add(name, 'I', _r(0x1b, f3, f7))
+    for name, f3, f7 in (('add', 0, 0), ('sub', 0, 0x20), ('sll', 1, 0), ('slt', 2, 0), ('sltu', 3, 0),
+                         ('xor', 4, 0), ('srl', 5, 0), ('sra', 5, 0x20), ('or', 6, 0), ('and', 7, 0)):
+        add(name, 'I', _r(0x33, f3, f7))
+    for name, f3, f7 in (('addw', 0, 0), ('subw', 0, 0x20), ('sllw', 1, 0), ('srlw', 5, 0), ('sraw', 5, 0x20)):
+        add(name, 'I', _r(0x3b, f3, f7))
+    add('fence', 'I', (0x0000000f, 0xf00fffff))
+    add('fence.i', 'I', (0x0000100f, 0xffffffff))
+    add('ecall', 'I', (0x00000073, 0xffffffff))
+    add('ebreak', 'I', (0x00100073, 0xffffffff))
+    for f3, name in ((1, 'csrrw'), (2, 'csrrs'), (3, 'csrrc'), (5, 'csrrwi'), (6, 'csrrsi'), (7, 'csrrci')):
+        add(name, 'I', _i(0x73, f3))
+
+    # ---- M ----
+    for f3, name in enumerate(('mul', 'mulh', 'mulhsu', 'mulhu', 'div', 'divu', 'rem', 'remu')):
+        add(name, 'M', _r(0x33, f3, 1))
+    for f3, name in ((0, 'mulw'), (4, 'divw'), (5, 'divuw'), (6, 'remw'), (7, 'remuw')):
+        add(name, 'M', _r(0x3b, f3, 1))
+
+    # ---- A ----
+    for f3, s in ((2, 'w'), (3, 'd')):
+        add(f'lr.{s}', 'A', (0x2f | f3 << 12 | 0b00010 << 27, 0xf9f0707f))
+        for f5, name in ((0b00011, 'sc'), (0b00001, 'amoswap'), (0b00000, 'amoadd'), (0b00100, 'amoxor'),
+                         (0b01100, 'amoand'), (0b01000, 'amoor'), (0b10000, 'amomin'), (0b10100, 'amomax'),
+                         (0b11000, 'amominu'), (0b11100, 'amomaxu')):
+            add(f'{name}.{s}', 'A', (0x2f | f3 << 12 | f5 << 27, 0xf800707f))
+
+    # ---- F / D ----
+    rm = ('in', 12, 3, RMS)
+    for fmt, s, cls in ((0, 's', 'F'), (1, 'd', 'D')):
+        add('flw' if fmt == 0 else 'fld', cls, _i(0x07, 2 + fmt))
+        add('fsw' if fmt == 0 else 'fsd', cls, _i(0x27, 2 + fmt))
+        for opc, name in ((0x43, 'fmadd'), (0x47, 'fmsub'), (0x4b, 'fnmsub'), (0x4f, 'fnmadd')):
+            add(f'{name}.{s}', cls, (opc | fmt << 25, 0x0600007f), [rm])
+        for f5, name in ((0x00, 'fadd'), (0x01, 'fsub'), (0x02, 'fmul'), (0x03, 'fdiv')):
+            add(f'{name}.{s}', cls, (0x53 | f5 << 27 | fmt << 25, 0xfe00007f), [rm])
+        add(f'fsqrt.{s}', cls, (0x53 | 0x0b << 27 | fmt << 25, 0xfff0007f), [rm])
+        for f5, f3, name in ((0x04, 0, 'fsgnj'), (0x04, 1, 'fsgnjn'), (0x04, 2, 'fsgnjx'), (0x05, 0, 'fmin'),
+                             (0x05, 1, 'fmax'), (0x14, 2, 'feq'), (0x14, 1, 'flt'), (0x14, 0, 'fle')):
+            add(f'{name}.{s}', cls, _r(0x53, f3, f5 << 2 | fmt))
+        for width, i in enumerate(('w', 'wu', 'l', 'lu')):
+            add(f'fcvt.{i}.{s}', cls, (0x53 | 0x18 << 27 | fmt << 25 | width << 20, 0xfff0007f), [rm])
+            add(f'fcvt.{s}.{i}', cls, (0x53 | 0x1a << 27 | fmt << 25 | width << 20, 0xfff0007f), [rm])
+        x = 'w' if fmt == 0 else 'd'
+        add(f'fmv.x.{x}', cls, (0x53 | 0x1c << 27 | fmt << 25, 0xfff0707f))
+        add(f'fclass.{s}', cls, (0x53 | 0x1c << 27 | fmt << 25 | 1 << 12, 0xfff0707f))
+        add(f'fmv.{x}.x', cls, (0x53 | 0x1e << 27 | fmt << 25, 0xfff0707f))
+    add('fcvt.s.d', 'D', (0x53 | 0x08 << 27 | 1 << 20, 0xfff0007f), [rm])
+    add('fcvt.d.s', 'D', (0x53 | 0x08 << 27 | 1 << 25, 0xfff0007f), [rm])
+
+    # ---- C ----
+    rd_nz = ('nz', 0x0f80)
+    rs2_nz = ('nz', 0x007c)
+    imm6_nz = ('nz', 0x107c)
+    add('c.addi4spn', 'C', _c(0, 0), [('nz', 0x1fe0)], 2)
+    for f3, name in ((1, 'c.fld'), (2, 'c.lw'), (3, 'c.ld'), (5, 'c.fsd'), (6, 'c.sw'), (7, 'c.sd')):
+        add(name, 'C', _c(0, f3), (), 2)
+    add('c.addi', 'C', _c(1, 0), [rd_nz, imm6_nz], 2)
+    add('c.addiw', 'C', _c(1, 1), [rd_nz], 2)
+    add('c.li', 'C', _c(1, 2), [rd_nz], 2)
+    add('c.addi16sp', 'C', (0x6101, 0xef83), [imm6_nz], 2)
+    add('c.lui', 'C', _c(1, 3), [('ne', 7, 5, (0, 2)), imm6_nz], 2)
+    add('c.srli', 'C', (0x8001, 0xec03), [imm6_nz], 2)
+    add('c.srai', 'C', (0x8401, 0xec03), [imm6_nz], 2)
+    add('c.andi', 'C', (0x8801, 0xec03), (), 2)
+    for f, name in enumerate(('c.sub', 'c.xor', 'c.or', 'c.and')):
+        add(name, 'C', (0x8c01 | f << 5, 0xfc63), (), 2)
+    for f, name in enumerate(('c.subw', 'c.addw')):
+        add(name, 'C', (0x9c01 | f << 5, 0xfc63), (), 2)
+    for f3, name in ((5, 'c.j'), (6, 'c.beqz'), (7, 'c.bnez')):
+        add(name, 'C', _c(1, f3), (), 2)
+    add('c.slli', 'C', _c(2, 0), [rd_nz, imm6_nz], 2)
+    add('c.fldsp', 'C', _c(2, 1), (), 2)
+    add('c.lwsp', 'C', _c(2, 2), [rd_nz], 2)
+    add('c.ldsp', 'C', _c(2, 3), [rd_nz], 2)
+    add('c.jr', 'C', (0x8002, 0xf07f), [rd_nz], 2)
+    add('c.mv', 'C', (0x8002, 0xf003), [rd_nz, rs2_nz], 2)
+    add('c.ebreak', 'C', (0x9002, 0xffff), (), 2)
+    add('c.jalr', 'C', (0x9002, 0xf07f), [rd_nz], 2)
+    add('c.add', 'C', (0x9002, 0xf003), [rd_nz, rs2_nz], 2)
+    for f3, name in ((5, 'c.fsdsp'), (6, 'c.swsp'), (7, 'c.sdsp')):
+        add(name, 'C', _c(2, f3), (), 2)
+
+    # ---- V ----
+    opv = lambda f3, f6: (0x57 | f3 << 12 | f6 << 26, 0xfc00707f)
+    add('vsetvli', 'V', (0x57 | 7 << 12, 0x8000707f), [('in', 20, 11, _vtypes(11))])
+    add('vsetivli', 'V', (0xc0000057 | 7 << 12, 0xc000707f), [('in', 20, 10, _vtypes(10))])
+    add('vsetvl', 'V', (0x80000057 | 7 << 12, 0xfe00707f))
+    ivv, fvv, mvv, ivi, ivx, fvf, mvx = range(7)
+    groups = (
+        ('ivv', ivv, set(_INT_BINARY) - {0b000011} | set(_INT_SHIFT) | set(_INT_COMPARE) - {0b011110, 0b011111}),
+        ('ivx', ivx, set(_INT_BINARY) | set(_INT_SHIFT) | set(_INT_COMPARE)),
+        ('ivi', ivi, {0b000000, 0b000011, 0b001001, 0b001010, 0b001011} | set(_INT_SHIFT)
+         | set(_INT_COMPARE) - {0b011010, 0b011011}),
+        ('mvv', mvv, set(_INT_REDUCE) | set(_INT_WIDEN) - {0b111110}),
+        ('mvx', mvx, set(_INT_WIDEN)),
+        ('fvv', fvv, set(_FP_BINARY) - {0b100001, 0b100111} | set(_FP_COMPARE) - {0b011101, 0b011111}
+         | set(_FP_FMA) | set(_FP_WIDEN)),
+        ('fvf', fvf, set(_FP_BINARY) | set(_FP_COMPARE) | set(_FP_FMA) | set(_FP_WIDEN)),
+    )
+    for kind, f3, funct6 in groups:
+        for f6 in sorted(funct6):
+            add(f'op{kind}.{f6:06b}', 'V', opv(f3, f6))
+    for f6 in sorted(_MASK_LOGIC):
+        add(f'opmvv.{f6:06b}', 'V', (opv(mvv, f6)[0] | 1 << 25, 0xfe00707f))
+    for kind, f3 in (('vv', ivv), ('vx', ivx), ('vi', ivi)):
+        add(f'vmerge.v{kind}m', 'V', (opv(f3, 0b010111)[0], 0xfe00707f))
+        add(f'vmv.v.{kind[1]}', 'V', (opv(f3, 0b010111)[0] | 1 << 25, 0xfff0707f))
+    for width, s in ((0b000, 8), (0b101, 16), (0b110, 32), (0b111, 64)):
+        add(f'vle{s}.v', 'V', (0x07 | width << 12, 0xfdf0707f))
+        add(f'vse{s}.v', 'V', (0x27 | width << 12, 0xfdf0707f))
+    return forms
+
+FORMS = _forms()
+NAMES = tuple(f[0] for f in FORMS)
+
+##############
+# 指令流生成 #
+##############
+def _field(words: np.ndarray, lo: int, width: int) -> np.ndarray:
+    return (words >> np.uint32(lo)) & np.uint32((1 << width) - 1)
+
+def _valid(words: np.ndarray, extra: tuple) -> np.ndarray:
+    ok = np.ones(len(words), dtype=bool)
+    for c in extra:
+        if c[0] == 'nz':
+            ok &= (words & np.uint32(c[1])) != 0
+        elif c[0] == 'ne':
+            _, lo, width, values = c
+            ok &= ~np.isin(_field(words, lo, width), values)
+    return ok
+
+def _draw(rng: np.random.Generator, k: int, form: tuple) -> np.ndarray:
+    _, _, size, match, mask, extra = form
+    free = np.uint32(~mask & ((1 << (8 * size)) - 1))
+    words = np.uint32(match) | (rng.integers(0, 1 << 32, size=k, dtype=np.uint32) & free)
+    for c in extra:
+        if c[0] == 'in':
+            _, lo, width, values = c
+            field = np.uint32(((1 << width) - 1) << lo)
+            pick = np.asarray(values, dtype=np.uint32)[rng.integers(0, len(values), size=k)]
+            words = (words & ~field) | (pick << np.uint32(lo))
+    return words
+
+def generate(count: int, weights: dict[str, float] | None = None, seed: int = 0) -> dict[str, np.ndarray]:
+    """
+    count 条随机指令: {'word': uint32 指令字 (16 位指令在低半字), 'size': 字节数, 'form': FORMS 的下标}
+    weights 为类别权重 (缺省 WEIGHTS，为 0 的类别不生成)
+    """
+    weights = dict(WEIGHTS if weights is None else weights)
+    unknown = set(weights) - set(CLASSES)
+    if unknown:
+        raise ValueError(f"instgen: unknown instruction class {sorted(unknown)}")
+    members = {c: [k for k, f in enumerate(FORMS) if f[1] == c] for c in CLASSES}
+    classes = [c for c in CLASSES if weights.get(c, 0) > 0]
+    if not classes:
+        raise ValueError("instgen: all class weights are zero")
+    p = np.array([weights[c] for c in classes], dtype=np.float64)
+    rng = np.random.default_rng(seed)
+    cls = rng.choice(len(classes), size=count, p=p / p.sum())
+    form = np.empty(count, dtype=np.uint16)
+    for k, c in enumerate(classes):
+        sel = np.flatnonzero(cls == k)
+        form[sel] = np.asarray(members[c], dtype=np.uint16)[rng.integers(0, len(members[c]), size=len(sel))]
+    words = np.empty(count, dtype=np.uint32)
+    for k in np.unique(form).tolist():
+        sel = np.flatnonzero(form == k)
+        w = _draw(rng, len(sel), FORMS[k])
+        bad = np.flatnonzero(~_valid(w, FORMS[k][5]))
+        while len(bad):
+            w[bad] = _draw(rng, len(bad), FORMS[k])
+            bad = bad[~_valid(w[bad], FORMS[k][5])]
+        words[sel] = w
+    sizes = np.array([f[2] for f in FORMS], dtype=np.uint8)[form]
+    return {'word': words, 'size': sizes, 'form': form}
+
+def halfwords(stream: dict[str, np.ndarray]) -> np.ndarray:
+    """
+    指令流按地址顺序排成 16 位半字
+    """
+    words, sizes = stream['word'], stream['size']
+    pos = np.concatenate(([0], np.cumsum(sizes // 2)[:-1])).astype(np.int64)
+    out = np.empty(int(sizes.sum()) // 2, dtype=np.uint16)
+    out[pos] = words & np.uint32(0xffff)
+    wide = sizes == 4
+    out[pos[wide] + 1] = words[wide] >> np.uint32(16)
+    return out
+
+def image(stream: dict[str, np.ndarray]) -> list[int]:
+    """
+    与 readmemh(.mem) 相同的内存镜像 (16 位块的列表，每 128 位一行，末尾用 c.nop 补齐)
+    """
+    h = halfwords(stream)
+    pad = -len(h) % 8
+    return np.concatenate((h, np.full(pad, 0x0001, dtype=np.uint16))).tolist()
+
+def write_mem(file_name: str, stream: dict[str, np.ndarray]) -> None:
+    rows = np.asarray(image(stream), dtype=np.uint16).reshape(-1, 8)
+    writememh(file_name, [(rows[:, k], 4) for k in range(7, -1, -1)])
+
+############
+# 译码检查 #
+############
+def check(stream: dict[str, np.ndarray]) -> tuple[dict[str, collections.Counter], float]:
+    """
+    逐条译码: 每种指令的结果计数 ('unit' 得到 InstrUnit / 'text' 只有汇编文本 /
+    'unknown' 不认识的编码 / 'error:<异常>' 译码器报错)，以及译码速度 (条/秒)
+    """
+    decoder = DecodeBlock()
+    out = collections.defaultdict(collections.Counter)
+    start = time.perf_counter()
+    for word, k in zip(stream['word'].tolist(), stream['form'].tolist()):
+        try:
+            code = decoder.decode_to_human(word, 0, 0)[1]
+            text, instr = code if isinstance(code, tuple) else (code, None)
+            if instr is None and is_vector(word):
+                instr = vector_instr(word)
+            if instr is not None:
+                kind = 'unit'
+            elif text and not text.startswith('.instr'):
+                kind = 'text'
+            else:
+                kind = 'unknown'
+        except Exception as e:
+            kind = f"error:{type(e).__name__}"
+        out[NAMES[k]][kind] += 1
+    rate = len(stream['word']) / max(time.perf_counter() - start, 1e-9)
+    return dict(out), rate
+
+
+def _weights(text: str) -> dict[str, float]:
+    weights = dict(WEIGHTS)
+    for item in text.split(','):
+        name, _, value = item.partition('=')
+        weights[name.strip()] = float(value)
+    return weights
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Constrained-random RV64GCV instruction stream generator")
+    parser.add_argument('output', nargs='?', default=None, help="readmemh .mem image")
+    parser.add_argument('--count', type=int, default=100_000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--weights', default=None, metavar='CLASS=W[,CLASS=W]',
+                        help=f"class weights over {', '.join(CLASSES)} (default {WEIGHTS})")
+    parser.add_argument('--check', action='store_true', help="decode the stream and report decoder failures")
+    args = parser.parse_args(argv)
+
+    try:
+        stream = generate(args.count, _weights(args.weights) if args.weights else None, args.seed)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.output:
+        write_mem(args.output, stream)
+        print(f"{args.count} instructions, {len(halfwords(stream)) * 2} bytes -> {args.output}", file=sys.stderr)
+    if not args.check:
+        return 0
+    result, rate = check(stream)
+    failed = 0
+    for name in NAMES:
+        counts = result.get(name)
+        if counts is None:
+            continue
+        bad = {k: v for k, v in counts.items() if k not in ('unit', 'text')}
+        if bad:
+            failed += sum(bad.values())
+            print(f"{name:16} {sum(counts.values()):>8} {dict(sorted(bad.items()))}")
+    print(f"decoded {args.count} instructions at {rate:,.0f}/s, {failed} failures", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,4 +1,3 @@
-from . import register
 from enum import Enum, auto
 
 class ExecType(Enum):
@@ -76,6 +75,11 @@ class AluOpType(Enum):
     SRAW = 0b11101
 
 class MduOpType(Enum):
+    '''
+    | 3 | 2-0 |
+    | W |  OP |
+    *W: 低 32 位参与运算，结果符号扩展
+    '''
     MUL = 0b000
     MULH = 0b001
     MULHSU = 0b010
@@ -84,9 +88,57 @@ class MduOpType(Enum):
     DIVU = 0b101
     REM = 0b110
     REMU = 0b111
+    MULW = 0b1000
+    DIVW = 0b1100
+    DIVUW = 0b1101
+    REMW = 0b1110
+    REMUW = 0b1111
 
 class FpuOpType(Enum):
-    pass
+    '''
+    按 fpnew 的运算组划分:
+    ADDMUL  FADD FSUB FMUL FMADD FMSUB FNMSUB FNMADD
+    DIVSQRT FDIV FSQRT
+    NONCOMP FSGNJ* FMIN FMAX FEQ FLT FLE FCLASS FMV_*
+    CONV    FCVT_*  (F2F: fcvt.s.d / fcvt.d.s，F2I: fcvt.{w,wu,l,lu}.fmt，I2F: fcvt.fmt.{w,wu,l,lu})
+    '''
+    FADD = auto()
+    FSUB = auto()
+    FMUL = auto()
+    FMADD = auto()
+    FMSUB = auto()
+    FNMSUB = auto()
+    FNMADD = auto()
+    FDIV = auto()
+    FSQRT = auto()
+    FSGNJ = auto()
+    FSGNJN = auto()
+    FSGNJX = auto()
+    FMIN = auto()
+    FMAX = auto()
+    FEQ = auto()
+    FLT = auto()
+    FLE = auto()
+    FCLASS = auto()
+    FMV_X2F = auto()    # fmv.w.x / fmv.d.x
+    FMV_F2X = auto()    # fmv.x.w / fmv.x.d
+    FCVT_F2F = auto()
+    FCVT_F2I = auto()
+    FCVT_I2F = auto()
+
+class VecOpType(Enum):
+    '''
+    CONFIG    vsetvli / vsetivli / vsetvl
+    ELEMENT   只写向量寄存器 (可以读标量寄存器)
+    TO_SCALAR 读向量寄存器写标量寄存器: vmv.x.s / vcpop.m / vfirst.m / vfmv.f.s
+    LOAD      向量访存: vle / vlse / vlxei / vlm / vl<nf>r / vleff
+    STORE     vse / vsse / vsxei / vsm / vs<nf>r
+    '''
+    CONFIG = auto()
+    ELEMENT = auto()
+    TO_SCALAR = auto()
+    LOAD = auto()
+    STORE = auto()
 
 
 class AluPortAType(Enum):
@@ -136,6 +188,16 @@ class LsuDataflowType():
     op: LsuOpType = -1
     region: RegisterType = -1
 
+class FpuDataflowType():
+    '''
+    fmt   0: S (binary32) / 1: D (binary64)，FCVT_F2F 为目的格式
+    rm    指令中的舍入模式，7 (DYN) 取 frm
+    width 整数转换的宽度: 0 W / 1 WU / 2 L / 3 LU
+    '''
+    fmt: int = 0
+    rm: int = 7
+    width: int = 0
+
 class CsrOpType(Enum):
     ERROR = -1
     RW = 1
@@ -166,11 +228,22 @@ class InterruptType():
     mcause = None # 原因
     mtval = None # 额外信息
 
+class FusionType(Enum):
+    '''
+    译码阶段融合的指令对
+    '''
+    NONE = -1
+    LUI_ADDI = auto()     # lui rd + addi(w) rd, rd
+    AUIPC_JALR = auto()   # auipc rd + jalr rd, imm(rd)
+    AUIPC_LD = auto()     # auipc rd + ld rd, imm(rd)
+    SLLI_SRLI = auto()    # slli rd, rs + srli rd, rd (零扩展)
+
 class InstrUnit():
     order: int = 0
     alu: ExecType = -1
-    op: AluOpType | BranchOpType | CsrOpType = -1
+    op: AluOpType | BranchOpType | CsrOpType | FpuOpType = -1
     lsu_dataflow: LsuDataflowType = LsuDataflowType()
+    fpu_dataflow: FpuDataflowType = FpuDataflowType()
     dataflow: ExecDataflow = ExecDataflow()
     req: ExecRegEnable = ExecRegEnable()
     region: ExecRegion = ExecRegion()
@@ -178,6 +251,17 @@ class InstrUnit():
     pc_effect: PCEffectType = PCEffectType()
     mux_A: AluPortAType = -1
     mux_B: AluPortBType = -1
+    fused: FusionType = FusionType.NONE
+
+    def __init__(self):
+        # 子结构每条指令独立，避免共享类属性
+        self.lsu_dataflow = LsuDataflowType()
+        self.fpu_dataflow = FpuDataflowType()
+        self.dataflow = ExecDataflow()
+        self.req = ExecRegEnable()
+        self.region = ExecRegion()
+        self.value = InstrValueType()
+        self.pc_effect = PCEffectType()
     
 
 class InstrResult():
@@ -186,4 +270,7 @@ class InstrResult():
     rd: int = -1
     value: int = -1
     pc: int = -1
-    pc_effect: PCEffectType = PCEffectType()
\ No newline at end of file
+    pc_effect: PCEffectType = PCEffectType()
+
+    def __init__(self):
+        self.pc_effect = PCEffectType()
\ No newline at end of file
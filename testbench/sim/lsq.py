@@ -0,0 +1,282 @@
+# Load Store Queue 访存队列
+#
+# 以 8 字节块地址为键的哈希索引，store-to-load 前递和访存顺序检查
+# 只需查看同一(或相邻)块中的表项，而不是扫描所有更老的 store
+
+import heapq
+from .instr_unit import *
+from .util import sext
+
+BLOCK_BITS = 3
+
+
+def lsu_code(op: LsuOpType | int) -> int:
+    return op.value if isinstance(op, LsuOpType) else op
+
+
+def lsu_size(op: LsuOpType | int) -> int:
+    """
+    | 4 |     3-2     | 1 | 0 |
+    | U | 1/2/4/8bits | L | S |
+    """
+    return 1 << ((lsu_code(op) >> 2) & 0b11)
+
+
+def lsu_is_load(op: LsuOpType | int) -> bool:
+    return (lsu_code(op) & 0b10) != 0
+
+
+def lsu_is_store(op: LsuOpType | int) -> bool:
+    return (lsu_code(op) & 0b01) != 0
+
+
+def lsu_extend(op: LsuOpType | int, raw: int) -> int:
+    """
+    按 LsuOpType 对读出的原始数据做符号/零扩展
+    """
+    bits = lsu_size(op) * 8
+    if lsu_code(op) & 0b10000 or bits == 64:
+        return raw
+    return sext(raw, bits) & ((1 << 64) - 1)
+
+
+def _blocks(addr: int, size: int) -> range:
+    return range(addr >> BLOCK_BITS, ((addr + size - 1) >> BLOCK_BITS) + 1)
+
+
+class LsqEntry():
+    order: int = 0
+    op: LsuOpType | int = -1
+    size: int = 0
+    addr: int = None
+    data: int = 0
+    executed: bool = False
+    fwd_order: int = -1    # load: 提供数据的最年轻 store 的 order，-1 表示来自内存
+    fwd_bytes: list[int] = None    # load: 每个字节的来源 store 的 order，-1 表示来自内存
+
+    def overlap(self, addr: int, size: int) -> bool:
+        return self.addr < addr + size and addr < self.addr + self.size
+
+
+class LoadStoreQueue():
+    '''
+    allocate   -> 派遣时按程序顺序分配
+    execute_*  -> 地址/数据就绪后执行
+    commit     -> store 提交时写入内存
+    flush      -> 冲刷 order 及更年轻的表项
+
+    merge_partial=False 时，部分重叠的 load 需要等待 store 提交后重放
+    '''
+    def __init__(self, lq_size: int = 32, sq_size: int = 32, merge_partial: bool = True):
+        self.lq_size = lq_size
+        self.sq_size = sq_size
+        self.merge_partial = merge_partial
+        self.loads: dict[int, LsqEntry] = {}
+        self.stores: dict[int, LsqEntry] = {}
+        self.store_index: dict[int, list[LsqEntry]] = {}
+        self.load_index: dict[int, list[LsqEntry]] = {}
+        self.unresolved: set[int] = set()
+        self.unresolved_heap: list[int] = []
+
+        self.load_count = 0
+        self.store_count = 0
+        self.forwarded = 0
+        self.partial_forwarded = 0
+        self.speculative = 0
+        self.violations = 0
+        self.replays = 0
+
+    def full(self, op: LsuOpType | int) -> bool:
+        if lsu_is_store(op):
+            return len(self.stores) >= self.sq_size
+        return len(self.loads) >= self.lq_size
+
+    def allocate(self, order: int, op: LsuOpType | int) -> None:
+        e = LsqEntry()
+        e.order = order
+        e.op = op
+        e.size = lsu_size(op)
+        if lsu_is_store(op):
+            self.stores[order] = e
+            self.unresolved.add(order)
+            heapq.heappush(self.unresolved_heap, order)
+        else:
+            self.loads[order] = e
+
+    @staticmethod
+    def _index_add(index: dict, e: LsqEntry) -> None:
+        for b in _blocks(e.addr, e.size):
+            index.setdefault(b, []).append(e)
+
+    @staticmethod
+    def _index_remove(index: dict, e: LsqEntry) -> None:
+        for b in _blocks(e.addr, e.size):
+            lst = index.get(b)
+            if lst is None:
+                continue
+            lst.remove(e)
+            if not lst:
+                del index[b]
+
+    def _oldest_unresolved(self) -> int:
+        heap = self.unresolved_heap
+        while heap and heap[0] not in self.unresolved:
+            heapq.heappop(heap)
+        return heap[0] if heap else 1 << 62
+
+    def execute_store(self, order: int, addr: int, data: int) -> list[int]:
+        """
+        store 地址/数据就绪
+        返回已经提前执行、读到旧值的更年轻 load 的 order (需要重放)
+        """
+        e = self.stores[order]
+        if e.addr is not None:
+            self._index_remove(self.store_index, e)
+        else:
+            self.unresolved.discard(order)
+        e.addr = addr
+        e.data = data & ((1 << (e.size * 8)) - 1)
+        e.executed = True
+        self._index_add(self.store_index, e)
+
+        # 访存顺序检查
+        victims = []
+        seen = set()
+        for b in _blocks(addr, e.size):
+            for ld in self.load_index.get(b, ()):
+                if ld.order in seen:
+                    continue
+                seen.add(ld.order)
+                if ld.order <= order or not ld.overlap(addr, e.size):
+                    continue
+                # 只有与本 store 重叠、且来源比本 store 更老的字节读到了旧值
+                lo = max(addr, ld.addr)
+                hi = min(addr + e.size, ld.addr + ld.size)
+                if any(ld.fwd_bytes[a - ld.addr] < order for a in range(lo, hi)):
+                    victims.append(ld.order)
+        if victims:
+            self.violations += 1
+            self.replays += len(victims)
+            victims.sort()
+        return victims
+
+    def execute_vector_store(self, order: int, addrs) -> list[int]:
+        """
+        向量 store 写入 addrs 中的各字节 (不进入 SQ，直接写内存)
+        返回已经提前执行、读到旧值的更年轻 load 的 order (需要重放)
+        """
+        written = set(addrs)
+        victims = []
+        seen = set()
+        for b in {a >> BLOCK_BITS for a in written}:
+            for ld in self.load_index.get(b, ()):
+                if ld.order in seen:
+                    continue
+                seen.add(ld.order)
+                if ld.order <= order:
+                    continue
+                if any(a in written and ld.fwd_bytes[a - ld.addr] < order for a in range(ld.addr, ld.addr + ld.size)):
+                    victims.append(ld.order)
+        if victims:
+            self.violations += 1
+            self.replays += len(victims)
+            victims.sort()
+        return victims
+
+    def execute_load(self, order: int, addr: int, memory) -> int | None:
+        """
+        load 地址就绪，返回扩展后的数据
+        返回 None 表示需要稍后重放 (部分重叠且不允许合并)
+        """
+        e = self.loads[order]
+        if e.executed:
+            self._index_remove(self.load_index, e)
+        e.addr = addr
+        size = e.size
+
+        # 每个字节取最年轻的、更老的 store
+        src: list[LsqEntry | None] = [None] * size
+        for b in _blocks(addr, size):
+            for st in self.store_index.get(b, ()):
+                if st.order > order or not st.overlap(addr, size):
+                    continue
+                lo = max(st.addr, addr)
+                hi = min(st.addr + st.size, addr + size)
+                for a in range(lo, hi):
+                    cur = src[a - addr]
+                    if cur is None or cur.order < st.order:
+                        src[a - addr] = st
+
+        hit = [s for s in src if s is not None]
+        if not hit:
+            raw = memory.read(addr, size)
+            e.fwd_order = -1
+            e.fwd_bytes = [-1] * size
+        else:
+            youngest = max(hit, key=lambda s: s.order)
+            full = len(hit) == size and all(s is youngest for s in hit)
+            if not full and not self.merge_partial:
+                self.replays += 1
+                e.executed = False
+                return None
+            raw = 0 if len(hit) == size else memory.read(addr, size)
+            for i, st in enumerate(src):
+                if st is None:
+                    continue
+                byte = (st.data >> ((addr + i - st.addr) * 8)) & 0xff
+                raw = (raw & ~(0xff << (i * 8))) | (byte << (i * 8))
+            e.fwd_order = youngest.order
+            e.fwd_bytes = [-1 if st is None else st.order for st in src]
+            if full:
+                self.forwarded += 1
+            else:
+                self.partial_forwarded += 1
+
+        if self._oldest_unresolved() < order:
+            self.speculative += 1
+
+        e.executed = True
+        e.data = lsu_extend(e.op, raw)
+        self._index_add(self.load_index, e)
+        return e.data
+
+    def commit(self, order: int, memory) -> None:
+        e = self.stores.pop(order, None)
+        if e is not None:
+            if e.addr is None:
+                raise ValueError("LSQ: commit store with unresolved address")
+            memory.write(e.addr, e.data, e.size)
+            self._index_remove(self.store_index, e)
+            self.store_count += 1
+            return
+        e = self.loads.pop(order, None)
+        if e is not None:
+            if e.executed:
+                self._index_remove(self.load_index, e)
+            self.load_count += 1
+
+    def flush(self, order: int) -> None:
+        """
+        冲刷 order 及更年轻的表项
+        """
+        for k in [k for k in self.stores if k >= order]:
+            e = self.stores.pop(k)
+            if e.addr is None:
+                self.unresolved.discard(k)
+            else:
+                self._index_remove(self.store_index, e)
+        for k in [k for k in self.loads if k >= order]:
+            e = self.loads.pop(k)
+            if e.executed:
+                self._index_remove(self.load_index, e)
+
+    def stats(self) -> dict:
+        return {
+            'loads': self.load_count,
+            'stores': self.store_count,
+            'forwarded': self.forwarded,
+            'partial_forwarded': self.partial_forwarded,
+            'speculative_loads': self.speculative,
+            'violations': self.violations,
+            'replays': self.replays,
+        }
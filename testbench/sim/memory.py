@@ -1,12 +1,193 @@
+import numpy as np
+
+PAGE_BITS = 12
+PAGE_SIZE = 1 << PAGE_BITS
+PAGE_MASK = PAGE_SIZE - 1
+
+# 观察点标志 (按页记录，命中页后再比较精确区间)
+WATCH_READ = 0b01
+WATCH_WRITE = 0b10
+
+
 class Memory():
-    def __init__(self):
-        pass
+    '''
+    字节寻址的稀疏内存，按 4KiB 页分配 (NumPy uint8)
+    多字节访问为小端序
+    limit: 批量访问 (gather / scatter / mapped) 的地址上界，None 表示整个地址空间可访问
+    '''
+    def __init__(self, limit: int | None = None):
+        self.pages: dict[int, np.ndarray] = {}
+        self.limit = limit
+        self.watch_pages: dict[int, int] = {}
+        self.watch_ranges: list[tuple[int, int, int]] = []
+
+    def page(self, page_num: int) -> np.ndarray:
+        p = self.pages.get(page_num)
+        if p is None:
+            p = np.zeros(PAGE_SIZE, dtype=np.uint8)
+            self.pages[page_num] = p
+        return p
+
+    def read_bytes(self, address: int, n: int) -> np.ndarray:
+        offset = address & PAGE_MASK
+        if offset + n <= PAGE_SIZE:
+            return self.page(address >> PAGE_BITS)[offset:offset + n].copy()
+        out = np.empty(n, dtype=np.uint8)
+        done = 0
+        while done < n:
+            a = address + done
+            offset = a & PAGE_MASK
+            k = min(n - done, PAGE_SIZE - offset)
+            out[done:done + k] = self.page(a >> PAGE_BITS)[offset:offset + k]
+            done += k
+        return out
+
+    def write_bytes(self, address: int, data) -> None:
+        data = np.asarray(data, dtype=np.uint8)
+        n = len(data)
+        done = 0
+        while done < n:
+            a = address + done
+            offset = a & PAGE_MASK
+            k = min(n - done, PAGE_SIZE - offset)
+            self.page(a >> PAGE_BITS)[offset:offset + k] = data[done:done + k]
+            done += k
+
+    def read(self, address: int, size: int = 8) -> int:
+        offset = address & PAGE_MASK
+        if offset + size <= PAGE_SIZE:
+            return int.from_bytes(self.page(address >> PAGE_BITS)[offset:offset + size].tobytes(), 'little')
+        return int.from_bytes(self.read_bytes(address, size).tobytes(), 'little')
+
+    def write(self, address: int, value: int, size: int = 8) -> None:
+        value &= (1 << (size * 8)) - 1
+        raw = np.frombuffer(value.to_bytes(size, 'little'), dtype=np.uint8)
+        offset = address & PAGE_MASK
+        if offset + size <= PAGE_SIZE:
+            self.page(address >> PAGE_BITS)[offset:offset + size] = raw
+        else:
+            self.write_bytes(address, raw)
+
+    def mapped(self, addrs: np.ndarray) -> np.ndarray:
+        """
+        每个字节地址是否低于 limit
+        """
+        if self.limit is None:
+            return np.ones(np.shape(addrs), dtype=bool)
+        return np.asarray(addrs) < np.uint64(self.limit)
+
+    def _rows(self, addrs: np.ndarray) -> tuple[list[int], np.ndarray, np.ndarray]:
+        """
+        字节地址 -> (涉及的页号, 每个地址所在页的下标, 页内偏移)
+        """
+        ok = self.mapped(addrs)
+        if not ok.all():
+            bad = int(addrs[~ok][0])
+            raise ValueError(f"Memory: address {hex(bad)} beyond limit {hex(self.limit)}")
+        pages, inv = np.unique(addrs >> np.uint64(PAGE_BITS), return_inverse=True)
+        return pages.tolist(), inv.reshape(np.shape(addrs)), (addrs & np.uint64(PAGE_MASK)).astype(np.intp)
 
-    def read(address: int):
-        pass
+    def gather(self, addrs: np.ndarray) -> np.ndarray:
+        """
+        按任意形状的 uint64 字节地址数组一次读出，结果形状相同
+        """
+        addrs = np.asarray(addrs, dtype=np.uint64)
+        if addrs.size == 0:
+            return np.zeros(addrs.shape, dtype=np.uint8)
+        pages, inv, off = self._rows(addrs)
+        if len(pages) == 1:
+            return self.page(pages[0])[off]
+        table = np.stack([self.page(p) for p in pages])
+        return table[inv, off]
+
+    def scatter(self, addrs: np.ndarray, data) -> None:
+        """
+        按字节地址数组写入 data (形状相同)；地址重复时后面的元素生效
+        """
+        addrs = np.asarray(addrs, dtype=np.uint64)
+        if addrs.size == 0:
+            return
+        data = np.broadcast_to(np.asarray(data, dtype=np.uint8), addrs.shape)
+        pages, inv, off = self._rows(addrs)
+        if len(pages) == 1:
+            self.page(pages[0])[off] = data
+            return
+        table = np.stack([self.page(p) for p in pages])
+        table[inv, off] = data
+        for i, p in enumerate(pages):
+            self.pages[p][:] = table[i]
+
+    def watch(self, address: int, size: int = 1, read: bool = False, write: bool = True) -> None:
+        flags = (WATCH_READ if read else 0) | (WATCH_WRITE if write else 0)
+        self.watch_ranges.append((address, address + size, flags))
+        for p in range(address >> PAGE_BITS, ((address + size - 1) >> PAGE_BITS) + 1):
+            self.watch_pages[p] = self.watch_pages.get(p, 0) | flags
+
+    def unwatch(self, address: int | None = None) -> None:
+        """
+        删除起始地址为 address 的观察点，None 删除全部
+        """
+        self.watch_ranges = [] if address is None else [w for w in self.watch_ranges if w[0] != address]
+        self.watch_pages = {}
+        for lo, hi, flags in self.watch_ranges:
+            for p in range(lo >> PAGE_BITS, ((hi - 1) >> PAGE_BITS) + 1):
+                self.watch_pages[p] = self.watch_pages.get(p, 0) | flags
+
+    def watch_hit(self, address: int, size: int, write: bool) -> bool:
+        flag = WATCH_WRITE if write else WATCH_READ
+        if not self.watch_pages.get(address >> PAGE_BITS, 0) & flag:
+            if (address + size - 1) >> PAGE_BITS == address >> PAGE_BITS:
+                return False
+            if not self.watch_pages.get((address + size - 1) >> PAGE_BITS, 0) & flag:
+                return False
+        for lo, hi, flags in self.watch_ranges:
+            if flags & flag and lo < address + size and address < hi:
+                return True
+        return False
+
+    def watch_hit_addrs(self, addrs: np.ndarray, write: bool) -> int:
+        """
+        按字节地址数组 (向量访存) 检查观察点，返回第一个命中的地址，没有命中为 -1
+        """
+        flag = WATCH_WRITE if write else WATCH_READ
+        addrs = np.asarray(addrs, dtype=np.uint64).ravel()
+        pages = np.unique(addrs >> np.uint64(PAGE_BITS)).tolist()
+        if not any(self.watch_pages.get(p, 0) & flag for p in pages):
+            return -1
+        hit = np.zeros(len(addrs), dtype=bool)
+        for lo, hi, flags in self.watch_ranges:
+            if flags & flag:
+                hit |= (addrs >= np.uint64(lo)) & (addrs < np.uint64(hi))
+        return int(addrs[np.argmax(hit)]) if hit.any() else -1
+
+    def load_image(self, chunks: list[int], base: int = 0) -> None:
+        """
+        载入 readmemh 的结果 (16-bit 块, LSB->MSB)
+        """
+        data = np.asarray(chunks, dtype=np.uint16).astype('<u2').view(np.uint8)
+        self.write_bytes(base, data)
 
-    def write(address: int, value: int):
-        pass
 
 class MemeoryBus():
-    def 
\ No newline at end of file
+    '''
+    按地址区间将访问分发到不同设备 (Memory 或兼容 read/write 的外设)
+    '''
+    def __init__(self):
+        self.regions: list[tuple[int, int, object]] = []
+
+    def attach(self, base: int, size: int, device) -> None:
+        self.regions.append((base, base + size, device))
+
+    def _find(self, address: int):
+        for lo, hi, dev in self.regions:
+            if lo <= address < hi:
+                return lo, dev
+        raise ValueError(f"MemoryBus: address {hex(address)} not mapped")
+
+    def read(self, address: int, size: int = 8) -> int:
+        lo, dev = self._find(address)
+        return dev.read(address - lo, size)
+
+    def write(self, address: int, value: int, size: int = 8) -> None:
+        lo, dev = self._find(address)
+        dev.write(address - lo, value, size)
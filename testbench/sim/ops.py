@@ -17,13 +17,16 @@ class alu():
         self.result = None
     
     def _pc_effect(self):
+        if not self.instr.pc_effect.valid:
+            return -1
         if self.instr.pc_effect.mux_A == PCEffectPortAType.RS1:
             x0 = self.instr.value.rs1
         elif self.instr.pc_effect.mux_A == PCEffectPortAType.PC:
             x0 = self.instr.dataflow.pc
         else:
             raise ValueError("ALU: PC side effect Mux Error")
-        return x0 + self.instr.dataflow.imm
+        # jalr 目标地址最低位清零
+        return (x0 + self.instr.dataflow.offset) & REGISTER_MASK & ~1
 
     def _mux_A(self) -> int:
         if self.instr.mux_A == AluPortAType.ERROR:
@@ -59,24 +62,29 @@ class alu():
         self.result.pc_effect.target = self._pc_effect()
 
         x0 = self._mux_A()
-        x1 = self._mux_B()
-        op = AluOpType(self.instr.op & ALU_MASK)
-        word = (self.instr.op & (ALU_MASK + 1) != 0)
+        x1 = 0 if self.instr.op == AluOpType.BYPASS else self._mux_B()
+        code = self.instr.op.value
+        op = AluOpType(code & ALU_MASK)
+        word = (code & (ALU_MASK + 1) != 0)
 
         shamt = x1 & mask(5 if word else 6)
+        if word:
+            # *W: 低 32 位参与运算
+            x0 = sext(x0, 32) if op == AluOpType.SRA else zext(x0, 32)
         
         if op == AluOpType.ADD:
             self.result.value = (x0 + x1) & REGISTER_MASK
         elif op == AluOpType.SLL :
             self.result.value = (x0 << shamt) & REGISTER_MASK
         elif op == AluOpType.SLR:
-            self.result.value = ((x0 & REGISTER_MASK) >> shamt) & REGISTER_MASK
+            # 0b010: SLT
+            self.result.value = 1 if sext(x0) < sext(x1) else 0
         elif op == AluOpType.SLTU:
             self.result.value = 1 if (x0 & REGISTER_MASK) < (x1 & REGISTER_MASK) else 0
         elif op == AluOpType.XOR:
             self.result.value = (x0 ^ x1) & REGISTER_MASK
         elif op == AluOpType.SRL:
-            self.result.value = ((x0 & REGISTER_MASK) >> x1) & REGISTER_MASK
+            self.result.value = ((x0 & REGISTER_MASK) >> shamt) & REGISTER_MASK
         elif op == AluOpType.OR:
             self.result.value = (x0 | x1) & REGISTER_MASK
         elif op == AluOpType.AND:
@@ -88,6 +96,48 @@ class alu():
         elif op == AluOpType.BYPASS:
             self.result.value = x0 & REGISTER_MASK
 
+        if word:
+            self.result.value = w_result(self.result.value)
+
+class branch():
+    '''
+    条件分支比较
+    |    2        | 1 | 0
+    | EQ(0) LT(1) | U | NOT
+    '''
+    instr: InstrUnit
+
+    def __init__(self):
+        self.instr = None
+        self.result = None
+
+    def set_instr(self, instr: InstrUnit):
+        self.instr = instr
+        self.result = None
+
+    def update(self) -> None:
+        self.result = InstrResult()
+        self.result.order = self.instr.order
+        self.result.pc = self.instr.dataflow.pc
+        self.result.rd = 0
+        self.result.region = RegisterType.GPR
+        self.result.pc_effect = self.instr.pc_effect
+
+        x0 = self.instr.value.rs1 & REGISTER_MASK
+        x1 = self.instr.value.rs2 & REGISTER_MASK
+        code = self.instr.op.value
+        if code & 0b100:
+            if code & 0b010:
+                taken = x0 < x1
+            else:
+                taken = sext(x0) < sext(x1)
+        else:
+            taken = x0 == x1
+        if code & 0b001:
+            taken = not taken
+        self.result.value = int(taken)
+        self.result.pc_effect.target = (self.instr.dataflow.pc + self.instr.dataflow.offset) & REGISTER_MASK
+
 class MduInstr():
     instr: InstrUnit
     latency: int = -1
@@ -97,14 +147,18 @@ class MDU():
     fifo: list[MduInstr]
     output_fifo: list[InstrUnit]
 
-    def __init__(self):
+    def __init__(self, mul_latency: int = 5, div_latency: tuple[int, int] = (18, 45), rng: random.Random = None):
         self.result = None
         self.fifo = [] # 模拟计算队列
+        self.mul_latency = mul_latency
+        self.div_latency = div_latency
+        self.rng = rng if rng is not None else random.Random()
 
     def _check_instr(self, instr: InstrUnit) -> str:
-        if instr.op in [MduOpType.MUL, MduOpType.MULH, MduOpType.MULHSU, MduOpType.MULHU]:
+        if instr.op in [MduOpType.MUL, MduOpType.MULH, MduOpType.MULHSU, MduOpType.MULHU, MduOpType.MULW]:
             return 'MUL'
-        elif instr.op in [MduOpType.DIV, MduOpType.DIVU, MduOpType.REM, MduOpType.REMU]:
+        elif instr.op in [MduOpType.DIV, MduOpType.DIVU, MduOpType.REM, MduOpType.REMU,
+                          MduOpType.DIVW, MduOpType.DIVUW, MduOpType.REMW, MduOpType.REMUW]:
             return 'DIV'
         else:
             raise ValueError("MDU: Instr OP Error")
@@ -115,11 +169,13 @@ class MDU():
         mdu_instr = MduInstr()
         mdu_instr.instr = instr
         if op_type == 'MUL':
-            mdu_instr.latency = 5
+            mdu_instr.latency = self.mul_latency
         elif op_type == 'DIV':
-            mdu_instr.latency = random.randint(18, 45)
+            mdu_instr.latency = self.rng.randint(*self.div_latency)
+        self.fifo.append(mdu_instr)
 
     def update(self, next_instr = True) -> None:
+        self.result = None
         has_output = False
         remove_k = None
         for k, i in enumerate(self.fifo):
@@ -131,7 +187,7 @@ class MDU():
                     continue
                 if not next_instr:
                     continue
-                self.result = self._process(i)
+                self.result = self._process(i.instr)
                 has_output = True
                 remove_k = k
 
@@ -147,7 +203,12 @@ class MDU():
 
         x0 = instr.value.rs1
         x1 = instr.value.rs2
-        op = instr.op
+        op = MduOpType(instr.op.value & 0b111)
+        word = instr.op.value & 0b1000 != 0
+        if word:
+            # *W: 低 32 位参与运算 (有符号除法 / 取余做符号扩展)
+            ext = sext if op in (MduOpType.DIV, MduOpType.REM) else zext
+            x0, x1 = ext(x0, 32) & REGISTER_MASK, ext(x1, 32) & REGISTER_MASK
 
         if op == MduOpType.MUL:
             result.value = (x0 * x1) & REGISTER_MASK
@@ -170,15 +231,8 @@ class MDU():
             prod = a * b
             result.value = (prod >> XLEN) & REGISTER_MASK
         elif op == MduOpType.DIV:
-            a = sext(x0, XLEN)
-            b = sext(x1, XLEN)
-            if b == 0:
-                result.value = -1 & REGISTER_MASK
-            elif a == -(1 << (XLEN - 1)) and b == -1:
-                # 溢出情况，结果 = 被除数
-                result.value = a & REGISTER_MASK
-            else:
-                result.value = (a // b) & REGISTER_MASK
+            # 向零截断，除零/溢出按规范处理
+            result.value = div_signed(x0, x1, XLEN)
         elif op == MduOpType.DIVU:
             a = x0 & REGISTER_MASK
             b = x1 & REGISTER_MASK
@@ -187,14 +241,7 @@ class MDU():
             else:
                 result.value = (a // b) & REGISTER_MASK
         elif op == MduOpType.REM:
-            a = sext(x0, XLEN)
-            b = sext(x1, XLEN)
-            if b == 0:
-                result.value = a & REGISTER_MASK
-            elif a == -(1 << (XLEN - 1)) and b == -1:
-                result.value = 0
-            else:
-                result.value = (a % b) & REGISTER_MASK
+            result.value = rem_signed(x0, x1, XLEN)
         elif op == MduOpType.REMU:
             a = x0 & REGISTER_MASK
             b = x1 & REGISTER_MASK
@@ -202,5 +249,7 @@ class MDU():
                 result.value = a
             else:
                 result.value = (a % b) & REGISTER_MASK
+        if word:
+            result.value = w_result(result.value)
         return result
                 
\ No newline at end of file
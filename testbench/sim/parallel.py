@@ -0,0 +1,130 @@
+# 区间并行的详细模拟
+#
+#   1. 功能模型运行一遍，把程序按指令数切成 K 个区间，在每个区间开始前 warmup 条指令处保存检查点
+#   2. 进程池中每个任务从一个检查点开始运行详细模型: 预热 warmup 条指令后统计该区间
+#   3. 各区间的周期数 / 指令数 / 计数相加得到整体结果
+#
+# 检查点写在 work_dir 中，任务只传文件名，工作进程以写时复制方式映射
+# 预热只能弥补 cache 和分支预测器的冷启动，区间边界处流水线的状态仍有少量误差
+#
+#   python -m sim.parallel main.mem --instret 10000000 --intervals 64 --warmup 50000 -j 32 -o report.json
+
+import argparse, contextlib, json, os, sys, tempfile
+from multiprocessing import Pool
+from .config import CoreConfig
+from .functional import FunctionalSim
+from .simpoint import run_interval
+from .sweep import flatten, load_image, write_csv
+from .util import readmemh
+
+
+def split(total: int, intervals: int) -> list[tuple[int, int]]:
+    """
+    [0, total) 均分为 intervals 段: [(start, length)]
+    """
+    intervals = max(1, min(intervals, total))
+    bounds = [total * i // intervals for i in range(intervals + 1)]
+    return [(bounds[i], bounds[i + 1] - bounds[i]) for i in range(intervals)]
+
+
+def prepare(mem, parts: list[tuple[int, int]], warmup: int, work_dir: str,
+            config: CoreConfig = None) -> list[tuple[str, int, int]]:
+    """
+    功能模型顺序运行，返回每个区间的 (检查点文件, 预热指令数, 区间长度)
+    融合对可能使检查点比 start - warmup 多 1 条，预热和长度按实际到达的指令数计算，区间终点不变
+    程序提前结束时丢弃之后的区间
+    """
+    sim = FunctionalSim(mem, config)
+    jobs = []
+    for i, (start, length) in enumerate(parts):
+        begin = max(start - warmup, 0)
+        sim.run_until(instret=begin)
+        if sim.instret < begin:
+            break
+        name = os.path.join(work_dir, f"interval{i}.ckpt")
+        sim.checkpoint().save(name)
+        warm = max(start - sim.instret, 0)
+        jobs.append((name, warm, start + length - sim.instret - warm))
+    return jobs
+
+
+def run_job(job: tuple[int, dict, str, str, int, int]) -> dict:
+    index, config, binary, ckpt, warmup, length = job
+    return {'interval': index, **run_interval(load_image(binary), CoreConfig.from_dict(config), ckpt, warmup, length)}
+
+
+def stitch(rows: list[dict]) -> dict:
+    """
+    区间结果相加: 周期数 / 指令数以及 bpu / cache / lsq 的各项计数
+    """
+    out = {'intervals': len(rows), 'cycles': 0, 'instret': 0}
+    for r in rows:
+        out['cycles'] += r['cycles']
+        out['instret'] += r['instret']
+        for name in ('bpu', 'icache', 'dcache', 'lsq'):
+            total = out.setdefault(name, {})
+            for k, v in r[name].items():
+                total[k] = total.get(k, 0) + v
+    out['ipc'] = out['instret'] / out['cycles'] if out['cycles'] else 0.0
+    out['halts'] = sorted({r['halt'] for r in rows})
+    return out
+
+
+def simulate(binary: str, total: int, intervals: int, warmup: int = 50_000, config: CoreConfig = None,
+             processes: int | None = None, work_dir: str | None = None, out_csv: str | None = None) -> dict:
+    """
+    processes=1 时在当前进程中串行执行
+    检查点保留在 work_dir 中 (不存在时创建)；work_dir=None 时使用临时目录并在结束后删除
+    """
+    cfg = (config if config is not None else CoreConfig()).validate()
+    mem = readmemh(binary)
+    if work_dir is not None:
+        os.makedirs(work_dir, exist_ok=True)
+        where = contextlib.nullcontext(work_dir)
+    else:
+        where = tempfile.TemporaryDirectory()
+    with where as tmp:
+        plan = prepare(mem, split(total, intervals), warmup, tmp, cfg)
+        jobs = [(i, cfg.to_dict(), binary, name, warm, length) for i, (name, warm, length) in enumerate(plan)]
+        if processes == 1:
+            rows = [run_job(j) for j in jobs]
+        else:
+            with Pool(processes) as pool:
+                rows = pool.map(run_job, jobs, 1)
+
+    if out_csv is not None:
+        write_csv(out_csv, [flatten(r) for r in rows])
+    return {**stitch(rows), 'warmup': warmup, 'rows': rows}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Interval-parallel detailed simulation")
+    parser.add_argument('binary', help="readmemh image")
+    parser.add_argument('--instret', type=int, required=True, help="instructions to simulate in total")
+    parser.add_argument('--intervals', type=int, default=os.cpu_count())
+    parser.add_argument('--warmup', type=int, default=50_000, help="detailed warm-up instructions before each interval")
+    parser.add_argument('--set', action='append', default=[], metavar='NAME=VALUE', help="override a CoreConfig field")
+    parser.add_argument('-j', '--jobs', type=int, default=None)
+    parser.add_argument('--work-dir', default=None, help="keep interval checkpoints in this directory")
+    parser.add_argument('--csv', default=None, help="per-interval statistics")
+    parser.add_argument('-o', '--output', default=None, help="JSON report")
+    args = parser.parse_args(argv)
+
+    try:
+        cfg = CoreConfig.from_overrides(args.set)
+    except ValueError as exc:
+        parser.error(str(exc))
+
+    report = simulate(args.binary, args.instret, args.intervals, args.warmup, cfg, args.jobs,
+                      args.work_dir, args.csv)
+    print(f"{report['intervals']} intervals, {report['instret']} instructions, "
+          f"{report['cycles']} cycles, IPC {report['ipc']:.4f}", file=sys.stderr)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps({k: v for k, v in report.items() if k != 'rows'}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
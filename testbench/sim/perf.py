@@ -0,0 +1,176 @@
+# 性能计数器: 每周期提交数 / 各级占用 / 停顿原因 / 功能单元利用率
+#
+# 所有计数在构造时预分配为 numpy 数组，流水线每周期只做下标自增
+# 运行结束后 to_dict() / dump_json() / dump_csv() 导出
+
+import csv, json
+import numpy as np
+from enum import IntEnum
+
+
+class StallReason(IntEnum):
+    '''
+    没有指令提交的周期归因，按优先级从高到低判断
+    '''
+    MDU_BUSY = 0        # ROB 头部是还在计算的乘除法
+    ROB_FULL = 1        # 重命名因 ROB 满而停顿
+    FREELIST_EMPTY = 2  # 重命名因空闲物理寄存器耗尽而停顿
+    LSQ_FULL = 3        # 重命名因 LQ/SQ 满而停顿
+    BRANCH_FLUSH = 4    # 分支预测错误 / 访存顺序冲刷后的流水线重填
+    ICACHE_MISS = 5     # ROB 为空且取指在等待 I-cache 缺失
+    MEMORY = 6          # ROB 头部是未完成的 load / store
+    EXECUTE = 7         # ROB 头部在等待操作数或执行延迟
+    FRONTEND = 8        # ROB 为空，其他前端原因 (译码气泡等)
+
+
+class Stage(IntEnum):
+    FETCH = 0       # 本周期取指条数
+    DECODE = 1      # 译码队列占用
+    RENAME = 2      # 本周期重命名条数
+    ISSUE = 3       # 本周期发射条数
+    COMMIT = 4      # 本周期提交条数
+    ROB = 5         # ROB 占用
+    IQ = 6          # 发射队列占用
+
+
+class FuncUnit(IntEnum):
+    ALU = 0
+    BRANCH = 1
+    LSU = 2
+    MDU = 3
+    CSR = 4
+    FPU = 5
+
+
+class PerfCounters():
+    '''
+    stall[StallReason]        非提交周期计数
+    occupancy[Stage][n]       每级 n 条 / 占用为 n 的周期数
+    fu_busy[FuncUnit]         功能单元被占用的 (单元 x 周期)
+    fu_ops[FuncUnit]          功能单元执行的指令数
+    interval_commit[k]        第 k 个采样区间提交的指令数 (区间 IPC)
+    '''
+    def __init__(self, fetch_width: int = 4, fetch_buffer: int = 16, commit_width: int = 4,
+                 rob_size: int = 64, fu_count: dict | None = None,
+                 interval: int = 1000, max_cycles: int = 1_000_000):
+        self.interval = interval
+        depth = {
+            Stage.FETCH: fetch_width,
+            Stage.DECODE: fetch_buffer,
+            Stage.RENAME: fetch_width,
+            Stage.ISSUE: rob_size,
+            Stage.COMMIT: commit_width,
+            Stage.ROB: rob_size,
+            Stage.IQ: rob_size,
+        }
+        self.occupancy = [np.zeros(depth[s] + 1, dtype=np.int64) for s in Stage]
+        self.stall = np.zeros(len(StallReason), dtype=np.int64)
+        self.fu_count = np.ones(len(FuncUnit), dtype=np.int64)
+        for name, n in (fu_count or {}).items():
+            self.fu_count[FuncUnit[name]] = n
+        self.fu_busy = np.zeros(len(FuncUnit), dtype=np.int64)
+        self.fu_ops = np.zeros(len(FuncUnit), dtype=np.int64)
+        self.interval_commit = np.zeros(max_cycles // interval + 1, dtype=np.int64)
+        self.cycles = 0
+        self.instret = 0
+
+    @classmethod
+    def from_config(cls, cfg) -> 'PerfCounters':
+        return cls(cfg.fetch_width, cfg.fetch_buffer, cfg.commit_width, cfg.rob_size,
+                   {'ALU': cfg.alu_count, 'BRANCH': cfg.alu_count, 'LSU': cfg.lsu_count,
+                    'MDU': cfg.mdu_depth, 'CSR': 1, 'FPU': 1},
+                   cfg.perf_interval, cfg.max_cycles)
+
+    def sample(self, stage: Stage, n: int) -> None:
+        h = self.occupancy[stage]
+        h[n if n < len(h) else len(h) - 1] += 1
+
+    def fu(self, unit: FuncUnit, busy: int, ops: int = 0) -> None:
+        self.fu_busy[unit] += busy
+        self.fu_ops[unit] += ops
+
+    def cycle(self, committed: int, stall: StallReason | None, retired: int | None = None) -> None:
+        """
+        每周期结束时调用一次
+        committed 为提交的 ROB 表项数，retired 为退休的指令数 (融合指令对计 2)
+        """
+        retired = committed if retired is None else retired
+        self.sample(Stage.COMMIT, committed)
+        self.interval_commit[self.cycles // self.interval] += retired
+        if committed == 0 and stall is not None:
+            self.stall[stall] += 1
+        self.cycles += 1
+        self.instret += retired
+
+    ########
+    # 导出 #
+    ########
+    def interval_ipc(self) -> np.ndarray:
+        n = (self.cycles + self.interval - 1) // self.interval
+        ipc = self.interval_commit[:n] / self.interval
+        if n and self.cycles % self.interval:
+            ipc[-1] = self.interval_commit[n - 1] / (self.cycles % self.interval)
+        return ipc
+
+    def mean_occupancy(self, stage: Stage) -> float:
+        h = self.occupancy[stage]
+        total = h.sum()
+        return float(np.dot(h, np.arange(len(h))) / total) if total else 0.0
+
+    def utilization(self) -> np.ndarray:
+        if not self.cycles:
+            return np.zeros(len(FuncUnit))
+        return self.fu_busy / (self.fu_count * self.cycles)
+
+    def summary(self) -> dict:
+        """
+        标量统计，便于写入 sweep 的 CSV
+        """
+        cycles = self.cycles or 1
+        out = {}
+        for r in StallReason:
+            out[f"stall.{r.name.lower()}"] = float(self.stall[r] / cycles)
+        for s in Stage:
+            out[f"occupancy.{s.name.lower()}"] = self.mean_occupancy(s)
+        util = self.utilization()
+        for u in FuncUnit:
+            out[f"util.{u.name.lower()}"] = float(util[u])
+        return out
+
+    def to_dict(self) -> dict:
+        return {
+            'cycles': self.cycles,
+            'instret': self.instret,
+            'ipc': self.instret / self.cycles if self.cycles else 0.0,
+            'stall': {r.name.lower(): int(self.stall[r]) for r in StallReason},
+            'occupancy': {s.name.lower(): self.occupancy[s].tolist() for s in Stage},
+            'fu_busy': {u.name.lower(): int(self.fu_busy[u]) for u in FuncUnit},
+            'fu_ops': {u.name.lower(): int(self.fu_ops[u]) for u in FuncUnit},
+            'fu_utilization': {u.name.lower(): float(v) for u, v in zip(FuncUnit, self.utilization())},
+            'interval': self.interval,
+            'interval_ipc': self.interval_ipc().tolist(),
+        }
+
+    def dump_json(self, file_name: str) -> None:
+        with open(file_name, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    def dump_csv(self, file_name: str) -> None:
+        """
+        group,name,value 三列，直方图按 occupancy.<stage>,<n>,<cycles> 展开
+        """
+        with open(file_name, 'w', newline='', encoding='utf-8') as f:
+            w = csv.writer(f)
+            w.writerow(['group', 'name', 'value'])
+            w.writerow(['core', 'cycles', self.cycles])
+            w.writerow(['core', 'instret', self.instret])
+            for r in StallReason:
+                w.writerow(['stall', r.name.lower(), int(self.stall[r])])
+            for u, v in zip(FuncUnit, self.utilization()):
+                w.writerow(['fu_ops', u.name.lower(), int(self.fu_ops[u])])
+                w.writerow(['fu_utilization', u.name.lower(), float(v)])
+            for s in Stage:
+                for n, c in enumerate(self.occupancy[s].tolist()):
+                    w.writerow([f"occupancy.{s.name.lower()}", n, c])
+            for k, v in enumerate(self.interval_ipc().tolist()):
+                w.writerow(['interval_ipc', k * self.interval, v])
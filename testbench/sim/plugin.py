@@ -0,0 +1,94 @@
+# 插件 / 观察者接口
+#
+# 插件订阅事件类型，流水线把事件追加到对应的列表，
+# 每攒满 batch 条转换为 numpy 结构化数组一次性交给插件
+# 没有插件订阅的事件，core() 拿到的缓冲区为 None，热路径只做一次 None 判断
+#
+#   class MyPlugin(Plugin):
+#       events = (Event.RETIRE,)
+#       def on_batch(self, event, records):
+#           ... records['pc'] ...
+#
+#   bus = PluginBus()
+#   bus.register(MyPlugin())
+#   core(mem, plugins=bus)
+
+import numpy as np
+from enum import IntEnum
+
+
+class Event(IntEnum):
+    RETIRE = 0      # 按程序顺序提交
+    ISSUE = 1       # 发射到功能单元 (可能在错误路径上，之后被冲刷)
+    MEMORY = 2      # 访存指令提交
+    BRANCH = 3      # 分支在写回阶段解析
+
+
+EVENT_DTYPES = {
+    Event.RETIRE: np.dtype([
+        ('cycle', np.int64), ('order', np.int64), ('pc', np.int64),
+        ('instr', np.uint32), ('rd', np.int8), ('value', np.uint64),
+    ]),
+    Event.ISSUE: np.dtype([
+        ('cycle', np.int64), ('order', np.int64), ('pc', np.int64), ('unit', np.int8),
+    ]),
+    Event.MEMORY: np.dtype([
+        ('cycle', np.int64), ('order', np.int64), ('pc', np.int64),
+        ('addr', np.uint64), ('size', np.uint8), ('store', np.bool_), ('value', np.uint64),
+    ]),
+    Event.BRANCH: np.dtype([
+        ('cycle', np.int64), ('order', np.int64), ('pc', np.int64), ('kind', np.int8),
+        ('taken', np.bool_), ('target', np.int64), ('mispredict', np.bool_),
+    ]),
+}
+
+
+class Plugin():
+    '''
+    events 列出订阅的事件；on_batch 收到的数组在返回后不再被修改，可以直接保存
+    '''
+    events: tuple[Event, ...] = ()
+
+    def on_batch(self, event: Event, records: np.ndarray) -> None:
+        pass
+
+    def on_finish(self) -> None:
+        pass
+
+
+class PluginBus():
+    def __init__(self, batch: int = 4096):
+        self.batch = batch
+        self.plugins: list[Plugin] = []
+        self.subscribers: dict[Event, list[Plugin]] = {e: [] for e in Event}
+        self.buffers: dict[Event, list[tuple]] = {e: [] for e in Event}
+        self.delivered = {e: 0 for e in Event}
+
+    def register(self, plugin: Plugin) -> Plugin:
+        for e in plugin.events:
+            self.subscribers[Event(e)].append(plugin)
+        self.plugins.append(plugin)
+        return plugin
+
+    def buffer(self, event: Event) -> list[tuple] | None:
+        """
+        事件缓冲区；没有订阅者时返回 None
+        调用方追加元组 (字段顺序同 EVENT_DTYPES)，长度达到 batch 时调用 flush(event)
+        """
+        return self.buffers[event] if self.subscribers[event] else None
+
+    def flush(self, event: Event | None = None) -> None:
+        for e in (Event if event is None else (event,)):
+            buf = self.buffers[e]
+            if not buf:
+                continue
+            records = np.array(buf, dtype=EVENT_DTYPES[e])
+            buf.clear()
+            self.delivered[e] += len(records)
+            for p in self.subscribers[e]:
+                p.on_batch(e, records)
+
+    def finish(self) -> None:
+        self.flush()
+        for p in self.plugins:
+            p.on_finish()
@@ -0,0 +1,173 @@
+# 数据预取器模型
+#
+# StridePrefetcher: 按 PC 记录上次地址与步长，置信度饱和后预取 addr + k*stride
+# StreamPrefetcher: 检测连续缺失的相邻 cache 行，向前/向后预取后续行
+# DataPrefetcher 组合两者并把预取请求填入 Cache
+
+import numpy as np
+from .cache import Cache
+from .util import sext
+
+MASK = (1 << 64) - 1
+
+
+class StridePrefetcher():
+    '''
+    直接映射的 per-PC 步长表
+    confidence 2-bit，>= threshold 时发出预取
+    '''
+    def __init__(self, entries: int = 64, degree: int = 2, distance: int = 1, threshold: int = 2):
+        self.entries = entries
+        self.degree = degree
+        self.distance = distance
+        self.threshold = threshold
+        self.pc = np.full(entries, -1, dtype=np.int64)
+        self.last = np.zeros(entries, dtype=np.uint64)   # 地址按无符号 64 位保存，步长按有符号计算
+        self.stride = np.zeros(entries, dtype=np.int64)
+        self.conf = np.zeros(entries, dtype=np.uint8)
+        self.issued = 0
+
+    def observe(self, pc: int, addr: int) -> list[int]:
+        i = (pc >> 1) % self.entries
+        if self.pc[i] != pc:
+            self.pc[i] = pc
+            self.last[i] = addr
+            self.stride[i] = 0
+            self.conf[i] = 0
+            return []
+        stride = sext((addr - int(self.last[i])) & MASK, 64)
+        self.last[i] = addr
+        if stride == 0:
+            return []
+        if stride == self.stride[i]:
+            if self.conf[i] < 3:
+                self.conf[i] += 1
+        else:
+            if self.conf[i] > 0:
+                self.conf[i] -= 1
+            else:
+                self.stride[i] = stride
+            return []
+        if self.conf[i] < self.threshold:
+            return []
+        out = [(addr + stride * (self.distance + k)) & MASK for k in range(self.degree)]
+        self.issued += len(out)
+        return out
+
+
+class StreamPrefetcher():
+    '''
+    next-line 流检测
+    缺失行 L 与某个流的预期行匹配时确认方向，预取之后 degree 行
+    '''
+    def __init__(self, streams: int = 8, degree: int = 2, line_bits: int = 6):
+        self.streams = streams
+        self.degree = degree
+        self.line_bits = line_bits
+        self.next_line = np.full(streams, -1, dtype=np.int64)
+        self.direction = np.zeros(streams, dtype=np.int8)
+        self.lru = np.zeros(streams, dtype=np.int64)
+        self.clock = 0
+        self.issued = 0
+
+    def observe(self, addr: int, miss: bool) -> list[int]:
+        if not miss:
+            return []
+        self.clock += 1
+        line = addr >> self.line_bits
+        for i in range(self.streams):
+            d = int(self.direction[i])
+            nl = int(self.next_line[i])
+            if nl < 0:
+                continue
+            if line == nl or (d == 0 and line == nl - 2):
+                if d == 0:
+                    d = 1 if line == nl else -1
+                    self.direction[i] = d
+                self.next_line[i] = line + d
+                self.lru[i] = self.clock
+                out = [(line + d * (k + 1)) << self.line_bits for k in range(self.degree)]
+                self.issued += len(out)
+                return out
+        # 新建流，预期下一次访问相邻行 (方向待定)
+        i = int(np.argmin(self.lru))
+        self.next_line[i] = line + 1
+        self.direction[i] = 0
+        self.lru[i] = self.clock
+        return []
+
+
+class DataPrefetcher():
+    '''
+    数据侧预取: 观察需求访问，预取请求直接填入 cache
+    stride / stream 可单独关闭
+    '''
+    def __init__(self, cache: Cache, stride: bool = True, stream: bool = True,
+                 stride_entries: int = 64, stride_degree: int = 2, stride_distance: int = 1,
+                 stream_count: int = 8, stream_degree: int = 2):
+        self.cache = cache
+        self.stride = StridePrefetcher(stride_entries, stride_degree, stride_distance) if stride else None
+        self.stream = StreamPrefetcher(stream_count, stream_degree, cache.line_bits) if stream else None
+        self.issued = 0
+        self.dropped = 0  # 目标行已在 cache 中
+
+    @classmethod
+    def from_config(cls, cache: Cache, cfg) -> 'DataPrefetcher':
+        return cls(cache, stride_entries=cfg.prefetch_entries, stride_degree=cfg.prefetch_degree,
+                   stride_distance=cfg.prefetch_distance, stream_count=cfg.prefetch_streams,
+                   stream_degree=cfg.prefetch_degree)
+
+    def access(self, pc: int, addr: int, cycle: int = 0) -> int:
+        """
+        需求访问 + 训练预取器，返回访问延迟
+        """
+        hit, latency = self.cache.access(addr, cycle)
+        candidates = []
+        if self.stride is not None:
+            candidates += self.stride.observe(pc, addr)
+        if self.stream is not None:
+            candidates += self.stream.observe(addr, not hit)
+        if candidates:
+            seen = set()
+            for a in candidates:
+                line = self.cache.line_addr(a)
+                if line in seen or line < 0:
+                    continue
+                seen.add(line)
+                if self.cache.fill(line, cycle):
+                    self.issued += 1
+                else:
+                    self.dropped += 1
+        return latency
+
+    def stats(self) -> dict:
+        c = self.cache
+        useful = c.prefetch_useful
+        out = c.stats()
+        out['prefetch_issued'] = self.issued
+        out['prefetch_dropped'] = self.dropped
+        # accuracy: 被使用的预取 / 发出的预取
+        out['accuracy'] = useful / self.issued if self.issued else 0.0
+        # coverage: 被预取消除的缺失 / (剩余缺失 + 被消除的缺失)
+        out['coverage'] = useful / (useful + c.misses) if useful + c.misses else 0.0
+        # lateness: 命中时填充尚未完成的预取比例
+        out['lateness'] = c.prefetch_late / useful if useful else 0.0
+        return out
+
+
+def run_trace(pcs, addrs, cycles=None, cache: Cache = None, **kwargs) -> dict:
+    """
+    在访存地址流上评估预取配置
+    cycles 缺省为每次访问间隔 1 周期；pc / 地址按无符号 64 位
+    """
+    cache = cache if cache is not None else Cache()
+    pf = DataPrefetcher(cache, **kwargs)
+    pcs = np.asarray(pcs, dtype=np.uint64).tolist()
+    addrs = np.asarray(addrs, dtype=np.uint64).tolist()
+    if cycles is None:
+        cycles = range(len(addrs))
+    else:
+        cycles = np.asarray(cycles, dtype=np.int64).tolist()
+    for pc, a, t in zip(pcs, addrs, cycles):
+        pf.access(pc, a, t)
+    return pf.stats()
@@ -1,9 +1,12 @@
 from .moduleConstant import *
+from .instr_unit import RegisterType
 
 class Register():
     def __init__(self, depth:int, zero = True):
         self.zero = zero
         self.mem = [0] * depth
+        self.watched: set[int] = set()
+        self.watch_hits: list[tuple[int, int, int]] = []
     
     def read(self, addr: int):
         if addr == 0 and self.zero:
@@ -15,20 +18,57 @@ class Register():
         if addr == 0 and self.zero:
             pass
         else:
-            self.mem[addr] = 0
+            self.mem[addr] = data
+
+    def _write_watched(self, addr:int, data:int):
+        old = self.mem[addr]
+        Register.write(self, addr, data)
+        if addr in self.watched and self.mem[addr] != old:
+            self.watch_hits.append((addr, old, self.mem[addr]))
+
+    # 只有存在观察点时才替换为带检查的 write
+    def watch(self, addr:int):
+        self.watched.add(addr)
+        self.write = self._write_watched
+
+    def unwatch(self, addr:int | None = None):
+        if addr is None:
+            self.watched.clear()
+        else:
+            self.watched.discard(addr)
+        if not self.watched:
+            self.__dict__.pop('write', None)
 
 class RegisterGroup():
-    def __init__(self, gpr: Register, fpr: Register, vpr: Register):
+    # vpr 为 vector.VectorRegFile (read / write / watch 接口与 Register 相同)
+    def __init__(self, gpr: Register, fpr: Register, vpr):
         self.gpr: Register = gpr
         self.fpr: Register = fpr
-        self.vpr: Register = vpr
-
-    def __getitem__(self, key: any):
-        if isinstance(key, int):
-            if key == GPR:
-                return self.gpr
-            elif key == FPR:
-                return self.fpr
-            elif key == VPR:
-                return self.vpr
-            
\ No newline at end of file
+        self.vpr = vpr
+
+    def __getitem__(self, key: RegisterType):
+        if key == RegisterType.GPR:
+            return self.gpr
+        elif key == RegisterType.FPR:
+            return self.fpr
+        elif key == RegisterType.VPR:
+            return self.vpr
+        raise KeyError(f"RegisterGroup: invalid region {key}")
+
+    def watch(self, region: RegisterType, addr: int):
+        self[region].watch(addr)
+
+    def unwatch(self, region: RegisterType | None = None, addr: int | None = None):
+        for r in ((RegisterType.GPR, RegisterType.FPR, RegisterType.VPR) if region is None else (region,)):
+            self[r].unwatch(addr)
+
+    def watch_hits(self) -> list[tuple[RegisterType, int, int, int]]:
+        """
+        取出并清空所有寄存器观察点的命中 (region, addr, old, new)
+        """
+        out = []
+        for r in (RegisterType.GPR, RegisterType.FPR, RegisterType.VPR):
+            reg = self[r]
+            out += [(r, *h) for h in reg.watch_hits]
+            reg.watch_hits.clear()
+        return out
@@ -0,0 +1,621 @@
+# 指令轨迹驱动的时序模型
+#
+# 功能模型运行一次，把每条提交的指令记录为定长记录，按块保存为 .npy:
+#   pc | next_pc | mem_addr | instr | instr2 (融合对的第二条指令字，否则为 0) | vcount
+# vsetvl* 的 mem_addr 为执行后的 vtype (供 critpath 推算向量寄存器组)
+# 向量访存另外记录访问过的 GRANULE 字节块 (去重、升序) 的块号，每块一个 vaddrNNNNNN.npy，
+# vcount 为该条指令在其中的块数
+# 时序模型只回放轨迹: 不执行 ALU / MDU，不保存数值，依赖关系按体系结构寄存器跟踪
+# 同一份轨迹可以在多个流水线配置下重放，比完整的执行 + 时序模拟快得多
+#
+# 与 sim_code.Simulator 的差别:
+#   轨迹中只有正确路径，分支预测错误时取指停到该分支解析后 redirect_penalty 个周期
+#   load 等所有更老的 store 发射后才发射 (地址已知，不产生访存顺序冲刷)
+#   融合由录制时的配置决定，重放时忽略 fusion
+#   FPU 的 rm=DYN 不等待更老的 CSR 指令
+#   向量访存与 Simulator 一样在 ROB 头部执行、每行访问一次 D-cache，但行由录制的 GRANULE 字节块换算
+#   (cache_line 不能小于 GRANULE)；向量 store 不阻塞更年轻的 load，也不产生访存顺序冲刷
+#
+#   python -m sim.replay record binary/main.mem trace_dir --instret 1000000
+#   python -m sim.replay run trace_dir --set rob_size=32,64,128 -j 8 -o replay.csv
+
+import argparse, heapq, itertools, json, os, random, sys
+from collections import deque
+import numpy as np
+from .decode import DecodeBlock, is_compressed
+from .instr_unit import *
+from .bpu import BranchPredictUnit, BranchKind
+from .lsq import lsu_is_store, lsu_size
+from .cache import Cache
+from .prefetch import DataPrefetcher
+from .config import CoreConfig, parse_sweep_axes
+from .perf import PerfCounters, StallReason, Stage, FuncUnit
+from .functional import FunctionalSim
+from .fpu import FPU
+from .sim_code import NOP_INSTR, _writes_gpr
+from .sweep import grid, flatten, write_csv
+from .util import readmemh
+from .vector import is_vector, vector_instr
+
+TRACE_DTYPE = np.dtype([
+    ('pc', '<u8'),
+    ('next_pc', '<u8'),
+    ('mem_addr', '<u8'),
+    ('instr', '<u4'),
+    ('instr2', '<u4'),
+    ('vcount', '<u4'),
+])
+META_FILE = 'meta.json'
+GRANULE_BITS = 3
+GRANULE = 1 << GRANULE_BITS
+
+
+########
+# 录制 #
+########
+class TraceWriter():
+    '''
+    作为 FunctionalSim 的 tracer，每 chunk 条记录写出一个 chunkNNNNNN.npy
+    '''
+    def __init__(self, directory: str, chunk: int = 1 << 20, fusion: bool = False):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.chunk = chunk
+        self.fusion = fusion
+        self.buf: list[tuple] = []
+        self.vbuf: list[np.ndarray] = []
+        self.chunks = 0
+        self.records = 0
+
+    def record(self, pc: int, next_pc: int, mem_addr: int, instr: int, instr2: int,
+               vaddrs: np.ndarray | None = None) -> None:
+        vcount = 0
+        if vaddrs is not None and len(vaddrs):
+            blocks = np.unique(vaddrs >> np.uint64(GRANULE_BITS))
+            self.vbuf.append(blocks)
+            vcount = len(blocks)
+        self.buf.append((pc, next_pc, mem_addr, instr, instr2, vcount))
+        if len(self.buf) >= self.chunk:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self.buf:
+            return
+        np.save(os.path.join(self.directory, f"chunk{self.chunks:06d}.npy"), np.array(self.buf, dtype=TRACE_DTYPE))
+        blocks = np.concatenate(self.vbuf) if self.vbuf else np.zeros(0, dtype=np.uint64)
+        np.save(os.path.join(self.directory, f"vaddr{self.chunks:06d}.npy"), blocks.astype(np.uint64))
+        self.records += len(self.buf)
+        self.chunks += 1
+        self.buf.clear()
+        self.vbuf.clear()
+
+    def close(self) -> None:
+        self.flush()
+        with open(os.path.join(self.directory, META_FILE), 'w', encoding='utf-8') as f:
+            json.dump({'records': self.records, 'chunks': self.chunks, 'chunk': self.chunk,
+                       'fusion': self.fusion, 'granule': GRANULE, 'dtype': TRACE_DTYPE.descr}, f, indent=2)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class TraceReader():
+    '''
+    按块读取 (mmap)，迭代得到每块的 (结构化数组, 向量访存的块号)
+    '''
+    def __init__(self, directory: str):
+        self.directory = directory
+        with open(os.path.join(directory, META_FILE), encoding='utf-8') as f:
+            self.meta = json.load(f)
+        if [tuple(d) for d in self.meta.get('dtype', ())] != TRACE_DTYPE.descr or self.meta.get('granule') != GRANULE:
+            raise ValueError(f"TraceReader: {directory} was recorded in a different trace format, record it again")
+
+    def __len__(self):
+        return self.meta['records']
+
+    def __iter__(self):
+        for i in range(self.meta['chunks']):
+            yield (np.load(os.path.join(self.directory, f"chunk{i:06d}.npy"), mmap_mode='r'),
+                   np.load(os.path.join(self.directory, f"vaddr{i:06d}.npy")))
+
+    def records(self, shift: int = 0):
+        """
+        逐条产生 (pc, next_pc, mem_addr, instr, instr2, blocks)；blocks 为向量访存的 GRANULE 块号，其余指令为 None
+        shift > 0 时 blocks 右移 shift 位后去重 (例如换算为 cache 行号)，按块向量化完成
+        """
+        for a, blocks in self:
+            counts = a['vcount'].astype(np.int64)
+            if len(blocks):
+                if shift:
+                    counts, blocks = _coarsen(counts, blocks, shift)
+                ends = np.cumsum(counts).tolist()
+                footprint = [blocks[e - c:e] if c else None for e, c in zip(ends, counts.tolist())]
+            else:
+                footprint = itertools.repeat(None)
+            yield from zip(a['pc'].tolist(), a['next_pc'].tolist(), a['mem_addr'].tolist(),
+                           a['instr'].tolist(), a['instr2'].tolist(), footprint)
+
+
+def _coarsen(counts: np.ndarray, blocks: np.ndarray, shift: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    每条记录的块号右移 shift 位后去重；记录内块号升序，只需去掉相邻的重复
+    """
+    blocks = blocks >> np.uint64(shift)
+    starts = (np.cumsum(counts) - counts)[counts > 0]
+    keep = np.ones(len(blocks), dtype=bool)
+    keep[1:] = blocks[1:] != blocks[:-1]
+    keep[starts] = True
+    counts = counts.copy()
+    counts[counts > 0] = np.add.reduceat(keep.astype(np.int64), starts)
+    return counts, blocks[keep]
+
+
+def record(mem, directory: str, config: CoreConfig = None, instret: int | None = None,
+           chunk: int = 1 << 20) -> int:
+    """
+    功能模型运行到 instret 条指令 (或程序结束)，返回记录条数
+    """
+    cfg = (config if config is not None else CoreConfig()).validate()
+    with TraceWriter(directory, chunk, cfg.fusion) as w:
+        FunctionalSim(mem, cfg, tracer=w).run_until(instret=instret)
+        w.flush()
+        return w.records
+
+
+########
+# 回放 #
+########
+class TraceEntry():
+    order: int = 0
+    pc: int = 0
+    size: int = 4
+    unit: ExecType = ExecType.ERROR
+    count: int = 1          # 提交计数 (融合对为 2)
+    rd: int = 0
+    rs1: int = 0
+    rs2: int = 0
+    frd: int = -1           # 写的 f 寄存器 (不重命名)
+    fsrcs: tuple = ()       # 读的 f 寄存器
+    latency: int = 0        # FPU 延迟
+    srcs: tuple = ()        # 重命名时尚未完成的生产者
+    fetch_cycle: int = 0
+    done: int = -1          # 结果可用的周期，-1 表示未发射
+    is_load: bool = False
+    is_store: bool = False
+    addr: int = 0
+    msize: int = 0
+    vmem: bool = False      # 向量访存
+    lines: np.ndarray = None    # 向量访存的 D-cache 行号
+    div: bool = False
+    pred = None
+    taken: bool = False
+    next_pc: int = 0
+    mispredict: bool = False
+
+
+class _Static():
+    '''
+    按 pc 缓存的译码结果
+    '''
+    STATIC_FIELDS = ('size', 'unit', 'count', 'rd', 'rs1', 'rs2', 'frd', 'fsrcs', 'latency',
+                     'is_load', 'is_store', 'msize', 'vmem', 'div')
+
+    def __init__(self, decoder: DecodeBlock, fpu: FPU, pc: int, instr: int, instr2: int):
+        self.key = (instr, instr2)
+        code = None
+        try:
+            if instr2:
+                code = decoder.fuse(instr, instr2, pc, 0)
+                self.size = (2 if is_compressed(instr) else 4) + (2 if is_compressed(instr2) else 4)
+            else:
+                _, code = decoder.decode_to_human(instr, pc, 0)
+                self.size = 2 if is_compressed(instr) else 4
+        except NotImplementedError:
+            self.size = 2 if is_compressed(instr) else 4
+        unit_instr = code[1] if isinstance(code, tuple) else None
+        if unit_instr is None and not instr2 and is_vector(instr):
+            unit_instr = vector_instr(instr)
+        self.unit = ExecType.ERROR
+        self.count = 2 if instr2 else 1
+        self.rs1 = self.rs2 = self.rd = 0
+        self.frd = -1
+        self.fsrcs = ()
+        self.latency = 0
+        self.is_load = self.is_store = False
+        self.msize = 0
+        self.vmem = False
+        self.div = False
+        if unit_instr is not None and unit_instr.alu in (ExecType.ALU, ExecType.BRANCH, ExecType.MDU,
+                                                         ExecType.LSU, ExecType.CSR, ExecType.VEC, ExecType.FPU):
+            self.unit = unit_instr.alu
+            df = unit_instr.dataflow
+            if unit_instr.req.rs1 or self.unit == ExecType.BRANCH:
+                self.rs1 = df.rs1
+            if unit_instr.req.rs2 or self.unit == ExecType.BRANCH:
+                self.rs2 = df.rs2
+            if _writes_gpr(unit_instr):
+                self.rd = df.rd
+            region = unit_instr.region
+            if region.rd == RegisterType.FPR:
+                self.frd = df.rd
+            self.fsrcs = tuple(r for k, r in ((region.rs1, df.rs1), (region.rs2, df.rs2), (region.rs3, df.rs3))
+                               if k == RegisterType.FPR)
+            if self.unit == ExecType.FPU:
+                self.latency = fpu.latency(unit_instr)
+                self.div = unit_instr.op in FPU.DIVSQRT
+            if self.unit == ExecType.LSU:
+                self.is_store = lsu_is_store(unit_instr.lsu_dataflow.op)
+                self.is_load = not self.is_store
+                self.msize = lsu_size(unit_instr.lsu_dataflow.op)
+            if self.unit == ExecType.VEC and unit_instr.op == VecOpType.TO_SCALAR:
+                # 与 CSR 相同在 ROB 头部执行，其余向量指令 (访存除外) 与 NOP 相同
+                self.unit = ExecType.CSR
+            self.vmem = self.unit == ExecType.VEC and unit_instr.op in (VecOpType.LOAD, VecOpType.STORE)
+            if self.unit == ExecType.MDU:
+                self.div = unit_instr.op in (MduOpType.DIV, MduOpType.DIVU, MduOpType.REM, MduOpType.REMU,
+                                             MduOpType.DIVW, MduOpType.DIVUW, MduOpType.REMW, MduOpType.REMUW)
+        self.instr = unit_instr if self.unit != ExecType.ERROR else NOP_INSTR
+        # 取指时整体拷贝到 TraceEntry
+        self.fields = {k: getattr(self, k) for k in self.STATIC_FIELDS}
+
+
+def replay(directory: str, config: CoreConfig = None, perf: PerfCounters | None = None,
+           max_instret: int | None = None) -> dict:
+    cfg = (config if config is not None else CoreConfig()).validate()
+    if cfg.cache_line < GRANULE:
+        raise ValueError(f"replay: cache_line must be at least {GRANULE} (the recorded vector access granule)")
+    perf = perf if perf is not None else PerfCounters.from_config(cfg)
+    reader = TraceReader(directory)
+
+    decoder = DecodeBlock()
+    bpu = BranchPredictUnit(cfg.predictor, btb_sets=cfg.btb_sets, btb_ways=cfg.btb_ways, ras_depth=cfg.ras_depth)
+    rng = random.Random(cfg.seed)
+    icache = Cache(cfg.icache_size, cfg.icache_ways, cfg.cache_line, cfg.cache_hit_latency, cfg.cache_miss_latency)
+    dcache = Cache(cfg.dcache_size, cfg.dcache_ways, cfg.cache_line, cfg.cache_hit_latency, cfg.cache_miss_latency)
+    dpf = DataPrefetcher.from_config(dcache, cfg) if cfg.prefetch else None
+    fpu = FPU(cfg)
+    source = reader.records(dcache.line_bits - GRANULE_BITS)
+    statics: dict[int, _Static] = {}
+
+    cycle = 0
+    instret = 0
+    seq = 0
+    fetch_count = 0         # 已取指的指令数 (融合对计 2)，与 max_instret 比较
+    limit = max_instret if max_instret is not None else 1 << 62
+    fetch_resume = 0
+    fetch_line = -1
+    icache_wait = 0
+    blocked = None          # 预测错误、尚未解析的分支，取指停在它后面
+    recover = False         # 正在从预测错误中恢复 (停顿归因)
+    pending = None          # 因 I-cache 缺失没有取进来的记录
+    exhausted = False
+    halted = None
+
+    decode_fifo = deque()
+    rob = deque()
+    iq = []
+    stores = deque()        # ROB 中的 store，按程序顺序
+    producer = [None] * cfg.arch_regs
+    fproducer = [None] * 32
+    free_regs = cfg.phy_regs - cfg.arch_regs
+    loads = store_count = 0
+    mdu_busy = []           # 在算的乘除法的完成周期 (最小堆)
+    fdiv_busy = 0           # FPU DIVSQRT 占用到该周期
+    branch_flushes = 0
+    fu_ops = [0] * len(FuncUnit)    # 各功能单元累计发射数，结束时一次计入 perf
+    mdu_occupied = 0
+
+    while cycle < cfg.max_cycles:
+        # [5] 提交
+        n = 0
+        retired = instret
+        while n < cfg.commit_width and rob and 0 <= rob[0].done < cycle:
+            e = rob.popleft()
+            if e.rd:
+                free_regs += 1
+                if producer[e.rd] is e:
+                    producer[e.rd] = None
+            if e.frd >= 0 and fproducer[e.frd] is e:
+                fproducer[e.frd] = None
+            if e.is_store:
+                stores.popleft()
+                store_count -= 1
+                dcache.access(e.addr, cycle)
+            elif e.is_load:
+                loads -= 1
+            if e.pred.kind != BranchKind.NONE:
+                bpu.update(e.pred, e.taken, e.next_pc)
+            instret += e.count
+            n += 1
+        committed = n
+
+        # [4] 分支解析
+        if blocked is not None and 0 <= blocked.done <= cycle:
+            bpu.recover(blocked.pred, blocked.taken, blocked.next_pc)
+            fetch_resume = blocked.done + cfg.redirect_penalty
+            fetch_line = -1
+            blocked = None
+        while mdu_busy and mdu_busy[0] <= cycle:
+            heapq.heappop(mdu_busy)
+
+        # [3] 发射 (最老优先)
+        alu_free = cfg.alu_count
+        lsu_free = cfg.lsu_count
+        fpu_free = 1
+        before = sum(fu_ops)
+        remain = []
+        for e in iq:
+            if e.srcs:
+                if any(s.done < 0 or s.done > cycle for s in e.srcs):
+                    remain.append(e)
+                    continue
+                e.srcs = ()
+            unit = e.unit
+            if unit == ExecType.ALU or unit == ExecType.BRANCH:
+                if alu_free == 0:
+                    remain.append(e)
+                    continue
+                alu_free -= 1
+                fu_ops[FuncUnit.ALU if unit == ExecType.ALU else FuncUnit.BRANCH] += 1
+                e.done = cycle + cfg.alu_latency
+            elif unit == ExecType.MDU:
+                if len(mdu_busy) >= cfg.mdu_depth:
+                    remain.append(e)
+                    continue
+                fu_ops[FuncUnit.MDU] += 1
+                e.done = cycle + (rng.randint(cfg.div_latency_min, cfg.div_latency_max) if e.div else cfg.mul_latency)
+                heapq.heappush(mdu_busy, e.done)
+            elif unit == ExecType.FPU:
+                if fpu_free == 0 or (e.div and fdiv_busy > cycle):
+                    remain.append(e)
+                    continue
+                fpu_free -= 1
+                fu_ops[FuncUnit.FPU] += 1
+                e.done = cycle + e.latency
+                if e.div:
+                    fdiv_busy = e.done
+            elif unit == ExecType.LSU:
+                if lsu_free == 0:
+                    remain.append(e)
+                    continue
+                if e.is_store:
+                    lsu_free -= 1
+                    fu_ops[FuncUnit.LSU] += 1
+                    e.done = cycle + 1
+                    continue
+                # 更老的 store 都发射后才发射，有重叠时前递
+                forward = False
+                wait = False
+                for s in stores:
+                    if s.order > e.order:
+                        break
+                    if s.done < 0:
+                        wait = True
+                        break
+                    if s.addr < e.addr + e.msize and e.addr < s.addr + s.msize:
+                        forward = True
+                if wait:
+                    remain.append(e)
+                    continue
+                lsu_free -= 1
+                fu_ops[FuncUnit.LSU] += 1
+                if forward:
+                    latency = cfg.cache_hit_latency
+                elif dpf is not None:
+                    latency = dpf.access(e.pc, e.addr, cycle)
+                else:
+                    latency = dcache.access(e.addr, cycle)[1]
+                e.done = cycle + latency
+            elif unit == ExecType.CSR:
+                if rob[0] is not e or alu_free == 0:
+                    remain.append(e)
+                    continue
+                alu_free -= 1
+                fu_ops[FuncUnit.CSR] += 1
+                e.done = cycle + cfg.alu_latency
+            elif e.vmem:
+                # 在 ROB 头部执行，延迟取所涉及 cache 行中最慢的一行
+                if rob[0] is not e or lsu_free == 0:
+                    remain.append(e)
+                    continue
+                lsu_free -= 1
+                fu_ops[FuncUnit.LSU] += 1
+                latency = cfg.cache_hit_latency
+                if e.lines is not None:
+                    for line in e.lines.tolist():
+                        latency = max(latency, dcache.access(line << dcache.line_bits, cycle)[1])
+                e.done = cycle + latency
+            else:
+                e.done = cycle + 1
+        iq = remain
+        perf.sample(Stage.ISSUE, sum(fu_ops) - before)
+        mdu_occupied += len(mdu_busy)
+
+        # [2] 重命名 / 分配 ROB
+        n = 0
+        rename_stall = None
+        while n < cfg.fetch_width and decode_fifo and decode_fifo[0].fetch_cycle < cycle:
+            e = decode_fifo[0]
+            if len(rob) >= cfg.rob_size:
+                rename_stall = StallReason.ROB_FULL
+                break
+            if e.rd and free_regs == 0:
+                rename_stall = StallReason.FREELIST_EMPTY
+                break
+            if (e.is_store and store_count >= cfg.sq_size) or (e.is_load and loads >= cfg.lq_size):
+                rename_stall = StallReason.LSQ_FULL
+                break
+            decode_fifo.popleft()
+            srcs = []
+            for r in (e.rs1, e.rs2):
+                p = producer[r] if r else None
+                if p is not None and not 0 <= p.done <= cycle:
+                    srcs.append(p)
+            for r in e.fsrcs:
+                p = fproducer[r]
+                if p is not None and not 0 <= p.done <= cycle:
+                    srcs.append(p)
+            e.srcs = tuple(srcs)
+            if e.rd:
+                free_regs -= 1
+                producer[e.rd] = e
+            if e.frd >= 0:
+                fproducer[e.frd] = e
+            if e.is_store:
+                stores.append(e)
+                store_count += 1
+            elif e.is_load:
+                loads += 1
+            rob.append(e)
+            iq.append(e)
+            n += 1
+        perf.sample(Stage.RENAME, n)
+
+        # [1] 取指 / 译码
+        fetched = len(decode_fifo)
+        if blocked is None and cycle >= fetch_resume and not exhausted and fetch_count < limit:
+            for _ in range(cfg.fetch_width):
+                if len(decode_fifo) >= cfg.fetch_buffer or fetch_count >= limit:
+                    break
+                if pending is None:
+                    pending = next(source, None)
+                    if pending is None:
+                        exhausted = True
+                        break
+                pc, next_pc, addr, word, word2, lines = pending
+                line = icache.line_addr(pc)
+                if line != fetch_line:
+                    hit, latency = icache.access(pc, cycle)
+                    if latency > cfg.cache_hit_latency:
+                        fetch_resume = cycle + latency
+                        icache_wait = fetch_resume
+                        break
+                    fetch_line = line
+                pending = None
+                st = statics.get(pc)
+                if st is None or st.key != (word, word2):
+                    st = statics[pc] = _Static(decoder, fpu, pc, word, word2)
+
+                e = TraceEntry()
+                e.__dict__.update(st.fields)
+                e.order = seq
+                e.pc = pc
+                e.fetch_cycle = cycle
+                e.addr = addr
+                e.lines = lines
+                e.next_pc = next_pc
+                seq += 1
+                fetch_count += st.count
+                e.pred = bpu.predict(pc, st.instr, st.size)
+                e.taken = next_pc != pc + st.size if e.pred.kind == BranchKind.COND else e.pred.kind != BranchKind.NONE
+                decode_fifo.append(e)
+                if e.pred.next_pc != next_pc:
+                    e.mispredict = True
+                    branch_flushes += 1
+                    blocked = e
+                    recover = True
+                    break
+                if e.pred.taken:
+                    fetch_line = -1
+                    break
+        perf.sample(Stage.FETCH, len(decode_fifo) - fetched)
+        perf.sample(Stage.DECODE, len(decode_fifo))
+        perf.sample(Stage.ROB, len(rob))
+        perf.sample(Stage.IQ, len(iq))
+
+        # 停顿归因
+        stall = None
+        if committed == 0:
+            head = rob[0] if rob else None
+            if head is not None and head.unit == ExecType.MDU and not 0 <= head.done < cycle:
+                stall = StallReason.MDU_BUSY
+            elif rename_stall is not None:
+                stall = rename_stall
+            elif head is None and (blocked is not None or recover):
+                stall = StallReason.BRANCH_FLUSH
+            elif head is None:
+                stall = StallReason.ICACHE_MISS if cycle < icache_wait else StallReason.FRONTEND
+            elif head.is_load or head.is_store:
+                stall = StallReason.MEMORY
+            else:
+                stall = StallReason.EXECUTE
+        elif blocked is None:
+            recover = False
+        perf.cycle(committed, stall, instret - retired)
+
+        cycle += 1
+        if (exhausted or fetch_count >= limit) and pending is None and not rob and not decode_fifo:
+            halted = 'end-of-trace'
+            break
+
+    if halted is None:
+        halted = 'max-cycles'
+    for u in FuncUnit:
+        perf.fu(u, mdu_occupied if u == FuncUnit.MDU else fu_ops[u], fu_ops[u])
+    return {
+        'halt': halted,
+        'cycles': cycle,
+        'instret': instret,
+        'ipc': instret / cycle if cycle else 0.0,
+        'branch_flushes': branch_flushes,
+        'perf': perf.summary(),
+        'bpu': bpu.stats(instret),
+        'icache': icache.stats(),
+        'dcache': dpf.stats() if dpf is not None else dcache.stats(),
+    }
+
+
+# 每个工作进程各自打开轨迹
+def run_one(job: tuple[dict, str, int | None]) -> dict:
+    config, directory, max_instret = job
+    row = dict(config)
+    row.update(flatten(replay(directory, CoreConfig.from_dict(config), max_instret=max_instret)))
+    return row
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Trace-driven timing model")
+    sub = parser.add_subparsers(dest='cmd', required=True)
+    rec = sub.add_parser('record', help="record a trace with the functional model")
+    rec.add_argument('mem', help="readmemh image")
+    rec.add_argument('directory')
+    rec.add_argument('--instret', type=int, default=None)
+    rec.add_argument('--chunk', type=int, default=1 << 20, help="records per .npy file")
+    rec.add_argument('--fusion', action='store_true')
+    run = sub.add_parser('run', help="replay a trace under one or more configurations")
+    run.add_argument('directory')
+    run.add_argument('--set', action='append', default=[], metavar='NAME=V1,V2', help="sweep axis")
+    run.add_argument('--instret', type=int, default=None)
+    run.add_argument('-j', '--jobs', type=int, default=None)
+    run.add_argument('-o', '--output', default=None, help="CSV, one row per configuration")
+    args = parser.parse_args(argv)
+
+    if args.cmd == 'record':
+        n = record(readmemh(args.mem), args.directory, CoreConfig(fusion=args.fusion), args.instret, args.chunk)
+        print(f"{n} records -> {args.directory}", file=sys.stderr)
+        return
+
+    try:
+        axes = parse_sweep_axes(args.set)
+        configs = grid(**axes)
+    except ValueError as exc:
+        parser.error(str(exc))
+    jobs = [(c.to_dict(), args.directory, args.instret) for c in configs]
+    if len(jobs) == 1 or args.jobs == 1:
+        rows = [run_one(j) for j in jobs]
+    else:
+        from multiprocessing import Pool
+        with Pool(args.jobs) as pool:
+            rows = pool.map(run_one, jobs, 1)
+    for r in rows:
+        print(f"{' '.join(f'{k}={r[k]}' for k in axes)} cycles={r['cycles']} instret={r['instret']} "
+              f"ipc={r['ipc']:.4f}", file=sys.stderr)
+    if args.output:
+        write_csv(args.output, rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,87 +1,1039 @@
-import os, sys
+import os, sys, heapq, random, argparse, json
+from collections import deque
 import numpy as np
 from .register import Register, RegisterGroup
-from .decode import DecodeBlock
+from .decode import DecodeBlock, is_compressed
 from .util import *
-from .instr_unit import InstrUnit
+from .moduleConstant import *
+from .instr_unit import *
+from .bpu import BranchPredictUnit, BranchKind
+from .ROB import RobGPR
+from .ops import alu, branch, MDU
+from .lsq import LoadStoreQueue, lsu_is_store, lsu_size
+from .memory import Memory
+from .cache import Cache
+from .prefetch import DataPrefetcher
+from .config import CoreConfig
+from .perf import PerfCounters, StallReason, Stage, FuncUnit
+from .trace import PipeTrace
+from .vcd import VcdWriter
+from .hotspot import HotspotProfiler
+from .plugin import PluginBus, Event
+from .debug import Debugger, StopEvent
+from .commitlog import CommitLog, FLAG_STORE, FLAG_FUSED, REGION_GPR, REGION_FPR, REGION_NONE
+from .checkpoint import Checkpoint
+from .vector import VectorUnit, CSR_VXRM, is_vector, vector_instr
+from .fpu import FPU, CSR_FRM, DYN, fp_load, accrue, sync_fcsr
 
 MEM_FILE = f"{os.path.dirname(__file__)}/../binary/main.mem"
 
 def addr2index(addr):
-    return addr * 2
+    return addr >> 1
 
 def index2addr(index):
-    return (index >> 1)
+    return index << 1
 
-def core(mem):
-    ############
-    # Register #
-    ############
-    gpr = Register(32, zero=True)
-    fpr = Register(32, zero=False)
-    vpr = Register(32, zero=False)
+def fetch_opcode(mem, addr) -> int:
+    index = addr2index(addr)
+    lo = mem[index] if index < len(mem) else 0
+    hi = mem[index + 1] if index + 1 < len(mem) else 0
+    return (hi << 16) | lo
 
-    decoder = DecodeBlock()
+def fetch_block(mem, addr, width: int = 128) -> int:
+    """
+    从 addr 开始读取 width 位 (取指总线宽度)
+    """
+    index = addr2index(addr)
+    value = 0
+    for k in range(width // 16):
+        if index + k < len(mem):
+            value |= mem[index + k] << (16 * k)
+    return value
 
-    ##############
-    # DEASSEMBLY #
-    ##############
+def disassemble(mem, decoder: DecodeBlock = None) -> list[tuple[int, int, str]]:
+    """
+    顺序反汇编整个镜像，返回 [(地址, 指令字, 文本)]
+    """
+    decoder = decoder if decoder is not None else DecodeBlock()
     i = 0
     addr = 0
-    human_code = []
-
-    # ASM
-    # Debug Only
+    out = []
     while(i < len(mem)):
         if i == len(mem) - 1:
             opcode = mem[i]
         else:
             opcode = (mem[i+1] << 16) + mem[i]
-        compress, code = decoder.decode_to_human(opcode, addr)
+        compress = is_compressed(opcode)
+        try:
+            _, code = decoder.decode_to_human(opcode, addr)
+            text = code[0] if isinstance(code, tuple) else code
+        except NotImplementedError:
+            text = None
         opcode = opcode & 0xffff if compress else opcode
-        human_code.append(f"{addr:08x}: {opcode:08x} {code[0]}")
+        if text is None:
+            text = f".instr {{{hex(opcode)}}}"
+        out.append((addr, opcode, text))
         if compress:
             i += 1
             addr += 2
         else:
             i += 2
             addr += 4
-    with open("main.asm", "w", encoding='utf-8') as f:
-        f.write('\n'.join(human_code))
+    return out
+
+def write_asm(lines, file_name = "main.asm"):
+    with open(file_name, "w", encoding='utf-8') as f:
+        f.write('\n'.join(f"{addr:08x}: {opcode:08x} {text}" for addr, opcode, text in lines))
+
+# ROB 表项状态
+DISPATCHED = 0
+ISSUED = 1
+COMPLETED = 2
+
+# 无法译码的指令按 NOP 处理时使用
+NOP_INSTR = InstrUnit()
+
+# 读 cycle / instret 的 CSR
+CSR_CYCLE = (0xC00, 0xB00)
+CSR_INSTRET = (0xC02, 0xB02)
+
+class RobEntry():
+    order: int = 0
+    pc: int = 0
+    opcode: int = 0
+    size: int = 4
+    instr: InstrUnit = None
+    text: str = ''
+    pred = None
+    unit: ExecType = ExecType.ERROR
+    state: int = DISPATCHED
+    rd: int = 0
+    rd_phy: int = -1
+    old_phy: int = -1
+    rs1_phy: int = -1
+    rs2_phy: int = -1
+    value: int = 0
+    taken: bool = False
+    next_pc: int = -1
+    is_load: bool = False
+    is_store: bool = False
+    mem_addr: int = -1
+    vec_addrs: np.ndarray = None    # 向量访存的字节地址 (VectorUnit.memory 的返回值)
+    frd: int = -1               # 提交时写入的 f 寄存器
+    fsrc: tuple = (None, None, None)    # rs1 / rs2 / rs3 为 f 寄存器时: (编号, 重命名时最近的在途写者)
+    fdeps: tuple = ()           # 尚未提交的 f 寄存器写者，完成后才能发射
+    old_fwriter = None
+    fflags: int = 0             # 提交时累积到 fflags
+    squashed: bool = False
+    decode_cycle: int = 0
+    rename_cycle: int = -1
+    issue_cycle: int = -1
+    complete_cycle: int = -1
+
+def _writes_gpr(instr: InstrUnit) -> bool:
+    if instr.alu in (ExecType.ALU, ExecType.MDU, ExecType.CSR):
+        return True
+    if instr.alu == ExecType.LSU:
+        return not lsu_is_store(instr.lsu_dataflow.op) and instr.lsu_dataflow.region == RegisterType.GPR
+    if instr.alu == ExecType.VEC or instr.alu == ExecType.FPU:
+        return instr.region.rd == RegisterType.GPR
+    return False
+
+def _log_commit(log: CommitLog, e: RobEntry, lsq: LoadStoreQueue) -> None:
+    flags = FLAG_FUSED if e.instr.fused != FusionType.NONE else 0
+    mem_size = mem_addr = mem_data = 0
+    if e.is_load or e.is_store:
+        mem_size = lsu_size(e.instr.lsu_dataflow.op)
+        mem_addr = e.mem_addr
+        if e.is_store:
+            flags |= FLAG_STORE
+            mem_data = lsq.stores[e.order].data
+        else:
+            mem_data = e.value
+    if e.rd_phy >= 0:
+        log.write(e.order, e.pc, e.opcode, REGION_GPR, e.rd, e.value, mem_size, mem_addr, mem_data, flags)
+    elif e.frd >= 0:
+        log.write(e.order, e.pc, e.opcode, REGION_FPR, e.frd, e.value, mem_size, mem_addr, mem_data, flags)
+    else:
+        log.write(e.order, e.pc, e.opcode, REGION_NONE, 0, 0, mem_size, mem_addr, mem_data, flags)
+
+
+class Simulator():
+    '''
+    可暂停 / 继续的核心模型，寄存器、译码器、存储器和流水线状态都保存在对象上
+    step() / run_until() 可以交替调用，从上次停下的周期继续运行
+
+    停止原因:
+      'self-loop' / 'end-of-image' / 'max-cycles'     程序结束，不能继续
+      'cycle' / 'instret' / 'pc'                      run_until() 的条件满足
+      'breakpoint' / 'watchpoint'                     Debugger 停下，debugger.stop 为详细信息
+    'pc' 和断点在该指令提交前停下，继续运行时不会在同一条指令上再次停下
+    'instret' 在使提交数达到目标的那条指令提交后停下 (融合对计 2 条，可能多 1 条)
+    'pc' / 'instret' / 断点 / 观察点停在周期中途，cycle 不推进；继续运行时先完成该周期，时序与不停下相同
+    '''
+    TERMINAL = ('self-loop', 'end-of-image', 'max-cycles')
+
+    def __init__(self, mem, config: CoreConfig = None, *, asm_file: str | None = None,
+                 perf: PerfCounters | None = None, trace: PipeTrace | None = None,
+                 commit_log: CommitLog | None = None, wave: VcdWriter | None = None,
+                 profiler: HotspotProfiler | None = None, plugins: PluginBus | None = None,
+                 debugger: Debugger | None = None):
+        cfg = (config if config is not None else CoreConfig()).validate()
+        self.mem = mem
+        self.cfg = cfg
+        self.perf = perf if perf is not None else PerfCounters.from_config(cfg)
+        self.trace = trace
+        self.commit_log = commit_log
+        self.wave = wave
+        self.profiler = profiler
+        self.plugins = plugins
+        self.debugger = debugger
+
+        ############
+        # Register #
+        ############
+        self.gpr = Register(cfg.arch_regs, zero=True)
+        self.fpr = Register(32, zero=False)
+        self.prf = RobGPR(cfg.arch_regs, cfg.phy_regs)
+        # 向量寄存器堆和 vl / vtype 由向量单元维护
+        self.vec = VectorUnit(cfg.vlen)
+        self.vpr = self.vec.vrf
+        self.regs = RegisterGroup(self.gpr, self.fpr, self.vpr)
+        self.csr = self.vec.csr()
+
+        self.decoder = DecodeBlock(fusion=cfg.fusion)
+        self.bpu = BranchPredictUnit(cfg.predictor, btb_sets=cfg.btb_sets, btb_ways=cfg.btb_ways, ras_depth=cfg.ras_depth)
+
+        self.alu = alu()
+        self.bru = branch()
+        self.mdu = MDU(cfg.mul_latency, (cfg.div_latency_min, cfg.div_latency_max), random.Random(cfg.seed))
+        self.fpu = FPU(cfg)
+
+        self.dmem = Memory()
+        self.dmem.load_image(mem)
+        self.lsq = LoadStoreQueue(cfg.lq_size, cfg.sq_size)
+        self.icache = Cache(cfg.icache_size, cfg.icache_ways, cfg.cache_line, cfg.cache_hit_latency, cfg.cache_miss_latency)
+        self.dcache = Cache(cfg.dcache_size, cfg.dcache_ways, cfg.cache_line, cfg.cache_hit_latency, cfg.cache_miss_latency)
+        self.dpf = DataPrefetcher.from_config(self.dcache, cfg) if cfg.prefetch else None
+
+        ##############
+        # DEASSEMBLY #
+        ##############
+        # Debug Only
+        if asm_file is not None:
+            write_asm(disassemble(mem, DecodeBlock()), asm_file)
+
+        self.cycle = 0
+        self.instret = 0
+        self.seq = 0
+        self.fetch_pc = 0
+        self.fetch_resume = 0
+        self.fetch_stopped = False
+        self.fetch_line = -1
+        self.recover_order = -1     # 冲刷后新路径的第一条指令
+        self.icache_wait = 0        # I-cache 缺失等待到该周期
+        self.cmd_new = True         # 取指收到新的起始地址 (复位 / 重定向)
+        self.halted = None          # 结束原因，不为 None 后不能继续运行
+        self.reason = None          # 最近一次停下的原因
+        self.skip_order = -1        # 继续运行时跳过该指令的断点 / pc 条件
+        self.partial = None         # 在提交阶段中途停下: (本周期已提交条数, 周期开始时的 instret)，继续时接着完成该周期
+        # 从检查点恢复时之前已经运行的周期 / 指令数，只影响读 cycle / instret CSR
+        self.base_cycle = 0
+        self.base_instret = 0
+        # 取指-译码接口波形，只在该组开启时计算；必须在第一个周期之前注册
+        self.fsig = wave.add_group('decode_to_fetch') if wave is not None else None
+        self.image_end = index2addr(len(mem))
+
+        # 所有的名称都是结果
+        self.decode_fifo = deque()
+        self.rob = deque()
+        self.iq = []
+        self.events = []
+        self.mdu_pending = {}
+        # f 寄存器不重命名，提交时写入；记录每个 f 寄存器最近的在途写者，读者从它前递
+        self.fwriter = {}
+        self.fdiv_busy = 0          # FPU DIVSQRT 占用到该周期
+
+        self.undecoded = 0
+        self.branch_flushes = 0
+        self.order_flushes = 0
+        # 已提交的融合对 (错误路径和重新取指的译码不计)
+        self.fusion_count = {t: 0 for t in FusionType if t != FusionType.NONE}
+
+    @property
+    def finished(self) -> bool:
+        return self.halted is not None
+
+    ########
+    # 运行 #
+    ########
+    def step(self, cycles: int = 1) -> str:
+        """
+        最多运行 cycles 个周期，返回停止原因
+        """
+        return self._run(until_cycle=self.cycle + cycles)
+
+    def run_until(self, pc: int | None = None, instret: int | None = None, cycle: int | None = None) -> str:
+        """
+        运行到任一条件满足: 地址为 pc 的指令即将提交 / 已提交指令数 >= instret / 周期数 >= cycle
+        没有给出条件时运行到程序结束或 max_cycles
+        """
+        return self._run(until_cycle=cycle, stop_pc=pc, stop_instret=instret)
+
+    def run(self) -> str:
+        return self._run()
+
+    def _run(self, until_cycle: int | None = None, stop_pc: int | None = None,
+             stop_instret: int | None = None) -> str:
+        if self.halted is not None:
+            return self.halted
+        cfg = self.cfg
+        mem = self.mem
+        perf = self.perf
+        trace = self.trace
+        commit_log = self.commit_log
+        wave = self.wave
+        profiler = self.profiler
+        plugins = self.plugins
+        debugger = self.debugger
+        MASK = REGISTER_MASK
+
+        gpr, fpr, vpr, regs, prf, csr = self.gpr, self.fpr, self.vpr, self.regs, self.prf, self.csr
+        vec = self.vec
+        decoder, bpu, alu_unit, bru_unit, mdu, fpu_unit = self.decoder, self.bpu, self.alu, self.bru, self.mdu, self.fpu
+        dmem, lsq, icache, dcache, dpf = self.dmem, self.lsq, self.icache, self.dcache, self.dpf
+        decode_fifo, rob, events, mdu_pending = self.decode_fifo, self.rob, self.events, self.mdu_pending
+        fwriter = self.fwriter
+        fusion_count = self.fusion_count
+        fsig, image_end = self.fsig, self.image_end
+        base_cycle, base_instret = self.base_cycle, self.base_instret
+
+        cycle = self.cycle
+        instret = self.instret
+        seq = self.seq
+        fetch_pc = self.fetch_pc
+        fetch_resume = self.fetch_resume
+        fetch_stopped = self.fetch_stopped
+        fetch_line = self.fetch_line
+        recover_order = self.recover_order
+        icache_wait = self.icache_wait
+        cmd_new = self.cmd_new
+        iq = self.iq
+        fdiv_busy = self.fdiv_busy
+        undecoded = self.undecoded
+        branch_flushes = self.branch_flushes
+        order_flushes = self.order_flushes
+        halted = None
+
+        limit = cfg.max_cycles if until_cycle is None else min(until_cycle, cfg.max_cycles)
+        if stop_instret is not None and instret >= stop_instret:
+            self.reason = 'instret'
+            return self.reason
+        # 从上次的断点 / pc 条件继续
+        if debugger is not None and debugger.stop is not None:
+            debugger.resume()
+        skip_order = self.skip_order
+        partial, self.partial = self.partial, None
+        # 断点 / 观察点: 没有设置时提交路径只判断一次 debugging
+        bp_map = b''
+        watch_mem = watch_reg = False
+        if debugger is not None and debugger.armed:
+            debugger.attach(dmem, regs)
+            bp_map = debugger.bitmap
+            watch_mem = bool(debugger.mem_watches)
+            watch_reg = bool(debugger.reg_watches)
+        debugging = bool(bp_map) or watch_mem or watch_reg or stop_pc is not None
+        # 插件事件缓冲区，无订阅者时为 None
+        ev_retire = ev_issue = ev_memory = ev_branch = None
+        if plugins is not None:
+            ev_batch = plugins.batch
+            ev_retire = plugins.buffer(Event.RETIRE)
+            ev_issue = plugins.buffer(Event.ISSUE)
+            ev_memory = plugins.buffer(Event.MEMORY)
+            ev_branch = plugins.buffer(Event.BRANCH)
+
+        def flush(order, new_pc):
+            nonlocal fetch_pc, fetch_resume, fetch_stopped, fetch_line, iq, recover_order, icache_wait, cmd_new
+            # 由新到旧回滚重命名
+            squashed = []
+            while rob and rob[-1].order >= order:
+                e = rob.pop()
+                e.squashed = True
+                squashed.append(e)
+                if e.rd_phy >= 0:
+                    prf.rollback(e.rd, e.rd_phy, e.old_phy)
+                if e.frd >= 0:
+                    if e.old_fwriter is not None:
+                        fwriter[e.frd] = e.old_fwriter
+                    else:
+                        fwriter.pop(e.frd, None)
+            if trace is not None:
+                for e in reversed(squashed):
+                    trace.record_entry(e, -1)
+                for e in decode_fifo:
+                    trace.record_entry(e, -1)
+            decode_fifo.clear()
+            iq = [e for e in iq if not e.squashed]
+            lsq.flush(order)
+            mdu.fifo = [m for m in mdu.fifo if m.instr.order < order]
+            for k in [k for k in mdu_pending if k >= order]:
+                del mdu_pending[k]
+            fetch_pc = new_pc
+            fetch_resume = cycle + cfg.redirect_penalty
+            fetch_stopped = False
+            fetch_line = -1
+            recover_order = seq
+            icache_wait = 0
+            cmd_new = True
+
+        def complete(e, at):
+            e.state = ISSUED
+            if e.issue_cycle < 0:
+                issue(e)
+            e.complete_cycle = at
+            heapq.heappush(events, (at, e.order, e))
+
+        def fread(src):
+            if src is None:
+                return 0
+            reg, writer = src
+            return fpr.read(reg) if writer is None else writer.value
+
+        def issue(e):
+            e.issue_cycle = cycle
+            if ev_issue is not None:
+                ev_issue.append((cycle, e.order, e.pc, e.unit.value))
+                if len(ev_issue) >= ev_batch:
+                    plugins.flush(Event.ISSUE)
+
+        try:
+            while(cycle < limit):
+                # [5] 提交
+                if partial is not None:
+                    n, retired = partial
+                    partial = None
+                else:
+                    n = 0
+                    retired = instret
+                while n < cfg.commit_width and rob and rob[0].state == COMPLETED:
+                    e = rob[0]
+                    if debugging and e.order != skip_order:
+                        i = e.pc >> 1
+                        if i < len(bp_map) and bp_map[i]:
+                            # 断点: 在该指令提交前停下
+                            debugger.stop = StopEvent('breakpoint', e.pc, e.order, cycle)
+                            self.skip_order = e.order
+                            halted = 'breakpoint'
+                            break
+                        if e.pc == stop_pc:
+                            self.skip_order = e.order
+                            halted = 'pc'
+                            break
+                    rob.popleft()
+                    if e.rd_phy >= 0:
+                        prf.release(e.old_phy)
+                        gpr.write(e.rd, e.value)
+                    if e.frd >= 0:
+                        fpr.write(e.frd, e.value)
+                        if fwriter.get(e.frd) is e:
+                            del fwriter[e.frd]
+                    if e.fflags:
+                        accrue(csr, e.fflags)
+                    if e.unit == ExecType.VEC:
+                        if e.instr.op in (VecOpType.CONFIG, VecOpType.ELEMENT):
+                            v = e.instr.value
+                            try:
+                                vec.execute(e.opcode, v.rs1, v.rs2, fpr.read(e.instr.dataflow.rs1),
+                                            csr.get(CSR_FRM, 0), csr.get(CSR_VXRM, 0))
+                                accrue(csr, vec.fflags)
+                            except NotImplementedError:
+                                if cfg.strict_decode:
+                                    raise
+                                undecoded += 1
+                        csr.update(vec.csr())
+                    if commit_log is not None:
+                        _log_commit(commit_log, e, lsq)
+                    if ev_memory is not None and (e.is_load or e.is_store):
+                        data = lsq.stores[e.order].data if e.is_store else e.value
+                        ev_memory.append((cycle, e.order, e.pc, e.mem_addr, lsu_size(e.instr.lsu_dataflow.op), e.is_store, data))
+                        if len(ev_memory) >= ev_batch:
+                            plugins.flush(Event.MEMORY)
+                    if e.is_load or e.is_store:
+                        lsq.commit(e.order, dmem)
+                        if e.is_store:
+                            dcache.access(e.mem_addr, cycle)
+                    if e.pred.kind != BranchKind.NONE:
+                        bpu.update(e.pred, e.taken, e.next_pc)
+                    if e.instr.fused != FusionType.NONE:
+                        instret += 2
+                        fusion_count[e.instr.fused] += 1
+                    else:
+                        instret += 1
+                    if trace is not None:
+                        trace.record_entry(e, cycle)
+                    if profiler is not None:
+                        profiler.on_retire(e.pc)
+                    if ev_retire is not None:
+                        ev_retire.append((cycle, e.order, e.pc, e.opcode, e.rd if e.rd_phy >= 0 else -1, e.value & MASK))
+                        if len(ev_retire) >= ev_batch:
+                            plugins.flush(Event.RETIRE)
+                    n += 1
+                    if e.order >= recover_order:
+                        recover_order = -1
+                    if debugging:
+                        if watch_reg and e.unit == ExecType.VEC:
+                            vpr.check_watches()
+                        if watch_mem and (e.is_load or e.is_store) and dmem.watch_hit(e.mem_addr, lsu_size(e.instr.lsu_dataflow.op), e.is_store):
+                            debugger.stop = StopEvent('watchpoint', e.pc, e.order, cycle, addr=e.mem_addr,
+                                                      access='write' if e.is_store else 'read')
+                            halted = 'watchpoint'
+                            break
+                        if watch_mem and e.vec_addrs is not None:
+                            vstore = e.instr.op == VecOpType.STORE
+                            addr = dmem.watch_hit_addrs(e.vec_addrs, vstore)
+                            if addr >= 0:
+                                debugger.stop = StopEvent('watchpoint', e.pc, e.order, cycle, addr=addr,
+                                                          access='write' if vstore else 'read')
+                                halted = 'watchpoint'
+                                break
+                        if watch_reg and (gpr.watch_hits or fpr.watch_hits or vpr.watch_hits):
+                            region, index, old, new = regs.watch_hits()[-1]
+                            debugger.stop = StopEvent('watchpoint', e.pc, e.order, cycle, region=region.name,
+                                                      reg=index, old=old, new=new)
+                            halted = 'watchpoint'
+                            break
+                    if e.next_pc == e.pc:
+                        # j 0: 程序结束
+                        halted = 'self-loop'
+                        break
+                    if stop_instret is not None and instret >= stop_instret:
+                        halted = 'instret'
+                        break
+                committed = n
+                if halted == 'self-loop':
+                    perf.cycle(committed, None, instret - retired)
+                    cycle += 1
+                    break
+                if halted is not None:
+                    # 断点 / 观察点 / pc / instret 条件: 周期不推进，继续运行时从提交阶段完成本周期，时序与不停下相同
+                    self.partial = (n, retired)
+                    break
+
+                # [4] 写回 / 分支解析
+                while events and events[0][0] <= cycle:
+                    _, _, e = heapq.heappop(events)
+                    if e.squashed:
+                        continue
+                    e.state = COMPLETED
+                    if e.rd_phy >= 0:
+                        prf.write(e.rd_phy, e.value)
+                        prf.release_busy(e.rd_phy)
+                    if ev_branch is not None and e.pred.kind != BranchKind.NONE:
+                        ev_branch.append((cycle, e.order, e.pc, e.pred.kind.value, e.taken, e.next_pc, e.next_pc != e.pred.next_pc))
+                        if len(ev_branch) >= ev_batch:
+                            plugins.flush(Event.BRANCH)
+                    if e.next_pc != e.pred.next_pc:
+                        bpu.recover(e.pred, e.taken, e.next_pc)
+                        branch_flushes += 1
+                        if profiler is not None:
+                            profiler.on_mispredict(e.pc)
+                        flush(e.order + 1, e.next_pc)
+
+                mdu.update()
+                if mdu.result is not None:
+                    e = mdu_pending.pop(mdu.result.order, None)
+                    if e is not None:
+                        e.value = mdu.result.value
+                        complete(e, cycle)
+
+                # [3] 发射 (最老优先)
+                alu_free = cfg.alu_count
+                lsu_free = cfg.lsu_count
+                fpu_free = 1
+                issued = [0] * len(FuncUnit)
+                violation = None
+                remain = []
+                for e in iq:
+                    if e.squashed:
+                        continue
+                    if violation is not None:
+                        remain.append(e)
+                        continue
+                    if (e.rs1_phy >= 0 and prf.read_busy(e.rs1_phy)) or (e.rs2_phy >= 0 and prf.read_busy(e.rs2_phy)):
+                        remain.append(e)
+                        continue
+                    if e.fdeps and any(w.state != COMPLETED for w in e.fdeps):
+                        remain.append(e)
+                        continue
+                    instr = e.instr
+                    unit = e.unit
+                    instr.value.rs1 = prf.read(e.rs1_phy) if e.rs1_phy >= 0 else 0
+                    instr.value.rs2 = prf.read(e.rs2_phy) if e.rs2_phy >= 0 else 0
+
+                    if unit == ExecType.ALU or unit == ExecType.BRANCH:
+                        if alu_free == 0:
+                            remain.append(e)
+                            continue
+                        alu_free -= 1
+                        issued[FuncUnit.ALU if unit == ExecType.ALU else FuncUnit.BRANCH] += 1
+                        if unit == ExecType.ALU:
+                            alu_unit.set_instr(instr)
+                            alu_unit.update()
+                            e.value = alu_unit.result.value
+                            if instr.pc_effect.valid:
+                                e.taken = True
+                                e.next_pc = alu_unit.result.pc_effect.target
+                        else:
+                            bru_unit.set_instr(instr)
+                            bru_unit.update()
+                            e.taken = bru_unit.result.value == 1
+                            e.next_pc = bru_unit.result.pc_effect.target if e.taken else e.pc + e.size
+                        complete(e, cycle + cfg.alu_latency)
+                    elif unit == ExecType.MDU:
+                        if len(mdu.fifo) >= cfg.mdu_depth:
+                            remain.append(e)
+                            continue
+                        mdu.set_instr(instr)
+                        mdu_pending[e.order] = e
+                        issued[FuncUnit.MDU] += 1
+                        e.state = ISSUED
+                        issue(e)
+                    elif unit == ExecType.LSU:
+                        if lsu_free == 0:
+                            remain.append(e)
+                            continue
+                        lsu_free -= 1
+                        issued[FuncUnit.LSU] += 1
+                        addr = (instr.value.rs1 + instr.dataflow.offset) & MASK
+                        e.mem_addr = addr
+                        fp = instr.lsu_dataflow.region == RegisterType.FPR
+                        if e.is_store:
+                            victims = lsq.execute_store(e.order, addr, fread(e.fsrc[1]) if fp else instr.value.rs2)
+                            complete(e, cycle + 1)
+                            if victims:
+                                violation = victims[0]
+                        else:
+                            value = lsq.execute_load(e.order, addr, dmem)
+                            if value is None:
+                                remain.append(e)
+                                continue
+                            if lsq.loads[e.order].fwd_order >= 0:
+                                latency = cfg.cache_hit_latency
+                            elif dpf is not None:
+                                latency = dpf.access(e.pc, addr, cycle)
+                            else:
+                                latency = dcache.access(addr, cycle)[1]
+                            e.value = fp_load(lsu_size(instr.lsu_dataflow.op), value) if fp else value
+                            complete(e, cycle + latency)
+                    elif unit == ExecType.FPU:
+                        # 每周期发射一条；DIVSQRT 不流水；rm=DYN 要等更老的 CSR 指令 (可能写 frm) 执行完
+                        divsqrt = instr.op in FPU.DIVSQRT
+                        if fpu_free == 0 or (divsqrt and fdiv_busy > cycle):
+                            remain.append(e)
+                            continue
+                        if instr.fpu_dataflow.rm == DYN:
+                            csr_wait = False
+                            for x in rob:
+                                if x is e:
+                                    break
+                                if x.unit == ExecType.CSR and x.issue_cycle < 0:
+                                    csr_wait = True
+                                    break
+                            if csr_wait:
+                                remain.append(e)
+                                continue
+                        fpu_free -= 1
+                        issued[FuncUnit.FPU] += 1
+                        a = instr.value.rs1 if instr.req.rs1 else fread(e.fsrc[0])
+                        try:
+                            e.value, e.fflags = fpu_unit.execute(instr, csr, a, fread(e.fsrc[1]), fread(e.fsrc[2]))
+                        except NotImplementedError:
+                            if cfg.strict_decode:
+                                raise
+                            undecoded += 1
+                        latency = fpu_unit.latency(instr)
+                        if divsqrt:
+                            fdiv_busy = cycle + latency
+                        complete(e, cycle + latency)
+                    elif unit == ExecType.CSR:
+                        # CSR 串行执行: 只在 ROB 头部执行
+                        if rob[0] is not e or alu_free == 0:
+                            remain.append(e)
+                            continue
+                        alu_free -= 1
+                        issued[FuncUnit.CSR] += 1
+                        addr = instr.dataflow.csr
+                        src = instr.dataflow.imm if instr.op.value >= 5 else instr.value.rs1
+                        if addr in CSR_CYCLE:
+                            old = cycle + base_cycle
+                        elif addr in CSR_INSTRET:
+                            old = instret + base_instret
+                        else:
+                            old = csr.get(addr, 0)
+                        kind = instr.op.value & 0b11
+                        if kind == CsrOpType.RW.value:
+                            csr[addr] = src & MASK
+                        elif kind == CsrOpType.RS.value:
+                            csr[addr] = (old | src) & MASK
+                        elif kind == CsrOpType.RC.value:
+                            csr[addr] = (old & ~src) & MASK
+                        sync_fcsr(csr, addr)
+                        e.value = old & MASK
+                        complete(e, cycle + cfg.alu_latency)
+                    elif unit == ExecType.VEC and (instr.op == VecOpType.LOAD or instr.op == VecOpType.STORE):
+                        # 向量访存在 ROB 头部执行 (更老的 store 均已写入内存)，延迟取所涉及 cache 行中最慢的一行
+                        if rob[0] is not e or lsu_free == 0:
+                            remain.append(e)
+                            continue
+                        lsu_free -= 1
+                        issued[FuncUnit.LSU] += 1
+                        e.mem_addr = instr.value.rs1
+                        latency = cfg.cache_hit_latency
+                        try:
+                            addrs = vec.memory(e.opcode, dmem, instr.value.rs1, instr.value.rs2)
+                        except NotImplementedError:
+                            if cfg.strict_decode:
+                                raise
+                            undecoded += 1
+                            addrs = np.zeros(0, dtype=np.uint64)
+                        e.vec_addrs = addrs
+                        for line in np.unique(addrs >> np.uint64(dcache.line_bits)).tolist():
+                            latency = max(latency, dcache.access(line << dcache.line_bits, cycle)[1])
+                        if instr.op == VecOpType.STORE:
+                            # 已经执行的 load 都比它年轻，读到旧值的需要重放
+                            victims = lsq.execute_vector_store(e.order, addrs.tolist())
+                            if victims:
+                                violation = victims[0]
+                        complete(e, cycle + latency)
+                    elif unit == ExecType.VEC and instr.op == VecOpType.TO_SCALAR:
+                        # 读向量寄存器写标量寄存器: 与 CSR 相同，只在 ROB 头部执行
+                        if rob[0] is not e or alu_free == 0:
+                            remain.append(e)
+                            continue
+                        alu_free -= 1
+                        issued[FuncUnit.CSR] += 1
+                        try:
+                            # 写 f 寄存器时在提交时写入 (e.frd)
+                            e.value = vec.execute(e.opcode)[2]
+                        except NotImplementedError:
+                            if cfg.strict_decode:
+                                raise
+                            undecoded += 1
+                        complete(e, cycle + cfg.alu_latency)
+                    elif unit == ExecType.VEC:
+                        # 其余向量指令的时序与 NOP 相同，提交时才修改向量状态；vsetvl* 的 rd 在此算出
+                        if instr.op == VecOpType.CONFIG:
+                            e.value = vec.config_vl(e.opcode, instr.value.rs1, instr.value.rs2)
+                        complete(e, cycle + 1)
+                    else:
+                        # 未建模的指令按 NOP 处理
+                        complete(e, cycle + 1)
+                iq = remain
+                perf.sample(Stage.ISSUE, sum(issued))
+                for u in (FuncUnit.ALU, FuncUnit.BRANCH, FuncUnit.LSU, FuncUnit.CSR, FuncUnit.FPU):
+                    perf.fu(u, issued[u], issued[u])
+                # MDU 按在算的指令数计占用
+                perf.fu(FuncUnit.MDU, len(mdu.fifo), issued[FuncUnit.MDU])
+                if violation is not None:
+                    # load 读到旧值: 从该 load 重新取指
+                    order_flushes += 1
+                    victim = next(e for e in rob if e.order == violation)
+                    bpu.restore(victim.pred)
+                    flush(victim.order, victim.pc)
+
+                # [2] 重命名 / 分配 ROB
+                n = 0
+                rename_stall = None
+                while n < cfg.fetch_width and decode_fifo and decode_fifo[0].decode_cycle < cycle:
+                    e = decode_fifo[0]
+                    instr = e.instr
+                    if len(rob) >= cfg.rob_size:
+                        rename_stall = StallReason.ROB_FULL
+                        break
+                    if e.rd_phy == 0 and not prf.avaliable_phy_reg:
+                        rename_stall = StallReason.FREELIST_EMPTY
+                        break
+                    if (e.is_load or e.is_store) and lsq.full(instr.lsu_dataflow.op):
+                        rename_stall = StallReason.LSQ_FULL
+                        break
+                    decode_fifo.popleft()
+                    e.rename_cycle = cycle
+                    df = instr.dataflow
+                    if instr.req.rs1 or e.unit == ExecType.BRANCH:
+                        e.rs1_phy = prf.map[df.rs1] if df.rs1 != 0 else -1
+                    if instr.req.rs2 or e.unit == ExecType.BRANCH:
+                        e.rs2_phy = prf.map[df.rs2] if df.rs2 != 0 else -1
+                    if e.rd_phy == 0:
+                        e.rd_phy, e.old_phy = prf.rename(e.rd)
+                    region = instr.region
+                    if RegisterType.FPR in (region.rs1, region.rs2, region.rs3):
+                        e.fsrc = tuple((r, fwriter.get(r)) if k == RegisterType.FPR else None
+                                       for k, r in ((region.rs1, df.rs1), (region.rs2, df.rs2), (region.rs3, df.rs3)))
+                        e.fdeps = tuple(src[1] for src in e.fsrc if src is not None and src[1] is not None)
+                    if e.frd >= 0:
+                        e.old_fwriter = fwriter.get(e.frd)
+                        fwriter[e.frd] = e
+                    if e.is_load or e.is_store:
+                        lsq.allocate(e.order, instr.lsu_dataflow.op)
+                    rob.append(e)
+                    iq.append(e)
+                    n += 1
+                perf.sample(Stage.RENAME, n)
+
+                # [1] 取指 / 译码 4发射
+                fetched = len(decode_fifo)
+                fetch_addr = fetch_pc
+                fetch_room = len(decode_fifo) < cfg.fetch_buffer
+                fetch_active = not fetch_stopped and cycle >= fetch_resume
+                if fetch_active:
+                    for i in range(cfg.fetch_width):
+                        if len(decode_fifo) >= cfg.fetch_buffer:
+                            break
+                        pc = fetch_pc
+                        if pc >= image_end:
+                            fetch_stopped = True
+                            break
+                        line = icache.line_addr(pc)
+                        if line != fetch_line:
+                            hit, latency = icache.access(pc, cycle)
+                            if latency > cfg.cache_hit_latency:
+                                fetch_resume = cycle + latency
+                                icache_wait = fetch_resume
+                                break
+                            fetch_line = line
+                        opcode = fetch_opcode(mem, pc)
+                        next_opcode = fetch_opcode(mem, pc + (2 if is_compressed(opcode) else 4))
+                        try:
+                            compress, size, code = decoder.decode_pair(opcode, next_opcode, pc, seq)
+                        except NotImplementedError:
+                            size, code = (2 if is_compressed(opcode) else 4), None
+                        instr = code[1] if isinstance(code, tuple) else None
+
+                        e = RobEntry()
+                        e.order = seq
+                        e.pc = pc
+                        e.opcode = opcode & 0xffff if is_compressed(opcode) else opcode
+                        e.size = size
+                        e.decode_cycle = cycle
+                        e.next_pc = pc + size
+                        if instr is None and is_vector(opcode):
+                            instr = vector_instr(opcode)
+                            e.unit = ExecType.VEC
+                            e.text = code if isinstance(code, str) else f".instr {{{hex(opcode)}}}"
+                        elif instr is None:
+                            if cfg.strict_decode:
+                                raise NotImplementedError("Decode: Undecoded Instruction")
+                            undecoded += 1
+                            instr = InstrUnit()
+                            e.text = code if isinstance(code, str) else f".instr {{{hex(opcode)}}}"
+                        else:
+                            e.text = code[0]
+                            if instr.alu in (ExecType.ALU, ExecType.BRANCH, ExecType.MDU, ExecType.LSU, ExecType.CSR, ExecType.FPU):
+                                e.unit = instr.alu
+                            else:
+                                # 其余执行单元未建模
+                                undecoded += 1
+                        instr.order = seq
+                        e.instr = instr
+                        if e.unit == ExecType.LSU:
+                            e.is_store = lsu_is_store(instr.lsu_dataflow.op)
+                            e.is_load = not e.is_store
+                        if e.unit != ExecType.ERROR and _writes_gpr(instr) and instr.dataflow.rd != 0:
+                            e.rd = instr.dataflow.rd
+                            e.rd_phy = 0    # 待重命名
+                        elif e.unit != ExecType.ERROR and instr.region.rd == RegisterType.FPR:
+                            e.frd = instr.dataflow.rd
+                        seq += 1
+
+                        # 按预测结果更新取指地址
+                        e.pred = bpu.predict(pc, instr if e.unit != ExecType.ERROR else NOP_INSTR, size)
+                        decode_fifo.append(e)
+                        fetch_pc = e.pred.next_pc
+                        if e.pred.taken:
+                            fetch_line = -1
+                            break
+
+                perf.sample(Stage.FETCH, len(decode_fifo) - fetched)
+                if fsig is not None:
+                    wave.set(fsig['valid'], int(not fetch_stopped))
+                    wave.set(fsig['next_addr'], fetch_addr)
+                    wave.set(fsig['cmd_new'], int(cmd_new and fetch_active))
+                    wave.set(fsig['next'], int(fetch_room))
+                    wave.set(fsig['ready'], int(len(decode_fifo) > fetched))
+                    if len(decode_fifo) > fetched:
+                        wave.set(fsig['addr'], fetch_addr)
+                        wave.set(fsig['data'], fetch_block(mem, fetch_addr))
+                    wave.cycle(cycle)
+                if fetch_active:
+                    cmd_new = False
+                perf.sample(Stage.DECODE, len(decode_fifo))
+                perf.sample(Stage.ROB, len(rob))
+                perf.sample(Stage.IQ, len(iq))
+
+                # 停顿归因
+                stall = None
+                if committed == 0:
+                    head = rob[0] if rob else None
+                    if head is not None and head.unit == ExecType.MDU and head.state != COMPLETED:
+                        stall = StallReason.MDU_BUSY
+                    elif rename_stall is not None:
+                        stall = rename_stall
+                    elif recover_order >= 0 and (head is None or head.order >= recover_order):
+                        stall = StallReason.BRANCH_FLUSH
+                    elif head is None:
+                        stall = StallReason.ICACHE_MISS if cycle < icache_wait else StallReason.FRONTEND
+                    elif head.is_load or head.is_store:
+                        stall = StallReason.MEMORY
+                    else:
+                        stall = StallReason.EXECUTE
+                perf.cycle(committed, stall, instret - retired)
+                if profiler is not None and committed == 0:
+                    profiler.on_stall(rob[0].pc if rob else fetch_pc)
+
+                if fetch_stopped and not rob and not decode_fifo:
+                    halted = 'end-of-image'
+                    break
+                cycle += 1
+        finally:
+            self.cycle = cycle
+            self.instret = instret
+            self.seq = seq
+            self.fetch_pc = fetch_pc
+            self.fetch_resume = fetch_resume
+            self.fetch_stopped = fetch_stopped
+            self.fetch_line = fetch_line
+            self.recover_order = recover_order
+            self.icache_wait = icache_wait
+            self.cmd_new = cmd_new
+            self.iq = iq
+            self.fdiv_busy = fdiv_busy
+            self.undecoded = undecoded
+            self.branch_flushes = branch_flushes
+            self.order_flushes = order_flushes
+
+        if halted is None:
+            halted = 'max-cycles' if cycle >= cfg.max_cycles else 'cycle'
+        if halted in self.TERMINAL:
+            self.halted = halted
+        self.reason = halted
+        return halted
+
+    def finish(self) -> dict:
+        """
+        合并剖析数据、通知插件结束，返回统计
+        """
+        if self.profiler is not None:
+            self.profiler.flush()
+        if self.plugins is not None:
+            self.plugins.finish()
+        return self.stats()
+
+    ########
+    # 统计 #
+    ########
+    def stats(self) -> dict:
+        debugger = self.debugger
+        return {
+            'halt': self.reason,
+            'cycles': self.cycle,
+            'instret': self.instret,
+            'ipc': self.instret / self.cycle if self.cycle else 0.0,
+            'fused_pairs': sum(self.fusion_count.values()),
+            'fusion': {t.name.lower(): n for t, n in self.fusion_count.items()},
+            'undecoded': self.undecoded,
+            'branch_flushes': self.branch_flushes,
+            'order_flushes': self.order_flushes,
+            'perf': self.perf.summary(),
+            'stop': debugger.stop.to_dict() if debugger is not None and debugger.stop is not None else None,
+            'bpu': self.bpu.stats(self.instret),
+            'lsq': self.lsq.stats(),
+            'icache': self.icache.stats(),
+            'dcache': self.dpf.stats() if self.dpf is not None else self.dcache.stats(),
+        }
+
+
+def core(mem, config: CoreConfig = None, asm_file: str | None = None, perf: PerfCounters | None = None,
+         trace: PipeTrace | None = None, commit_log: CommitLog | None = None,
+         wave: VcdWriter | None = None, profiler: HotspotProfiler | None = None,
+         plugins: PluginBus | None = None, debugger: Debugger | None = None) -> dict:
+    """
+    运行到程序结束 (或断点 / 观察点)，返回统计
+    """
+    sim = Simulator(mem, config, asm_file=asm_file, perf=perf, trace=trace, commit_log=commit_log,
+                    wave=wave, profiler=profiler, plugins=plugins, debugger=debugger)
+    sim.run()
+    return sim.finish()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="RISC-V out-of-order core model")
+    parser.add_argument('mem', nargs='?', default=MEM_FILE, help="readmemh image")
+    parser.add_argument('--set', action='append', default=[], metavar='NAME=VALUE', help="override a CoreConfig field")
+    parser.add_argument('--max-cycles', type=int, default=None)
+    parser.add_argument('--until-pc', type=lambda s: int(s, 0), default=None, help="stop before this pc commits")
+    parser.add_argument('--until-instret', type=int, default=None)
+    parser.add_argument('--until-cycle', type=int, default=None)
+    parser.add_argument('--break', dest='breaks', action='append', default=[], type=lambda s: int(s, 0),
+                        metavar='PC', help="breakpoint, repeatable")
+    parser.add_argument('--asm', default='main.asm', help="disassembly output ('' to skip)")
+    parser.add_argument('--trace', default=None, help="O3PipeView trace file")
+    parser.add_argument('--commit-log', default=None, help="binary commit log")
+    parser.add_argument('--vcd', default=None, help="decode_to_fetch waveform")
+    parser.add_argument('--profile', default='main.prof', help="hot-spot report ('' to skip)")
+    parser.add_argument('--perf-json', default='perf.json')
+    parser.add_argument('--perf-csv', default='perf.csv')
+    parser.add_argument('--json', default=None, help="write stats as JSON")
+    parser.add_argument('--restore', default=None, help="start from an architectural checkpoint")
+    parser.add_argument('--save', default=None, help="write a checkpoint where the run stops")
+    args = parser.parse_args(argv)
+
+    try:
+        cfg = CoreConfig.from_overrides(args.set)
+    except ValueError as exc:
+        parser.error(str(exc))
+    if args.max_cycles is not None:
+        cfg = cfg.replace(max_cycles=args.max_cycles)
+
+    mem = readmemh(args.mem)
+    perf = PerfCounters.from_config(cfg)
+    profiler = HotspotProfiler(index2addr(len(mem))) if args.profile else None
+    trace = PipeTrace(args.trace) if args.trace else None
+    commit_log = CommitLog(args.commit_log) if args.commit_log else None
+    wave = VcdWriter(args.vcd) if args.vcd else None
+    debugger = None
+    if args.breaks:
+        debugger = Debugger()
+        for pc in args.breaks:
+            debugger.break_at(pc)
+
+    sim = Simulator(mem, cfg, asm_file=args.asm or None, perf=perf, trace=trace, commit_log=commit_log,
+                    wave=wave, profiler=profiler, debugger=debugger)
+    if args.restore:
+        Checkpoint.load(args.restore).restore(sim)
+    try:
+        reason = sim.run_until(pc=args.until_pc, instret=args.until_instret, cycle=args.until_cycle)
+        stats = sim.finish()
+    finally:
+        for sink in (trace, commit_log, wave):
+            if sink is not None:
+                sink.close()
+    print(f"stopped: {reason} at cycle {sim.cycle}, instret {sim.instret}", file=sys.stderr)
+    if args.save:
+        Checkpoint.capture(sim).save(args.save)
+
+    if profiler is not None:
+        lines = disassemble(mem)
+        profiler.write(lines, args.profile)
+        print(profiler.summary(lines))
+    if args.perf_json:
+        perf.dump_json(args.perf_json)
+    if args.perf_csv:
+        perf.dump_csv(args.perf_csv)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(stats, f, indent=2, default=str)
+    print(stats)
+
 
-    next_addr = 0
-    addr = 0
-    # 所有的名称都是结果
-    decode_fifo = []
-    rob_fifo = []
-
-
-    while(True):
-        # [2] 分配 Rob
-        for i in decode_fifo:
-            if
-        # [1] 译码 4发射
-        for i in range(4):
-            index = addr2index(next_addr)
-            opcode = (mem[index + 1] << 16) | mem[index]
-            compress, code = decoder.decode_to_human(opcode)
-            if compress:
-                next_addr += 2
-            else:
-                next_addr += 4
-            if code[1] is None:
-                raise NotImplementedError("Decode: Undecoded Instruction")
-            decode_fifo.append(code[1])
-        
-
-
-
-             
-            
-
-    
-    
 if __name__ == '__main__':
-    mem = readmemh(MEM_FILE)
-    core(mem)
-    pass
\ No newline at end of file
+    main()
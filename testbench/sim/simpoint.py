@@ -0,0 +1,374 @@
+# SimPoint 采样模拟
+#
+#   1. 功能模型运行整个程序，按固定指令数划分区间，统计每个区间的基本块向量 (BBV)
+#   2. BBV 归一化后随机投影到低维，k-means 聚类 (按 BIC 选择 k)，每类取离中心最近的区间
+#   3. 功能模型再运行一遍，在每个代表区间之前 warmup 条指令处保存检查点
+#   4. 详细模型从检查点开始，先运行 warmup 条指令预热 cache / 分支预测器，再统计该区间
+#   5. 按类的大小加权得到整体 CPI / IPC；每类默认取 2 个区间，给出分层抽样的标准误差
+#
+#   python -m sim.simpoint main.mem --interval 100000 --max-k 10 --warmup 20000
+
+import argparse, json, math, sys
+import numpy as np
+from .config import CoreConfig
+from .checkpoint import Checkpoint
+from .functional import FunctionalSim
+from .sim_code import Simulator, readmemh, MEM_FILE
+
+MAX_INSTRET = 10_000_000    # 命令行缺省的剖析长度
+
+
+class BbvProfiler():
+    '''
+    作为 FunctionalSim 的 on_block 回调
+    区间在指令数达到 interval 后的第一个基本块结束处切分，因此区间长度略有出入
+    '''
+    def __init__(self, interval: int = 100_000):
+        self.interval = interval
+        self.vectors: list[dict[int, int]] = []
+        self.bounds: list[tuple[int, int]] = []    # [start, end) 按指令数
+        self.current: dict[int, int] = {}
+        self.start = 0
+        self.count = 0
+
+    def on_block(self, pc: int, n: int) -> None:
+        cur = self.current
+        cur[pc] = cur.get(pc, 0) + n
+        self.count += n
+        if self.count - self.start >= self.interval:
+            self._close()
+
+    def _close(self) -> None:
+        self.vectors.append(self.current)
+        self.bounds.append((self.start, self.count))
+        self.current = {}
+        self.start = self.count
+
+    def finish(self) -> None:
+        if self.current:
+            self._close()
+
+    def matrix(self) -> tuple[np.ndarray, np.ndarray]:
+        """
+        (区间 × 基本块) 的计数矩阵和对应的基本块起始地址
+        """
+        pcs = np.array(sorted({pc for v in self.vectors for pc in v}), dtype=np.int64)
+        col = {int(pc): i for i, pc in enumerate(pcs)}
+        x = np.zeros((len(self.vectors), len(pcs)), dtype=np.float64)
+        for r, v in enumerate(self.vectors):
+            idx = np.fromiter((col[pc] for pc in v), dtype=np.int64, count=len(v))
+            x[r, idx] = np.fromiter(v.values(), dtype=np.float64, count=len(v))
+        return x, pcs
+
+    def write(self, file_name: str) -> None:
+        """
+        SimPoint 工具的 .bb 格式: 每个区间一行 'T:id:count :id:count ...' (id 从 1 开始)
+        """
+        _, pcs = self.matrix()
+        col = {int(pc): i + 1 for i, pc in enumerate(pcs)}
+        with open(file_name, 'w', encoding='utf-8') as f:
+            for v in self.vectors:
+                f.write('T' + ' '.join(f":{col[pc]}:{n}" for pc, n in sorted(v.items())) + '\n')
+
+
+########
+# 聚类 #
+########
+def project(x: np.ndarray, dims: int = 15, seed: int = 0) -> np.ndarray:
+    """
+    每行归一化为频率后随机投影到 dims 维 (SimPoint 默认 15)
+    """
+    x = x / np.maximum(x.sum(axis=1, keepdims=True), 1)
+    if x.shape[1] <= dims:
+        return x
+    rng = np.random.default_rng(seed)
+    return x @ rng.uniform(-1.0, 1.0, size=(x.shape[1], dims))
+
+
+def kmeans(x: np.ndarray, k: int, iters: int = 100, n_init: int = 5,
+           seed: int = 0) -> tuple[np.ndarray, np.ndarray, float]:
+    """
+    k-means++ 初始化，取 n_init 次中误差最小的一次
+    返回 (中心, 标签, 误差平方和)
+    """
+    rng = np.random.default_rng(seed)
+    n = len(x)
+    k = min(k, n)
+    best = None
+    for _ in range(n_init):
+        centers = np.empty((k, x.shape[1]))
+        centers[0] = x[rng.integers(n)]
+        d2 = ((x - centers[0]) ** 2).sum(axis=1)
+        for c in range(1, k):
+            total = d2.sum()
+            i = rng.choice(n, p=d2 / total) if total > 0 else rng.integers(n)
+            centers[c] = x[i]
+            d2 = np.minimum(d2, ((x - centers[c]) ** 2).sum(axis=1))
+        labels = None
+        for _ in range(iters):
+            dist = ((x[:, None, :] - centers[None, :, :]) ** 2).sum(axis=2)
+            new = dist.argmin(axis=1)
+            if labels is not None and (new == labels).all():
+                break
+            labels = new
+            for c in range(k):
+                members = x[labels == c]
+                if len(members):
+                    centers[c] = members.mean(axis=0)
+        sse = float(((x - centers[labels]) ** 2).sum())
+        if best is None or sse < best[2]:
+            best = (centers.copy(), labels.copy(), sse)
+    return best
+
+
+def bic(x: np.ndarray, centers: np.ndarray, labels: np.ndarray, sse: float) -> float:
+    """
+    球形高斯模型的 BIC (Pelleg & Moore, X-means)，越大越好
+    """
+    r, m = x.shape
+    k = len(centers)
+    if r <= k:
+        return -math.inf
+    var = max(sse / (m * (r - k)), 1e-12)
+    sizes = np.bincount(labels, minlength=k)
+    sizes = sizes[sizes > 0]
+    ll = float(np.sum(sizes * np.log(sizes) - sizes * math.log(r) - sizes / 2 * math.log(2 * math.pi)
+                      - sizes * m / 2 * math.log(var) - (sizes - k) / 2))
+    params = (k - 1) + m * k + 1
+    return ll - params / 2 * math.log(r)
+
+
+def cluster(x: np.ndarray, max_k: int = 10, threshold: float = 0.9,
+            seed: int = 0) -> tuple[np.ndarray, np.ndarray]:
+    """
+    对 k = 1..max_k 聚类，选 BIC 达到 (最小值 + threshold × 范围) 的最小 k
+    返回 (中心, 标签)
+    """
+    runs = [kmeans(x, k, seed=seed) for k in range(1, min(max_k, len(x)) + 1)]
+    scores = np.array([bic(x, *r) for r in runs])
+    finite = scores[np.isfinite(scores)]
+    if not len(finite):
+        return runs[0][:2]
+    lo, hi = finite.min(), finite.max()
+    for r, s in zip(runs, scores):
+        if np.isfinite(s) and s >= lo + threshold * (hi - lo):
+            return r[:2]
+    return runs[-1][:2]
+
+
+class SimPoint():
+    interval: int = 0       # 区间下标
+    cluster: int = 0
+    start: int = 0          # 区间起始的指令数
+    length: int = 0
+    weight: float = 0.0     # 所在类的权重 (按指令数)
+
+    def __init__(self, interval: int, cluster: int, start: int, length: int, weight: float):
+        self.interval = interval
+        self.cluster = cluster
+        self.start = start
+        self.length = length
+        self.weight = weight
+
+    def to_dict(self) -> dict:
+        return {'interval': self.interval, 'cluster': self.cluster, 'start': self.start,
+                'length': self.length, 'weight': self.weight}
+
+
+def choose(bbv: BbvProfiler, max_k: int = 10, per_cluster: int = 1, dims: int = 15,
+           seed: int = 0) -> list[SimPoint]:
+    """
+    每类按到中心的距离取前 per_cluster 个区间
+    """
+    x, _ = bbv.matrix()
+    if not len(x):
+        return []
+    y = project(x, dims, seed)
+    centers, labels = cluster(y, max_k, seed=seed)
+    lengths = np.array([e - s for s, e in bbv.bounds], dtype=np.float64)
+    total = lengths.sum()
+    dist = ((y - centers[labels]) ** 2).sum(axis=1)
+    points = []
+    for c in np.unique(labels):
+        members = np.flatnonzero(labels == c)
+        weight = float(lengths[members].sum() / total)
+        for i in members[np.argsort(dist[members])][:per_cluster]:
+            s, e = bbv.bounds[i]
+            points.append(SimPoint(int(i), int(c), s, e - s, weight))
+    points.sort(key=lambda p: p.start)
+    return points
+
+
+##########
+# 检查点 #
+##########
+def profile(mem, config: CoreConfig = None, interval: int = 100_000,
+            max_instret: int | None = None) -> BbvProfiler:
+    bbv = BbvProfiler(interval)
+    FunctionalSim(mem, config, on_block=bbv.on_block).run_until(instret=max_instret)
+    bbv.finish()
+    return bbv
+
+
+def checkpoints(mem, starts: list[int], config: CoreConfig = None,
+                file_prefix: str | None = None) -> dict[int, Checkpoint | str]:
+    """
+    功能模型按顺序运行一遍，在每个指令数处保存检查点
+    融合对计为 2 条，检查点的 instret 可能比请求的多 1，以检查点记录的为准
+    file_prefix 不为 None 时写入 '{prefix}{instret}.ckpt' 并返回文件名
+    """
+    sim = FunctionalSim(mem, config)
+    out = {}
+    for start in sorted(set(starts)):
+        sim.run_until(instret=start)
+        ckpt = sim.checkpoint()
+        if file_prefix is not None:
+            name = f"{file_prefix}{start}.ckpt"
+            ckpt.save(name)
+            out[start] = name
+        else:
+            out[start] = ckpt
+    return out
+
+
+def _counters(sim: Simulator) -> dict[str, dict[str, int]]:
+    stats = {'bpu': sim.bpu.stats(sim.instret), 'icache': sim.icache.stats(),
+             'dcache': sim.dpf.stats() if sim.dpf is not None else sim.dcache.stats(), 'lsq': sim.lsq.stats()}
+    return {name: {k: v for k, v in d.items() if isinstance(v, int) and not isinstance(v, bool)}
+            for name, d in stats.items()}
+
+
+def run_interval(mem, config: CoreConfig | dict, ckpt: Checkpoint | str, warmup: int, length: int) -> dict:
+    """
+    从检查点开始运行详细模型: 先预热 warmup 条指令，再统计到第 warmup + length 条 (均从检查点算起)
+    预热停在融合对中间时多提交 1 条，统计区间相应短 1 条，区间终点不变
+    ckpt 为文件名时在本进程中映射 (可以作为进程池的任务)
+    bpu / cache / lsq 只给出统计区间内的计数 (不含预热)
+    """
+    cfg = config if isinstance(config, CoreConfig) else CoreConfig.from_dict(config)
+    if isinstance(ckpt, str):
+        ckpt = Checkpoint.load(ckpt)
+    sim = Simulator(mem, cfg)
+    ckpt.restore(sim)
+    if warmup:
+        sim.run_until(instret=warmup)
+    cycle0, instret0 = sim.cycle, sim.instret
+    before = _counters(sim)
+    halt = sim.run_until(instret=warmup + length)
+    cycles = sim.cycle - cycle0
+    instret = sim.instret - instret0
+    sim.finish()
+    after = _counters(sim)
+    return {
+        'halt': halt,
+        'warmup': instret0,
+        'cycles': cycles,
+        'instret': instret,
+        'cpi': cycles / instret if instret else None,
+        'ipc': instret / cycles if cycles else 0.0,
+        **{name: {k: v - before[name][k] for k, v in d.items()} for name, d in after.items()},
+    }
+
+
+def estimate(points: list[SimPoint], results: list[dict]) -> dict:
+    """
+    加权 CPI (IPC 为其倒数) 和分层抽样的标准误差
+    只有一个样本的类使用其他类的合并类内方差；没有任何类有多个样本时误差和置信区间为 None
+    IPC 置信区间的 CPI 下界不为正时上界为 None (无界)
+    没有提交任何指令的区间 (程序在预热中结束) 不参与估计，其余类的权重重新归一化
+    """
+    strata: dict[int, tuple[float, list[float]]] = {}
+    for p, r in zip(points, results):
+        if r['cpi'] is not None:
+            w, cpis = strata.setdefault(p.cluster, (p.weight, []))
+            cpis.append(r['cpi'])
+    total = sum(w for w, _ in strata.values())
+    strata = {c: (w / total, cpis) for c, (w, cpis) in strata.items()}
+    cpi = sum(w * float(np.mean(c)) for w, c in strata.values())
+    multi = [c for _, c in strata.values() if len(c) > 1]
+    if multi:
+        dof = sum(len(c) - 1 for c in multi)
+        pooled = sum(float(np.var(c, ddof=1)) * (len(c) - 1) for c in multi) / dof
+        var = sum(w * w * (float(np.var(c, ddof=1)) if len(c) > 1 else pooled) / len(c)
+                  for w, c in strata.values())
+        se = math.sqrt(var)
+        lo, hi = cpi - 1.96 * se, cpi + 1.96 * se
+        cpi_ci = [lo, hi]
+        ipc_ci = [1 / hi if hi > 0 else 0.0, 1 / lo if lo > 0 else None]
+    else:
+        se = cpi_ci = ipc_ci = None
+    return {
+        'cpi': cpi,
+        'ipc': 1 / cpi if cpi else 0.0,
+        'cpi_stderr': se,
+        'cpi_ci95': cpi_ci,
+        'ipc_ci95': ipc_ci,
+        'clusters': len(strata),
+        'samples': len(points),
+    }
+
+
+def simulate(mem, config: CoreConfig = None, interval: int = 100_000, max_k: int = 10,
+             warmup: int = 20_000, per_cluster: int = 2, max_instret: int | None = None,
+             seed: int = 0, bbv_file: str | None = None) -> dict:
+    cfg = (config if config is not None else CoreConfig()).validate()
+    bbv = profile(mem, cfg, interval, max_instret)
+    if bbv_file is not None:
+        bbv.write(bbv_file)
+    points = choose(bbv, max_k, per_cluster, seed=seed)
+    ckpts = checkpoints(mem, [max(p.start - warmup, 0) for p in points], cfg)
+    results = []
+    for p in points:
+        ckpt = ckpts[max(p.start - warmup, 0)]
+        warm = max(p.start - ckpt.instret, 0)
+        results.append(run_interval(mem, cfg, ckpt, warm, p.start + p.length - ckpt.instret - warm))
+    return {
+        'intervals': len(bbv.vectors),
+        'profiled_instret': bbv.count,
+        'points': [{**p.to_dict(), **r} for p, r in zip(points, results)],
+        **estimate(points, results),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="SimPoint sampled simulation")
+    parser.add_argument('mem', nargs='?', default=MEM_FILE, help="readmemh image")
+    parser.add_argument('--set', action='append', default=[], metavar='NAME=VALUE', help="override a CoreConfig field")
+    parser.add_argument('--interval', type=int, default=100_000, help="instructions per interval")
+    parser.add_argument('--max-k', type=int, default=10)
+    parser.add_argument('--per-cluster', type=int, default=2, help="samples per cluster (>= 2 gives an error estimate)")
+    parser.add_argument('--warmup', type=int, default=20_000, help="detailed warm-up instructions before each interval")
+    parser.add_argument('--max-instret', type=int, default=MAX_INSTRET,
+                        help="stop the profiling pass here (programs such as main.mem never halt)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--bbv', default=None, help="write basic-block vectors in SimPoint .bb format")
+    parser.add_argument('-o', '--output', default=None, help="JSON report")
+    args = parser.parse_args(argv)
+
+    try:
+        cfg = CoreConfig.from_overrides(args.set)
+    except ValueError as exc:
+        parser.error(str(exc))
+    if args.per_cluster < 1:
+        parser.error("--per-cluster must be at least 1")
+    if args.max_instret < 1:
+        parser.error("--max-instret must be positive")
+
+    report = simulate(readmemh(args.mem), cfg, args.interval, args.max_k, args.warmup,
+                      args.per_cluster, args.max_instret, args.seed, args.bbv)
+    ci = report['ipc_ci95']
+    if ci is None:
+        ci_text = "no error estimate: every cluster has a single sample"
+    else:
+        ci_text = f"95% CI {ci[0]:.4f} - {'inf' if ci[1] is None else f'{ci[1]:.4f}'}"
+    print(f"{report['samples']} samples / {report['intervals']} intervals, IPC {report['ipc']:.4f} ({ci_text})",
+          file=sys.stderr)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, allow_nan=False)
+    else:
+        print(json.dumps(report, indent=2, allow_nan=False))
+
+
+if __name__ == '__main__':
+    main()
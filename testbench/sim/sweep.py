@@ -0,0 +1,104 @@
+# 参数扫描: 在 CoreConfig 的笛卡尔积上并行运行 core()，结果写入 CSV
+#
+# python -m sim.sweep --binary binary/main.mem --set rob_size=32,64,128 --set predictor=gshare,tage -o sweep.csv -j 8
+
+import argparse, csv, itertools, os, sys
+from multiprocessing import Pool
+from .config import CoreConfig, parse_sweep_axes
+from .sim_code import core
+from .util import readmemh
+
+
+def grid(base: CoreConfig = None, **axes) -> list[CoreConfig]:
+    """
+    grid(rob_size=[32, 64], predictor=['gshare', 'tage']) -> 4 个配置
+    """
+    base = base if base is not None else CoreConfig()
+    names = list(axes)
+    out = []
+    for values in itertools.product(*(axes[n] for n in names)):
+        out.append(base.replace(**dict(zip(names, values))).validate())
+    return out
+
+
+def flatten(d: dict, prefix: str = '') -> dict:
+    """
+    {'dcache': {'hits': 1}} -> {'dcache.hits': 1}
+    """
+    out = {}
+    for k, v in d.items():
+        key = f"{prefix}{k}"
+        if isinstance(v, dict):
+            out.update(flatten(v, f"{key}."))
+        else:
+            out[key] = v
+    return out
+
+
+def write_csv(file_name: str, rows: list[dict]) -> None:
+    """
+    表头为所有行的键按首次出现的顺序合并 (不同配置的统计项可能不同，例如开启预取后 dcache 多出的字段)
+    """
+    header = []
+    for r in rows:
+        header += [k for k in r if k not in header]
+    with open(file_name, 'w', newline='', encoding='utf-8') as f:
+        w = csv.DictWriter(f, fieldnames=header)
+        w.writeheader()
+        w.writerows(rows)
+
+
+# 每个工作进程只读一次镜像
+_images: dict[str, list] = {}
+
+def load_image(binary: str) -> list:
+    if binary not in _images:
+        _images[binary] = readmemh(binary)
+    return _images[binary]
+
+
+def run_one(job: tuple[dict, str]) -> dict:
+    config, binary = job
+    stats = core(load_image(binary), CoreConfig.from_dict(config))
+    row = {'binary': os.path.basename(binary)}
+    row.update(config)
+    row.update(flatten(stats))
+    return row
+
+
+def sweep(configs: list[CoreConfig], binaries: list[str], out_csv: str | None = None,
+          processes: int | None = None, chunksize: int = 1) -> list[dict]:
+    """
+    configs x binaries 全部组合，processes=1 时在当前进程中串行执行
+    """
+    jobs = [(c.to_dict(), b) for c in configs for b in binaries]
+    if processes == 1:
+        rows = [run_one(j) for j in jobs]
+    else:
+        with Pool(processes) as pool:
+            rows = pool.map(run_one, jobs, chunksize)
+
+    if out_csv is not None:
+        write_csv(out_csv, rows)
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="CoreConfig parameter sweep")
+    parser.add_argument('--binary', action='append', required=True, help="readmemh image, repeatable")
+    parser.add_argument('--set', action='append', default=[], metavar='NAME=V1,V2',
+                        help="sweep axis; a single value overrides the base config")
+    parser.add_argument('-o', '--output', default='sweep.csv')
+    parser.add_argument('-j', '--jobs', type=int, default=None)
+    args = parser.parse_args(argv)
+
+    try:
+        configs = grid(**parse_sweep_axes(args.set))
+    except ValueError as exc:
+        parser.error(str(exc))
+    rows = sweep(configs, args.binary, args.output, args.jobs)
+    print(f"{len(rows)} runs -> {args.output}", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+# 基准基线回归测试
+#
+#   cd testbench && python -m pytest sim/test_bench.py
+
+import json
+from .bench import compare, main
+
+FAST = ['--scale', '0.01', '--repeat', '1']
+
+
+def _load(path) -> dict:
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def test_only_save_merges_into_baseline(tmp_path):
+    path = str(tmp_path / 'baseline.json')
+    assert main(['--only', 'mdu', '--save', '--baseline', path] + FAST) == 0
+    assert main(['--only', 'alu', '--save', '--baseline', path] + FAST) == 0
+    assert list(_load(path)['metrics']) == ['alu', 'mdu']
+
+
+def test_mismatched_conditions_do_not_gate_or_merge(tmp_path, capsys):
+    path = str(tmp_path / 'baseline.json')
+    assert main(['--only', 'alu', '--save', '--baseline', path] + FAST) == 0
+    data = _load(path)
+    data['metrics']['alu']['rate'] *= 1000      # 远快于本机: 条件相同时判为回归
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+    assert main(['--only', 'alu', '--baseline', path] + FAST) == 1
+    assert main(['--only', 'alu', '--baseline', path, '--scale', '0.02', '--repeat', '1']) == 0
+    assert 'different scale' in capsys.readouterr().err
+    assert main(['--only', 'mdu', '--save', '--baseline', path, '--scale', '0.01', '--repeat', '2']) == 1
+    assert _load(path) == data
+
+
+def test_compare_normalises_by_reference_loop():
+    """
+    机器整体慢一半 (参考循环也慢一半) 不算回归；只有指标本身变慢才算
+    """
+    baseline = {'reference': 100.0, 'metrics': {'alu': {'rate': 10.0}, 'mdu': {'rate': 10.0}}}
+    result = {'reference': 50.0, 'metrics': {'alu': {'rate': 5.0}, 'mdu': {'rate': 2.0}}}
+    rows = {r[0]: r for r in compare(result, baseline, 0.2)}
+    assert rows['alu'][3] == 1.0 and not rows['alu'][4]
+    assert rows['mdu'][3] == 0.4 and rows['mdu'][4]
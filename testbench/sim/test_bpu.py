@@ -0,0 +1,73 @@
+# 分支预测器回归测试
+#
+#   cd testbench && python -m pytest sim/test_bpu.py
+
+from .bpu import RAS, BranchPredictUnit, compare
+from .decode import DecodeBlock
+
+
+def _stream(pattern: list[bool], repeat: int, pc: int = 0x1000):
+    taken = pattern * repeat
+    return [pc] * len(taken), taken
+
+
+def test_bimodal_learns_biased_branch():
+    pcs, taken = _stream([True] * 9 + [False], 200)
+    out = compare(pcs, taken, {'bimodal': ('bimodal', {})})
+    assert out['bimodal']['accuracy'] > 0.89
+
+
+def test_gshare_learns_alternating_branch():
+    """
+    T/N 交替: bimodal 只能猜对约一半，gshare 用 1 位历史即可区分
+    """
+    pcs, taken = _stream([True, False], 500)
+    out = compare(pcs, taken, {'bimodal': ('bimodal', {}), 'gshare': ('gshare', {'history': 4})})
+    assert out['bimodal']['accuracy'] < 0.6
+    assert out['gshare']['accuracy'] > 0.98
+
+
+def test_tage_learns_long_period():
+    """
+    周期 24 的循环出口超出 gshare 12 位历史，TAGE 的长历史表可以捕获
+    """
+    pcs, taken = _stream([True] * 23 + [False], 400)
+    out = compare(pcs, taken, {'gshare': ('gshare', {}), 'tage': ('tage', {})})
+    assert out['tage']['mispredicts'] < out['gshare']['mispredicts']
+    assert out['tage']['accuracy'] > 0.99
+
+
+def test_ras_overflow_and_restore():
+    ras = RAS(depth=2)
+    for addr in (0x10, 0x20, 0x30):
+        ras.push(addr)
+    assert ras.overflows == 1
+    snap = ras.snapshot()
+    assert ras.pop() == 0x30
+    ras.push(0x99)
+    ras.restore(snap)
+    assert ras.pop() == 0x30
+    assert ras.pop() == 0x20
+    assert ras.pop() is None
+
+
+def test_btb_holds_only_indirect_targets():
+    """
+    条件分支和 jal 的目标在译码时已知，不占用 BTB；jalr 的目标在提交后从 BTB 预测
+    """
+    decoder = DecodeBlock()
+    bpu = BranchPredictUnit('bimodal')
+    _, beq = decoder.decode_32(0x00000863, 0x100)     # beq x0, x0, 16
+    _, jal = decoder.decode_32(0x0100006f, 0x200)     # jal x0, 16
+    _, jalr = decoder.decode_32(0x00030067, 0x300)    # jalr x0, 0(x6)
+    for pc, instr, target in ((0x100, beq, 0x110), (0x200, jal, 0x210)):
+        pred = bpu.predict(pc, instr)
+        assert pred.target == target
+        bpu.update(pred, True, target)
+    assert not bpu.btb.valid.any()
+
+    pred = bpu.predict(0x300, jalr)
+    assert pred.next_pc == 0x304
+    bpu.update(pred, True, 0x4000)
+    assert bpu.predict(0x300, jalr).next_pc == 0x4000
+    assert bpu.btb.valid.sum() == 1
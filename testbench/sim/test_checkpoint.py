@@ -0,0 +1,71 @@
+# 检查点回归测试
+#
+#   cd testbench && python -m pytest sim/test_checkpoint.py
+
+import numpy as np
+from .checkpoint import Checkpoint
+from .config import CoreConfig
+from .functional import FunctionalSim
+from .instgen import image
+from .sim_code import Simulator
+
+
+def _i(opc, funct3, rd, rs1, imm):
+    return (imm & 0xfff) << 20 | rs1 << 15 | funct3 << 12 | rd << 7 | opc
+
+
+def _b(funct3, rs1, rs2, imm):
+    imm &= 0x1fff
+    return (imm >> 12 << 31 | (imm >> 5 & 0x3f) << 25 | rs2 << 20 | rs1 << 15 | funct3 << 12
+            | (imm >> 1 & 0xf) << 8 | (imm >> 11 & 1) << 7 | 0x63)
+
+
+# 前缀和写入 0x1000 起的 40 个双字，以自循环结束
+PROGRAM = [
+    _i(0x13, 0, 10, 0, 0),                      # 0:  addi x10, x0, 0
+    _i(0x13, 0, 11, 0, 40),                     # 4:  addi x11, x0, 40
+    0x1 << 12 | 12 << 7 | 0x37,                 # 8:  lui  x12, 1
+    11 << 20 | 10 << 15 | 10 << 7 | 0x33,       # 12: add  x10, x10, x11
+    10 << 20 | 12 << 15 | 0b011 << 12 | 0x23,   # 16: sd   x10, 0(x12)
+    _i(0x13, 0, 12, 12, 8),                     # 20: addi x12, x12, 8
+    _i(0x13, 0, 11, 11, -1),                    # 24: addi x11, x11, -1
+    _b(0b001, 11, 0, -16),                      # 28: bne  x11, x0, 12
+    0x0000006f,                                 # 32: j    0
+]
+INSTRET = 3 + 5 * 40 + 1     # 自循环的 j 提交一次后停下
+
+
+def _mem():
+    return image({'word': np.array(PROGRAM, dtype=np.uint32), 'size': np.full(len(PROGRAM), 4, dtype=np.uint8)})
+
+
+def _data(dmem) -> list[int]:
+    return dmem.read_bytes(0x1000, 8 * 40).view('<u8').tolist()
+
+
+def test_restore_matches_uninterrupted_run(tmp_path):
+    """
+    在第 57 条指令处保存检查点，经文件恢复到功能模型和流水线模型后继续运行，
+    结束时的寄存器、内存和指令数与不中断的运行相同
+    """
+    ref = FunctionalSim(_mem())
+    assert ref.run_until() == 'self-loop'
+    assert ref.instret == INSTRET
+
+    sim = FunctionalSim(_mem())
+    sim.run_until(instret=57)
+    sim.checkpoint().save(str(tmp_path / 'mid.ckpt'))
+    ckpt = Checkpoint.load(str(tmp_path / 'mid.ckpt'))
+
+    fsim = FunctionalSim(_mem())
+    fsim.restore(ckpt)
+    assert fsim.run_until() == 'self-loop'
+    core = Simulator(_mem(), CoreConfig())
+    ckpt.restore(core)
+    assert core.run() == 'self-loop'
+
+    for other, instret in ((fsim, fsim.instret + fsim.base_instret), (core, core.instret + core.base_instret)):
+        assert instret == INSTRET
+        assert list(other.gpr.mem) == list(ref.gpr.mem)
+        assert _data(other.dmem) == _data(ref.dmem)
+    assert _data(ref.dmem)[-1] == 40 * 41 // 2
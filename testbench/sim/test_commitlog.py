@@ -0,0 +1,38 @@
+# 提交日志比较回归测试
+#
+#   cd testbench && python -m pytest sim/test_commitlog.py
+
+import numpy as np
+from .commitlog import CommitLog, LogView, compare
+from .config import CoreConfig
+from .sim_code import Simulator
+from .test_checkpoint import INSTRET, _mem
+
+
+def _rewrite(name: str, records: np.ndarray) -> None:
+    with CommitLog(name) as log:
+        for r in records:
+            log.write(*(int(r[f]) for f in ('order', 'pc', 'instr', 'rd_region', 'rd', 'value',
+                                            'mem_size', 'mem_addr', 'mem_data', 'flags')))
+
+
+def test_commit_log_mismatch(tmp_path):
+    """
+    两次运行的日志一致；修改一条记录的写回值、截短日志时报告第一条不一致的位置
+    """
+    a, b, bad, short = (str(tmp_path / f'{k}.log') for k in ('a', 'b', 'bad', 'short'))
+    for name in (a, b):
+        with CommitLog(name) as log:
+            Simulator(_mem(), CoreConfig(), commit_log=log).run()
+    assert compare(a, b) is None
+
+    with LogView(a) as view:
+        records = view.records.copy()
+    assert len(records) == INSTRET
+    _rewrite(short, records[:150])
+    records[100]['value'] ^= 1
+    _rewrite(bad, records)
+    diff = compare(a, bad)
+    assert diff['index'] == 100 and diff['fields'] == ['value']
+    diff = compare(a, short)
+    assert diff['index'] == 150 and diff['len_b'] == 150 and diff['b'] is None
@@ -0,0 +1,97 @@
+# critpath 依赖图与向量依赖回归测试
+#
+#   cd testbench && python -m pytest sim/test_critpath.py
+
+import numpy as np
+import pytest
+from .critpath import (_vector_regs, _vector_keys, _parse, _parse_sweep, latency_table, DepGraph, CLASSES,
+                       ALU, MUL, DIV, LOAD, VECTOR, VL_KEY, VPR)
+
+
+def _opv(funct6, vm, vs2, vs1, funct3, vd):
+    return funct6 << 26 | vm << 25 | vs2 << 20 | vs1 << 15 | funct3 << 12 | vd << 7 | 0x57
+
+
+def test_register_groups_follow_lmul():
+    """
+    vadd.vv v8, v16, v24 在 LMUL=4 时读写 4 个寄存器的组，并依赖 vl / vtype
+    """
+    inst = _opv(0b000000, 1, 16, 24, 0b000, 8)
+    srcs, dsts = _vector_regs(inst, 32, 32)
+    assert sorted(srcs) == [16, 17, 18, 19, 24, 25, 26, 27]
+    assert dsts == [8, 9, 10, 11]
+    keys, _ = _vector_keys(inst, 32, 32)
+    assert VL_KEY in keys
+
+
+def test_masked_store_reads_v0_and_data_group():
+    """
+    vse32.v v4, (x10), v0.t 在 SEW=32 / LMUL=2 时读 v0 和 v4 / v5，不写向量寄存器
+    """
+    inst = 0b000 << 29 | 0 << 25 | 10 << 15 | 0b110 << 12 | 4 << 7 | 0x27
+    srcs, dsts = _vector_regs(inst, 32, 16)
+    assert sorted(srcs) == [0, 4, 5]
+    assert dsts == []
+
+
+def test_widening_compare_and_config():
+    """
+    vwaddu.vv 的目的组宽为 2 * LMUL；vmseq.vv 只写一个掩码寄存器；vsetvli 只写 vl / vtype
+    """
+    _, dsts = _vector_regs(_opv(0b110000, 1, 4, 6, 0b010, 8), 16, 16)
+    assert dsts == [8, 9, 10, 11]
+    _, dsts = _vector_regs(_opv(0b011000, 1, 4, 6, 0b000, 1), 16, 16)
+    assert dsts == [1]
+    vsetvli = 0b0_00000010000 << 20 | 11 << 15 | 0b111 << 12 | 5 << 7 | 0x57
+    assert _vector_keys(vsetvli, 8, 8) == ([], [VL_KEY])
+    assert VPR * 32 + 1 == _vector_keys(_opv(0b011000, 1, 4, 6, 0b000, 1), 16, 8)[1][0]
+
+
+def test_scenario_parsing():
+    assert _parse('mul=3, div=8') == {'mul': 3, 'div': 8}
+    assert _parse_sweep('load=2:4') == [{'load': 2}, {'load': 3}, {'load': 4}]
+    for bad in ('mull=3', 'mul', 'mul=x', 'mul=-1'):
+        with pytest.raises(ValueError):
+            _parse(bad)
+    for bad in ('mul=5:2', 'mul', 'fma=1:2'):
+        with pytest.raises(ValueError):
+            _parse_sweep(bad)
+
+
+def _graph() -> DepGraph:
+    """
+    0 load          1 alu
+    2 mul  <- 0     3 div <- 1
+    4 alu  <- 2 (融合对，计 2 条)
+    5 vector <- 0 1 2，另有额外的边 <- 3
+    6 alu  <- 4
+    """
+    n = 7
+    cls = np.array([LOAD, ALU, MUL, DIV, ALU, VECTOR, ALU], dtype=np.int8)
+    deps = np.full((3, n), n, dtype=np.int64)
+    deps[0, 2], deps[0, 3], deps[0, 4], deps[0, 6] = 0, 1, 2, 4
+    deps[:, 5] = (0, 1, 2)
+    level = np.array([0, 0, 1, 1, 2, 2, 3], dtype=np.int64)
+    count = np.array([1, 1, 1, 1, 2, 1, 1], dtype=np.int8)
+    extra = (np.array([5], dtype=np.int64), np.array([3], dtype=np.int64))
+    return DepGraph(cls, deps, level, count, extra)
+
+
+def test_critical_path_through_extra_edge():
+    """
+    div=20 时关键路径为 1 -> 3 -> 5 (经过额外的边): 1 + 20 + 1 = 22
+    div=2 时为 0 -> 2 -> 4 -> 6: 2 + 3 + 1 + 1 = 7
+    """
+    graph = _graph()
+    assert (graph.n, graph.instret, graph.depth) == (7, 8, 4)
+    base = {**dict.fromkeys(CLASSES, 1), 'load': 2, 'mul': 3, 'div': 20}
+    table = latency_table([{}, {'div': 2}], base)
+    assert graph.critical_path(table).tolist() == [22, 7]
+    assert graph.ilp(table).tolist() == [8 / 22, 8 / 7]
+    slow = {c: n for c, n in graph.breakdown(table[0]).items() if n}
+    assert slow == {'alu': 1, 'div': 20, 'vector': 1}
+    fast = {c: n for c, n in graph.breakdown(table[1]).items() if n}
+    assert fast == {'load': 2, 'mul': 3, 'alu': 2}
+    # 没有额外的边时 div 不在任何到 5 的路径上
+    plain = DepGraph(graph.cls, graph.deps, graph.level, graph.count)
+    assert plain.critical_path(table).tolist() == [21, 7]
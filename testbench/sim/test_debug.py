@@ -0,0 +1,66 @@
+# 观察点回归测试
+#
+#   cd testbench && python -m pytest sim/test_debug.py
+
+import numpy as np
+from .config import CoreConfig
+from .debug import Debugger
+from .instgen import image
+from .instr_unit import RegisterType
+from .sim_code import Simulator
+from .test_checkpoint import PROGRAM
+
+VSETIVLI_E32_M1 = 0b11 << 30 | 0x10 << 20 | 4 << 15 | 0b111 << 12 | 0x57    # vsetivli x0, 4, e32, m1
+VMV_V3_5 = 0b010111 << 26 | 1 << 25 | 5 << 15 | 0b011 << 12 | 3 << 7 | 0x57  # vmv.v.i v3, 5
+ADDI_X5_1 = 1 << 20 | 5 << 7 | 0x13                                           # addi x5, x0, 1
+J_0 = 0x6f
+
+
+def _program(words):
+    return image({'word': np.array(words, dtype=np.uint32), 'size': np.full(len(words), 4, dtype=np.uint8)})
+
+
+def test_vector_register_watchpoint():
+    """
+    v3 的观察点在写它的 vmv.v.i 提交后停下，给出新旧值
+    """
+    dbg = Debugger()
+    dbg.watch_register(3, RegisterType.VPR)
+    sim = Simulator(_program([VSETIVLI_E32_M1, ADDI_X5_1, VMV_V3_5, ADDI_X5_1, J_0]), CoreConfig(), debugger=dbg)
+    assert sim.run() == 'watchpoint'
+    stop = dbg.stop.to_dict()
+    assert stop['pc'] == 8 and stop['region'] == 'VPR' and stop['reg'] == 3
+    assert stop['old'] == 0 and stop['new'] == 0x00000005_00000005_00000005_00000005
+    assert sim.run() == 'self-loop'
+
+
+def _uninterrupted(mem) -> Simulator:
+    sim = Simulator(mem, CoreConfig())
+    assert sim.run() == 'self-loop'
+    return sim
+
+
+def _same_timing(sim: Simulator, ref: Simulator) -> None:
+    assert (sim.cycle, sim.instret) == (ref.cycle, ref.instret)
+    assert sim.perf.summary() == ref.perf.summary()
+    assert list(sim.gpr.mem) == list(ref.gpr.mem)
+
+
+def test_stops_do_not_change_timing():
+    """
+    断点、内存和寄存器观察点停下再继续，结束时的周期数、指令数和性能计数与不停下的运行相同
+    """
+    mem = _program(PROGRAM)
+    ref = _uninterrupted(mem)
+    dbg = Debugger()
+    dbg.break_at(12)
+    dbg.break_at(28)
+    dbg.watch_memory(0x1000 + 8 * 10, 8)
+    dbg.watch_register(11)
+    sim = Simulator(mem, CoreConfig(), debugger=dbg)
+    stops = 0
+    while (reason := sim.run()) in ('breakpoint', 'watchpoint'):
+        stops += 1
+    assert reason == 'self-loop'
+    assert stops == 40 + 40 + 1 + 41
+    _same_timing(sim, ref)
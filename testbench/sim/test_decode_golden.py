@@ -0,0 +1,15 @@
+# 译码参考表回归测试
+#
+#   cd testbench && python -m pytest sim/test_decode_golden.py
+
+from .decode_golden import sources
+
+
+def test_source_hash_covers_transitive_imports():
+    """
+    decode.py / vector.py 导入的 util.py、moduleConstant.py 以及 vector.py 导入的 fpu.py 都参与哈希
+    """
+    names = sources()
+    assert {'decode_golden.py', 'decode.py', 'instr_unit.py', 'vector.py', 'fpu.py',
+            'util.py', 'moduleConstant.py'} <= set(names)
+    assert names == sorted(names)
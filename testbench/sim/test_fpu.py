@@ -0,0 +1,119 @@
+# 标量浮点单元回归测试
+#
+#   cd testbench && python -m pytest sim/test_fpu.py
+
+import struct
+import numpy as np
+import pytest
+from .fpu import (MNEMONICS, CANONICAL_NAN, CSR_FCSR, CSR_FFLAGS, S, D, RNE, RTZ, RMM,
+                  NV, DZ, OF, UF, NX, accrue, batch, box, fp_execute, fp_load, vectors)
+from .instr_unit import FpuOpType as Op
+
+MASK64 = (1 << 64) - 1
+QNAN_S, SNAN_S = 0x7fc00000, 0x7f800001
+SNAN_D = 0x7ff0000000000001
+
+
+def f32(x: float) -> int:
+    return box(struct.unpack('<I', struct.pack('<f', x))[0], S)
+
+
+def f64(x: float) -> int:
+    return struct.unpack('<Q', struct.pack('<d', x))[0]
+
+
+def test_nan_boxing():
+    """
+    单精度结果装箱；高 32 位不全为 1 的输入按规范 NaN 处理；fmv.x.w 符号扩展
+    """
+    assert fp_execute(Op.FADD, S, RNE, f32(1.0), f32(2.0)) == (f32(3.0), 0)
+    assert fp_load(4, 0x1234_5678_3f80_0000) == f32(1.0)
+    bad = 0x3f800000                                        # 未装箱的 1.0
+    assert fp_execute(Op.FADD, S, RNE, bad, f32(2.0)) == (box(QNAN_S, S), 0)
+    assert fp_execute(Op.FCLASS, S, RNE, bad)[0] == 1 << 9  # qNaN
+    assert fp_execute(Op.FMV_F2X, S, RNE, f32(-1.0))[0] == 0xffffffff_bf800000
+    assert fp_execute(Op.FMV_X2F, S, RNE, 0x3f800000) == (f32(1.0), 0)
+    assert fp_execute(Op.FCVT_F2F, S, RNE, f64(1.5)) == (f32(1.5), 0)
+
+
+@pytest.mark.parametrize('op, fmt, a, b, rm, result, flags', [
+    (Op.FDIV, S, f32(1.0), f32(0.0), RNE, f32(float('inf')), DZ),
+    (Op.FDIV, D, f64(0.0), f64(0.0), RNE, CANONICAL_NAN[D], NV),
+    (Op.FSQRT, D, f64(-1.0), 0, RNE, CANONICAL_NAN[D], NV),
+    (Op.FDIV, S, f32(1.0), f32(3.0), RNE, f32(1 / 3), NX),
+    (Op.FMUL, S, f32(3e38), f32(2.0), RNE, f32(float('inf')), OF | NX),
+    (Op.FMUL, S, f32(3e38), f32(2.0), RTZ, box(0x7f7fffff, S), OF | NX),
+    (Op.FMUL, D, f64(2.0 ** -1022), f64(0.5), RNE, f64(2.0 ** -1023), 0),     # 非规格化但精确: 不置 UF
+    (Op.FMUL, D, 1, f64(0.5), RNE, 0, UF | NX),                             # 最小非规格化数 / 2
+    (Op.FMUL, D, 1, f64(0.5), RMM, 1, UF | NX),
+    (Op.FADD, S, box(SNAN_S, S), f32(1.0), RNE, box(QNAN_S, S), NV),
+    (Op.FEQ, S, box(SNAN_S, S), f32(1.0), RNE, 0, NV),
+    (Op.FEQ, S, box(QNAN_S, S), f32(1.0), RNE, 0, 0),
+    (Op.FLT, S, box(QNAN_S, S), f32(1.0), RNE, 0, NV),
+])
+def test_fflags(op, fmt, a, b, rm, result, flags):
+    assert fp_execute(op, fmt, rm, a, b) == (result, flags)
+
+
+def test_accrue_sets_fflags_and_fcsr():
+    csr = {}
+    accrue(csr, NX)
+    accrue(csr, DZ)
+    accrue(csr, 0)
+    assert csr == {CSR_FFLAGS: NX | DZ, CSR_FCSR: NX | DZ}
+
+
+@pytest.mark.parametrize('fmt, a, width, rm, result, flags', [
+    (S, f32(3e9), 0, RNE, 0x7fffffff, NV),                      # fcvt.w.s 上溢
+    (S, f32(-3e9), 0, RNE, 0xffffffff_80000000, NV),            # 下溢，符号扩展
+    (S, f32(2.0 ** 31), 0, RNE, 0x7fffffff, NV),
+    (S, f32(-2.0 ** 31), 0, RNE, 0xffffffff_80000000, 0),       # 恰好可表示
+    (S, box(QNAN_S, S), 0, RNE, 0x7fffffff, NV),                # NaN 按正上溢处理
+    (S, f32(float('-inf')), 0, RNE, 0xffffffff_80000000, NV),
+    (S, f32(-1.0), 1, RNE, 0, NV),                              # fcvt.wu.s 负数
+    (S, f32(-0.5), 1, RTZ, 0, NX),                              # 舍入后为 0: 不饱和
+    (S, f32(5e9), 1, RNE, MASK64, NV),                          # wu 的 32 位全 1 符号扩展
+    (D, f64(2.0 ** 63), 2, RNE, (1 << 63) - 1, NV),             # fcvt.l.d
+    (D, f64(-2.0 ** 63), 2, RNE, 1 << 63, 0),
+    (D, SNAN_D, 3, RNE, MASK64, NV),                            # fcvt.lu.d
+    (D, f64(2.5), 2, RNE, 2, NX),
+    (D, f64(2.5), 2, RMM, 3, NX),
+])
+def test_fcvt_to_int_saturates(fmt, a, width, rm, result, flags):
+    assert fp_execute(Op.FCVT_F2I, fmt, rm, a, width=width) == (result, flags)
+
+
+@pytest.mark.parametrize('fmt, pos, neg, num, qnan, snan', [
+    (S, f32(0.0), f32(-0.0), f32(1.0), box(QNAN_S, S), box(SNAN_S, S)),
+    (D, f64(0.0), f64(-0.0), f64(1.0), CANONICAL_NAN[D], SNAN_D),
+])
+def test_fmin_fmax_nan_and_signed_zero(fmt, pos, neg, num, qnan, snan):
+    """
+    minimumNumber / maximumNumber: -0 < +0；一个 NaN 时返回另一个操作数 (sNaN 置 NV)；两个 NaN 返回规范 NaN
+    """
+    for a, b in ((pos, neg), (neg, pos)):
+        assert fp_execute(Op.FMIN, fmt, RNE, a, b) == (neg, 0)
+        assert fp_execute(Op.FMAX, fmt, RNE, a, b) == (pos, 0)
+    for op in (Op.FMIN, Op.FMAX):
+        assert fp_execute(op, fmt, RNE, qnan, num) == (num, 0)
+        assert fp_execute(op, fmt, RNE, num, snan) == (num, NV)
+        assert fp_execute(op, fmt, RNE, snan, qnan) == (qnan, NV)
+        assert fp_execute(op, fmt, RNE, qnan, qnan) == (qnan, 0)
+
+
+@pytest.mark.parametrize('name', sorted(MNEMONICS))
+def test_batch_matches_scalar(name):
+    """
+    batch() 的 NumPy 快速路径与逐个 fp_execute 结果、fflags 相同 (随机舍入模式，含特殊值)
+    """
+    op, fmt, width, _ = MNEMONICS[name]
+    v = vectors(name, 400, rm=None, seed=7)
+    expect = [fp_execute(op, fmt, int(rm), int(a), int(b), int(c), width)
+              for a, b, c, rm in zip(v['a'], v['b'], v['c'], v['rm'])]
+    assert v['result'].tolist() == [r for r, _ in expect]
+    assert v['flags'].tolist() == [f for _, f in expect]
+
+
+def test_batch_rejects_dynamic_rounding():
+    with pytest.raises(ValueError):
+        batch(Op.FADD, D, np.zeros(1, dtype=np.uint64), rm=7)
@@ -0,0 +1,19 @@
+# 热点分析回归测试
+#
+#   cd testbench && python -m pytest sim/test_hotspot.py
+
+from .hotspot import HotspotProfiler
+
+
+def test_summary_includes_unflushed_events():
+    """
+    未攒满 batch 的事件也要计入 summary 的总数和占比
+    """
+    prof = HotspotProfiler(64, batch=1 << 10)
+    for _ in range(3):
+        prof.on_retire(0x10)
+    prof.on_retire(0x20)
+    prof.on_stall(0x20)
+    text = prof.summary([(0x10, 0, 'addi x1, x1, 1'), (0x20, 0, 'bnez x1, -4')], n=1)
+    assert '00000010          3  75.00%' in text
+    assert '00000020          1 100.00%' in text
@@ -0,0 +1,56 @@
+# LoadStoreQueue 回归测试
+#
+#   cd testbench && python -m pytest sim/test_lsq.py
+
+from .instr_unit import LsuOpType
+from .lsq import LoadStoreQueue
+from .memory import Memory
+
+
+def test_violation_behind_partial_forward():
+    """
+    SW#5 地址未知，SB#6 @0 = 0xAA，LW#7 @0 的第 0 字节由 #6 前递、其余 3 字节读内存
+    #5 解析到 0 后，LW#7 的第 1..3 字节读到了旧值，必须重放
+    """
+    mem = Memory()
+    lsq = LoadStoreQueue()
+    lsq.allocate(5, LsuOpType.SW)
+    lsq.allocate(6, LsuOpType.SB)
+    lsq.allocate(7, LsuOpType.LW)
+    assert lsq.execute_store(6, 0, 0xAA) == []
+    assert lsq.execute_load(7, 0, mem) == 0xaa
+    assert lsq.execute_store(5, 0, 0x11223344) == [7]
+    assert lsq.execute_load(7, 0, mem) == 0x112233aa
+
+
+def test_no_violation_when_shadowed():
+    """
+    被更年轻的 store 完全覆盖的字节不受更老 store 的影响
+    """
+    mem = Memory()
+    lsq = LoadStoreQueue()
+    lsq.allocate(5, LsuOpType.SB)
+    lsq.allocate(6, LsuOpType.SW)
+    lsq.allocate(7, LsuOpType.LW)
+    lsq.execute_store(6, 0, 0x11223344)
+    assert lsq.execute_load(7, 0, mem) == 0x11223344
+    assert lsq.execute_store(5, 1, 0xAA) == []
+
+
+def test_vector_store_replays_only_stale_loads():
+    """
+    向量 store #5 写 0x10..0x1f；LD#6 @0x18 读内存 (旧值) 需要重放，
+    LW#8 @0x10 全部由更年轻的 SW#7 前递不受影响，LW#9 @0x20 不重叠
+    """
+    mem = Memory()
+    lsq = LoadStoreQueue()
+    for order, op in ((6, LsuOpType.LD), (7, LsuOpType.SW), (8, LsuOpType.LW), (9, LsuOpType.LW)):
+        lsq.allocate(order, op)
+    lsq.execute_load(6, 0x18, mem)
+    lsq.execute_store(7, 0x10, 0x1234)
+    lsq.execute_load(8, 0x10, mem)
+    lsq.execute_load(9, 0x20, mem)
+    assert lsq.execute_vector_store(5, range(0x10, 0x20)) == [6]
+    assert (lsq.violations, lsq.replays) == (1, 1)
+    assert lsq.execute_vector_store(5, range(0x40, 0x50)) == []
+    assert (lsq.violations, lsq.replays) == (1, 1)
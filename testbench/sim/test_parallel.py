@@ -0,0 +1,26 @@
+# 区间并行模拟回归测试
+#
+#   cd testbench && python -m pytest sim/test_parallel.py
+
+import numpy as np
+import pytest
+from .config import CoreConfig
+from .instgen import image
+from .parallel import prepare, split, stitch
+from .simpoint import run_interval
+from .test_fusion import PROGRAM as FUSION_PROGRAM
+
+
+@pytest.mark.parametrize('warmup', [0, 1, 3])
+def test_fused_boundaries_are_not_counted_twice(tmp_path, warmup):
+    """
+    融合时 instret 为 2,3,5,7,9,10；按 1 条切成 10 段，多数边界落在融合对中间，
+    各区间从检查点实际到达的指令数开始，拼接后恰好 10 条
+    """
+    mem = image({'word': np.array(FUSION_PROGRAM, dtype=np.uint32),
+                 'size': np.full(len(FUSION_PROGRAM), 4, dtype=np.uint8)})
+    cfg = CoreConfig(fusion=True)
+    jobs = prepare(mem, split(10, 10), warmup, str(tmp_path), cfg)
+    rows = [run_interval(mem, cfg, *job) for job in jobs]
+    assert stitch(rows)['instret'] == 10
+    assert [r['instret'] for r in rows] == [2, 0, 1, 2, 0, 2, 0, 2, 0, 1]
@@ -0,0 +1,42 @@
+# 轨迹回放回归测试
+#
+#   cd testbench && python -m pytest sim/test_replay.py
+
+import os
+import numpy as np
+import pytest
+from .config import CoreConfig
+from .instgen import image
+from .replay import record, replay
+from .sim_code import Simulator
+from .test_fusion import PROGRAM as FUSION_PROGRAM
+from .util import readmemh
+
+MAIN = os.path.join(os.path.dirname(__file__), '..', 'binary', 'main.mem')
+
+
+@pytest.mark.parametrize('rob_size', [64, 16])
+def test_replay_cycles_close_to_simulator(tmp_path, rob_size):
+    """
+    main.mem 前 5000 条指令: 回放的周期数与完整模型相差不超过 5%
+    """
+    cfg = CoreConfig(rob_size=rob_size)
+    sim = Simulator(readmemh(MAIN), cfg)
+    sim.run_until(instret=5000)
+    assert record(readmemh(MAIN), str(tmp_path), instret=5000) == 5000
+    out = replay(str(tmp_path), cfg)
+    assert out['instret'] == 5000
+    assert out['cycles'] == pytest.approx(sim.cycle, rel=0.05)
+
+
+def test_max_instret_counts_fused_pairs(tmp_path):
+    """
+    融合对占一条记录、计两条指令: --instret 按指令数截止，不按记录数
+    """
+    mem = image({'word': np.array(FUSION_PROGRAM, dtype=np.uint32),
+                 'size': np.full(len(FUSION_PROGRAM), 4, dtype=np.uint8)})
+    assert record(mem, str(tmp_path), CoreConfig(fusion=True)) == 6
+    assert replay(str(tmp_path))['instret'] == 10
+    # lui+addiw (2)、addi (1)
+    assert replay(str(tmp_path), max_instret=3)['instret'] == 3
+    assert replay(str(tmp_path), max_instret=4)['instret'] == 5
@@ -0,0 +1,50 @@
+# 可暂停 / 继续运行的回归测试
+#
+#   cd testbench && python -m pytest sim/test_resume.py
+
+import numpy as np
+from .config import CoreConfig
+from .instgen import image
+from .sim_code import Simulator
+from .test_checkpoint import PROGRAM, INSTRET
+
+
+def _mem():
+    return image({'word': np.array(PROGRAM, dtype=np.uint32), 'size': np.full(len(PROGRAM), 4, dtype=np.uint8)})
+
+
+def test_run_until_and_resume_equals_run():
+    """
+    run_until(pc=...) / run_until(instret=...) / step() 交替停下再继续，结果与一次 run() 相同
+    """
+    ref = Simulator(_mem(), CoreConfig())
+    assert ref.run() == 'self-loop'
+    assert ref.instret == INSTRET
+
+    sim = Simulator(_mem(), CoreConfig())
+    stops = 0
+    while (reason := sim.run_until(pc=12)) == 'pc':
+        stops += 1
+        assert sim.rob[0].pc == 12
+        sim.step(3)
+        sim.run_until(instret=sim.instret + 2)
+    assert reason == 'self-loop'
+    assert stops > 1
+    assert (sim.cycle, sim.instret) == (ref.cycle, ref.instret)
+    assert sim.perf.summary() == ref.perf.summary()
+    assert sim.bpu.stats(sim.instret) == ref.bpu.stats(ref.instret)
+
+
+def test_run_until_instret_stops_at_that_commit():
+    """
+    run_until(instret=k) 在第 k 条提交后停下，而不是等本周期其余的指令提交完
+    """
+    ref = Simulator(_mem(), CoreConfig())
+    ref.run()
+    sim = Simulator(_mem(), CoreConfig())
+    for k in range(1, INSTRET):
+        assert sim.run_until(instret=k) == 'instret'
+        assert sim.instret == k
+    assert sim.run() == 'self-loop'
+    assert (sim.cycle, sim.instret) == (ref.cycle, ref.instret)
+    assert sim.perf.summary() == ref.perf.summary()
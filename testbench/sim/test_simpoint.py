@@ -0,0 +1,42 @@
+# SimPoint 误差估计回归测试
+#
+#   cd testbench && python -m pytest sim/test_simpoint.py
+
+import json
+import numpy as np
+from .config import CoreConfig
+from .instgen import image
+from .simpoint import estimate, simulate, SimPoint
+from .test_fusion import PROGRAM as FUSION_PROGRAM
+
+
+def test_single_sample_clusters_have_no_error_estimate():
+    """
+    每类只有一个样本时没有误差估计，报告为 null 而不是 NaN / Infinity
+    """
+    points = [SimPoint(0, 0, 0, 100, 0.25), SimPoint(1, 1, 100, 100, 0.75)]
+    report = estimate(points, [{'cpi': 2.0}, {'cpi': 1.0}])
+    assert report['cpi'] == 1.25
+    assert report['cpi_stderr'] is None and report['ipc_ci95'] is None
+    assert json.loads(json.dumps(report, allow_nan=False))['cpi_ci95'] is None
+
+
+def test_stratified_error_with_two_samples():
+    points = [SimPoint(0, 0, 0, 100, 0.5), SimPoint(1, 0, 100, 100, 0.5), SimPoint(2, 1, 200, 100, 0.5)]
+    report = estimate(points, [{'cpi': 1.0}, {'cpi': 1.2}, {'cpi': 2.0}])
+    assert abs(report['cpi'] - 1.55) < 1e-12
+    lo, hi = report['cpi_ci95']
+    assert lo < report['cpi'] < hi
+    assert report['ipc_ci95'][0] < report['ipc'] < report['ipc_ci95'][1]
+
+
+def test_fused_pair_at_checkpoint_shortens_warmup():
+    """
+    融合时 instret 为 2,3,5,7,9,10；第二个区间 [7, 10) 的检查点请求在 6，实际停在 7，
+    预热为 0，区间仍然统计 3 条
+    """
+    mem = image({'word': np.array(FUSION_PROGRAM, dtype=np.uint32),
+                 'size': np.full(len(FUSION_PROGRAM), 4, dtype=np.uint8)})
+    report = simulate(mem, CoreConfig(fusion=True), interval=1, warmup=1, per_cluster=2)
+    assert [(p['start'], p['length'], p['instret']) for p in report['points']] == [(0, 7, 7), (7, 3, 3)]
+    assert report['points'][1]['warmup'] == 0
@@ -0,0 +1,63 @@
+# 流水线轨迹 (O3PipeView) 回归测试
+#
+#   cd testbench && python -m pytest sim/test_trace.py
+
+import gzip
+from .config import CoreConfig
+from .sim_code import Simulator
+from .test_checkpoint import INSTRET, _mem
+from .trace import PipeTrace
+
+STAGES = ('fetch', 'decode', 'rename', 'dispatch', 'issue', 'complete', 'retire')
+
+
+def _run(path: str, **kwargs) -> None:
+    with PipeTrace(path, **kwargs) as trace:
+        assert Simulator(_mem(), CoreConfig(), trace=trace).run() == 'self-loop'
+
+
+def _parse(text: str) -> list[dict]:
+    lines = text.splitlines()
+    assert len(lines) % 7 == 0
+    out = []
+    for i in range(0, len(lines), 7):
+        group = [line.split(':') for line in lines[i:i + 7]]
+        assert all(g[0] == 'O3PipeView' for g in group)
+        assert tuple(g[1] for g in group) == STAGES
+        fetch = lines[i].split(':', 6)
+        out.append({
+            'pc': int(fetch[3], 16),
+            'order': int(fetch[5]),
+            'text': fetch[6],
+            'ticks': [int(g[2]) for g in group],
+            'store': int(group[6][4]),
+        })
+    return out
+
+
+def test_o3pipeview_records(tmp_path):
+    """
+    每条指令 7 行；提交的指令各阶段时刻不减、按程序顺序、条数等于 instret，
+    store 的 store 时刻等于 retire；被冲刷的指令 retire 为 0
+    """
+    path = str(tmp_path / 'trace.out')
+    _run(path, capacity=16, compress=None)      # 小缓冲区，经过多次写出
+    with open(path, encoding='utf-8') as f:
+        records = _parse(f.read())
+    retired = [r for r in records if r['ticks'][-1]]
+    assert len(retired) == INSTRET
+    assert [r['order'] for r in retired] == sorted(r['order'] for r in retired)
+    for r in retired:
+        ticks = r['ticks']
+        assert ticks == sorted(ticks) and ticks[0] % 1000 == 0
+        assert r['store'] == (ticks[-1] if r['text'].startswith('sd') else 0)
+    assert retired[0]['pc'] == 0 and retired[-1]['pc'] == 32
+    assert all(r['store'] == 0 for r in records if not r['ticks'][-1])
+
+
+def test_gzip_matches_plain(tmp_path):
+    plain, packed = str(tmp_path / 'trace.out'), str(tmp_path / 'trace.gz')
+    _run(plain, compress=None)
+    _run(packed, compress='gzip')
+    with open(plain, encoding='utf-8') as f, gzip.open(packed, 'rt', encoding='utf-8') as g:
+        assert f.read() == g.read()
@@ -0,0 +1,200 @@
+# 向量访存回归测试
+#
+#   cd testbench && python -m pytest sim/test_vector.py
+
+import numpy as np
+import pytest
+from .memory import Memory
+from .vector import VectorUnit
+
+E32M1 = 0b010 << 3     # SEW=32, LMUL=1
+
+
+def _vmem(store: bool, width: int, vd: int, rs1: int, mop: int = 0, field: int = 0, vm: int = 1) -> int:
+    """
+    field: 单位步长时为 lumop / sumop，步长访存时为 rs2
+    """
+    return mop << 26 | vm << 25 | field << 20 | rs1 << 15 | width << 12 | vd << 7 | (0x27 if store else 0x07)
+
+
+def _words(mem: Memory, addr: int, n: int) -> list[int]:
+    return mem.read_bytes(addr, 4 * n).view('<u4').tolist()
+
+
+def test_unit_stride_round_trip():
+    mem = Memory()
+    vec = VectorUnit(128)
+    assert vec.vsetvl(None, E32M1) == 4
+    mem.write_bytes(0x100, np.array([1, 2, 3, 0xffffffff], dtype='<u4').view(np.uint8))
+    addrs = vec.memory(_vmem(False, 0b110, 1, 10), mem, 0x100)
+    assert addrs.tolist() == list(range(0x100, 0x110))
+    vec.memory(_vmem(True, 0b110, 1, 10), mem, 0x200)
+    assert _words(mem, 0x200, 4) == [1, 2, 3, 0xffffffff]
+
+
+def test_strided_and_masked_store():
+    """
+    vlse32 步长 8 读隔一个字；vse32 v1, v0.t 只写 v0 中被置位的元素
+    """
+    mem = Memory()
+    vec = VectorUnit(128)
+    vec.vsetvl(None, E32M1)
+    mem.write_bytes(0x100, np.arange(8, dtype='<u4').view(np.uint8))
+    vec.memory(_vmem(False, 0b110, 1, 10, mop=0b10, field=11), mem, 0x100, 8)
+    assert vec.vrf.group(1, 32)[:4].tolist() == [0, 2, 4, 6]
+    vec.vrf.write(0, 0b0110)
+    vec.memory(_vmem(True, 0b110, 1, 10, vm=0), mem, 0x200)
+    assert _words(mem, 0x200, 4) == [0, 2, 4, 0]
+
+
+def test_fault_only_first_truncates_vl():
+    """
+    vle32ff: 第 2 个元素越界时 vl 截短为 2，已读的元素保留；第 0 个元素越界时仍然报错，
+    普通 vle32 任一元素越界都报错
+    """
+    mem = Memory(limit=0x108)
+    vec = VectorUnit(128)
+    vec.vsetvl(None, E32M1)
+    mem.write_bytes(0x100, np.array([7, 9], dtype='<u4').view(np.uint8))
+    vle32ff = _vmem(False, 0b110, 1, 10, field=0b10000)
+    addrs = vec.memory(vle32ff, mem, 0x100)
+    assert vec.vl == 2
+    assert len(addrs) == 8
+    assert vec.vrf.group(1, 32)[:2].tolist() == [7, 9]
+    with pytest.raises(ValueError):
+        vec.memory(vle32ff, mem, 0x108)
+    # 普通 vle32 不截短
+    vec.vsetvl(None, E32M1)
+    with pytest.raises(ValueError):
+        vec.memory(_vmem(False, 0b110, 1, 10), mem, 0x100)
+
+
+E32M2 = 0b010 << 3 | 0b001
+E64M1 = 0b011 << 3
+OPIVV, OPFVV, OPMVV, OPIVI, OPIVX, OPFVF = 0, 1, 2, 3, 4, 5
+
+
+def _opv(funct6: int, funct3: int, vd: int, vs1: int, vs2: int, vm: int = 1) -> int:
+    return funct6 << 26 | vm << 25 | vs2 << 20 | vs1 << 15 | funct3 << 12 | vd << 7 | 0x57
+
+
+def _unit(vtype: int = E32M1) -> VectorUnit:
+    vec = VectorUnit(128)
+    vec.vsetvl(None, vtype)
+    return vec
+
+
+def test_carry_out_masks():
+    """
+    vmadc / vmsbc: 进位 / 借位输出写成掩码，vm=0 时加上 v0 的进位 / 借位输入
+    """
+    vec = _unit()
+    vec.vrf.group(2, 32)[:4] = [0xffffffff, 1, 0x80000000, 0xffffffff]
+    vec.vrf.group(1, 32)[:4] = [1, 1, 0x80000000, 0]
+    vec.execute(_opv(0b010001, OPIVV, 4, 1, 2))
+    assert vec.vrf.read(4) & 0xf == 0b0101
+    vec.vrf.write(0, 0b1111)
+    vec.execute(_opv(0b010001, OPIVV, 4, 1, 2, vm=0))
+    assert vec.vrf.read(4) & 0xf == 0b1101
+    vec.vrf.group(2, 32)[:4] = [0, 1, 5, 3]
+    vec.vrf.group(1, 32)[:4] = [1, 1, 4, 3]
+    vec.execute(_opv(0b010011, OPIVV, 4, 1, 2))
+    assert vec.vrf.read(4) & 0xf == 0b0001
+    vec.execute(_opv(0b010011, OPIVV, 4, 1, 2, vm=0))
+    assert vec.vrf.read(4) & 0xf == 0b1011
+
+
+def test_compress_and_gather_ei16():
+    vec = _unit()
+    vec.vrf.group(2, 32)[:4] = [10, 11, 12, 13]
+    vec.vrf.write(1, 0b1010)
+    vec.vrf.group(3, 32)[:4] = [0, 0, 0, 99]
+    vec.execute(_opv(0b010111, OPMVV, 3, 1, 2))         # vcompress.vm v3, v2, v1
+    assert vec.vrf.group(3, 32)[:4].tolist() == [11, 13, 0, 99]
+    vec.vrf.group(1, 16)[:4] = [3, 0, 9, 1]            # 下标 EMUL = 1/2
+    vec.execute(_opv(0b001110, OPIVV, 4, 1, 2))         # vrgatherei16.vv v4, v2, v1
+    assert vec.vrf.group(4, 32)[:4].tolist() == [13, 10, 0, 11]
+
+
+def test_averaging_add_follows_vxrm():
+    """
+    vaaddu: (vs2 + vs1) >> 1，和不截断；rnu / rne / rdn / rod 对 1.5、0.5 的舍入不同
+    """
+    vec = _unit()
+    vec.vrf.group(2, 32)[:4] = [1, 1, 3, 0xffffffff]
+    vec.vrf.group(1, 32)[:4] = [2, 0, 0, 0xffffffff]
+    expect = {0: [2, 1, 2, 0xffffffff], 1: [2, 0, 2, 0xffffffff], 2: [1, 0, 1, 0xffffffff], 3: [1, 1, 1, 0xffffffff]}
+    for vxrm, values in expect.items():
+        vec.execute(_opv(0b001000, OPMVV, 3, 1, 2), vxrm=vxrm)
+        assert vec.vrf.group(3, 32)[:4].tolist() == values
+    vec.vrf.group(2, 32, kind='s')[0] = -5
+    vec.vrf.group(1, 32, kind='s')[0] = 2
+    vec.execute(_opv(0b001011, OPMVV, 3, 1, 2), vxrm=2)   # vasub: -3.5 向下舍入
+    assert vec.vrf.group(3, 32, kind='s')[0] == -4
+
+
+def test_scaling_shift_clip_and_multiply():
+    vec = _unit()
+    vec.vrf.group(2, 32)[:4] = [5, 6, 7, 8]
+    vec.execute(_opv(0b101010, OPIVI, 3, 2, 2))          # vssrl.vi v3, v2, 2 (rnu)
+    assert vec.vrf.group(3, 32)[:4].tolist() == [1, 2, 2, 2]
+    assert vec.vxsat == 0
+
+    # vnclip.wi v1, v2, 4: vs2 为 64 位元素 (v2, v3)
+    vec.vrf.group(2, 64, 16, 's')[:4] = [1 << 40, -(1 << 40), 100, -7]
+    vec.execute(_opv(0b101111, OPIVI, 1, 4, 2))
+    assert vec.vrf.group(1, 32, kind='s')[:4].tolist() == [0x7fffffff, -0x80000000, 6, 0]
+    assert vec.vxsat == 1
+
+    vec.vxsat = 0
+    vec.vrf.group(2, 32, kind='s')[:3] = [-1 << 31, 1 << 30, -3]
+    vec.vrf.group(1, 32, kind='s')[:3] = [-1 << 31, 1 << 30, (1 << 31) - 1]
+    vec.execute(_opv(0b100111, OPIVV, 3, 1, 2))          # vsmul.vv
+    assert vec.vrf.group(3, 32, kind='s')[:3].tolist() == [0x7fffffff, 1 << 29, -3]
+    assert vec.vxsat == 1
+
+    vec = _unit(E64M1)
+    vec.vrf.group(2, 64, kind='s')[:2] = [3 << 61, (1 << 62) + 1]
+    vec.vrf.group(1, 64, kind='s')[:2] = [1 << 62, 1 << 62]
+    vec.execute(_opv(0b100111, OPIVV, 3, 1, 2))          # 128 位乘积
+    assert vec.vrf.group(3, 64, kind='s')[:2].tolist() == [3 << 60, (1 << 61) + 1]
+
+
+def test_fp_fused_rounding_and_flags():
+    """
+    SEW=64 的 vfmacc 为融合乘加；舍入取 frm；只有活跃元素产生 fflags
+    """
+    vec = _unit(E64M1)
+    vec.vrf.group(1, 64, kind='f')[:1] = [-1.0]
+    vec.vrf.group(2, 64, kind='f')[:1] = [1 + 2.0 ** -30]
+    vec.vrf.group(3, 64, kind='f')[:1] = [1 - 2.0 ** -30]
+    vec.execute(_opv(0b101100, OPFVV, 1, 2, 3))          # vfmacc.vv v1, v2, v3
+    assert vec.vrf.group(1, 64, kind='f')[0] == -2.0 ** -60
+    assert vec.fflags == 0
+
+    vec = _unit()
+    vec.vrf.group(2, 32, kind='f')[:2] = [1.0, 1.0]
+    tiny = 0xffffffff_00000000 | int(np.float32(2.0 ** -30).view(np.uint32))
+    vec.execute(_opv(0b000000, OPFVF, 3, 1, 2), frs1=tiny)            # vfadd.vf, RNE
+    assert vec.vrf.group(3, 32, kind='f')[0] == 1.0 and vec.fflags == 0x01
+    vec.execute(_opv(0b000000, OPFVF, 3, 1, 2), frs1=tiny, frm=3)     # RUP
+    assert vec.vrf.group(3, 32, kind='f')[0] == np.nextafter(np.float32(1), np.float32(2))
+
+    vec.vrf.group(1, 32, kind='f')[:4] = [1.0, 0.0, 1.0, 1.0]
+    vec.vrf.group(2, 32, kind='f')[:4] = [1.0, 1.0, 1.0, 1.0]
+    vec.vrf.write(0, 0b1101)
+    vec.execute(_opv(0b100000, OPFVV, 3, 1, 2, vm=0))    # vfdiv.vv，除以 0 的元素未激活
+    assert vec.fflags == 0
+    vec.execute(_opv(0b100000, OPFVV, 3, 1, 2))
+    assert vec.fflags == 0x08
+
+
+def test_fp_conversions_use_frm():
+    vec = _unit()
+    vec.vrf.group(2, 32, kind='f')[:2] = [-1.5, 2.0]
+    vec.execute(_opv(0b010010, OPFVV, 3, 0b00001, 2), frm=2)     # vfcvt.x.f.v, RDN
+    assert vec.vrf.group(3, 32, kind='s')[:2].tolist() == [-2, 2]
+    assert vec.fflags == 0x01
+    vec.vrf.group(2, 64, 16, 'f')[:2] = [1 + 2.0 ** -40, 2.0]
+    vec.execute(_opv(0b010010, OPFVV, 1, 0b10101, 2))            # vfncvt.rod.f.f.w
+    assert vec.vrf.group(1, 32, kind='f')[:2].tolist() == [1 + 2.0 ** -23, 2.0]
@@ -0,0 +1,104 @@
+# 流水线轨迹导出 (gem5 O3PipeView 格式，Konata 可直接打开)
+#
+# 每条指令在提交或被冲刷时写入预分配的缓冲区，
+# 缓冲区写满后一次格式化并写入 gzip / zstd 压缩流
+#
+#   O3PipeView:fetch:<tick>:0x<pc>:0:<order>:<disasm>
+#   O3PipeView:decode:<tick>
+#   O3PipeView:rename:<tick>
+#   O3PipeView:dispatch:<tick>
+#   O3PipeView:issue:<tick>
+#   O3PipeView:complete:<tick>
+#   O3PipeView:retire:<tick>:store:<tick>     (retire tick 为 0 表示被冲刷)
+
+import gzip
+
+# 一条指令的全部记录，用一次 % 格式化生成
+O3_RECORD = ("O3PipeView:fetch:%d:0x%08x:0:%d:%s\n"
+             "O3PipeView:decode:%d\n"
+             "O3PipeView:rename:%d\n"
+             "O3PipeView:dispatch:%d\n"
+             "O3PipeView:issue:%d\n"
+             "O3PipeView:complete:%d\n"
+             "O3PipeView:retire:%d:store:%d\n")
+
+
+def _open(file_name: str, compress: str | None):
+    if compress is None:
+        return open(file_name, 'w', encoding='utf-8')
+    if compress == 'gzip':
+        # 较低的压缩级别足够
+        return gzip.open(file_name, 'wt', encoding='utf-8', compresslevel=1)
+    if compress == 'zstd':
+        try:
+            import zstandard
+        except ImportError:
+            raise ImportError("Trace: zstd output requires the 'zstandard' package") from None
+        import io
+        raw = open(file_name, 'wb')
+        return io.TextIOWrapper(zstandard.ZstdCompressor(level=1).stream_writer(raw), encoding='utf-8')
+    raise ValueError(f"Trace: unknown compression {compress}")
+
+
+class PipeTrace():
+    '''
+    capacity 条记录的缓冲区 (预分配的元组槽位)
+    写满后整块格式化写出，写出时的异常直接抛给调用者
+    '''
+    def __init__(self, file_name: str, capacity: int = 1 << 14,
+                 compress: str | None = 'gzip', ticks_per_cycle: int = 1000):
+        self.file_name = file_name
+        self.ticks = ticks_per_cycle
+        self.ring: list[tuple | None] = [None] * capacity
+        self.fill = 0       # 已写入条数
+        self.records = 0
+        self.closed = False
+        self.file = _open(file_name, compress)
+
+    def record(self, order: int, pc: int, text: str, fetch: int, decode: int, rename: int,
+               issue: int, complete: int, commit: int, store: bool = False) -> None:
+        self.ring[self.fill] = (order, pc, text, fetch, decode, rename, issue, complete, commit, store)
+        self.records += 1
+        self.fill += 1
+        if self.fill == len(self.ring):
+            self._flush()
+
+    def record_entry(self, e, commit: int) -> None:
+        """
+        按 RobEntry 记录，commit 为 -1 表示被冲刷
+        """
+        self.record(e.order, e.pc, e.text, e.decode_cycle, e.decode_cycle, e.rename_cycle,
+                    e.issue_cycle, e.complete_cycle, commit, e.is_store)
+
+    def _flush(self) -> None:
+        n, self.fill = self.fill, 0
+        self.file.write(self._format(n))
+
+    def _format(self, n: int) -> str:
+        t = self.ticks
+        out = []
+        for order, pc, s, fetch, decode, rename, issue, complete, commit, store in self.ring[:n]:
+            # 未到达的阶段记为 0
+            rename = rename * t if rename >= 0 else 0
+            issue = issue * t if issue >= 0 else 0
+            complete = complete * t if complete >= 0 else 0
+            retire = commit * t if commit >= 0 else 0
+            out.append(O3_RECORD % (fetch * t, pc, order, s, decode * t, rename, rename,
+                                    issue, complete, retire, retire if store else 0))
+        return ''.join(out)
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            if self.fill:
+                self._flush()
+        finally:
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -41,6 +41,39 @@ def readmemh(file_name, width=128):
                     out.append(int(chunk_hex, 16))
     return out
 
+def writememh(file_name, columns, header=None, chunk=1 << 20):
+    """
+    Write $readmemh vectors, one line per vector.
+
+    - columns: [(values, digits)], values is an integer array (<= 64 bits),
+      digits the number of hex chars it occupies; fields are concatenated
+      MSB-first in the given order.
+    - header: optional text written as '//' comment lines.
+    - file_name may also be a binary file object, which is appended to
+      (for writing a large set in several calls).
+    """
+    import contextlib, os
+    import numpy as np
+    digits = np.frombuffer(b"0123456789abcdef", dtype=np.uint8)
+    columns = [(np.asarray(v).astype(np.uint64, copy=False), d) for v, d in columns]
+    n = len(columns[0][0])
+    width = sum(d for _, d in columns) + 1
+    opened = open(file_name, "wb") if isinstance(file_name, (str, bytes, os.PathLike)) else contextlib.nullcontext(file_name)
+    with opened as f:
+        if header:
+            f.write("".join(f"// {line}\n" for line in header.splitlines()).encode())
+        for lo in range(0, n, chunk):
+            hi = min(lo + chunk, n)
+            buf = np.empty((hi - lo, width), dtype=np.uint8)
+            pos = 0
+            for values, d in columns:
+                v = values[lo:hi]
+                for k in range(d):
+                    buf[:, pos + k] = digits[(v >> np.uint64(4 * (d - 1 - k))) & np.uint64(0xf)]
+                pos += d
+            buf[:, -1] = ord("\n")
+            f.write(buf.tobytes())
+
 def mask(n: int) -> int:
     """
     生成 n 位宽的掩码
@@ -118,7 +151,9 @@ def div_signed(a: int, b: int, xlen: int) -> int:
         return mask(xlen)  # -1
     if a_s == -(1 << (xlen - 1)) and b_s == -1:
         return a_s & mask(xlen)
-    q = int(a_s / b_s)  # Python / 是浮点除，结果转 int 等价于向零截断
+    q = abs(a_s) // abs(b_s)  # 整数除法后按符号取反，等价于向零截断
+    if (a_s < 0) != (b_s < 0):
+        q = -q
     return wrap(q, xlen)
 
 
@@ -136,7 +171,9 @@ def rem_signed(a: int, b: int, xlen: int) -> int:
         return wrap(a_s, xlen)
     if a_s == -(1 << (xlen - 1)) and b_s == -1:
         return 0
-    q = int(a_s / b_s)
+    q = abs(a_s) // abs(b_s)
+    if (a_s < 0) != (b_s < 0):
+        q = -q
     r = a_s - q * b_s
     return wrap(r, xlen)
 
@@ -0,0 +1,181 @@
+# VCD 波形输出，信号定义取自 interface_wave/*.json
+#
+# 只记录变化的值，按块缓冲写出；按信号组 (json 文件名) 开启
+# 时间轴与 test_fetch.sv 一致: always #5 clk = ~clk，复位 #20 后释放
+
+import json, os
+
+INTERFACE_WAVE = f"{os.path.dirname(__file__)}/../../interface_wave"
+
+# 位宽不在 wavedrom 描述中，按 RTL 参数补充 (test_fetch.sv: ADDR_WIDTH=40, DATA_WIDTH=128)
+SIGNAL_WIDTHS = {
+    'decode_to_fetch': {
+        'clk': 1,
+        'rst_n': 1,
+        'valid': 1,
+        'next_addr': 40,
+        'cmd_new': 1,
+        'next': 1,
+        'ready': 1,
+        'addr': 40,
+        'data': 128,
+    },
+}
+
+CLOCK = 'clk'
+RESET_N = 'rst_n'
+
+
+def wave_signals(group: str, path: str = INTERFACE_WAVE) -> list[str]:
+    """
+    读取 wavedrom json 中的信号名，跳过空行分隔 {}
+    """
+    with open(f"{path}/{group}.json", encoding='utf-8') as f:
+        wave = json.load(f)
+    return [s['name'] for s in wave['signal'] if s.get('name')]
+
+
+def _ident(n: int) -> str:
+    # VCD 标识符: 可打印字符 '!' ~ '~'
+    s = ''
+    while True:
+        s += chr(33 + n % 94)
+        n //= 94
+        if n == 0:
+            return s
+
+
+class VcdWriter():
+    '''
+    groups=None 时开启所有注册的组，否则只开启列出的组
+    add_group() 对未开启的组返回 None，调用方据此跳过信号计算
+    set() 只在值变化时产生输出，cycle() 推进一个时钟周期
+    '''
+    def __init__(self, file_name: str, groups: list[str] | None = None, timescale: str = '1ns',
+                 period: int = 10, reset_cycles: int = 2, buffer: int = 1 << 14):
+        self.file_name = file_name
+        self.groups = None if groups is None else set(groups)
+        self.timescale = timescale
+        self.period = period
+        self.reset_cycles = reset_cycles
+        self.buffer = buffer
+
+        self.scopes: dict[str, list[tuple[str, int, str]]] = {}
+        self.width: list[int] = []
+        self.ids: list[str] = []
+        self.last: list[int | None] = []
+        self.clocks: list[int] = []
+        self.resets: list[int] = []
+        self.pending: list[str] = []
+        self.out: list[str] = []
+        self.file = None
+        self.changes = 0
+
+    def enabled(self, group: str) -> bool:
+        return self.groups is None or group in self.groups
+
+    def add_group(self, group: str, signals: list[str] | None = None,
+                  widths: dict[str, int] | None = None) -> dict[str, int] | None:
+        if not self.enabled(group):
+            return None
+        if self.file is not None:
+            raise RuntimeError("VCD: groups must be added before the first cycle")
+        signals = signals if signals is not None else wave_signals(group)
+        widths = widths if widths is not None else SIGNAL_WIDTHS.get(group, {})
+        handles = {}
+        scope = []
+        for name in signals:
+            sid = len(self.ids)
+            self.ids.append(_ident(sid))
+            self.width.append(widths.get(name, 1))
+            self.last.append(None)
+            if name == CLOCK:
+                self.clocks.append(sid)
+            elif name == RESET_N:
+                self.resets.append(sid)
+            scope.append((name, self.width[sid], self.ids[sid]))
+            handles[name] = sid
+        self.scopes[group] = scope
+        return handles
+
+    def _value(self, sid: int, value: int | None) -> str:
+        if self.width[sid] == 1:
+            return f"{'x' if value is None else value & 1}{self.ids[sid]}\n"
+        if value is None:
+            return f"bx {self.ids[sid]}\n"
+        return f"b{value & ((1 << self.width[sid]) - 1):b} {self.ids[sid]}\n"
+
+    def _header(self) -> None:
+        self.file = open(self.file_name, 'w', encoding='utf-8')
+        head = [f"$timescale {self.timescale} $end\n"]
+        for group, scope in self.scopes.items():
+            head.append(f"$scope module {group} $end\n")
+            for name, width, ident in scope:
+                head.append(f"$var wire {width} {ident} {name} $end\n")
+            head.append("$upscope $end\n")
+        head.append("$enddefinitions $end\n#0\n$dumpvars\n")
+        for sid in range(len(self.ids)):
+            v = 0 if sid in self.clocks or sid in self.resets else None
+            self.last[sid] = v
+            head.append(self._value(sid, v))
+        head.append("$end\n")
+        # 复位期间的时钟
+        half = self.period // 2
+        for c in range(self.reset_cycles):
+            t = c * self.period
+            if c:
+                head.append(f"#{t}\n")
+            head += [f"1{self.ids[s]}\n" for s in self.clocks]
+            head.append(f"#{t + half}\n")
+            head += [f"0{self.ids[s]}\n" for s in self.clocks]
+        self.file.write(''.join(head))
+        for s in self.resets:
+            self.set(s, 1)
+
+    def set(self, sid: int, value: int | None) -> None:
+        if self.last[sid] != value:
+            self.last[sid] = value
+            self.pending.append(self._value(sid, value))
+
+    def cycle(self, cycle: int) -> None:
+        """
+        写出本周期 (时钟上升沿) 的变化并推进时间
+        """
+        if self.file is None:
+            self._header()
+        if not self.clocks and not self.pending:
+            return
+        t = (cycle + self.reset_cycles) * self.period
+        out = self.out
+        out.append(f"#{t}\n")
+        for s in self.clocks:
+            out.append(f"1{self.ids[s]}\n")
+        if self.pending:
+            self.changes += len(self.pending)
+            out += self.pending
+            self.pending.clear()
+        if self.clocks:
+            out.append(f"#{t + self.period // 2}\n")
+            for s in self.clocks:
+                out.append(f"0{self.ids[s]}\n")
+        if len(out) >= self.buffer:
+            self.flush()
+
+    def flush(self) -> None:
+        if self.file is not None and self.out:
+            self.file.write(''.join(self.out))
+            self.out.clear()
+
+    def close(self) -> None:
+        if self.file is None:
+            if not self.scopes:
+                return
+            self._header()
+        self.flush()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,1158 @@
+# RVV 向量单元 (RVV 1.0 的 OP-V 子集)
+#
+# 寄存器堆是 32 x VLENB 的 uint8 数组，寄存器组 v[n : n+LMUL] 的字节是连续的，
+# 按当前 SEW 取 int8 ... int64 / float16 ... float64 视图即为元素数组
+# 每条指令对 [0, vl) 的元素做整段 numpy 运算，不逐元素循环
+#
+#   掩码 (vm=0): v0 的位展开为 bool 数组，写回时 np.copyto(where=) 只写活跃元素
+#   非活跃元素和尾部元素保持原值 (undisturbed，vta / vma 为 agnostic 时也是合法的实现)
+#   浮点: SEW=32 / 64 经 fpu.batch 逐元素执行标量 F / D 运算，结果与标量指令逐位相同 (按 frm 舍入，乘加为融合乘加)，
+#         活跃元素产生的 fflags 记入 fflags，由调用方 accrue；SEW=16 在 numpy float16 中按 RNE 计算，不产生 fflags
+#   定点: 饱和运算置 vxsat；vaadd / vasub / vsmul / vssrl / vssra / vnclip 按 vxrm 舍入
+#
+# 向量访存 (LOAD-FP / STORE-FP 中 width 为 0 / 5 / 6 / 7) 先算出 (元素, 字段, 字节) 的地址数组:
+#   单位步长 / 步长: 整段读出 [lo, lo + 跨度) 后按步长切片 (as_strided)，写时改完整段写回
+#   索引: Memory.gather / scatter 按地址数组一次读写，地址重复时后面的元素生效 (与有序索引写相同)
+#   段访存 (nf > 1) 的第 f 个字段写入 vd + f * EMUL；越过 Memory.limit 的活跃元素为访存异常
+#
+# 功能编码按 RVV 1.0 规范；decode.py 中的表只用于反汇编显示
+
+import numpy as np
+from numpy.lib.stride_tricks import as_strided
+from .moduleConstant import REGISTER_MASK, XLEN
+from .instr_unit import InstrUnit, ExecType, RegisterType, VecOpType, FpuOpType
+from .fpu import _fclass, batch, fp_execute, S, D, RTZ, RMM, NX
+from .util import sext, mask
+
+CSR_VSTART = 0x008
+CSR_VXSAT = 0x009
+CSR_VXRM = 0x00A
+CSR_VL = 0xC20
+CSR_VTYPE = 0xC21
+CSR_VLENB = 0xC22
+
+VILL = 1 << (XLEN - 1)
+
+# funct3
+OPIVV, OPFVV, OPMVV, OPIVI, OPIVX, OPFVF, OPMVX, OPCFG = range(8)
+
+_DTYPES = {
+    'u': {8: np.uint8, 16: np.uint16, 32: np.uint32, 64: np.uint64},
+    's': {8: np.int8, 16: np.int16, 32: np.int32, 64: np.int64},
+    'f': {16: np.float16, 32: np.float32, 64: np.float64},
+}
+
+
+# LOAD-FP / STORE-FP 的 width -> EEW (1 ~ 4 为标量浮点访存)
+_VMEM_WIDTH = {0b000: 8, 0b101: 16, 0b110: 32, 0b111: 64}
+
+# 步长访存的跨度不超过该值时整段读写后切片，否则按地址 gather / scatter
+_SPAN_MAX = 1 << 16
+
+
+def is_vector(opcode: int) -> bool:
+    op = opcode & 0x7f
+    return op == 0x57 or (op in (0x07, 0x27) and opcode >> 12 & 0b111 in _VMEM_WIDTH)
+
+
+def vector_instr(inst: int) -> InstrUnit:
+    """
+    OP-V 指令字对应的 InstrUnit (alu=VEC)，只描述读写的标量整数寄存器，供重命名和依赖分析使用
+    region.rd 为 GPR / FPR 时指令写回 x[rd] / f[rd]
+    """
+    instr = InstrUnit()
+    instr.alu = ExecType.VEC
+    instr.op = VecOpType.ELEMENT
+    funct3 = inst >> 12 & 0b111
+    funct6 = inst >> 26
+    df = instr.dataflow
+    df.rd, df.rs1, df.rs2 = inst >> 7 & 0x1f, inst >> 15 & 0x1f, inst >> 20 & 0x1f
+    if inst & 0x7f != 0x57:
+        # 向量访存: x[rs1] 为基地址，步长访存的 x[rs2] 为步长
+        instr.op = VecOpType.STORE if inst & 0x7f == 0x27 else VecOpType.LOAD
+        instr.req.rs1 = True
+        instr.req.rs2 = inst >> 26 & 0b11 == 0b10
+        return instr
+    if funct3 == OPCFG:
+        instr.req.rs1 = inst >> 30 != 0b11              # vsetivli 的 rs1 字段是立即数
+        instr.req.rs2 = inst >> 30 == 0b10              # vsetvl
+        instr.region.rd = RegisterType.GPR
+        instr.op = VecOpType.CONFIG
+    elif funct3 in (OPIVX, OPMVX):
+        instr.req.rs1 = True
+    if funct6 == 0b010000 and funct3 in (OPMVV, OPFVV):
+        # vmv.x.s / vcpop.m / vfirst.m / vfmv.f.s
+        instr.region.rd = RegisterType.GPR if funct3 == OPMVV else RegisterType.FPR
+        instr.op = VecOpType.TO_SCALAR
+    return instr
+
+
+def _scalar(value: int, sew: int, kind: str) -> np.ndarray:
+    """
+    标量按 SEW 截断后的 0 维数组 (与向量运算时不提升类型)
+    """
+    return np.array(value & mask(sew), dtype=_DTYPES['u'][sew]).astype(_DTYPES[kind][sew])
+
+
+def _fscalar(bits: int, sew: int) -> np.ndarray:
+    """
+    f 寄存器的值按 SEW 取出，没有正确 NaN-boxing 的窄值视为 canonical NaN
+    """
+    if sew < 64 and bits >> sew != mask(XLEN - sew):
+        bits = 0x7e00 if sew == 16 else 0x7fc00000
+    return np.array(bits & mask(sew), dtype=_DTYPES['u'][sew]).view(_DTYPES['f'][sew])
+
+
+def _nanbox(bits: int, sew: int) -> int:
+    return (bits | (REGISTER_MASK ^ mask(sew))) & REGISTER_MASK
+
+
+def _mulhu64(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """
+    uint64 乘积的高 64 位 (拆成 32 位的半字计算)
+    """
+    lo = np.uint64(0xffffffff)
+    al, ah, bl, bh = a & lo, a >> 32, b & lo, b >> 32
+    ll, lh, hl, hh = al * bl, al * bh, ah * bl, ah * bh
+    mid = (ll >> 32) + (lh & lo) + (hl & lo)
+    return hh + (lh >> 32) + (hl >> 32) + (mid >> 32)
+
+
+def _mulh(a: np.ndarray, b: np.ndarray, sew: int, sa: bool, sb: bool) -> np.ndarray:
+    """
+    a * b 的高 SEW 位；a / b 为无符号视图，sa / sb 表示按有符号数解释
+    """
+    u = _DTYPES['u'][sew]
+    if sew < 64:
+        s = _DTYPES['s'][sew]
+        wide = np.int64 if sa or sb else np.uint64
+        wa = (a.astype(s) if sa else a).astype(wide)
+        wb = (b.astype(s) if sb else b).astype(wide)
+        return ((wa * wb) >> sew).astype(u)
+    hi = _mulhu64(a, b)
+    if sa:
+        hi = hi - np.where(a >> 63, b, 0).astype(u)
+    if sb:
+        hi = hi - np.where(b >> 63, a, 0).astype(u)
+    return hi
+
+
+def _divide(a: np.ndarray, b: np.ndarray, sew: int, signed: bool, rem: bool) -> np.ndarray:
+    """
+    RISC-V 除法语义 (a / b 为无符号视图):
+    除以 0 时商为全 1、余数为被除数；有符号溢出时商为被除数、余数为 0
+    """
+    a, b = np.broadcast_arrays(a, b)
+    ua, ub = a, b
+    if signed:
+        na, nb = (a >> (sew - 1)).astype(bool), (b >> (sew - 1)).astype(bool)
+        ua, ub = np.where(na, -a, a), np.where(nb, -b, b)
+    zero = ub == 0
+    safe = np.where(zero, 1, ub).astype(a.dtype)
+    if rem:
+        r = ua % safe
+        if signed:
+            r = np.where(na, -r, r)
+        return np.where(zero, a, r)
+    q = ua // safe
+    if signed:
+        q = np.where(na ^ nb, -q, q)
+    return np.where(zero, np.iinfo(a.dtype).max, q)
+
+
+def _round_increment(vxrm: int, lsb: np.ndarray, half: np.ndarray, sticky: np.ndarray) -> np.ndarray:
+    """
+    定点舍入右移 d 位时的进位 (RVV 规范 vxrm)，lsb = v[d]，half = v[d-1]，sticky = (v[d-2:0] != 0)
+    """
+    if vxrm == 0:                   # rnu
+        return half
+    if vxrm == 1:                   # rne
+        return half & (sticky | lsb)
+    if vxrm == 2:                   # rdn
+        return np.zeros_like(half)
+    return ~lsb & (half | sticky)   # rod
+
+
+def _shift_round(v: np.ndarray, d, vxrm: int) -> np.ndarray:
+    """
+    v >> d 按 vxrm 舍入 (有符号类型为算术右移)，0 <= d < 位宽
+    """
+    u = v.astype(_DTYPES['u'][v.dtype.itemsize * 8])
+    one = u.dtype.type(1)
+    d = np.asarray(d).astype(u.dtype)
+    k = np.maximum(d, one) - one
+    half = ((u >> k) & one).astype(bool) & (d > 0)
+    sticky = (u & ((one << k) - one)) != 0
+    lsb = ((u >> d) & one).astype(bool)
+    return (v >> d.astype(v.dtype)) + _round_increment(vxrm, lsb, half, sticky).astype(v.dtype)
+
+
+def _f2i(x: np.ndarray, bits: int, signed: bool, rtz: bool) -> np.ndarray:
+    """
+    浮点转整数，越界饱和，NaN 转为最大值
+    """
+    r = np.trunc(x) if rtz else np.rint(x)
+    lo, hi = (-(1 << (bits - 1)), (1 << (bits - 1)) - 1) if signed else (0, mask(bits))
+    big = np.isnan(r) | (r >= float(hi + 1))
+    small = r < float(lo)
+    out = np.where(big | small, 0, r).astype(_DTYPES['s' if signed else 'u'][bits])
+    out[big] = hi
+    out[small] = lo
+    return out
+
+
+# OPIVV / OPIVX / OPIVI: funct6 -> (元素类型, 运算)
+_INT_BINARY = {
+    0b000000: ('u', np.add),
+    0b000010: ('u', np.subtract),
+    0b000011: ('u', lambda a, b: b - a),            # vrsub
+    0b000100: ('u', np.minimum),
+    0b000101: ('s', np.minimum),
+    0b000110: ('u', np.maximum),
+    0b000111: ('s', np.maximum),
+    0b001001: ('u', np.bitwise_and),
+    0b001010: ('u', np.bitwise_or),
+    0b001011: ('u', np.bitwise_xor),
+}
+
+_INT_SHIFT = {
+    0b100101: ('u', np.left_shift),                 # vsll
+    0b101000: ('u', np.right_shift),                # vsrl
+    0b101001: ('s', np.right_shift),                # vsra
+}
+
+_INT_COMPARE = {
+    0b011000: ('u', np.equal),                      # vmseq
+    0b011001: ('u', np.not_equal),
+    0b011010: ('u', np.less),                       # vmsltu
+    0b011011: ('s', np.less),
+    0b011100: ('u', np.less_equal),                 # vmsleu
+    0b011101: ('s', np.less_equal),
+    0b011110: ('u', np.greater),                    # vmsgtu (vx / vi)
+    0b011111: ('s', np.greater),
+}
+
+# OPMVV 归约: vd[0] = op(vs1[0], vs2[*])
+_INT_REDUCE = {
+    0b000000: ('u', np.add),                        # vredsum
+    0b000001: ('u', np.bitwise_and),
+    0b000010: ('u', np.bitwise_or),
+    0b000011: ('u', np.bitwise_xor),
+    0b000100: ('u', np.minimum),                    # vredminu
+    0b000101: ('s', np.minimum),
+    0b000110: ('u', np.maximum),                    # vredmaxu
+    0b000111: ('s', np.maximum),
+}
+
+# OPMVV 掩码逻辑: (vs2, vs1)
+_MASK_LOGIC = {
+    0b011000: lambda a, b: a & ~b,                  # vmandn
+    0b011001: lambda a, b: a & b,
+    0b011010: lambda a, b: a | b,
+    0b011011: lambda a, b: a ^ b,
+    0b011100: lambda a, b: a | ~b,                  # vmorn
+    0b011101: lambda a, b: ~(a & b),                # vmnand
+    0b011110: lambda a, b: ~(a | b),
+    0b011111: lambda a, b: ~(a ^ b),                # vmxnor
+}
+
+# OPMVV / OPMVX 加宽: funct6 -> (vs2 类型, vs1 类型, 运算)
+_INT_WIDEN = {
+    0b110000: ('u', 'u', 'add'),                    # vwaddu
+    0b110001: ('s', 's', 'add'),
+    0b110010: ('u', 'u', 'sub'),                    # vwsubu
+    0b110011: ('s', 's', 'sub'),
+    0b110100: ('u', 'u', 'add'),                    # vwaddu.w
+    0b110101: ('s', 's', 'add'),
+    0b110110: ('u', 'u', 'sub'),                    # vwsubu.w
+    0b110111: ('s', 's', 'sub'),
+    0b111000: ('u', 'u', 'mul'),                    # vwmulu
+    0b111010: ('s', 'u', 'mul'),                    # vwmulsu
+    0b111011: ('s', 's', 'mul'),
+    0b111100: ('u', 'u', 'macc'),                   # vwmaccu
+    0b111101: ('s', 's', 'macc'),
+    0b111110: ('s', 'u', 'macc'),                   # vwmaccus (vx)
+    0b111111: ('u', 's', 'macc'),                   # vwmaccsu
+}
+
+# OPFVV / OPFVF: funct6 -> (标量运算, 交换操作数)，vd = vs2 op vs1
+_FP_BINARY = {
+    0b000000: (FpuOpType.FADD, False),
+    0b000010: (FpuOpType.FSUB, False),
+    0b000100: (FpuOpType.FMIN, False),
+    0b000110: (FpuOpType.FMAX, False),
+    0b100000: (FpuOpType.FDIV, False),
+    0b100001: (FpuOpType.FDIV, True),               # vfrdiv
+    0b100100: (FpuOpType.FMUL, False),
+    0b100111: (FpuOpType.FSUB, True),               # vfrsub
+}
+
+# funct6 -> (标量比较, 交换操作数, 取反)
+_FP_COMPARE = {
+    0b011000: (FpuOpType.FEQ, False, False),        # vmfeq
+    0b011001: (FpuOpType.FLE, False, False),
+    0b011011: (FpuOpType.FLT, False, False),
+    0b011100: (FpuOpType.FEQ, False, True),         # vmfne
+    0b011101: (FpuOpType.FLT, True, False),         # vmfgt (vf)
+    0b011111: (FpuOpType.FLE, True, False),         # vmfge (vf)
+}
+
+# 乘加: funct6 -> (标量乘加, 乘数为 vd)
+_FP_FMA = {
+    0b101000: (FpuOpType.FMADD, True),              # vfmadd   vd * vs1 + vs2
+    0b101001: (FpuOpType.FNMADD, True),             # vfnmadd
+    0b101010: (FpuOpType.FMSUB, True),              # vfmsub
+    0b101011: (FpuOpType.FNMSUB, True),             # vfnmsub
+    0b101100: (FpuOpType.FMADD, False),             # vfmacc   vs1 * vs2 + vd
+    0b101101: (FpuOpType.FNMADD, False),            # vfnmacc
+    0b101110: (FpuOpType.FMSUB, False),             # vfmsac
+    0b101111: (FpuOpType.FNMSUB, False),            # vfnmsac
+}
+
+_FP_WIDEN = {
+    0b110000: FpuOpType.FADD,                       # vfwadd
+    0b110010: FpuOpType.FSUB,
+    0b110100: FpuOpType.FADD,                       # vfwadd.w
+    0b110110: FpuOpType.FSUB,
+    0b111000: FpuOpType.FMUL,                       # vfwmul
+    0b111100: FpuOpType.FMADD,                      # vfwmacc
+    0b111101: FpuOpType.FNMADD,                     # vfwnmacc
+    0b111110: FpuOpType.FMSUB,                      # vfwmsac
+    0b111111: FpuOpType.FNMSUB,                     # vfwnmsac
+}
+
+# SEW=16: 标量运算 -> numpy (float16，RNE)
+_F16 = {
+    FpuOpType.FADD: np.add,
+    FpuOpType.FSUB: np.subtract,
+    FpuOpType.FMUL: np.multiply,
+    FpuOpType.FDIV: np.divide,
+    FpuOpType.FMIN: np.fmin,
+    FpuOpType.FMAX: np.fmax,
+    FpuOpType.FSQRT: np.sqrt,
+    FpuOpType.FEQ: np.equal,
+    FpuOpType.FLT: np.less,
+    FpuOpType.FLE: np.less_equal,
+}
+
+# 乘加 -> (乘积取负, 加数取负)
+_FMA_NEGATE = {
+    FpuOpType.FMADD: (False, False),
+    FpuOpType.FMSUB: (False, True),
+    FpuOpType.FNMSUB: (True, False),
+    FpuOpType.FNMADD: (True, True),
+}
+
+
+class VType():
+    '''
+    vtype 的各字段；lmul8 = 8 * LMUL (分数 LMUL 1/8 ~ 1/2 对应 1 ~ 4)
+    保留位非 0、SEW > 64、LMUL 为保留编码或 SEW > LMUL * 64 时置 vill
+    '''
+    def __init__(self, value: int = VILL):
+        value &= REGISTER_MASK
+        vlmul = value & 0b111
+        self.sew = 8 << (value >> 3 & 0b111)
+        self.lmul8 = 8 << vlmul if vlmul < 4 else 8 >> (8 - vlmul)
+        self.ta = value >> 6 & 1
+        self.ma = value >> 7 & 1
+        self.vill = bool(value >> 8) or self.sew > 64 or vlmul == 4 or self.sew * 8 > self.lmul8 * 64
+        self.value = VILL if self.vill else value
+
+    def vlmax(self, vlen: int) -> int:
+        return 0 if self.vill else vlen * self.lmul8 // (8 * self.sew)
+
+
+class VectorRegFile():
+    '''
+    32 个 VLEN 位的向量寄存器，data[n] 是 vn 的小端字节
+    group() 返回视图，对视图的写入直接修改寄存器堆
+    观察点: 写入没有统一的入口，watch() 保存被观察寄存器的副本，check_watches() 比较后把变化记入
+    watch_hits (与 Register.watch_hits 格式相同)，可以放进 RegisterGroup 的 VPR 位置
+    '''
+    def __init__(self, vlen: int = 128):
+        if vlen < 64 or vlen & (vlen - 1):
+            raise ValueError(f"VectorRegFile: VLEN must be a power of two >= 64, got {vlen}")
+        self.vlen = vlen
+        self.vlenb = vlen // 8
+        self.data = np.zeros((32, self.vlenb), dtype=np.uint8)
+        self.watched: dict[int, np.ndarray] = {}
+        self.watch_hits: list[tuple[int, int, int]] = []
+
+    def group(self, reg: int, sew: int, lmul8: int = 8, kind: str = 'u') -> np.ndarray:
+        """
+        从 v[reg] 开始的寄存器组按 SEW 解释的元素数组 (LMUL < 1 时为整个 v[reg])
+        kind: 'u' 无符号 / 's' 有符号 / 'f' 浮点
+        """
+        n = max(lmul8 // 8, 1)
+        if reg % n or reg + n > 32:
+            raise ValueError(f"VectorRegFile: v{reg} is not aligned to LMUL={n}")
+        try:
+            dtype = _DTYPES[kind][sew]
+        except KeyError:
+            raise NotImplementedError(f"VectorRegFile: no {kind}{sew} element type") from None
+        return self.data[reg:reg + n].reshape(-1).view(dtype)
+
+    def mask(self, reg: int, n: int) -> np.ndarray:
+        """
+        v[reg] 的前 n 个掩码位
+        """
+        return np.unpackbits(self.data[reg], bitorder='little')[:n].view(bool)
+
+    def write_mask(self, reg: int, bits: np.ndarray, where: np.ndarray | None = None) -> None:
+        cur = np.unpackbits(self.data[reg], bitorder='little').view(bool)
+        np.copyto(cur[:len(bits)], bits, where=True if where is None else where)
+        self.data[reg] = np.packbits(cur, bitorder='little')
+
+    def read(self, reg: int) -> int:
+        return int.from_bytes(self.data[reg].tobytes(), 'little')
+
+    def write(self, reg: int, value: int) -> None:
+        self.data[reg] = np.frombuffer((value & mask(self.vlen)).to_bytes(self.vlenb, 'little'), dtype=np.uint8)
+
+    def watch(self, reg: int) -> None:
+        self.watched[reg] = self.data[reg].copy()
+
+    def unwatch(self, reg: int | None = None) -> None:
+        if reg is None:
+            self.watched.clear()
+        else:
+            self.watched.pop(reg, None)
+
+    def check_watches(self) -> None:
+        for reg, old in self.watched.items():
+            if not np.array_equal(self.data[reg], old):
+                self.watch_hits.append((reg, int.from_bytes(old.tobytes(), 'little'), self.read(reg)))
+                old[:] = self.data[reg]
+
+
+class VectorUnit():
+    '''
+    执行 OP-V 指令字 (opcode 0x57)
+        execute(inst, rs1, rs2, frs1): x[rs1] / x[rs2] / f[rs1] 的值，分别用于 .vx 与 vsetvl* / vsetvl / .vf
+        frm / vxrm 为当前的 CSR 值；返回需要写回的标量寄存器 (RegisterType, rd, value)，没有时返回 None
+        fflags 为该指令产生的浮点异常标志
+    memory(inst, mem, rs1, rs2) 执行向量访存，返回访问的字节地址
+    vl / vtype / vxsat 变化后由调用方通过 csr() 同步到 CSR 表
+    '''
+    def __init__(self, vlen: int = 128):
+        self.vrf = VectorRegFile(vlen)
+        self.vlen = vlen
+        self.vtype = VType()
+        self.vl = 0
+        self.vxsat = 0
+        self.frm = 0
+        self.vxrm = 0
+        self.fflags = 0
+
+    def csr(self) -> dict[int, int]:
+        return {CSR_VSTART: 0, CSR_VXSAT: self.vxsat, CSR_VL: self.vl,
+                CSR_VTYPE: self.vtype.value, CSR_VLENB: self.vrf.vlenb}
+
+    def load_csr(self, csr: dict[int, int]) -> None:
+        self.vtype = VType(csr.get(CSR_VTYPE, VILL))
+        self.vl = csr.get(CSR_VL, 0)
+        self.vxsat = csr.get(CSR_VXSAT, 0)
+
+    def vsetvl(self, avl: int | None, vtype: int) -> int:
+        """
+        avl=None: rs1=x0 且 rd!=x0，vl 取 VLMAX
+        """
+        self.vtype = VType(vtype)
+        vlmax = self.vtype.vlmax(self.vlen)
+        self.vl = vlmax if avl is None else min(avl, vlmax)
+        return self.vl
+
+    def _config(self, inst: int, rs1: int, rs2: int) -> tuple[int | None, int]:
+        """
+        vsetvl* 的 (AVL, vtype)
+        """
+        s1, rd = inst >> 15 & 0x1f, inst >> 7 & 0x1f
+        if inst >> 30 == 0b11:                      # vsetivli
+            return s1, inst >> 20 & 0x3ff
+        vtype = inst >> 20 & 0x7ff if inst >> 31 == 0 else rs2
+        return (rs1 if s1 != 0 else (None if rd != 0 else self.vl)), vtype
+
+    def config_vl(self, inst: int, rs1: int, rs2: int) -> int:
+        """
+        vsetvl* 写回 rd 的值，不改变状态 (rd!=x0 时结果与当前 vl 无关，可以在乱序发射时计算)
+        """
+        avl, vtype = self._config(inst, rs1, rs2)
+        vlmax = VType(vtype).vlmax(self.vlen)
+        return vlmax if avl is None else min(avl, vlmax)
+
+    def execute(self, inst: int, rs1: int = 0, rs2: int = 0, frs1: int = 0,
+                frm: int = 0, vxrm: int = 0) -> tuple[RegisterType, int, int] | None:
+        self.frm, self.vxrm, self.fflags = frm, vxrm & 0b11, 0
+        funct3 = inst >> 12 & 0b111
+        vd = inst >> 7 & 0x1f
+        s1 = inst >> 15 & 0x1f
+        vs2 = inst >> 20 & 0x1f
+        if funct3 == OPCFG:
+            return RegisterType.GPR, vd, self.vsetvl(*self._config(inst, rs1, rs2))
+
+        if self.vtype.vill:
+            raise ValueError("VectorUnit: vector instruction with vtype.vill set")
+        funct6 = inst >> 26
+        vm = inst >> 25 & 1
+        active = None if vm else self.vrf.mask(0, self.vl)
+        if funct3 in (OPIVV, OPIVX, OPIVI):
+            return self._opi(funct3, funct6, vd, s1, vs2, vm, active, rs1)
+        if funct3 in (OPMVV, OPMVX):
+            return self._opm(funct3, funct6, vd, s1, vs2, active, rs1)
+        with np.errstate(all='ignore'):
+            return self._opf(funct3, funct6, vd, s1, vs2, vm, active, frs1)
+
+    ############
+    # 公共操作 #
+    ############
+    @staticmethod
+    def _store(dst: np.ndarray, res, active: np.ndarray | None) -> None:
+        np.copyto(dst, np.asarray(res).astype(dst.dtype, copy=False), where=True if active is None else active)
+
+    def _slide(self, vd: int, src: np.ndarray, off: int, up: bool, active: np.ndarray | None, fill=None) -> None:
+        """
+        vslideup / vslidedown，fill 不为 None 时为 vslide1up / vslide1down 插入的标量
+        src 为 vs2 的整个寄存器组 (VLMAX 个元素)
+        """
+        vl = self.vl
+        dst = self.vrf.group(vd, self.vtype.sew, self.vtype.lmul8, 'u' if src.dtype.kind != 'f' else 'f')
+        vlmax = self.vtype.vlmax(self.vlen)
+        if up:
+            if off < vl:
+                seg = None if active is None else active[off:]
+                self._store(dst[off:vl], src[:vl - off].copy(), seg)
+            if fill is not None and vl and (active is None or active[0]):
+                dst[0] = fill
+            return
+        res = np.zeros(vl, dtype=src.dtype)
+        if off < vlmax:
+            n = min(vl, vlmax - off)
+            res[:n] = src[off:off + n]
+        if fill is not None and vl:
+            res[vl - 1] = fill
+        self._store(dst[:vl], res, active)
+
+    def _rm(self, rm: int | None = None) -> int:
+        rm = self.frm if rm is None else rm
+        if rm > RMM:
+            raise NotImplementedError(f"VectorUnit: Illegal Rounding Mode {rm}")
+        return rm
+
+    def _batch(self, op: FpuOpType, fmt: int, active: np.ndarray | None, *regs: np.ndarray,
+               rm: int | None = None, width: int = 0) -> tuple[np.ndarray, np.ndarray]:
+        """
+        fpu.batch 逐元素执行标量 F / D 运算，uint32 的操作数为单精度位模式 (在这里 NaN-boxing)
+        活跃元素的 fflags 并入 self.fflags，返回 (uint64 结果, 每个元素的 fflags)
+        """
+        boxed = [r.astype(np.uint64) | np.uint64(0xffffffff_00000000 if r.dtype == np.uint32 else 0) for r in regs]
+        res, flags = batch(op, fmt, *boxed, rm=self._rm(rm), width=width)
+        self.fflags |= int(np.bitwise_or.reduce(flags if active is None else flags[active]))
+        return res, flags
+
+    def _fop(self, op: FpuOpType, sew: int, active: np.ndarray | None, *args: np.ndarray) -> np.ndarray:
+        """
+        对 SEW 位 float 元素 (或 0 维标量) 执行标量浮点运算，返回结果的 uint 视图，比较运算返回 bool
+        """
+        args = np.broadcast_arrays(*(np.atleast_1d(x) for x in args))
+        compare = op in (FpuOpType.FEQ, FpuOpType.FLT, FpuOpType.FLE)
+        if sew == 16:
+            if op in _FMA_NEGATE:
+                # 半精度的乘积和求和在 float64 中都是精确的，只舍入一次
+                neg_prod, neg_add = _FMA_NEGATE[op]
+                x, y, z = (a.astype(np.float64) for a in args)
+                res = ((-x if neg_prod else x) * y + (-z if neg_add else z)).astype(np.float16)
+            else:
+                res = _F16[op](*args)
+            return res if compare else res.view(np.uint16)
+        u = _DTYPES['u'][sew]
+        res, _ = self._batch(op, S if sew == 32 else D, active, *(a.view(u) for a in args))
+        return res.astype(bool) if compare else res.astype(u)
+
+    def _widen(self, x: np.ndarray, sew: int, active: np.ndarray | None) -> np.ndarray:
+        """
+        SEW -> 2*SEW 的精确转换，SEW=32 时按 fcvt.d.s (sNaN 置 NV)
+        """
+        if np.ndim(x) == 0:
+            x = np.broadcast_to(x, (self.vl,))
+        if sew == 16:
+            return x.astype(np.float32)
+        return self._batch(FpuOpType.FCVT_F2F, D, active, x.view(np.uint32))[0].view(np.float64)
+
+    def _fold(self, op: FpuOpType, sew: int, init: np.ndarray, src: np.ndarray) -> int:
+        """
+        归约 acc = op(acc, src[i])，从 init 开始按元素顺序逐个舍入，返回结果的位模式
+        """
+        u = _DTYPES['u'][sew]
+        if sew == 16:
+            seq = np.concatenate([init, src.astype(init.dtype)])
+            if op == FpuOpType.FADD:
+                return int(np.cumsum(seq, dtype=init.dtype)[-1:].view(u)[0])
+            return int(_F16[op].reduce(seq, keepdims=True).view(u)[0])
+        fmt, rm = (S if sew == 32 else D), self._rm()
+        box = 0xffffffff_00000000 if sew == 32 else 0
+        acc = int(init.view(u)[0])
+        for x in src.view(u).tolist():
+            acc, flags = fp_execute(op, fmt, rm, acc | box, x | box)
+            self.fflags |= flags
+        return acc & mask(sew)
+
+    ############
+    # OPI 整数 #
+    ############
+    def _opi(self, funct3, funct6, vd, s1, vs2, vm, active, x):
+        vrf, vl = self.vrf, self.vl
+        sew, lmul8 = self.vtype.sew, self.vtype.lmul8
+
+        def operand(kind: str, uimm: bool = False, width: int = sew):
+            if funct3 == OPIVV:
+                return vrf.group(s1, sew, lmul8, kind)[:vl].astype(_DTYPES[kind][width])
+            if funct3 == OPIVI:
+                return _scalar(s1 if uimm else sext(s1, 5), width, kind)
+            return _scalar(x, width, kind)
+
+        if funct6 in _INT_BINARY:
+            kind, op = _INT_BINARY[funct6]
+            self._store(vrf.group(vd, sew, lmul8, kind)[:vl], op(vrf.group(vs2, sew, lmul8, kind)[:vl], operand(kind)), active)
+            return None
+        if funct6 in _INT_SHIFT:
+            kind, op = _INT_SHIFT[funct6]
+            amount = operand(kind, uimm=True) & (sew - 1)
+            self._store(vrf.group(vd, sew, lmul8, kind)[:vl], op(vrf.group(vs2, sew, lmul8, kind)[:vl], amount), active)
+            return None
+        if funct6 in _INT_COMPARE:
+            kind, op = _INT_COMPARE[funct6]
+            vrf.write_mask(vd, op(vrf.group(vs2, sew, lmul8, kind)[:vl], operand(kind)), active)
+            return None
+
+        if funct6 == 0b010111:
+            # vmv.v.* (vm=1) / vmerge.v*m (vm=0)
+            b = operand('u')
+            res = b if vm else np.where(active, b, vrf.group(vs2, sew, lmul8)[:vl])
+            self._store(vrf.group(vd, sew, lmul8)[:vl], res, None)
+            return None
+        if funct6 == 0b100111 and funct3 == OPIVI:
+            # vmv<nr>r.v
+            nr = s1 + 1
+            if nr not in (1, 2, 4, 8) or vd % nr or vs2 % nr:
+                raise ValueError(f"VectorUnit: bad vmv{nr}r.v v{vd}, v{vs2}")
+            vrf.data[vd:vd + nr] = vrf.data[vs2:vs2 + nr]
+            return None
+        if funct6 in (0b010000, 0b010010) and not vm:
+            # vadc / vsbc: v0 为进位 / 借位输入
+            a = vrf.group(vs2, sew, lmul8)[:vl]
+            carry = vrf.mask(0, vl).astype(a.dtype)
+            res = a + operand('u') + carry if funct6 == 0b010000 else a - operand('u') - carry
+            self._store(vrf.group(vd, sew, lmul8)[:vl], res, None)
+            return None
+        if funct6 in (0b010001, 0b010011):
+            # vmadc / vmsbc: 进位 / 借位输出写入掩码 vd，vm=0 时 v0 为进位 / 借位输入
+            a = vrf.group(vs2, sew, lmul8)[:vl]
+            b = operand('u')
+            cin = (np.zeros(vl, dtype=bool) if vm else vrf.mask(0, vl)).astype(a.dtype)
+            if funct6 == 0b010001:
+                s = a + b
+                out = (s < a) | (s + cin < s)
+            else:
+                out = (a < b) | (a - b < cin)
+            vrf.write_mask(vd, out)
+            return None
+        if funct6 in (0b100000, 0b100001, 0b100010, 0b100011):
+            # vsaddu / vsadd / vssubu / vssub
+            signed, sub = funct6 & 1, funct6 & 2
+            a = vrf.group(vs2, sew, lmul8)[:vl]
+            b = operand('u')
+            r = a - b if sub else a + b
+            if signed:
+                sa, sb, sr = a >> (sew - 1), b >> (sew - 1), r >> (sew - 1)
+                over = (sa != sr) & ((sa != sb) if sub else (sa == sb))
+                sat = np.where(sa, 1 << (sew - 1), mask(sew - 1)).astype(a.dtype)
+            else:
+                over = (r > a) if sub else (r < a)
+                sat = np.array(0 if sub else mask(sew), dtype=a.dtype)
+            self._store(vrf.group(vd, sew, lmul8)[:vl], np.where(over, sat, r), active)
+            if np.any(over if active is None else over & active):
+                self.vxsat = 1
+            return None
+        if funct6 == 0b100111:
+            # vsmul: (vs2 * vs1) >> (SEW - 1) 按 vxrm 舍入，只有 -2^(SEW-1) 的平方溢出
+            a = vrf.group(vs2, sew, lmul8, 's')[:vl]
+            b = operand('s')
+            lo, hi = np.iinfo(a.dtype).min, np.iinfo(a.dtype).max
+            if sew < 64:
+                res = _shift_round(a.astype(np.int64) * b.astype(np.int64), sew - 1, self.vxrm)
+            else:
+                ua, ub = a.view(np.uint64), b.view(np.uint64)
+                ph, pl = _mulh(ua, ub, 64, True, True), ua * ub
+                one = np.uint64(1)
+                inc = _round_increment(self.vxrm, (pl >> np.uint64(63)).astype(bool), ((pl >> np.uint64(62)) & one).astype(bool),
+                                       (pl & np.uint64(mask(62))) != 0)
+                res = ((ph << one) | (pl >> np.uint64(63))) + inc.astype(np.uint64)
+            over = (a == lo) & (b == lo)
+            self._store(vrf.group(vd, sew, lmul8, 's')[:vl], np.where(over, hi, res), active)
+            if np.any(over if active is None else over & active):
+                self.vxsat = 1
+            return None
+        if funct6 in (0b101010, 0b101011):
+            # vssrl / vssra
+            kind = 's' if funct6 & 1 else 'u'
+            amount = operand(kind, uimm=True) & (sew - 1)
+            res = _shift_round(vrf.group(vs2, sew, lmul8, kind)[:vl], amount, self.vxrm)
+            self._store(vrf.group(vd, sew, lmul8, kind)[:vl], res, active)
+            return None
+        if funct6 == 0b001100 or (funct6 == 0b001110 and funct3 == OPIVV):
+            # vrgather / vrgatherei16 (下标为 16 位元素，EMUL = 16 / SEW * LMUL): 越界下标得 0
+            vlmax = self.vtype.vlmax(self.vlen)
+            src = vrf.group(vs2, sew, lmul8)[:vlmax]
+            if funct3 == OPIVV:
+                width, elmul8 = (16, lmul8 * 16 // sew) if funct6 == 0b001110 else (sew, lmul8)
+                if not 1 <= elmul8 <= 64:
+                    raise ValueError(f"VectorUnit: vrgatherei16 with SEW={sew} LMUL={lmul8 / 8}")
+                idx = vrf.group(s1, width, elmul8)[:vl]
+                res = np.where(idx < vlmax, src[np.minimum(idx, vlmax - 1).astype(np.intp)], 0)
+            else:
+                i = x if funct3 == OPIVX else s1
+                res = src[i] if i < vlmax else 0
+            self._store(vrf.group(vd, sew, lmul8)[:vl], res, active)
+            return None
+        if funct6 in (0b001110, 0b001111) and funct3 != OPIVV:
+            src = vrf.group(vs2, sew, lmul8)[:self.vtype.vlmax(self.vlen)]
+            self._slide(vd, src, x if funct3 == OPIVX else s1, funct6 == 0b001110, active)
+            return None
+        if funct6 in (0b101100, 0b101101):
+            # vnsrl / vnsra: vs2 为 2*SEW
+            if sew == 64:
+                raise ValueError("VectorUnit: narrowing shift with SEW=64")
+            kind = 's' if funct6 & 1 else 'u'
+            a = vrf.group(vs2, 2 * sew, 2 * lmul8, kind)[:vl]
+            amount = operand(kind, uimm=True, width=2 * sew) & (2 * sew - 1)
+            self._store(vrf.group(vd, sew, lmul8, kind)[:vl], a >> amount, active)
+            return None
+        if funct6 in (0b101110, 0b101111):
+            # vnclipu / vnclip: vs2 为 2*SEW，按 vxrm 舍入右移后饱和到 SEW
+            if sew == 64:
+                raise ValueError("VectorUnit: narrowing clip with SEW=64")
+            kind = 's' if funct6 & 1 else 'u'
+            a = vrf.group(vs2, 2 * sew, 2 * lmul8, kind)[:vl]
+            amount = operand(kind, uimm=True, width=2 * sew) & (2 * sew - 1)
+            res = _shift_round(a, amount, self.vxrm)
+            info = np.iinfo(_DTYPES[kind][sew])
+            over = (res < info.min) | (res > info.max)
+            self._store(vrf.group(vd, sew, lmul8, kind)[:vl], np.clip(res, info.min, info.max), active)
+            if np.any(over if active is None else over & active):
+                self.vxsat = 1
+            return None
+        raise NotImplementedError(f"VectorUnit: OPI funct3={funct3} funct6=0b{funct6:06b}")
+
+    ############
+    # OPM 整数 #
+    ############
+    def _opm(self, funct3, funct6, vd, s1, vs2, active, x):
+        vrf, vl = self.vrf, self.vl
+        sew, lmul8 = self.vtype.sew, self.vtype.lmul8
+        vv = funct3 == OPMVV
+
+        def operand(kind: str):
+            if vv:
+                return vrf.group(s1, sew, lmul8, kind)[:vl]
+            return _scalar(x, sew, kind)
+
+        if vv and funct6 in _INT_REDUCE:
+            kind, op = _INT_REDUCE[funct6]
+            if vl:
+                src = vrf.group(vs2, sew, lmul8, kind)[:vl]
+                if active is not None:
+                    src = src[active]
+                init = vrf.group(s1, sew, 8, kind)[:1]
+                vrf.group(vd, sew, 8, kind)[0] = op.reduce(np.concatenate([init, src]), dtype=init.dtype)
+            return None
+        if vv and funct6 in _MASK_LOGIC:
+            vrf.write_mask(vd, _MASK_LOGIC[funct6](vrf.mask(vs2, vl), vrf.mask(s1, vl)))
+            return None
+        if vv and funct6 == 0b010111:
+            # vcompress.vm: vs1 中置位的元素依次放到 vd 开头，其余元素不变
+            src = vrf.group(vs2, sew, lmul8)[:vl][vrf.mask(s1, vl)]
+            vrf.group(vd, sew, lmul8)[:len(src)] = src
+            return None
+        if 0b001000 <= funct6 <= 0b001011:
+            # vaaddu / vaadd / vasubu / vasub: (vs2 +/- vs1) >> 1 按 vxrm 舍入，中间结果不截断
+            kind = 's' if funct6 & 1 else 'u'
+            a = vrf.group(vs2, sew, lmul8, kind)[:vl]
+            b = operand(kind)
+            one = a.dtype.type(1)
+            if funct6 & 2:
+                res = (a >> one) - (b >> one) - (~a & b & one)
+            else:
+                res = (a >> one) + (b >> one) + (a & b & one)
+            dropped = ((a ^ b) & one).astype(bool)
+            inc = _round_increment(self.vxrm, (res & one).astype(bool), dropped, np.zeros_like(dropped))
+            self._store(vrf.group(vd, sew, lmul8, kind)[:vl], res + inc.astype(res.dtype), active)
+            return None
+
+        if funct6 == 0b010000:
+            if not vv:
+                # vmv.s.x
+                if vl:
+                    vrf.group(vd, sew, 8)[0] = x & mask(sew)
+                return None
+            if s1 == 0b00000:               # vmv.x.s
+                return RegisterType.GPR, vd, int(vrf.group(vs2, sew, 8, 's')[0]) & REGISTER_MASK
+            bits = vrf.mask(vs2, vl)
+            if active is not None:
+                bits = bits & active
+            if s1 == 0b10000:               # vcpop.m
+                return RegisterType.GPR, vd, int(np.count_nonzero(bits))
+            if s1 == 0b10001:               # vfirst.m
+                return RegisterType.GPR, vd, int(np.argmax(bits)) if bits.any() else REGISTER_MASK
+        if vv and funct6 == 0b010010 and 0b00010 <= s1 <= 0b00111:
+            # vzext / vsext.vf8 / vf4 / vf2
+            factor = 8 >> ((s1 >> 1) - 1)
+            if sew // factor < 8:
+                raise ValueError(f"VectorUnit: vf{factor} extension with SEW={sew}")
+            kind = 's' if s1 & 1 else 'u'
+            src = vrf.group(vs2, sew // factor, max(lmul8 // factor, 1), kind)[:vl]
+            self._store(vrf.group(vd, sew, lmul8, kind)[:vl], src, active)
+            return None
+        if vv and funct6 == 0b010100:
+            if s1 == 0b10001:               # vid.v
+                self._store(vrf.group(vd, sew, lmul8)[:vl], np.arange(vl), active)
+                return None
+            bits = vrf.mask(vs2, vl)
+            if active is not None:
+                bits = bits & active
+            if s1 == 0b10000:               # viota.m
+                self._store(vrf.group(vd, sew, lmul8)[:vl], np.cumsum(bits) - bits, active)
+                return None
+            first = int(np.argmax(bits)) if bits.any() else vl
+            idx = np.arange(vl)
+            res = {0b00001: idx < first, 0b00011: idx <= first, 0b00010: idx == first}.get(s1)    # vmsbf / vmsif / vmsof
+            if res is not None:
+                vrf.write_mask(vd, res, active)
+                return None
+        if not vv and funct6 in (0b001110, 0b001111):
+            # vslide1up / vslide1down
+            src = vrf.group(vs2, sew, lmul8)[:self.vtype.vlmax(self.vlen)]
+            self._slide(vd, src, 1, funct6 == 0b001110, active, x & mask(sew))
+            return None
+
+        if 0b100000 <= funct6 <= 0b100011:
+            # vdivu / vdiv / vremu / vrem
+            a = vrf.group(vs2, sew, lmul8)[:vl]
+            res = _divide(a, operand('u'), sew, bool(funct6 & 1), bool(funct6 & 2))
+            self._store(vrf.group(vd, sew, lmul8)[:vl], res, active)
+            return None
+        if 0b100100 <= funct6 <= 0b100111:
+            a = vrf.group(vs2, sew, lmul8)[:vl]
+            b = operand('u')
+            if funct6 == 0b100101:          # vmul
+                res = a * b
+            else:                           # vmulhu / vmulhsu / vmulh
+                res = _mulh(a, b, sew, funct6 != 0b100100, funct6 == 0b100111)
+            self._store(vrf.group(vd, sew, lmul8)[:vl], res, active)
+            return None
+        if funct6 in (0b101001, 0b101011, 0b101101, 0b101111):
+            # vmadd / vnmsub: vd 为乘数；vmacc / vnmsac: vd 为加数
+            dst = vrf.group(vd, sew, lmul8)[:vl]
+            b = operand('u')
+            a = vrf.group(vs2, sew, lmul8)[:vl]
+            prod, addend = (b * dst, a) if funct6 < 0b101100 else (b * a, dst)
+            res = addend - prod if funct6 & 0b10 else addend + prod
+            self._store(dst, res, active)
+            return None
+        if funct6 in _INT_WIDEN:
+            if sew == 64:
+                raise ValueError("VectorUnit: widening operation with SEW=64")
+            k2, k1, op = _INT_WIDEN[funct6]
+            wide = _DTYPES['s'][2 * sew]
+            dst = vrf.group(vd, 2 * sew, 2 * lmul8, 's')[:vl]
+            if 0b110100 <= funct6 <= 0b110111:
+                a = vrf.group(vs2, 2 * sew, 2 * lmul8, k2)[:vl].astype(wide)
+            else:
+                a = vrf.group(vs2, sew, lmul8, k2)[:vl].astype(wide)
+            b = operand(k1).astype(wide)
+            res = {'add': lambda: a + b, 'sub': lambda: a - b, 'mul': lambda: a * b, 'macc': lambda: dst + a * b}[op]()
+            self._store(dst, res, active)
+            return None
+        raise NotImplementedError(f"VectorUnit: OPM funct3={funct3} funct6=0b{funct6:06b}")
+
+    ############
+    # OPF 浮点 #
+    ############
+    def _opf(self, funct3, funct6, vd, s1, vs2, vm, active, f):
+        vrf, vl = self.vrf, self.vl
+        sew, lmul8 = self.vtype.sew, self.vtype.lmul8
+        vv = funct3 == OPFVV
+        if sew not in _DTYPES['f']:
+            raise ValueError(f"VectorUnit: floating-point operation with SEW={sew}")
+
+        def operand(width: int = sew):
+            if vv:
+                return vrf.group(s1, sew, lmul8, 'f')[:vl].astype(_DTYPES['f'][width])
+            return _fscalar(f, sew).astype(_DTYPES['f'][width])
+
+        def group(reg: int, kind: str = 'f'):
+            return vrf.group(reg, sew, lmul8, kind)[:vl]
+
+        if funct6 in _FP_BINARY:
+            op, swap = _FP_BINARY[funct6]
+            a, b = group(vs2), operand()
+            self._store(group(vd, 'u'), self._fop(op, sew, active, *((b, a) if swap else (a, b))), active)
+            return None
+        if funct6 in _FP_COMPARE:
+            op, swap, invert = _FP_COMPARE[funct6]
+            a, b = group(vs2), operand()
+            res = self._fop(op, sew, active, *((b, a) if swap else (a, b)))
+            vrf.write_mask(vd, ~res if invert else res, active)
+            return None
+        if funct6 in _FP_FMA:
+            op, vd_mul = _FP_FMA[funct6]
+            dst = group(vd)
+            args = (dst, operand(), group(vs2)) if vd_mul else (operand(), group(vs2), dst)
+            self._store(group(vd, 'u'), self._fop(op, sew, active, *args), active)
+            return None
+        if funct6 in (0b001000, 0b001001, 0b001010):
+            # vfsgnj / vfsgnjn / vfsgnjx
+            sign = 1 << (sew - 1)
+            a = group(vs2, 'u')
+            b = group(s1, 'u') if vv else _fscalar(f, sew).view(_DTYPES['u'][sew])
+            if funct6 == 0b001010:
+                res = a ^ (b & sign)
+            else:
+                res = (a & (sign - 1)) | (((~b) if funct6 == 0b001001 else b) & sign)
+            self._store(group(vd, 'u'), res, active)
+            return None
+
+        if vv and funct6 in (0b000001, 0b000011, 0b000101, 0b000111, 0b110001, 0b110011):
+            # vfredusum / vfredosum / vfredmin / vfredmax / vfwredusum / vfwredosum (均按顺序求和)
+            if vl:
+                width = 2 * sew if funct6 >> 4 else sew
+                op = {0b000101: FpuOpType.FMIN, 0b000111: FpuOpType.FMAX}.get(funct6, FpuOpType.FADD)
+                src = group(vs2)
+                if active is not None:
+                    src = src[active]
+                if width != sew:
+                    src = self._widen(src, sew, None)
+                init = vrf.group(s1, width, 8, 'f')[:1]
+                vrf.group(vd, width, 8)[0] = self._fold(op, width, init, src)
+            return None
+        if funct6 == 0b010000:
+            if vv:                          # vfmv.f.s
+                bits = int(vrf.group(vs2, sew, 8)[0])
+                return RegisterType.FPR, vd, _nanbox(bits, sew)
+            if vl:                          # vfmv.s.f
+                vrf.group(vd, sew, 8, 'f')[0] = _fscalar(f, sew)
+            return None
+        if not vv and funct6 == 0b010111:
+            # vfmv.v.f (vm=1) / vfmerge.vfm (vm=0)
+            b = operand()
+            res = b if vm else np.where(active, b, group(vs2))
+            self._store(group(vd), res, None)
+            return None
+        if not vv and funct6 in (0b001110, 0b001111):
+            # vfslide1up / vfslide1down
+            src = vrf.group(vs2, sew, lmul8, 'f')[:self.vtype.vlmax(self.vlen)]
+            self._slide(vd, src, 1, funct6 == 0b001110, active, _fscalar(f, sew))
+            return None
+        if vv and funct6 == 0b010011:
+            if s1 == 0b00000:               # vfsqrt
+                self._store(group(vd, 'u'), self._fop(FpuOpType.FSQRT, sew, active, group(vs2)), active)
+                return None
+            if s1 == 0b10000:               # vfclass
+                self._store(group(vd, 'u'), _fclass(group(vs2, 'u'), sew), active)
+                return None
+        if vv and funct6 == 0b010010:
+            return self._convert(vd, s1, vs2, active)
+        if funct6 in _FP_WIDEN:
+            if sew == 64:
+                raise ValueError("VectorUnit: widening operation with SEW=64")
+            op = _FP_WIDEN[funct6]
+            dst = vrf.group(vd, 2 * sew, 2 * lmul8, 'f')[:vl]
+            if 0b110100 <= funct6 <= 0b110111:
+                a = vrf.group(vs2, 2 * sew, 2 * lmul8, 'f')[:vl]
+            else:
+                a = self._widen(group(vs2), sew, active)
+            # 加宽后的乘积是精确的，乘加只舍入一次
+            args = (a, self._widen(operand(), sew, active)) + ((dst,) if op in _FMA_NEGATE else ())
+            self._store(vrf.group(vd, 2 * sew, 2 * lmul8)[:vl], self._fop(op, 2 * sew, active, *args), active)
+            return None
+        raise NotImplementedError(f"VectorUnit: OPF funct3={funct3} funct6=0b{funct6:06b}")
+
+    def _convert(self, vd, code, vs2, active):
+        """
+        VFUNARY0: vfcvt / vfwcvt / vfncvt
+        code[4:3] 00 同宽 / 01 加宽 / 10 变窄；code[2:0] 为转换类型
+        """
+        vrf, vl = self.vrf, self.vl
+        sew, lmul8 = self.vtype.sew, self.vtype.lmul8
+        shape, kind = code >> 3, code & 0b111
+        if shape > 2 or (shape == 0 and kind in (0b100, 0b101)) or (shape == 1 and kind == 0b101):
+            raise NotImplementedError(f"VectorUnit: VFUNARY0 vs1=0b{code:05b}")
+        if shape != 0 and sew == 64:
+            raise ValueError("VectorUnit: widening / narrowing conversion with SEW=64")
+        sw, sl = (2 * sew, 2 * lmul8) if shape == 2 else (sew, lmul8)
+        dw, dl = (2 * sew, 2 * lmul8) if shape == 1 else (sew, lmul8)
+        # 半精度和 16 位整数不经过 fpu: 按 RNE (rtz 为截断)，vfncvt.rod 按 RNE，不产生 fflags
+        scalar = 16 not in (sw, dw)
+        if kind in (0b000, 0b001, 0b110, 0b111):
+            # 浮点 -> 整数
+            signed = bool(kind & 1)
+            src = vrf.group(vs2, sw, sl, 'f')[:vl]
+            dst = vrf.group(vd, dw, dl, 's' if signed else 'u')[:vl]
+            if scalar:
+                res, _ = self._batch(FpuOpType.FCVT_F2I, S if sw == 32 else D, active, src.view(_DTYPES['u'][sw]),
+                                     rm=RTZ if kind >= 0b110 else None, width=(2 if dw == 64 else 0) + (not signed))
+                res = res.astype(dst.dtype)
+            else:
+                res = _f2i(src, dw, signed, kind >= 0b110)
+        elif kind in (0b010, 0b011):
+            # 整数 -> 浮点
+            signed = bool(kind & 1)
+            src = vrf.group(vs2, sw, sl, 's' if signed else 'u')[:vl]
+            if scalar:
+                dst = vrf.group(vd, dw, dl)[:vl]
+                regs = src.astype(np.int64).view(np.uint64) if signed else src.astype(np.uint64)
+                res, _ = self._batch(FpuOpType.FCVT_I2F, S if dw == 32 else D, active, regs,
+                                     width=(2 if sw == 64 else 0) + (not signed))
+            else:
+                dst = vrf.group(vd, dw, dl, 'f')[:vl]
+                res = src.astype(dst.dtype)
+        else:
+            # 浮点 -> 浮点；vfncvt.rod 按 RTZ 舍入后把不精确结果的最低位置 1
+            src = vrf.group(vs2, sw, sl, 'f')[:vl]
+            if scalar:
+                dst = vrf.group(vd, dw, dl)[:vl]
+                rod = kind == 0b101
+                res, flags = self._batch(FpuOpType.FCVT_F2F, S if dw == 32 else D, active, src.view(_DTYPES['u'][sw]),
+                                         rm=RTZ if rod else None)
+                res = res.astype(dst.dtype)
+                if rod:
+                    res |= ((flags & NX) != 0).astype(dst.dtype)
+            else:
+                dst = vrf.group(vd, dw, dl, 'f')[:vl]
+                res = src.astype(dst.dtype)
+        self._store(dst, res, active)
+        return None
+
+    ############
+    # 向量访存 #
+    ############
+    def memory(self, inst: int, mem, rs1: int, rs2: int = 0) -> np.ndarray:
+        """
+        LOAD-FP / STORE-FP 中的向量访存，rs1 为基地址，rs2 为步长；mem 为 memory.Memory
+        返回访问的字节地址 (uint64，按元素、字段顺序)；fault-only-first 可能截短 vl
+        """
+        store = inst & 0x7f == 0x27
+        eew = _VMEM_WIDTH[inst >> 12 & 0b111]
+        if inst >> 28 & 1:
+            raise NotImplementedError("VectorUnit: vector memory access with mew=1")
+        nf = (inst >> 29) + 1
+        mop = inst >> 26 & 0b11
+        vm = inst >> 25 & 1
+        umop = inst >> 20 & 0x1f
+        vd = inst >> 7 & 0x1f
+        base = np.uint64(rs1 & REGISTER_MASK)
+        vrf = self.vrf
+        if mop == 0 and umop not in (0b00000, 0b01000, 0b01011) and (store or umop != 0b10000):
+            raise NotImplementedError(f"VectorUnit: {'sumop' if store else 'lumop'}=0b{umop:05b}")
+
+        if mop == 0 and umop == 0b01000:
+            # vl<nf>r / vs<nf>r: 整寄存器搬运，与 vtype / vl / 掩码无关
+            if nf not in (1, 2, 4, 8) or vd % nf or not vm or (store and eew != 8):
+                raise ValueError(f"VectorUnit: bad whole-register access v{vd}, nf={nf}, eew={eew}")
+            b = eew // 8
+            n = nf * vrf.vlenb // b
+            addrs = base + np.arange(n * b, dtype=np.uint64).reshape(n, 1, b)
+            self._fault(mem, addrs, None, False)
+            return self._transfer(mem, store, addrs, vrf.data[vd:vd + nf].reshape(n, 1, b), None, b)
+
+        if self.vtype.vill:
+            raise ValueError("VectorUnit: vector memory access with vtype.vill set")
+        sew, lmul8, vl = self.vtype.sew, self.vtype.lmul8, self.vl
+        if mop == 0 and umop == 0b01011:
+            # vlm.v / vsm.v: ceil(vl / 8) 个字节，不带掩码
+            if eew != 8 or nf != 1 or not vm:
+                raise ValueError("VectorUnit: vlm.v / vsm.v must be unmasked with EEW=8, nf=1")
+            n = (vl + 7) // 8
+            addrs = base + np.arange(n, dtype=np.uint64).reshape(n, 1, 1)
+            self._fault(mem, addrs, None, False)
+            return self._transfer(mem, store, addrs, vrf.data[vd, :n].reshape(n, 1, 1), None, 1)
+
+        # 索引访存的数据元素宽度为 SEW，下标宽度为 EEW
+        indexed = mop & 1
+        width = sew if indexed else eew
+        emul8 = lmul8 if indexed else eew * lmul8 // sew
+        regs = max(emul8 // 8, 1)
+        if not 1 <= emul8 <= 64 or nf * regs > 8 or vd % regs or vd + nf * regs > 32:
+            raise ValueError(f"VectorUnit: bad vector memory access v{vd}, nf={nf}, EMUL={emul8}/8")
+        b = width // 8
+        if indexed:
+            if not 1 <= eew * lmul8 // sew <= 64:
+                raise ValueError(f"VectorUnit: bad index EEW={eew} with SEW={sew}")
+            offs = vrf.group(inst >> 20 & 0x1f, eew, eew * lmul8 // sew)[:vl].astype(np.uint64)
+            stride = None
+        else:
+            stride = nf * b if mop == 0 else sext(rs2 & REGISTER_MASK, XLEN)
+            offs = np.arange(vl, dtype=np.uint64) * np.uint64(stride & REGISTER_MASK)
+        field = np.arange(nf, dtype=np.uint64)[:, None] * np.uint64(b) + np.arange(b, dtype=np.uint64)
+        addrs = base + offs[:, None, None] + field
+
+        # 第 f 个字段的寄存器组为 vd + f * EMUL: (元素, 字段, 字节) 视图
+        data = vrf.data[vd:vd + nf * regs].reshape(nf, -1)[:, :vl * b].reshape(nf, vl, b).transpose(1, 0, 2)
+        active = None if vm else vrf.mask(0, vl)
+        n = self._fault(mem, addrs, active, mop == 0 and umop == 0b10000)
+        if n < vl:
+            self.vl = n
+            addrs, data = addrs[:n], data[:n]
+            active = None if active is None else active[:n]
+        return self._transfer(mem, store, addrs, data, active, stride)
+
+    @staticmethod
+    def _fault(mem, addrs: np.ndarray, active: np.ndarray | None, first_only: bool) -> int:
+        """
+        越过 mem.limit 的活跃元素: 第 0 个元素或非 fault-only-first 时抛出 ValueError，
+        否则返回该元素的下标 (新的 vl)；没有越界时返回元素数
+        """
+        ok = mem.mapped(addrs).all(axis=(1, 2))
+        bad = ~ok if active is None else ~ok & active
+        if not bad.any():
+            return len(addrs)
+        i = int(np.argmax(bad))
+        if i == 0 or not first_only:
+            raise ValueError(f"VectorUnit: access fault at {hex(int(addrs[i].min()))}")
+        return i
+
+    @staticmethod
+    def _transfer(mem, store: bool, addrs: np.ndarray, data: np.ndarray, active: np.ndarray | None,
+                  stride: int | None) -> np.ndarray:
+        """
+        addrs / data: (元素, 字段, 字节) 的地址数组和寄存器字节视图
+        stride 不为 None 时元素地址等距: 整段读出后用 as_strided 切片；元素重叠、跨度过大或地址回绕时
+        与索引访存一样按地址 gather / scatter
+        """
+        n, nf, b = addrs.shape
+        if n == 0:
+            return addrs.reshape(-1)
+        if stride is not None:
+            first = int(addrs[0, 0, 0])
+            lo = first + min(0, (n - 1) * stride)
+            span = abs(stride) * (n - 1) + nf * b
+            if lo >= 0 and lo + span <= 1 << XLEN and (n == 1 or abs(stride) >= nf * b) \
+                    and (stride == nf * b or span <= _SPAN_MAX):
+                buf = mem.read_bytes(lo, span)
+                view = as_strided(buf[first - lo:], shape=(n, nf, b), strides=(stride, b, 1))
+                where = True if active is None else active[:, None, None]
+                if store:
+                    np.copyto(view, data, where=where)
+                    mem.write_bytes(lo, buf)
+                else:
+                    np.copyto(data, view, where=where)
+                return addrs.reshape(-1) if active is None else addrs[active].reshape(-1)
+        if active is not None:
+            addrs = addrs[active]
+        if store:
+            mem.scatter(addrs, data if active is None else data[active])
+        elif active is None:
+            data[...] = mem.gather(addrs)
+        else:
+            data[active] = mem.gather(addrs)
+        return addrs.reshape(-1)